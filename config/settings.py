@@ -384,13 +384,11 @@ class Settings(BaseSettings):
 
             # 读取现有文件，保留未知键，进行深度合并
             from src.shared.utils.file_operations import get_file_operations
-            import asyncio
             ops = get_file_operations("settings")
             existing: dict[str, Any] = {}
             try:
                 if file_path.exists():
-                    loop = asyncio.get_event_loop()
-                    loaded = loop.run_until_complete(ops.load_json_cached(file_path))
+                    loaded = ops.load_json_sync(file_path)
                     if isinstance(loaded, dict):
                         existing = loaded
             except Exception:
@@ -421,26 +419,9 @@ class Settings(BaseSettings):
 
             merged = convert_paths(merged)
 
-            # 使用统一文件操作进行原子性写入（线程安全地调用异步保存）
-            from src.shared.utils.file_operations import get_file_operations
-            ops = get_file_operations("settings")
-            try:
-                import asyncio, threading
-                asyncio.get_running_loop()
-                result_ref = {}
-                def runner():
-                    try:
-                        result_ref['ok'] = asyncio.run(ops.save_json_atomic(file_path, merged, create_backup=True))
-                    except Exception as e:
-                        result_ref['error'] = e
-                t = threading.Thread(target=runner, daemon=True)
-                t.start(); t.join()
-                if 'error' in result_ref:
-                    raise result_ref['error']
-            except RuntimeError:
-                # 无运行中事件循环
-                import asyncio
-                asyncio.run(ops.save_json_atomic(file_path, merged, create_backup=True))
+            # 使用统一文件操作进行原子性写入（同步写入，可在任意线程包括应用事件循环线程调用）
+            if not ops.save_json_atomic_sync(file_path, merged, create_backup=True):
+                raise IOError(f"写入失败: {file_path}")
 
         except Exception as e:
             raise IOError(f"保存配置文件失败: {e}") from e
@@ -456,10 +437,8 @@ class Settings(BaseSettings):
         try:
             # 使用统一文件操作进行读取
             from src.shared.utils.file_operations import get_file_operations
-            import asyncio
             ops = get_file_operations("settings")
-            loop = asyncio.get_event_loop()
-            config_dict = loop.run_until_complete(ops.load_json_cached(file_path))
+            config_dict = ops.load_json_sync(file_path)
             if not config_dict:
                 return cls()
             if not isinstance(config_dict, dict):
@@ -15,7 +15,7 @@ from typing import Optional, Any
 PROJECT_ROOT = Path(__file__).parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-# 使用标准asyncio，不依赖qasync
+# 使用标准asyncio，不依赖qasync：全应用共享一个常驻在后台线程的事件循环（见 src.shared.utils.event_loop）
 
 from PyQt6.QtWidgets import QApplication, QMessageBox
 # from PyQt6.QtCore import QSettings  # 已禁用：统一仅使用全局 config.json
@@ -24,6 +24,7 @@ from PyQt6.QtWidgets import QApplication, QMessageBox
 from src.shared.ioc.container import Container
 from src.shared.events.event_bus import EventBus
 from src.shared.utils.logger import setup_logging, get_logger
+from src.shared.utils.event_loop import get_app_event_loop, run_coroutine_blocking, shutdown_app_event_loop
 logger = get_logger(__name__)
 from src.presentation.views.main_window import MainWindow
 from src.presentation.controllers.main_controller import MainController
@@ -75,6 +76,9 @@ from src.shared.utils.splash_factory import create_splash_and_execute_steps
 
 logger = get_logger(__name__)
 
+# 主窗口显示后延迟加载中文分词词典（毫秒），避开启动时的界面布局和项目加载
+SEGMENTER_WARMUP_DELAY_MS = 1500
+
 
 # 使用统一的错误处理装饰器，移除重复的装饰器定义
 
@@ -189,6 +193,9 @@ class AINovelEditorApp:
             self.app.setApplicationVersion(APP_VERSION)
             self.app.setOrganizationName(APP_ORGANIZATION)
 
+            # 启动应用事件循环（所有协程共享）
+            self._setup_async_loop()
+
             # 使用启动画面工厂执行初始化
             success = create_splash_and_execute_steps(self.app, self)
             if not success:
@@ -309,6 +316,9 @@ class AINovelEditorApp:
         # 注册控制器
         self._register_controllers()
 
+        # 校验依赖图并预编译解析计划，之后的解析不再做签名反射
+        self.container.freeze(strict=False)
+
         # 初始化AI服务（如果需要）
         if self._ai_services_need_initialization:
             logger.info("依赖注册完成，开始初始化AI服务...")
@@ -572,29 +582,13 @@ class AINovelEditorApp:
             logger.error(f"应用主题失败: {e}")
 
     def _setup_async_loop(self):
-        """设置异步事件循环"""
+        """启动应用事件循环"""
         if self._is_shutting_down:
             return
 
         try:
-            # 检查是否已有事件循环
-            try:
-                existing_loop = asyncio.get_event_loop()
-                if existing_loop and not existing_loop.is_closed():
-                    self._event_loop = existing_loop
-                    logger.debug("使用现有的异步事件循环")
-                    return
-            except RuntimeError:
-                # 没有现有循环，创建新的
-                pass
-
-            # 创建基础事件循环
-            if self._event_loop is None or self._event_loop.is_closed():
-                self._event_loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(self._event_loop)
-                logger.debug("创建新的异步事件循环")
-
-            logger.debug("异步事件循环设置完成")
+            self._event_loop = get_app_event_loop().start()
+            logger.debug("应用事件循环设置完成")
 
         except Exception as e:
             logger.error(f"设置异步事件循环失败: {e}")
@@ -632,6 +626,13 @@ class AINovelEditorApp:
                 # 使用独立事件循环进行初始化
                 self._run_ai_initialization_with_timeout(ai_orchestration)
 
+                # 预热文本分析工作进程（加载 jieba 和分析器词典），首次分析时无需等待
+                try:
+                    from src.application.services.ai.intelligence.analysis_process_pool import get_analysis_pool
+                    get_analysis_pool().start()
+                except Exception as e:
+                    logger.warning(f"预热文本分析进程池失败: {e}")
+
             else:
                 logger.warning("⚠️ AI编排服务未找到")
 
@@ -641,20 +642,14 @@ class AINovelEditorApp:
             logger.error(f"❌ 异常详情: {traceback.format_exc()}")
 
     def _run_ai_initialization_with_timeout(self, ai_orchestration):
-        """在独立事件循环中运行AI初始化"""
+        """在应用事件循环中运行AI初始化并等待完成"""
         if self._is_shutting_down:
             return
 
-        temp_loop = None
         try:
-            # 使用临时事件循环避免干扰主循环
-            temp_loop = asyncio.new_event_loop()
-
             logger.info("🔧 开始异步初始化...")
-            # 统一超时时间为30秒
-            result = temp_loop.run_until_complete(
-                asyncio.wait_for(ai_orchestration.initialize(), timeout=ASYNC_MEDIUM_TIMEOUT)
-            )
+            # 在共享事件循环上初始化，客户端及其连接池可被后续请求复用；统一超时时间为30秒
+            result = run_coroutine_blocking(ai_orchestration.initialize(), timeout=ASYNC_MEDIUM_TIMEOUT)
 
             if result:
                 logger.info("✅ AI编排服务同步初始化完成")
@@ -665,21 +660,19 @@ class AINovelEditorApp:
             logger.error(f"❌ AI服务初始化超时（{ASYNC_MEDIUM_TIMEOUT}秒）")
         except Exception as e:
             logger.error(f"❌ AI服务异步初始化失败: {e}")
-        finally:
-            if temp_loop:
-                try:
-                    # 清理临时循环
-                    pending = asyncio.all_tasks(temp_loop)
-                    for task in pending:
-                        if not task.done():
-                            task.cancel()
-                    temp_loop.close()
-                    logger.debug("🔧 临时事件循环已关闭")
-                except Exception as e:
-                    logger.warning(f"关闭临时事件循环失败: {e}")
 
     # 移除重复的异步初始化方法，统一使用同步初始化
 
+    def _schedule_segmenter_warm_up(self):
+        """事件循环空闲后在后台线程加载 jieba 词典，首次分析时无需等待"""
+        try:
+            from PyQt6.QtCore import QTimer
+            from src.shared.utils.text_segmenter import get_text_segmenter
+
+            QTimer.singleShot(SEGMENTER_WARMUP_DELAY_MS, get_text_segmenter().warm_up)
+        except Exception as e:
+            logger.warning(f"预加载中文分词词典失败: {e}")
+
 
 
     def _on_theme_changed(self, theme_name: str):
@@ -865,6 +858,9 @@ class AINovelEditorApp:
             # 显示主窗口
             self.main_window.show()
 
+            # 界面显示后空闲时在后台加载中文分词词典
+            self._schedule_segmenter_warm_up()
+
             # 使用标准Qt事件循环
             return self.app.exec()
 
@@ -952,40 +948,28 @@ class AINovelEditorApp:
                             from pathlib import Path
                             target_path = Path(location) / name
 
-                            # 调用异步服务在独立线程中执行，避免事件循环冲突
-                            import asyncio, threading
-                            result = {}
-                            def runner():
-                                try:
-                                    # 从info映射类型与作者
-                                    from src.domain.entities.project import ProjectType
-                                    proj_type = info.get('type', 'novel')
-                                    if not isinstance(proj_type, ProjectType):
-                                        s = str(proj_type).strip()
-                                        zh_map = {"小说": ProjectType.NOVEL, "散文": ProjectType.ESSAY, "诗歌": ProjectType.POETRY, "剧本": ProjectType.SCRIPT, "其他": ProjectType.OTHER}
-                                        pt = zh_map.get(s)
-                                        if pt is None:
-                                            try:
-                                                pt = getattr(ProjectType, s.upper())
-                                            except Exception:
-                                                try:
-                                                    pt = ProjectType(s.lower())
-                                                except Exception:
-                                                    pt = ProjectType.NOVEL
-                                    else:
-                                        pt = proj_type
-                                    author = (info.get('author') or '').strip()
-                                    desc = info.get('description') or ''
-                                    wc = int(info.get('word_count') or 80000)
-                                    proj = asyncio.run(svc.create_project(name=name, project_type=pt, description=desc, author=author, target_word_count=wc, project_path=str(target_path)))
-                                    result['proj'] = proj
-                                except Exception as e:
-                                    result['error'] = e
-                            t = threading.Thread(target=runner, daemon=True)
-                            t.start(); t.join()
-                            if 'error' in result:
-                                raise result['error']
-                            proj = result.get('proj')
+                            # 调用异步服务（在应用事件循环中执行）
+                            # 从info映射类型与作者
+                            from src.domain.entities.project import ProjectType
+                            proj_type = info.get('type', 'novel')
+                            if not isinstance(proj_type, ProjectType):
+                                s = str(proj_type).strip()
+                                zh_map = {"小说": ProjectType.NOVEL, "散文": ProjectType.ESSAY, "诗歌": ProjectType.POETRY, "剧本": ProjectType.SCRIPT, "其他": ProjectType.OTHER}
+                                pt = zh_map.get(s)
+                                if pt is None:
+                                    try:
+                                        pt = getattr(ProjectType, s.upper())
+                                    except Exception:
+                                        try:
+                                            pt = ProjectType(s.lower())
+                                        except Exception:
+                                            pt = ProjectType.NOVEL
+                            else:
+                                pt = proj_type
+                            author = (info.get('author') or '').strip()
+                            desc = info.get('description') or ''
+                            wc = int(info.get('word_count') or 80000)
+                            proj = run_coroutine_blocking(svc.create_project(name=name, project_type=pt, description=desc, author=author, target_word_count=wc, project_path=str(target_path)))
                             # 回调通知成功并关闭启动窗口
                             project_root = getattr(proj, 'root_path', None) or target_path
                             completion_callback(project_root)
@@ -1168,37 +1152,38 @@ class AINovelEditorApp:
                     ai_orchestration = getattr(self.ai_service, 'ai_orchestration_service', None)
                     if ai_orchestration:
                         logger.info("关闭AI编排服务...")
-                        # 创建临时事件循环来关闭AI服务
                         try:
-                            loop = asyncio.get_event_loop()
-                            if loop.is_closed():
-                                loop = asyncio.new_event_loop()
-                                asyncio.set_event_loop(loop)
-                            loop.run_until_complete(ai_orchestration.shutdown())
+                            run_coroutine_blocking(ai_orchestration.shutdown(), timeout=ASYNC_MEDIUM_TIMEOUT)
                         except Exception as e:
                             logger.error(f"关闭AI编排服务失败: {e}")
                 except Exception as e:
                     logger.error(f"关闭AI服务失败: {e}")
 
+            # 3b. 停止文本分析工作进程
+            try:
+                from src.application.services.ai.intelligence.analysis_process_pool import shutdown_analysis_pool
+                shutdown_analysis_pool()
+            except Exception as e:
+                logger.warning(f"关闭文本分析进程池失败: {e}")
+
+            # 3c. 写入排队中的搜索索引更新
+            try:
+                from src.application.services.search import SearchService
+                if hasattr(self, 'container') and self.container:
+                    search_service = self.container.try_get(SearchService)
+                    if search_service:
+                        search_service.shutdown()
+            except Exception as e:
+                logger.warning(f"写入搜索索引队列失败: {e}")
+
             # 4. 关闭事件总线
             try:
                 from src.shared.events.event_bus import get_event_bus
                 event_bus = get_event_bus()
                 if event_bus:
                     logger.info("关闭事件总线...")
-                    # 优先使用 asyncio.run，在无事件循环时优雅关闭；若当前线程已有事件循环，则退回同步关闭
                     try:
-                        asyncio.run(event_bus.shutdown_async())
-                    except RuntimeError:
-                        # 可能是“Cannot be called from a running event loop”
-                        try:
-                            loop = asyncio.get_running_loop()
-                            # 尝试在线程安全地提交到该循环
-                            future = asyncio.run_coroutine_threadsafe(event_bus.shutdown_async(), loop)
-                            future.result(timeout=2)
-                        except Exception as e:
-                            logger.warning(f"异步关闭事件总线失败，使用同步方法: {e}")
-                            event_bus.shutdown()
+                        run_coroutine_blocking(event_bus.shutdown_async(), timeout=2)
                     except Exception as e:
                         logger.warning(f"异步关闭事件总线失败，使用同步方法: {e}")
                         event_bus.shutdown()
@@ -1221,56 +1206,14 @@ class AINovelEditorApp:
             logger.error(f"资源清理失败: {e}")
 
     def _cleanup_event_loop(self):
-        """清理事件循环"""
+        """清理事件循环：取消未完成任务并停止应用事件循环"""
         try:
-            # 优先清理我们管理的事件循环
-            if self._event_loop and not self._event_loop.is_closed():
-                self._cancel_pending_tasks(self._event_loop)
-                self._event_loop.close()
-                self._event_loop = None
-                logger.debug("已清理管理的事件循环")
-                return
-
-            # 如果没有管理的循环，尝试清理当前循环
-            try:
-                current_loop = asyncio.get_event_loop()
-                if current_loop and not current_loop.is_closed():
-                    self._cancel_pending_tasks(current_loop)
-                    current_loop.close()
-                    logger.debug("已清理当前事件循环")
-            except RuntimeError as e:
-                # 可能没有事件循环或已经关闭
-                if "no current event loop" not in str(e).lower():
-                    logger.warning(f"获取当前事件循环失败: {e}")
-
+            shutdown_app_event_loop()
+            self._event_loop = None
+            logger.debug("已停止应用事件循环")
         except Exception as e:
             logger.error(f"清理事件循环失败: {e}")
 
-    def _cancel_pending_tasks(self, loop):
-        """取消事件循环中的待处理任务"""
-        try:
-            pending = asyncio.all_tasks(loop)
-            if pending:
-                logger.debug(f"取消 {len(pending)} 个待处理任务")
-                for task in pending:
-                    if not task.done():
-                        task.cancel()
-
-                # 等待任务取消完成，设置超时避免无限等待
-                try:
-                    loop.run_until_complete(
-                        asyncio.wait_for(
-                            asyncio.gather(*pending, return_exceptions=True),
-                            timeout=5.0
-                        )
-                    )
-                except asyncio.TimeoutError:
-                    logger.warning("等待异步任务取消超时")
-                except Exception as e:
-                    logger.warning(f"等待任务取消失败: {e}")
-        except Exception as e:
-            logger.warning(f"取消待处理任务失败: {e}")
-
 
 def main() -> int:
     """
@@ -1304,4 +1247,7 @@ def main() -> int:
 
 
 if __name__ == "__main__":
+    # 打包后的程序在 Windows 上启动分析工作进程需要
+    import multiprocessing
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -312,10 +312,11 @@ class TextProcessorPlugin(EditorPlugin):
             
             # 简单的词频统计
             import collections
+            from src.shared.utils.text_segmenter import get_text_segmenter
             
-            # 移除标点符号和空白字符
+            # 移除标点符号后分词（中文按词切分，单字和空白不计入）
             clean_text = re.sub(r'[^\w\s]', '', text)
-            words = clean_text.split()
+            words = [word for word in get_text_segmenter().cut(clean_text) if len(word.strip()) > 1]
             
             # 统计词频
             word_freq = collections.Counter(words)
@@ -121,17 +121,19 @@ class AIOrchestrationService:
         # 委托给统一客户端管理器处理
         try:
             if use_streaming:
-                # 流式处理
-                response_content = ""
+                # 流式处理（收集块后一次拼接，避免逐块拼接字符串）
+                chunks = []
                 async for chunk in self.client_manager.generate_text_stream(
                     prompt=request.prompt,
                     context=request.context,
                     max_tokens=request.parameters.get('max_tokens', 2000),
                     temperature=request.parameters.get('temperature', 0.7),
                     model=request.parameters.get('model'),
-                    provider=preferred_provider
+                    provider=preferred_provider,
+                    priority=request.priority
                 ):
-                    response_content += chunk
+                    chunks.append(chunk)
+                response_content = "".join(chunks)
 
                 # 创建响应对象
                 from src.domain.ai.entities.ai_response import AIResponse, AIResponseStatus
@@ -150,7 +152,8 @@ class AIOrchestrationService:
                     max_tokens=request.parameters.get('max_tokens', 2000),
                     temperature=request.parameters.get('temperature', 0.7),
                     model=request.parameters.get('model'),
-                    provider=preferred_provider
+                    provider=preferred_provider,
+                    priority=request.priority
                 )
 
                 # 创建响应对象
@@ -200,7 +203,8 @@ class AIOrchestrationService:
             max_tokens=request.parameters.get('max_tokens', 2000),
             temperature=request.parameters.get('temperature', 0.7),
             model=request.parameters.get('model'),
-            provider=preferred_provider
+            provider=preferred_provider,
+            priority=request.priority
         ):
             yield chunk
 
@@ -270,7 +274,8 @@ class AIOrchestrationService:
         max_tokens: int = 2000,
         temperature: float = 0.7,
         model: Optional[str] = None,
-        provider: Optional[str] = None
+        provider: Optional[str] = None,
+        priority: Optional[AIPriority] = None
     ) -> str:
         if not self.is_initialized:
             raise RuntimeError("AI编排服务未初始化")
@@ -280,7 +285,8 @@ class AIOrchestrationService:
             max_tokens=max_tokens,
             temperature=temperature,
             model=model,
-            provider=provider
+            provider=provider,
+            priority=priority
         )
 
     # 兼容旧API：流式生成文本
@@ -291,7 +297,8 @@ class AIOrchestrationService:
         max_tokens: int = 2000,
         temperature: float = 0.7,
         model: Optional[str] = None,
-        provider: Optional[str] = None
+        provider: Optional[str] = None,
+        priority: Optional[AIPriority] = None
     ) -> AsyncGenerator[str, None]:
         if not self.is_initialized:
             raise RuntimeError("AI编排服务未初始化")
@@ -301,7 +308,8 @@ class AIOrchestrationService:
             max_tokens=max_tokens,
             temperature=temperature,
             model=model,
-            provider=provider
+            provider=provider,
+            priority=priority
         ):
             yield chunk
 
@@ -317,11 +325,13 @@ class AIOrchestrationService:
             raise RuntimeError("AI编排服务未初始化")
         from src.shared.config.ai_prompts import build_analysis_prompt
         prompt = build_analysis_prompt(text, analysis_type)
+        # 文本分析属于后台任务，排在交互请求和自动建议之后
         content = await self.client_manager.simple_generate(
             prompt=prompt,
             context="",
             model=model,
-            provider=provider
+            provider=provider,
+            priority=AIPriority.LOW
         )
         # 尝试解析结构化结果，若失败则返回原文
         try:
@@ -350,7 +360,8 @@ class AIOrchestrationService:
             prompt=prompt,
             context="",
             model=model,
-            provider=provider
+            provider=provider,
+            priority=AIPriority.HIGH
         )
 
     # 提示词构造迁移至 src/shared/config/ai_prompts.py，避免重复实现
@@ -8,13 +8,13 @@ Date: 2025-08-06
 """
 
 import re
-import jieba
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
 from .deep_context_analyzer import DeepContextAnalyzer, WritingContext, NarrativeVoice, EmotionalTone
 from src.shared.utils.logger import get_logger
+from src.shared.utils.text_segmenter import get_text_segmenter
 
 logger = get_logger(__name__)
 
@@ -775,7 +775,7 @@ class AIResponseEvaluator:
     def _assess_vocabulary_richness(self, text: str) -> float:
         """评估词汇丰富性"""
         try:
-            words = list(jieba.cut(text))
+            words = get_text_segmenter().cut(text)
             if not words:
                 return 50.0
             
@@ -917,8 +917,8 @@ class AIResponseEvaluator:
         """计算关键词重叠度"""
         try:
             # 提取关键词
-            original_words = set(jieba.cut(original_context))
-            response_words = set(jieba.cut(ai_response))
+            original_words = set(get_text_segmenter().cut(original_context))
+            response_words = set(get_text_segmenter().cut(ai_response))
             
             # 过滤停用词
             stop_words = {'的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这'}
@@ -1059,7 +1059,7 @@ class AIResponseEvaluator:
         """评估新颖性"""
         try:
             # 基于词汇使用的独特性
-            words = list(jieba.cut(text))
+            words = get_text_segmenter().cut(text)
             
             # 检查是否使用了不常见的词汇或表达
             uncommon_indicators = ['竟然', '居然', '忽然', '突然', '意外', '惊讶']
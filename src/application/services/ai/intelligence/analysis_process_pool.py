@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文本分析进程池
+
+jieba 分词、深度上下文分析和响应质量评估都是纯 Python 的 CPU 密集计算，
+在界面进程的线程里执行会与界面争抢 GIL。这里把它们放到常驻的工作进程中：
+- 工作进程启动时预先加载 jieba 词典和分析器词典（warm），之后每个任务只传文本和结果
+- 请求/响应是可 pickle 的数据类；结果（WritingContext、QualityAssessment）也是普通数据类
+- 带键提交时同一个键只保留最新的任务，排队中的旧任务被取消；已在运行的任务无法中断，
+  其结果被丢弃
+- 工作进程用 spawn 方式启动：fork 会把界面进程里其他线程持有的锁（如 TextSegmenter 的加载锁）
+  原样复制到子进程，导致初始化永久阻塞
+- 无法创建进程池（平台不支持、打包环境等）、工作进程初始化失败或超时、进程池崩溃时，
+  退回到进程内的单线程执行；已提交但尚未得到结果的请求会改在进程内重新执行
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, Future, InvalidStateError, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 最多两个工作进程，并给界面进程留一个核心
+DEFAULT_ANALYSIS_WORKERS = max(1, min(2, (os.cpu_count() or 2) - 1))
+DEFAULT_TASK_TIMEOUT = 30.0
+WORKER_START_METHOD = "spawn"
+# 工作进程完成初始化（加载词典）的最长等待时间，须小于任务超时，超时后改为进程内执行
+WORKER_START_TIMEOUT = 15.0
+
+
+class AnalysisKind(Enum):
+    """分析任务类型"""
+    WRITING_CONTEXT = "writing_context"      # DeepContextAnalyzer.analyze_writing_context
+    EVALUATE_RESPONSE = "evaluate_response"  # AIResponseEvaluator.evaluate_response
+    SEGMENT = "segment"                      # jieba 分词
+
+
+@dataclass
+class AnalysisRequest:
+    """分析请求（在进程间传递，字段必须可 pickle）"""
+    kind: AnalysisKind
+    payload: Dict[str, Any]
+    request_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+
+@dataclass
+class AnalysisResponse:
+    """分析结果"""
+    request_id: str
+    kind: AnalysisKind
+    value: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    in_process: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# ----------------------------------------------------------------------
+# 工作进程侧（模块级函数，供进程池调用）
+# ----------------------------------------------------------------------
+
+_worker_evaluator = None
+
+
+def _get_evaluator():
+    global _worker_evaluator
+    if _worker_evaluator is None:
+        from .ai_response_evaluator import AIResponseEvaluator
+        from .singleton import get_deep_context_analyzer
+        _worker_evaluator = AIResponseEvaluator(get_deep_context_analyzer())
+    return _worker_evaluator
+
+
+def initialize_worker() -> None:
+    """工作进程初始化：加载 jieba 词典和分析器词典"""
+    from src.shared.utils.text_segmenter import get_text_segmenter
+    get_text_segmenter().initialize()
+
+    from .singleton import get_deep_context_analyzer
+    get_deep_context_analyzer()
+    _get_evaluator()
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def execute_analysis(request: AnalysisRequest) -> AnalysisResponse:
+    """执行一个分析请求（工作进程和进程内回退共用）"""
+    started = time.perf_counter()
+    response = AnalysisResponse(request_id=request.request_id, kind=request.kind)
+    try:
+        payload = request.payload
+        if request.kind == AnalysisKind.WRITING_CONTEXT:
+            from .singleton import get_deep_context_analyzer
+            response.value = get_deep_context_analyzer().analyze_writing_context(payload['content'])
+        elif request.kind == AnalysisKind.EVALUATE_RESPONSE:
+            response.value = _get_evaluator().evaluate_response(
+                ai_response=payload['ai_response'],
+                original_context=payload['original_context'],
+                request_type=payload.get('request_type', 'continuation'),
+                expected_style=payload.get('expected_style')
+            )
+        elif request.kind == AnalysisKind.SEGMENT:
+            from src.shared.utils.text_segmenter import get_text_segmenter
+            response.value = get_text_segmenter().cut(payload['text'])
+        else:
+            response.error = f"未知的分析类型: {request.kind}"
+    except Exception as e:
+        response.error = f"{type(e).__name__}: {e}"
+    response.elapsed = time.perf_counter() - started
+    return response
+
+
+# ----------------------------------------------------------------------
+# 界面进程侧
+# ----------------------------------------------------------------------
+
+class AnalysisProcessPool:
+    """
+    文本分析进程池
+
+    submit() 返回 concurrent.futures.Future，run() 在调用线程中阻塞等待（供后台线程使用），
+    run_async() 供协程使用；取消协程时同时取消对应任务。
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_ANALYSIS_WORKERS, use_processes: bool = True):
+        self.max_workers = max(1, max_workers)
+        self._use_processes = use_processes
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._fallback_executor: Optional[ThreadPoolExecutor] = None
+        self._keyed: Dict[str, Future] = {}
+        # 对外 Future -> (请求, 实际执行的 Future, 所在进程池；进程内执行时为 None)
+        self._in_flight: Dict[Future, Tuple[AnalysisRequest, Optional[Future], Optional[ProcessPoolExecutor]]] = {}
+        self._closed = False
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.fallback_runs = 0
+
+    @property
+    def uses_processes(self) -> bool:
+        return self._use_processes
+
+    def start(self) -> bool:
+        """创建进程池并让每个工作进程完成初始化（可在启动后空闲时调用）"""
+        executor = self._get_process_executor()
+        if executor is None:
+            return False
+        try:
+            for _ in range(self.max_workers):
+                executor.submit(_warm_up)
+            return True
+        except Exception as e:
+            self._disable_processes(e)
+            return False
+
+    def _get_process_executor(self) -> Optional[ProcessPoolExecutor]:
+        with self._lock:
+            if not self._use_processes or self._closed:
+                return None
+            if self._executor is not None:
+                return self._executor
+            try:
+                executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+                    initializer=initialize_worker
+                )
+            except (ImportError, NotImplementedError, OSError, ValueError) as e:
+                self._use_processes = False
+                logger.warning(f"无法创建文本分析进程池，改为进程内执行: {e}")
+                return None
+            self._executor = executor
+        logger.info(f"文本分析进程池已创建: {self.max_workers} 个工作进程")
+        self._watch_startup(executor)
+        return executor
+
+    def _watch_startup(self, executor: ProcessPoolExecutor) -> None:
+        """确认工作进程完成初始化；初始化失败或超时则退回进程内执行"""
+        try:
+            warm_up = executor.submit(_warm_up)
+        except Exception as e:
+            self._disable_processes(e, executor)
+            return
+
+        def _on_warm_up(f: Future) -> None:
+            if not f.cancelled() and f.exception() is not None:
+                self._disable_processes(f.exception(), executor)
+
+        def _on_timeout() -> None:
+            if warm_up.done():
+                return
+            # 工作进程卡在初始化中，无法通过 shutdown 结束，直接终止
+            for process in list((getattr(executor, '_processes', None) or {}).values()):
+                try:
+                    process.terminate()
+                except Exception:
+                    pass
+            self._disable_processes(TimeoutError(f"工作进程 {WORKER_START_TIMEOUT:.0f} 秒内未完成初始化"), executor)
+
+        warm_up.add_done_callback(_on_warm_up)
+        timer = threading.Timer(WORKER_START_TIMEOUT, _on_timeout)
+        timer.daemon = True
+        timer.start()
+
+    def _get_fallback_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._fallback_executor is None:
+                self._fallback_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="text-analysis")
+            return self._fallback_executor
+
+    def _disable_processes(self, error: BaseException, executor: Optional[ProcessPoolExecutor] = None) -> None:
+        with self._lock:
+            if not self._use_processes:
+                return
+            if executor is not None and self._executor is not executor:
+                return
+            self._use_processes = False
+            executor, self._executor = self._executor, None
+            stranded = [
+                (future, inner) for future, (_, inner, owner) in self._in_flight.items()
+                if owner is executor and inner is not None
+            ]
+        logger.warning(f"文本分析进程池不可用，改为进程内执行: {error}")
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        # 已交给工作进程但还没有结果的请求改在进程内重新执行
+        for future, inner in stranded:
+            self._retry_in_process(future, inner)
+
+    # ------------------------------------------------------------------
+    # 提交与取消
+    # ------------------------------------------------------------------
+
+    def submit(self, request: AnalysisRequest, key: Optional[str] = None) -> Future:
+        """
+        提交分析请求
+
+        Args:
+            request: 分析请求
+            key: 可选的任务键；同一个键只保留最新任务，之前排队中的任务被取消
+        """
+        if self._closed:
+            raise RuntimeError("文本分析进程池已关闭")
+        if key is not None:
+            self.cancel(key)
+
+        # 对外返回的 Future 与实际执行的 Future 分开，以便进程池失效时把请求改派到进程内
+        future: Future = Future()
+        future.add_done_callback(self._discard_in_flight)
+        self._dispatch(request, future)
+
+        if key is not None:
+            with self._lock:
+                self._keyed[key] = future
+            future.add_done_callback(lambda f, k=key: self._forget(k, f))
+        return future
+
+    def _dispatch(self, request: AnalysisRequest, future: Future) -> None:
+        """把请求交给工作进程（不可用时交给进程内线程），结果转交给 future"""
+        inner = None
+        executor = self._get_process_executor()
+        if executor is not None:
+            try:
+                inner = executor.submit(execute_analysis, request)
+            except (BrokenProcessPool, RuntimeError, OSError) as e:
+                self._disable_processes(e, executor)
+        if inner is None:
+            executor = None
+            inner = self._get_fallback_executor().submit(self._execute_in_process, request)
+
+        with self._lock:
+            registered = not future.done()
+            if registered:
+                self._in_flight[future] = (request, inner, executor)
+        if not registered:
+            inner.cancel()
+            return
+        inner.add_done_callback(lambda f: self._relay(future, f))
+
+    def _retry_in_process(self, future: Future, inner: Future) -> None:
+        """inner 仍是 future 当前的执行者时，改在进程内重新执行"""
+        with self._lock:
+            entry = self._in_flight.get(future)
+            if entry is None or entry[1] is not inner:
+                return
+            request = entry[0]
+            self._in_flight[future] = (request, None, None)
+        self._dispatch(request, future)
+
+    def _relay(self, future: Future, inner: Future) -> None:
+        with self._lock:
+            entry = self._in_flight.get(future)
+            if entry is None or entry[1] is not inner:
+                return  # 已改派或已取消
+            owner = entry[2]
+        error = None if inner.cancelled() else inner.exception()
+
+        if owner is not None and (inner.cancelled() or isinstance(error, BrokenProcessPool)):
+            # 工作进程异常退出或进程池被关闭：关闭进程池，在进程内重新执行
+            self._disable_processes(error or CancelledError("进程池已关闭"), owner)
+            self._retry_in_process(future, inner)
+            return
+
+        with self._lock:
+            if self._in_flight.get(future, (None, None))[1] is not inner:
+                return
+            del self._in_flight[future]
+        try:
+            if inner.cancelled():
+                future.cancel()
+            elif error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(inner.result())
+        except InvalidStateError:
+            pass  # 调用方已取消
+
+    def _discard_in_flight(self, future: Future) -> None:
+        with self._lock:
+            entry = self._in_flight.pop(future, None)
+        if entry is not None and entry[1] is not None:
+            entry[1].cancel()
+
+    def _execute_in_process(self, request: AnalysisRequest) -> AnalysisResponse:
+        self.fallback_runs += 1
+        response = execute_analysis(request)
+        response.in_process = True
+        return response
+
+    def _forget(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._keyed.get(key) is future:
+                del self._keyed[key]
+
+    def cancel(self, key: str) -> bool:
+        """取消键对应的任务；已在运行的任务无法中断，其结果被丢弃"""
+        with self._lock:
+            future = self._keyed.pop(key, None)
+        if future is None or future.done():
+            return False
+        cancelled = future.cancel()
+        if cancelled:
+            self.cancelled += 1
+        return cancelled
+
+    # ------------------------------------------------------------------
+    # 等待结果
+    # ------------------------------------------------------------------
+
+    def run(
+        self,
+        request: AnalysisRequest,
+        key: Optional[str] = None,
+        timeout: Optional[float] = DEFAULT_TASK_TIMEOUT
+    ) -> AnalysisResponse:
+        """提交并阻塞等待结果（不要在界面线程中调用）"""
+        try:
+            future = self.submit(request, key)
+            return self._collect(request, future.result(timeout=timeout))
+        except CancelledError:
+            return AnalysisResponse(request.request_id, request.kind, error="已取消")
+        except FutureTimeoutError:
+            future.cancel()
+            self.failed += 1
+            return AnalysisResponse(request.request_id, request.kind, error="分析超时")
+        except Exception as e:
+            self.failed += 1
+            return AnalysisResponse(request.request_id, request.kind, error=str(e))
+
+    async def run_async(self, request: AnalysisRequest, key: Optional[str] = None) -> AnalysisResponse:
+        """在协程中等待分析结果；协程被取消时取消对应任务"""
+        future = self.submit(request, key)
+        try:
+            return self._collect(request, await asyncio.wrap_future(future))
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+    def _collect(self, request: AnalysisRequest, response: AnalysisResponse) -> AnalysisResponse:
+        if response.ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+            logger.error(f"文本分析失败 ({request.kind.value}): {response.error}")
+        return response
+
+    # ------------------------------------------------------------------
+    # 便捷方法
+    # ------------------------------------------------------------------
+
+    def analyze_writing_context(self, content: str, key: Optional[str] = None):
+        """深度上下文分析，失败返回 None"""
+        response = self.run(AnalysisRequest(AnalysisKind.WRITING_CONTEXT, {'content': content}), key)
+        return response.value if response.ok else None
+
+    def evaluate_response(
+        self,
+        ai_response: str,
+        original_context: str,
+        request_type: str = "continuation",
+        expected_style=None
+    ):
+        """响应质量评估，失败返回 None"""
+        response = self.run(AnalysisRequest(AnalysisKind.EVALUATE_RESPONSE, {
+            'ai_response': ai_response,
+            'original_context': original_context,
+            'request_type': request_type,
+            'expected_style': expected_style,
+        }))
+        return response.value if response.ok else None
+
+    def segment(self, text: str) -> Optional[List[str]]:
+        """jieba 分词，失败返回 None"""
+        response = self.run(AnalysisRequest(AnalysisKind.SEGMENT, {'text': text}))
+        return response.value if response.ok else None
+
+    # ------------------------------------------------------------------
+    # 生命周期与统计
+    # ------------------------------------------------------------------
+
+    def shutdown(self, wait: bool = False) -> None:
+        """关闭工作进程（应用退出时调用）"""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+            fallback, self._fallback_executor = self._fallback_executor, None
+            self._keyed.clear()
+            in_flight = list(self._in_flight)
+        for future in in_flight:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        if fallback is not None:
+            fallback.shutdown(wait=wait, cancel_futures=True)
+        logger.info("文本分析进程池已关闭")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            'uses_processes': self._use_processes,
+            'max_workers': self.max_workers,
+            'pending_keyed': len(self._keyed),
+            'completed': self.completed,
+            'cancelled': self.cancelled,
+            'failed': self.failed,
+            'fallback_runs': self.fallback_runs,
+        }
+
+
+_analysis_pool: Optional[AnalysisProcessPool] = None
+_analysis_pool_lock = threading.Lock()
+
+
+def get_analysis_pool() -> AnalysisProcessPool:
+    """获取全局文本分析进程池"""
+    global _analysis_pool
+    if _analysis_pool is None:
+        with _analysis_pool_lock:
+            if _analysis_pool is None:
+                _analysis_pool = AnalysisProcessPool()
+    return _analysis_pool
+
+
+def shutdown_analysis_pool() -> None:
+    """关闭全局文本分析进程池（应用退出时调用）"""
+    global _analysis_pool
+    with _analysis_pool_lock:
+        pool, _analysis_pool = _analysis_pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -14,6 +14,7 @@ from .ai_function_registry import register_ai_function, AIFunctionCategory
 from .deep_context_analyzer import DeepContextAnalyzer
 from .intelligent_prompt_builder import IntelligentPromptBuilder
 from .ai_response_evaluator import AIResponseEvaluator
+from .analysis_process_pool import get_analysis_pool
 from src.domain.ai.value_objects.ai_execution_mode import AIExecutionMode
 from src.domain.ai.value_objects.ai_request_type import AIRequestType
 
@@ -34,8 +35,30 @@ class EnhancedAIIntelligentFunction(AIIntelligentFunction):
         self._prompt_builder = IntelligentPromptBuilder(self._context_analyzer)
         self._response_evaluator = AIResponseEvaluator(self._context_analyzer)
 
+        # 本次请求的上下文提示（光标位置）
+        self._context_hints: Dict[str, Any] = {}
+
         logger.info(f"增强AI功能初始化: {self.__class__.__name__}")
 
+    # 从请求参数中提取的上下文提示
+    CONTEXT_HINT_KEYS = ('cursor_position',)
+
+    def build_auto_request(
+        self,
+        context: str = "",
+        selected_text: str = "",
+        parameters: Dict[str, Any] = None
+    ):
+        """构建智能化AI请求，参数中的上下文提示交给提示词构建器使用"""
+        parameters = parameters or {}
+        self._context_hints = {
+            key: parameters[key] for key in self.CONTEXT_HINT_KEYS if parameters.get(key) is not None
+        }
+        try:
+            return super().build_auto_request(context, selected_text, parameters)
+        finally:
+            self._context_hints = {}
+
     def _build_intelligent_prompt(self, input_text: str, context: str, selected_text: str) -> str:
         """
         构建智能化提示词（增强版本）
@@ -49,7 +72,8 @@ class EnhancedAIIntelligentFunction(AIIntelligentFunction):
                 request_type=self._get_request_type(),
                 selected_text=selected_text,
                 user_intent=input_text,
-                target_length=self._get_target_length()
+                target_length=self._get_target_length(),
+                **self._context_hints
             )
 
             logger.info(f"智能提示词构建完成，质量评分: {intelligent_prompt.estimated_quality:.2f}")
@@ -78,10 +102,14 @@ class EnhancedAIIntelligentFunction(AIIntelligentFunction):
             Dict[str, Any]: 评估结果
         """
         try:
-            assessment = self._response_evaluator.evaluate_response(
+            # 优先在分析进程池中评估，失败时在本进程评估
+            request_type = self._get_request_type().value
+            assessment = get_analysis_pool().evaluate_response(
+                ai_response, original_context, request_type
+            ) or self._response_evaluator.evaluate_response(
                 ai_response=ai_response,
                 original_context=original_context,
-                request_type=self._get_request_type().value
+                request_type=request_type
             )
 
             return {
@@ -117,7 +145,10 @@ class EnhancedAIIntelligentFunction(AIIntelligentFunction):
             Dict[str, Any]: 分析结果
         """
         try:
-            writing_context = self._context_analyzer.analyze_writing_context(content)
+            writing_context = (
+                get_analysis_pool().analyze_writing_context(content)
+                or self._context_analyzer.analyze_writing_context(content)
+            )
 
             return {
                 'narrative_voice': writing_context.narrative_voice.description,
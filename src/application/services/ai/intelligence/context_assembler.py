@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词上下文组装器
+
+按令牌预算为提示词挑选上下文，不再把整篇文档塞进模板。选区必定完整放入，
+其余预算用于光标/选区附近的正文窗口。令牌数按段落估算并缓存，编辑后重新组装时
+只有发生变化的段落需要重新估算。
+"""
+
+import math
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from src.shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 预算配置
+DEFAULT_CONTEXT_BUDGET_TOKENS = 3000
+WINDOW_BEFORE_RATIO = 0.75  # 窗口中光标之前内容的目标占比（续写更依赖前文）
+
+# 令牌估算：CJK字符按单字计，英文单词按字母数折算，数字按位数折算，其余符号各计一个
+CJK_CHAR_TOKENS = 1.0
+ASCII_CHARS_PER_TOKEN = 4
+DIGITS_PER_TOKEN = 3
+PARAGRAPH_CACHE_SIZE = 4096
+
+TOKEN_PATTERN = re.compile(
+    r'(?P<cjk>[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff])'
+    r'|(?P<word>[A-Za-z]+)'
+    r'|(?P<num>\d+)'
+    r'|(?P<other>\S)'
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的令牌数（CJK感知，偏保守）"""
+    if not text:
+        return 0
+    total = 0.0
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'cjk':
+            total += CJK_CHAR_TOKENS
+        elif kind == 'word':
+            total += math.ceil(len(match.group()) / ASCII_CHARS_PER_TOKEN)
+        elif kind == 'num':
+            total += math.ceil(len(match.group()) / DIGITS_PER_TOKEN)
+        else:
+            total += 1
+    return int(math.ceil(total))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, keep: str = "end") -> str:
+    """
+    把文本截断到令牌预算以内
+
+    Args:
+        text: 原文本
+        max_tokens: 令牌上限
+        keep: 保留哪一端，"end" 保留结尾，"start" 保留开头
+    """
+    if max_tokens <= 0 or not text:
+        return ""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+
+    chars = max(1, int(len(text) * max_tokens / tokens))
+    while chars > 0:
+        piece = text[-chars:] if keep == "end" else text[:chars]
+        if estimate_tokens(piece) <= max_tokens:
+            return piece
+        chars = int(chars * 0.9)
+    return ""
+
+
+class ParagraphTokenCache:
+    """
+    段落令牌数缓存（LRU）
+
+    以段落文本为键，编辑只会让被修改的段落失效。线程安全。
+    """
+
+    def __init__(self, max_entries: int = PARAGRAPH_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._counts: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, paragraph: str) -> int:
+        if not paragraph:
+            return 0
+        with self._lock:
+            cached = self._counts.get(paragraph)
+            if cached is not None:
+                self._counts.move_to_end(paragraph)
+                self.hits += 1
+                return cached
+
+        tokens = estimate_tokens(paragraph)
+        with self._lock:
+            self.misses += 1
+            self._counts[paragraph] = tokens
+            self._counts.move_to_end(paragraph)
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+        return tokens
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+@dataclass
+class AssembledContext:
+    """组装后的上下文"""
+    window_text: str
+    selected_text: str = ""
+    total_tokens: int = 0
+    budget_tokens: int = 0
+    window_range: Tuple[int, int] = (0, 0)  # 窗口覆盖的段落区间 [start, end)
+    paragraph_count: int = 0
+    truncated: bool = False  # 是否省略了部分正文
+
+    @property
+    def primary_text(self) -> str:
+        """模板中的主体内容：有选区时为选区，否则为正文窗口"""
+        return self.selected_text or self.window_text
+
+
+class ContextAssembler:
+    """
+    按令牌预算组装提示词上下文
+
+    段落令牌数缓存在组装器内，同一文档反复组装时（每次按键后、每次请求前）
+    只有改动过的段落会被重新估算。
+    """
+
+    def __init__(self, budget_tokens: int = DEFAULT_CONTEXT_BUDGET_TOKENS):
+        self.budget_tokens = budget_tokens
+        self._paragraph_cache = ParagraphTokenCache()
+
+    def assemble(
+        self,
+        content: str,
+        cursor_position: Optional[int] = None,
+        selected_text: str = "",
+        budget_tokens: Optional[int] = None
+    ) -> AssembledContext:
+        """
+        组装上下文
+
+        Args:
+            content: 文档全文
+            cursor_position: 光标位置（字符偏移）；为None时以选区或文末为锚点
+            selected_text: 选中文本，必定完整放入
+            budget_tokens: 本次使用的预算，默认为组装器预算
+
+        Returns:
+            AssembledContext: 组装结果
+        """
+        budget = budget_tokens if budget_tokens is not None else self.budget_tokens
+        content = content or ""
+        paragraphs = content.split('\n')
+        counts = [self._paragraph_cache.count(p) for p in paragraphs]
+        anchor_start, anchor_end, anchor_offset = self._find_anchor(
+            paragraphs, content, cursor_position, selected_text
+        )
+
+        selected_tokens = estimate_tokens(selected_text)
+        remaining = max(0, budget - selected_tokens)
+
+        start, end, window_text, window_tokens, window_truncated = self._select_window(
+            paragraphs, counts, anchor_start, anchor_end, anchor_offset, remaining
+        )
+        truncated = window_truncated or start > 0 or end < len(paragraphs)
+
+        return AssembledContext(
+            window_text=window_text,
+            selected_text=selected_text,
+            total_tokens=selected_tokens + window_tokens,
+            budget_tokens=budget,
+            window_range=(start, end),
+            paragraph_count=len(paragraphs),
+            truncated=truncated
+        )
+
+    # ------------------------------------------------------------------
+    # 正文窗口
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _find_anchor(
+        paragraphs: List[str],
+        content: str,
+        cursor_position: Optional[int],
+        selected_text: str
+    ) -> Tuple[int, int, int]:
+        """
+        确定窗口锚点
+
+        Returns:
+            (起始段落, 结束段落(含), 锚点在起始段落中的字符偏移)
+        """
+        start_pos: Optional[int] = None
+        end_pos: Optional[int] = None
+        if cursor_position is not None:
+            start_pos = end_pos = max(0, min(cursor_position, len(content)))
+        elif selected_text:
+            index = content.find(selected_text)
+            if index >= 0:
+                start_pos, end_pos = index, index + len(selected_text)
+
+        if start_pos is None:
+            last = len(paragraphs) - 1
+            return last, last, len(paragraphs[last])
+
+        anchor_start = anchor_end = len(paragraphs) - 1
+        anchor_offset = 0
+        offset = 0
+        found_start = False
+        for index, paragraph in enumerate(paragraphs):
+            paragraph_end = offset + len(paragraph)
+            if not found_start and start_pos <= paragraph_end:
+                anchor_start, anchor_offset, found_start = index, start_pos - offset, True
+            if found_start and end_pos <= paragraph_end:
+                anchor_end = index
+                break
+            offset = paragraph_end + 1
+        if not found_start:
+            anchor_offset = len(paragraphs[anchor_start])
+        return anchor_start, anchor_end, anchor_offset
+
+    @staticmethod
+    def _select_window(
+        paragraphs: List[str],
+        counts: List[int],
+        anchor_start: int,
+        anchor_end: int,
+        anchor_offset: int,
+        budget: int
+    ) -> Tuple[int, int, str, int, bool]:
+        """
+        以锚点段落为中心向两侧扩展，直到放不下下一个段落
+
+        Returns:
+            (起始段落, 结束段落(不含), 窗口文本, 令牌数, 是否截断了锚点段落)
+        """
+        if budget <= 0:
+            return anchor_start, anchor_start, "", 0, False
+
+        used = sum(counts[anchor_start:anchor_end + 1])
+        if used > budget:
+            # 锚点段落本身超出预算：截取锚点附近的文字
+            text = '\n'.join(paragraphs[anchor_start:anchor_end + 1])
+            before = truncate_to_tokens(text[:anchor_offset], int(budget * WINDOW_BEFORE_RATIO), keep="end")
+            after = truncate_to_tokens(text[anchor_offset:], budget - estimate_tokens(before), keep="start")
+            window_text = before + after
+            return anchor_start, anchor_end + 1, window_text, estimate_tokens(window_text), True
+
+        start, end = anchor_start, anchor_end + 1
+        before_tokens, after_tokens = 0, 0
+        while True:
+            can_before = start > 0 and used + counts[start - 1] <= budget
+            can_after = end < len(paragraphs) and used + counts[end] <= budget
+            if not can_before and not can_after:
+                break
+            prefer_before = before_tokens * (1 - WINDOW_BEFORE_RATIO) <= after_tokens * WINDOW_BEFORE_RATIO
+            if can_before and (prefer_before or not can_after):
+                start -= 1
+                used += counts[start]
+                before_tokens += counts[start]
+            else:
+                used += counts[end]
+                after_tokens += counts[end]
+                end += 1
+
+        return start, end, '\n'.join(paragraphs[start:end]), used, False
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+
+    def get_statistics(self) -> Dict[str, int]:
+        return {
+            'budget_tokens': self.budget_tokens,
+            'cached_paragraphs': len(self._paragraph_cache),
+            'cache_hits': self._paragraph_cache.hits,
+            'cache_misses': self._paragraph_cache.misses,
+        }
+
+    def clear_cache(self) -> None:
+        self._paragraph_cache.clear()
@@ -3,18 +3,26 @@
 
 实现对文档内容的深度语义分析，为AI功能提供精准的上下文理解。
 
+分析按段落增量进行：每个段落的特征（指示词计数、句长、分词结果、人名、对话）
+按段落内容哈希缓存，整篇结果由各段特征汇总得到。编辑一句话时只有被修改的段落
+需要重新扫描和分词，其余段落直接命中缓存。
+
 Author: AI小说编辑器团队
 Date: 2025-08-06
 """
 
+import bisect
+import hashlib
 import re
-import jieba
+import threading
 from typing import Dict, List, Optional, Set, Tuple, Any
 from dataclasses import dataclass, field
 from enum import Enum
-from collections import Counter, defaultdict
+from collections import Counter, OrderedDict, defaultdict
 
 from src.shared.utils.logger import get_logger
+from src.shared.utils.multi_pattern_matcher import MultiPatternMatcher, PatternCounts, ScanResult
+from src.shared.utils.text_segmenter import get_text_segmenter
 
 logger = get_logger(__name__)
 
@@ -128,6 +136,173 @@ class WritingContext:
     themes: List[str]
 
 
+# 指示词词表（全部编译进同一个多模式匹配自动机）
+NARRATIVE_INDICATORS = {
+    NarrativeVoice.FIRST_PERSON: ['我', '我们', '我的', '我们的', '咱们'],
+    NarrativeVoice.THIRD_PERSON: ['他', '她', '它', '他们', '她们', '它们'],
+    NarrativeVoice.SECOND_PERSON: ['你', '您', '你们', '你的', '您的']
+}
+
+EMOTION_WORDS = {
+    EmotionalTone.POSITIVE: ['高兴', '快乐', '喜悦', '兴奋', '满足', '幸福', '愉快'],
+    EmotionalTone.NEGATIVE: ['悲伤', '痛苦', '愤怒', '恐惧', '焦虑', '绝望', '沮丧'],
+    EmotionalTone.PEACEFUL: ['平静', '安详', '宁静', '祥和', '温和', '舒缓'],
+    EmotionalTone.TENSE: ['紧张', '激烈', '急促', '危险', '刺激', '惊险']
+}
+
+LITERARY_DEVICES = {
+    '比喻': ['像', '如同', '仿佛', '好似', '犹如'],
+    '拟人': ['微笑', '哭泣', '舞蹈', '歌唱'],
+    '排比': ['一个', '一种', '一片'],
+    '对比': ['然而', '但是', '相反', '不同']
+}
+
+# 复杂句特征词
+COMPLEX_SENTENCE_INDICATORS = ['虽然', '尽管', '不仅', '而且', '因为', '所以', '如果', '那么']
+
+# 句子结束标点
+SENTENCE_ENDINGS = ['。', '！', '？', '…', '；']
+
+DESCRIPTIVE_WORDS = ['美丽', '漂亮', '优雅', '壮观', '宁静', '热闹', '繁华', '古老']
+
+LITERARY_SOPHISTICATION_INDICATORS = {
+    '修辞手法': ['比喻', '拟人', '排比', '对偶'],
+    '文学词汇': ['诗意', '韵味', '意境', '神韵'],
+    '深度表达': ['内心', '灵魂', '精神', '哲理']
+}
+
+# 情节阶段指示词
+PLOT_STAGE_INDICATORS = {
+    '开端': ['开始', '起初', '最初', '首先'],
+    '发展': ['然后', '接着', '随后', '后来'],
+    '高潮': ['突然', '忽然', '瞬间', '终于'],
+    '结局': ['最后', '最终', '结果', '终于']
+}
+
+TENSION_WORDS = ['紧张', '危险', '急迫', '焦虑', '担心', '害怕']
+
+LOCATION_WORDS = ['房间', '客厅', '卧室', '厨房', '花园', '公园', '街道', '学校', '办公室']
+
+TIME_WORDS = ['早晨', '上午', '中午', '下午', '傍晚', '晚上', '深夜', '春天', '夏天', '秋天', '冬天']
+
+ATMOSPHERE_WORDS = {
+    'peaceful': ['宁静', '安详', '平和'],
+    'tense': ['紧张', '压抑', '沉重'],
+    'joyful': ['欢快', '热闹', '活跃'],
+    'melancholic': ['忧郁', '悲伤', '沉闷']
+}
+
+SENSORY_PATTERNS = {
+    '视觉': ['看到', '看见', '观察', '注视', '颜色', '光线'],
+    '听觉': ['听到', '听见', '声音', '音乐', '噪音'],
+    '触觉': ['触摸', '感受', '温度', '质感'],
+    '嗅觉': ['闻到', '香味', '气味'],
+    '味觉': ['尝到', '味道', '甜', '苦', '酸']
+}
+
+GENRE_PATTERNS = {
+    '言情': ['爱情', '恋爱', '情感', '浪漫'],
+    '悬疑': ['谜团', '线索', '调查', '真相'],
+    '科幻': ['科技', '未来', '机器人', '太空'],
+    '奇幻': ['魔法', '精灵', '龙', '魔兽'],
+    '历史': ['古代', '朝代', '皇帝', '宫廷']
+}
+
+THEME_PATTERNS = {
+    '成长': ['成长', '学习', '进步', '改变'],
+    '友情': ['朋友', '友谊', '伙伴', '同伴'],
+    '亲情': ['家人', '父母', '兄弟', '姐妹'],
+    '爱情': ['爱情', '恋爱', '情侣', '爱人'],
+    '冒险': ['冒险', '探险', '旅行', '发现'],
+    '正义': ['正义', '公平', '善良', '帮助']
+}
+
+
+def build_indicator_lexicons() -> Dict[Any, List[str]]:
+    """把所有指示词表整理成 类别 -> 词表，供多模式匹配器一次性编译"""
+    lexicons: Dict[Any, List[str]] = {
+        'sentence_end': SENTENCE_ENDINGS,
+        'quote': ['"'],
+        'complex': COMPLEX_SENTENCE_INDICATORS,
+        'descriptive': DESCRIPTIVE_WORDS,
+        'tension': TENSION_WORDS,
+        'location': LOCATION_WORDS,
+        'time': TIME_WORDS,
+    }
+    grouped = (
+        ('voice', NARRATIVE_INDICATORS),
+        ('emotion', EMOTION_WORDS),
+        ('device', LITERARY_DEVICES),
+        ('literary', LITERARY_SOPHISTICATION_INDICATORS),
+        ('stage', PLOT_STAGE_INDICATORS),
+        ('atmosphere', ATMOSPHERE_WORDS),
+        ('sense', SENSORY_PATTERNS),
+        ('genre', GENRE_PATTERNS),
+        ('theme', THEME_PATTERNS),
+    )
+    for prefix, groups in grouped:
+        for key, words in groups.items():
+            lexicons[(prefix, key)] = words
+    return lexicons
+
+
+_indicator_matcher: Optional[MultiPatternMatcher] = None
+
+
+def get_indicator_matcher() -> MultiPatternMatcher:
+    """获取共享的指示词匹配器（首次使用时构建，之后只读共享）"""
+    global _indicator_matcher
+    if _indicator_matcher is None:
+        _indicator_matcher = MultiPatternMatcher(build_indicator_lexicons())
+    return _indicator_matcher
+
+
+# 段落特征缓存的条目上限（按最近使用淘汰）
+PARAGRAPH_CACHE_SIZE = 8192
+
+# 角色名与对话
+CHINESE_NAME_PATTERN = re.compile(
+    r'[王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯龙史陶黎贺顾毛郝龚邵万钱严覃武戴莫孔向汤][一-龯]{1,2}'
+)
+ENGLISH_NAME_PATTERN = re.compile(r'[A-Z][a-z]+')
+DIALOGUE_PATTERN = re.compile(r'"([^"]*)"')
+
+# 关键词停用词
+KEYWORD_STOP_WORDS = {'的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这'}
+
+
+@dataclass
+class ParagraphFeatures:
+    """单个段落的分析特征（只依赖段落内容，按内容哈希缓存）"""
+    length: int                                   # 预处理后的字符数
+    whitespace_tokens: int                        # 按空白切分的片段数
+    pattern_counts: Dict[int, int]                # 指示词ID -> 出现次数
+    sentence_lengths: Tuple[int, ...]             # 各句长度
+    complex_sentences: int                        # 含复杂句特征词的句子数
+    tokens: frozenset                             # jieba 分词得到的不同词
+    token_total: int                              # 分词总数
+    keyword_counts: Dict[str, int]                # 去掉停用词和单字后的词频（按首次出现顺序）
+    chinese_names: Dict[str, Tuple[int, int]]     # 中文人名 -> (出现次数, 首次出现位置)
+    english_names: Dict[str, Tuple[int, int]]     # 英文人名 -> (出现次数, 首次出现位置)
+    dialogues: Tuple[Tuple[str, int], ...]        # (对话内容, 位置)
+
+
+@dataclass
+class DocumentFeatures:
+    """由各段特征汇总得到的整篇文档特征"""
+    length: int
+    whitespace_tokens: int
+    counts: PatternCounts
+    sentence_lengths: List[int]
+    complex_sentences: int
+    vocabulary_size: int
+    token_total: int
+    keyword_counts: Counter
+    chinese_names: Dict[str, Tuple[int, Tuple[int, int]]]   # 人名 -> (出现次数, 首次出现的(段落序号, 位置))
+    english_names: Dict[str, Tuple[int, Tuple[int, int]]]
+    dialogues: List[Tuple[str, Tuple[int, int]]]
+
+
 class DeepContextAnalyzer:
     """
     深度上下文分析器
@@ -142,16 +317,27 @@ class DeepContextAnalyzer:
 
     7. 文学手法识别
     8. 主题提取
+
+    每个段落只扫描、分词一次，特征按段落内容哈希缓存，各项分析基于汇总后的文档特征。
+    分析器在多个线程间共享，段落缓存由内部锁保护。
     """
 
     def __init__(self):
-        # 初始化中文分词
-        jieba.initialize()
+        # 中文分词词典在后台加载，不阻塞构造
+        self._segmenter = get_text_segmenter()
+        self._segmenter.warm_up()
 
         # 加载词典和模式
         self._load_literary_patterns()
         self._load_character_patterns()
         self._load_emotion_patterns()
+        self._matcher = get_indicator_matcher()
+
+        # 段落特征缓存：内容哈希 -> 特征
+        self._paragraph_cache: "OrderedDict[bytes, ParagraphFeatures]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
 
         logger.info("深度上下文分析器初始化完成")
 
@@ -165,44 +351,30 @@ class DeepContextAnalyzer:
 
     def _analyze_content_internal(self, content: str) -> Dict[str, Any]:
         """内部分析实现，原先分散的分析流程整合"""
-        processed_content = self._preprocess_content(content)
+        context = self._build_writing_context(self._document_features(content))
         return {
-            'narrative_voice': self._detect_narrative_voice(processed_content),
-            'writing_style': self._analyze_writing_style(processed_content),
-            'character_analysis': self._extract_character_info(processed_content),
-            'plot_structure': self._analyze_plot_structure(processed_content),
-            'emotional_tone': self._analyze_emotional_tone(processed_content),
-            'scene_setting': self._extract_scene_setting(processed_content),
-            'literary_devices': self._detect_literary_devices(processed_content),
-            'genre_indicators': self._detect_genre_indicators(processed_content),
-            'keywords': self._extract_keywords(processed_content),
-            'themes': self._extract_themes(processed_content)
+            'narrative_voice': context.narrative_voice,
+            'writing_style': context.writing_style,
+            'character_analysis': context.character_analysis,
+            'plot_structure': context.plot_structure,
+            'emotional_tone': context.emotional_tone,
+            'scene_setting': context.scene_setting,
+            'literary_devices': context.literary_devices,
+            'genre_indicators': context.genre_indicators,
+            'keywords': context.keywords,
+            'themes': context.themes
         }
 
     def _load_literary_patterns(self):
         """加载文学模式"""
         # 叙述视角指示词
-        self.narrative_indicators = {
-            NarrativeVoice.FIRST_PERSON: ['我', '我们', '我的', '我们的', '咱们'],
-            NarrativeVoice.THIRD_PERSON: ['他', '她', '它', '他们', '她们', '它们'],
-            NarrativeVoice.SECOND_PERSON: ['你', '您', '你们', '你的', '您的']
-        }
+        self.narrative_indicators = NARRATIVE_INDICATORS
 
         # 情感词典
-        self.emotion_words = {
-            EmotionalTone.POSITIVE: ['高兴', '快乐', '喜悦', '兴奋', '满足', '幸福', '愉快'],
-            EmotionalTone.NEGATIVE: ['悲伤', '痛苦', '愤怒', '恐惧', '焦虑', '绝望', '沮丧'],
-            EmotionalTone.PEACEFUL: ['平静', '安详', '宁静', '祥和', '温和', '舒缓'],
-            EmotionalTone.TENSE: ['紧张', '激烈', '急促', '危险', '刺激', '惊险']
-        }
+        self.emotion_words = EMOTION_WORDS
 
         # 文学手法
-        self.literary_devices = {
-            '比喻': ['像', '如同', '仿佛', '好似', '犹如'],
-            '拟人': ['微笑', '哭泣', '舞蹈', '歌唱'],
-            '排比': ['一个', '一种', '一片'],
-            '对比': ['然而', '但是', '相反', '不同']
-        }
+        self.literary_devices = LITERARY_DEVICES
 
     def _load_character_patterns(self):
         """加载角色模式"""
@@ -238,35 +410,7 @@ class DeepContextAnalyzer:
         """
         try:
             logger.info(f"开始深度上下文分析: {len(content)} 字符")
-
-            # 预处理文本
-            processed_content = self._preprocess_text(content)
-
-            # 执行各项分析
-            narrative_voice = self._detect_narrative_voice(processed_content)
-            writing_style = self._analyze_writing_style(processed_content)
-            character_analysis = self._extract_character_info(processed_content)
-            plot_structure = self._analyze_plot_structure(processed_content)
-            emotional_tone = self._analyze_emotional_tone(processed_content)
-            scene_setting = self._extract_scene_setting(processed_content)
-            literary_devices = self._detect_literary_devices(processed_content)
-            genre_indicators = self._detect_genre_indicators(processed_content)
-            keywords = self._extract_keywords(processed_content)
-            themes = self._extract_themes(processed_content)
-
-            context = WritingContext(
-                narrative_voice=narrative_voice,
-                writing_style=writing_style,
-                character_analysis=character_analysis,
-                plot_structure=plot_structure,
-                emotional_tone=emotional_tone,
-                scene_setting=scene_setting,
-                literary_devices=literary_devices,
-                genre_indicators=genre_indicators,
-                keywords=keywords,
-                themes=themes
-            )
-
+            context = self._build_writing_context(self._document_features(content))
             logger.info("深度上下文分析完成")
             return context
 
@@ -275,6 +419,26 @@ class DeepContextAnalyzer:
             # 返回默认上下文
             return self._create_default_context()
 
+    def _build_writing_context(self, features: DocumentFeatures) -> WritingContext:
+        """由文档特征得到各项分析结果"""
+        counts = features.counts
+        return WritingContext(
+            narrative_voice=self._detect_narrative_voice(counts),
+            writing_style=self._analyze_writing_style(features),
+            character_analysis=self._extract_character_info(features),
+            plot_structure=self._analyze_plot_structure(features),
+            emotional_tone=self._analyze_emotional_tone(counts),
+            scene_setting=self._extract_scene_setting(counts),
+            literary_devices=self._detect_literary_devices(counts),
+            genre_indicators=self._detect_genre_indicators(counts),
+            keywords=self._extract_keywords(features),
+            themes=self._extract_themes(counts)
+        )
+
+    # ------------------------------------------------------------------
+    # 段落特征
+    # ------------------------------------------------------------------
+
     def _preprocess_text(self, content: str) -> str:
         """预处理文本"""
         # 清理多余的空白字符
@@ -284,14 +448,128 @@ class DeepContextAnalyzer:
         content = content.replace(''', "'").replace(''', "'")
         return content.strip()
 
-    def _detect_narrative_voice(self, content: str) -> NarrativeVoice:
+    def _split_paragraphs(self, content: str) -> List[str]:
+        """按行切分段落并预处理（空段落丢弃）"""
+        paragraphs = []
+        for line in content.split('\n'):
+            paragraph = self._preprocess_text(line)
+            if paragraph:
+                paragraphs.append(paragraph)
+        return paragraphs
+
+    def _document_features(self, content: str) -> DocumentFeatures:
+        """切分段落、取得各段特征（优先命中缓存）并汇总"""
+        paragraphs = self._split_paragraphs(content)
+        return self._aggregate_features([self._paragraph_features(p) for p in paragraphs])
+
+    def _paragraph_features(self, paragraph: str) -> ParagraphFeatures:
+        """取得段落特征（按内容哈希缓存）"""
+        key = hashlib.blake2b(paragraph.encode('utf-8'), digest_size=16).digest()
+        with self._cache_lock:
+            features = self._paragraph_cache.get(key)
+            if features is not None:
+                self._paragraph_cache.move_to_end(key)
+                self.cache_hits += 1
+                return features
+            self.cache_misses += 1
+
+        features = self._compute_paragraph_features(paragraph)
+
+        with self._cache_lock:
+            self._paragraph_cache[key] = features
+            while len(self._paragraph_cache) > PARAGRAPH_CACHE_SIZE:
+                self._paragraph_cache.popitem(last=False)
+        return features
+
+    def _compute_paragraph_features(self, paragraph: str) -> ParagraphFeatures:
+        """扫描、分句、分词并提取人名和对话（只处理一个段落）"""
+        scan = self._matcher.scan(paragraph)
+        sentences = self._split_sentences(paragraph, scan)
+        token_counts = Counter(self._segmenter.cut(paragraph))
+        return ParagraphFeatures(
+            length=len(paragraph),
+            whitespace_tokens=len(paragraph.split()),
+            pattern_counts=scan.pattern_id_counts(),
+            sentence_lengths=tuple(end - start for start, end in sentences),
+            complex_sentences=self._count_complex_sentences(sentences, scan),
+            tokens=frozenset(token_counts),
+            token_total=sum(token_counts.values()),
+            keyword_counts={
+                word: count for word, count in token_counts.items()
+                if word not in KEYWORD_STOP_WORDS and len(word) > 1
+            },
+            chinese_names=self._find_names(CHINESE_NAME_PATTERN, paragraph),
+            english_names=self._find_names(ENGLISH_NAME_PATTERN, paragraph),
+            dialogues=tuple((m.group(1), m.start(1)) for m in DIALOGUE_PATTERN.finditer(paragraph))
+        )
+
+    @staticmethod
+    def _find_names(pattern: "re.Pattern", paragraph: str) -> Dict[str, Tuple[int, int]]:
+        names: Dict[str, Tuple[int, int]] = {}
+        for match in pattern.finditer(paragraph):
+            name = match.group()
+            if 2 <= len(name) <= 4:  # 合理的姓名长度
+                count, first = names.get(name, (0, match.start()))
+                names[name] = (count + 1, first)
+        return names
+
+    def _aggregate_features(self, paragraphs: List[ParagraphFeatures]) -> DocumentFeatures:
+        """汇总各段特征（段落之间按单个空格连接计算长度）"""
+        counts = PatternCounts(self._matcher)
+        sentence_lengths: List[int] = []
+        vocabulary: Set[str] = set()
+        keyword_counts: Counter = Counter()
+        chinese_names: Dict[str, Tuple[int, Tuple[int, int]]] = {}
+        english_names: Dict[str, Tuple[int, Tuple[int, int]]] = {}
+        dialogues: List[Tuple[str, Tuple[int, int]]] = []
+
+        for index, features in enumerate(paragraphs):
+            counts.add(features.pattern_counts)
+            sentence_lengths.extend(features.sentence_lengths)
+            vocabulary.update(features.tokens)
+            keyword_counts.update(features.keyword_counts)
+            for source, target in ((features.chinese_names, chinese_names), (features.english_names, english_names)):
+                for name, (count, offset) in source.items():
+                    total, first = target.get(name, (0, (index, offset)))
+                    target[name] = (total + count, first)
+            dialogues.extend((text, (index, offset)) for text, offset in features.dialogues)
+
+        return DocumentFeatures(
+            length=sum(f.length for f in paragraphs) + max(0, len(paragraphs) - 1),
+            whitespace_tokens=sum(f.whitespace_tokens for f in paragraphs),
+            counts=counts,
+            sentence_lengths=sentence_lengths,
+            complex_sentences=sum(f.complex_sentences for f in paragraphs),
+            vocabulary_size=len(vocabulary),
+            token_total=sum(f.token_total for f in paragraphs),
+            keyword_counts=keyword_counts,
+            chinese_names=chinese_names,
+            english_names=english_names,
+            dialogues=dialogues
+        )
+
+    def get_cache_statistics(self) -> Dict[str, Any]:
+        """段落特征缓存统计"""
+        with self._cache_lock:
+            total = self.cache_hits + self.cache_misses
+            return {
+                'paragraphs': len(self._paragraph_cache),
+                'max_paragraphs': PARAGRAPH_CACHE_SIZE,
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'hit_rate': self.cache_hits / total if total else 0.0
+            }
+
+    # ------------------------------------------------------------------
+    # 各项分析（基于汇总特征）
+    # ------------------------------------------------------------------
+
+    def _detect_narrative_voice(self, counts: PatternCounts) -> NarrativeVoice:
         """检测叙述视角"""
         try:
-            voice_counts = {}
-
-            for voice, indicators in self.narrative_indicators.items():
-                count = sum(content.count(word) for word in indicators)
-                voice_counts[voice] = count
+            voice_counts = {
+                voice: counts.count(('voice', voice)) for voice in self.narrative_indicators
+            }
 
             # 找到最多的视角
             if not any(voice_counts.values()):
@@ -311,21 +589,19 @@ class DeepContextAnalyzer:
             logger.error(f"检测叙述视角失败: {e}")
             return NarrativeVoice.THIRD_PERSON
 
-    def _analyze_writing_style(self, content: str) -> WritingStyle:
+    def _analyze_writing_style(self, features: DocumentFeatures) -> WritingStyle:
         """分析写作风格"""
         try:
-            sentences = self._split_sentences(content)
-
-            if not sentences:
+            counts = features.counts
+            sentence_lengths = features.sentence_lengths
+            if not sentence_lengths:
                 return WritingStyle()
 
             # 计算句子长度统计
-            sentence_lengths = [len(s) for s in sentences]
             avg_sentence_length = sum(sentence_lengths) / len(sentence_lengths)
 
             # 分析句子复杂度
-            complex_sentences = sum(1 for s in sentences if self._is_complex_sentence(s))
-            complexity_ratio = complex_sentences / len(sentences)
+            complexity_ratio = features.complex_sentences / len(sentence_lengths)
 
             # 确定复杂度级别
             if avg_sentence_length < 15 and complexity_ratio < 0.2:
@@ -338,20 +614,18 @@ class DeepContextAnalyzer:
                 sentence_complexity = WritingComplexity.SOPHISTICATED
 
             # 计算描述性密度
-            descriptive_words = self._count_descriptive_words(content)
-            descriptive_density = descriptive_words / len(content.split()) if content.split() else 0
+            descriptive_words = counts.count('descriptive')
+            descriptive_density = descriptive_words / features.whitespace_tokens if features.whitespace_tokens else 0
 
             # 计算对话频率
-            dialogue_count = content.count('"') + content.count('"')
-            dialogue_frequency = dialogue_count / len(sentences) if sentences else 0
+            dialogue_count = counts.count('quote') * 2
+            dialogue_frequency = dialogue_count / len(sentence_lengths)
 
             # 计算词汇丰富度
-            words = list(jieba.cut(content))
-            unique_words = len(set(words))
-            vocabulary_richness = unique_words / len(words) if words else 0
+            vocabulary_richness = features.vocabulary_size / features.token_total if features.token_total else 0
 
             # 评估文学性
-            literary_sophistication = self._assess_literary_sophistication(content)
+            literary_sophistication = self._assess_literary_sophistication(counts)
 
             return WritingStyle(
                 sentence_complexity=sentence_complexity,
@@ -366,63 +640,54 @@ class DeepContextAnalyzer:
             logger.error(f"分析写作风格失败: {e}")
             return WritingStyle()
 
-    def _split_sentences(self, content: str) -> List[str]:
-        """分割句子"""
-        # 中文句子分割
-        sentence_endings = ['。', '！', '？', '…', '；']
-        sentences = []
-        current_sentence = ""
-
-        for char in content:
-            current_sentence += char
-            if char in sentence_endings:
-                if current_sentence.strip():
-                    sentences.append(current_sentence.strip())
-                current_sentence = ""
-
-        # 添加最后一个句子
-        if current_sentence.strip():
-            sentences.append(current_sentence.strip())
+    def _split_sentences(self, content: str, scan: ScanResult) -> List[Tuple[int, int]]:
+        """
+        分割句子
 
+        根据扫描得到的句末标点位置切分，返回去除首尾空白后的 (起始, 结束) 区间。
+        """
+        sentences = []
+        start = 0
+        boundaries = [position + 1 for position, _ in scan.positions('sentence_end')]
+        boundaries.append(len(content))
+        for end in boundaries:
+            # 去除首尾空白（预处理后只会剩下单个空格）
+            left, right = start, end
+            while left < right and content[left].isspace():
+                left += 1
+            while right > left and content[right - 1].isspace():
+                right -= 1
+            if left < right:
+                sentences.append((left, right))
+            start = end
         return sentences
 
+    def _count_complex_sentences(self, sentences: List[Tuple[int, int]], scan: ScanResult) -> int:
+        """统计包含复杂句特征词的句子数"""
+        if not sentences:
+            return 0
+        sentence_ends = [end for _, end in sentences]
+        complex_indexes = set()
+        for position, word in scan.positions('complex'):
+            index = bisect.bisect_right(sentence_ends, position)
+            if index < len(sentences):
+                start, end = sentences[index]
+                if start <= position and position + len(word) <= end:
+                    complex_indexes.add(index)
+        return len(complex_indexes)
+
     def _is_complex_sentence(self, sentence: str) -> bool:
         """判断是否为复杂句子"""
-        # 复杂句子的特征
-        complex_indicators = ['虽然', '尽管', '不仅', '而且', '因为', '所以', '如果', '那么']
-        return any(indicator in sentence for indicator in complex_indicators)
-
-    def _count_descriptive_words(self, content: str) -> int:
-        """计算描述性词汇数量"""
-        descriptive_patterns = [
-            r'[形容词]+的',  # 形容词+的
-            r'[副词]+地',    # 副词+地
-        ]
-
-        descriptive_words = ['美丽', '漂亮', '优雅', '壮观', '宁静', '热闹', '繁华', '古老']
-
-        count = 0
-        for word in descriptive_words:
-            count += content.count(word)
-
-        return count
+        return any(indicator in sentence for indicator in COMPLEX_SENTENCE_INDICATORS)
 
-    def _assess_literary_sophistication(self, content: str) -> float:
+    def _assess_literary_sophistication(self, counts: PatternCounts) -> float:
         """评估文学性"""
         try:
-            # 文学性指标
-            literary_indicators = {
-                '修辞手法': ['比喻', '拟人', '排比', '对偶'],
-                '文学词汇': ['诗意', '韵味', '意境', '神韵'],
-                '深度表达': ['内心', '灵魂', '精神', '哲理']
-            }
-
             total_score = 0
             max_score = 0
 
-            for category, indicators in literary_indicators.items():
-                category_score = sum(content.count(word) for word in indicators)
-                total_score += category_score
+            for category, indicators in LITERARY_SOPHISTICATION_INDICATORS.items():
+                total_score += counts.count(('literary', category))
                 max_score += len(indicators)
 
             # 标准化到0-1范围
@@ -435,35 +700,27 @@ class DeepContextAnalyzer:
             logger.error(f"评估文学性失败: {e}")
             return 0.0
 
-    def _extract_character_info(self, content: str) -> Dict[str, CharacterInfo]:
+    def _extract_character_info(self, features: DocumentFeatures) -> Dict[str, CharacterInfo]:
         """提取角色信息"""
         try:
             characters = {}
-
-            # 使用正则表达式查找可能的角色名
-            # 中文姓名模式
-            name_patterns = [
-                r'[王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯龙史陶黎贺顾毛郝龚邵万钱严覃武戴莫孔向汤][一-龯]{1,2}',
-                r'[A-Z][a-z]+',  # 英文名
-            ]
-
-            for pattern in name_patterns:
-                matches = re.findall(pattern, content)
-                for name in matches:
-                    if len(name) >= 2 and len(name) <= 4:  # 合理的姓名长度
-                        if name not in characters:
-                            characters[name] = CharacterInfo(name=name)
-                        characters[name].mentions += 1
-
-            # 分析对话
-            dialogue_pattern = r'"([^"]*)"'
-            dialogues = re.findall(dialogue_pattern, content)
-
-            # 简单的对话归属分析
-            for dialogue in dialogues:
-                # 查找对话前后的角色名
+            first_mentions = {}
+
+            # 中文姓名在前、英文名在后，各自按首次出现顺序
+            for names in (features.chinese_names, features.english_names):
+                for name, (mentions, first) in names.items():
+                    if name not in characters:
+                        characters[name] = CharacterInfo(name=name)
+                        first_mentions[name] = first
+                    characters[name].mentions += mentions
+
+            # 简单的对话归属分析：对话中提到的角色，或在该对话首次出现之前已出场的角色
+            first_dialogues: Dict[str, Tuple[int, int]] = {}
+            for dialogue, position in features.dialogues:
+                first_dialogues.setdefault(dialogue, position)
+            for dialogue, _ in features.dialogues:
                 for name in characters:
-                    if name in dialogue or content.find(dialogue) > content.find(name):
+                    if name in dialogue or first_dialogues[dialogue] > first_mentions[name]:
                         characters[name].dialogue_count += 1
                         break
 
@@ -474,33 +731,23 @@ class DeepContextAnalyzer:
             logger.error(f"提取角色信息失败: {e}")
             return {}
 
-    def _analyze_plot_structure(self, content: str) -> PlotStructure:
+    def _analyze_plot_structure(self, features: DocumentFeatures) -> PlotStructure:
         """分析情节结构"""
         try:
-            # 情节阶段指示词
-            stage_indicators = {
-                '开端': ['开始', '起初', '最初', '首先'],
-                '发展': ['然后', '接着', '随后', '后来'],
-                '高潮': ['突然', '忽然', '瞬间', '终于'],
-                '结局': ['最后', '最终', '结果', '终于']
-            }
+            counts = features.counts
 
             # 分析当前阶段
-            stage_scores = {}
-            for stage, indicators in stage_indicators.items():
-                score = sum(content.count(word) for word in indicators)
-                stage_scores[stage] = score
+            stage_scores = {stage: counts.count(('stage', stage)) for stage in PLOT_STAGE_INDICATORS}
 
             current_stage = max(stage_scores, key=stage_scores.get) if stage_scores else "发展"
 
             # 分析紧张程度
-            tension_words = ['紧张', '危险', '急迫', '焦虑', '担心', '害怕']
-            tension_count = sum(content.count(word) for word in tension_words)
+            tension_count = counts.count('tension')
             tension_level = min(tension_count / 10, 1.0)  # 标准化到0-1
 
             # 分析节奏
-            sentence_count = len(self._split_sentences(content))
-            avg_sentence_length = len(content) / sentence_count if sentence_count > 0 else 0
+            sentence_count = len(features.sentence_lengths)
+            avg_sentence_length = features.length / sentence_count if sentence_count > 0 else 0
 
             if avg_sentence_length < 15:
                 pacing = "fast"
@@ -521,14 +768,10 @@ class DeepContextAnalyzer:
             logger.error(f"分析情节结构失败: {e}")
             return PlotStructure()
 
-    def _analyze_emotional_tone(self, content: str) -> EmotionalTone:
+    def _analyze_emotional_tone(self, counts: PatternCounts) -> EmotionalTone:
         """分析情感基调"""
         try:
-            emotion_scores = {}
-
-            for tone, words in self.emotion_words.items():
-                score = sum(content.count(word) for word in words)
-                emotion_scores[tone] = score
+            emotion_scores = {tone: counts.count(('emotion', tone)) for tone in self.emotion_words}
 
             if not any(emotion_scores.values()):
                 return EmotionalTone.NEUTRAL
@@ -548,30 +791,17 @@ class DeepContextAnalyzer:
             logger.error(f"分析情感基调失败: {e}")
             return EmotionalTone.NEUTRAL
 
-    def _extract_scene_setting(self, content: str) -> SceneSetting:
+    def _extract_scene_setting(self, counts: PatternCounts) -> SceneSetting:
         """提取场景设定"""
         try:
-            # 地点词汇
-            location_words = ['房间', '客厅', '卧室', '厨房', '花园', '公园', '街道', '学校', '办公室']
-            detected_locations = [word for word in location_words if word in content]
-            location = detected_locations[0] if detected_locations else "unknown"
-
-            # 时间词汇
-            time_words = ['早晨', '上午', '中午', '下午', '傍晚', '晚上', '深夜', '春天', '夏天', '秋天', '冬天']
-            detected_times = [word for word in time_words if word in content]
-            time_period = detected_times[0] if detected_times else "unknown"
+            # 地点、时间取词表中第一个出现的词
+            location = counts.first('location') or "unknown"
+            time_period = counts.first('time') or "unknown"
 
             # 氛围词汇
-            atmosphere_words = {
-                'peaceful': ['宁静', '安详', '平和'],
-                'tense': ['紧张', '压抑', '沉重'],
-                'joyful': ['欢快', '热闹', '活跃'],
-                'melancholic': ['忧郁', '悲伤', '沉闷']
-            }
-
             atmosphere = "neutral"
-            for mood, words in atmosphere_words.items():
-                if any(word in content for word in words):
+            for mood in ATMOSPHERE_WORDS:
+                if counts.has(('atmosphere', mood)):
                     atmosphere = mood
                     break
 
@@ -579,97 +809,38 @@ class DeepContextAnalyzer:
                 location=location,
                 time_period=time_period,
                 atmosphere=atmosphere,
-                sensory_details=self._extract_sensory_details(content)
+                sensory_details=self._extract_sensory_details(counts)
             )
 
         except Exception as e:
             logger.error(f"提取场景设定失败: {e}")
             return SceneSetting()
 
-    def _extract_sensory_details(self, content: str) -> List[str]:
+    def _extract_sensory_details(self, counts: PatternCounts) -> List[str]:
         """提取感官细节"""
-        sensory_patterns = {
-            '视觉': ['看到', '看见', '观察', '注视', '颜色', '光线'],
-            '听觉': ['听到', '听见', '声音', '音乐', '噪音'],
-            '触觉': ['触摸', '感受', '温度', '质感'],
-            '嗅觉': ['闻到', '香味', '气味'],
-            '味觉': ['尝到', '味道', '甜', '苦', '酸']
-        }
-
-        detected_details = []
-        for sense, words in sensory_patterns.items():
-            if any(word in content for word in words):
-                detected_details.append(sense)
+        return [sense for sense in SENSORY_PATTERNS if counts.has(('sense', sense))]
 
-        return detected_details
-
-    def _detect_literary_devices(self, content: str) -> List[str]:
+    def _detect_literary_devices(self, counts: PatternCounts) -> List[str]:
         """检测文学手法"""
-        detected_devices = []
-
-        for device, indicators in self.literary_devices.items():
-            if any(indicator in content for indicator in indicators):
-                detected_devices.append(device)
+        return [device for device in self.literary_devices if counts.has(('device', device))]
 
-        return detected_devices
-
-    def _detect_genre_indicators(self, content: str) -> List[str]:
+    def _detect_genre_indicators(self, counts: PatternCounts) -> List[str]:
         """检测文体指示器"""
-        genre_patterns = {
-            '言情': ['爱情', '恋爱', '情感', '浪漫'],
-            '悬疑': ['谜团', '线索', '调查', '真相'],
-            '科幻': ['科技', '未来', '机器人', '太空'],
-            '奇幻': ['魔法', '精灵', '龙', '魔兽'],
-            '历史': ['古代', '朝代', '皇帝', '宫廷']
-        }
-
-        detected_genres = []
-        for genre, indicators in genre_patterns.items():
-            if any(indicator in content for indicator in indicators):
-                detected_genres.append(genre)
-
-        return detected_genres
+        return [genre for genre in GENRE_PATTERNS if counts.has(('genre', genre))]
 
-    def _extract_keywords(self, content: str) -> List[str]:
+    def _extract_keywords(self, features: DocumentFeatures) -> List[str]:
         """提取关键词"""
         try:
-            # 使用jieba分词
-            words = list(jieba.cut(content))
-
-            # 过滤停用词
-            stop_words = {'的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这'}
-
-            filtered_words = [word for word in words if word not in stop_words and len(word) > 1]
-
-            # 统计词频
-            word_freq = Counter(filtered_words)
-
-            # 返回前10个高频词
-            keywords = [word for word, freq in word_freq.most_common(10)]
-
-            return keywords
+            # 各段已过滤停用词；汇总词频保持首次出现顺序，并列时的排序与整篇分词一致
+            return [word for word, freq in features.keyword_counts.most_common(10)]
 
         except Exception as e:
             logger.error(f"提取关键词失败: {e}")
             return []
 
-    def _extract_themes(self, content: str) -> List[str]:
+    def _extract_themes(self, counts: PatternCounts) -> List[str]:
         """提取主题"""
-        theme_patterns = {
-            '成长': ['成长', '学习', '进步', '改变'],
-            '友情': ['朋友', '友谊', '伙伴', '同伴'],
-            '亲情': ['家人', '父母', '兄弟', '姐妹'],
-            '爱情': ['爱情', '恋爱', '情侣', '爱人'],
-            '冒险': ['冒险', '探险', '旅行', '发现'],
-            '正义': ['正义', '公平', '善良', '帮助']
-        }
-
-        detected_themes = []
-        for theme, indicators in theme_patterns.items():
-            if any(indicator in content for indicator in indicators):
-                detected_themes.append(theme)
-
-        return detected_themes
+        return [theme for theme in THEME_PATTERNS if counts.has(('theme', theme))]
 
     def _create_default_context(self) -> WritingContext:
         """创建默认上下文"""
@@ -6,23 +6,31 @@
 负责管理AI组件与文档编辑器之间的上下文同步，
 提供实时的文档内容分析和智能建议。
 
+内容分析由每个文档一个的后台工作线程执行：更新在空闲窗口内防抖，
+只分析最新快照，被新内容取代的快照和分析结果直接丢弃。
+
 Author: AI小说编辑器团队
 Date: 2025-08-08
 """
 
 import logging
+import threading
+import time
 from typing import Dict, Any, Optional, List, Callable
 from dataclasses import dataclass
 from datetime import datetime
 from threading import Lock
-from PyQt6.QtCore import QTimer
 
 from .deep_context_analyzer import WritingContext
 from .singleton import get_deep_context_analyzer
+from .analysis_process_pool import get_analysis_pool
+from src.domain.events.document_events import DocumentContentChangedEvent
 from src.shared.events.event_bus import EventBus
 
 logger = logging.getLogger(__name__)
 
+WORKER_IDLE_TIMEOUT = 30.0  # 工作线程空闲超过该秒数后退出，下次更新时重新启动
+
 
 @dataclass
 class DocumentContextInfo:
@@ -34,12 +42,92 @@ class DocumentContextInfo:
     last_updated: datetime
     analysis_result: Optional[WritingContext] = None
     suggestions: List[str] = None
+    content_version: int = 0  # 内容变化时递增，用于丢弃过期的分析结果
+    content_hash: str = ""    # 由内容变更事件同步时记录的版本哈希，用于判断能否应用下一个增量
     
     def __post_init__(self):
         if self.suggestions is None:
             self.suggestions = []
 
 
+class _DocumentAnalysisWorker:
+    """
+    单个文档的分析工作线程
+
+    只保留最新提交的快照（latest-wins），在最后一次提交后的空闲窗口结束时才执行分析；
+    空闲一段时间后线程退出，下次提交时重新启动。
+    """
+
+    def __init__(self, document_id: str, run: Callable[[DocumentContextInfo], None]):
+        self.document_id = document_id
+        self._run = run
+        self._condition = threading.Condition()
+        self._pending: Optional[DocumentContextInfo] = None
+        self._last_submit = 0.0
+        self._debounce_seconds = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self.superseded = 0
+        self.completed = 0
+
+    def submit(self, snapshot: DocumentContextInfo, debounce_seconds: float) -> None:
+        """提交快照（替换尚未分析的旧快照）"""
+        with self._condition:
+            if self._stopped:
+                return
+            if self._pending is not None:
+                self.superseded += 1
+            self._pending = snapshot
+            self._last_submit = time.monotonic()
+            self._debounce_seconds = max(0.0, debounce_seconds)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop,
+                    name=f"context-analysis-{self.document_id}",
+                    daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._pending = None
+            self._condition.notify()
+
+    @property
+    def is_busy(self) -> bool:
+        with self._condition:
+            return self._pending is not None
+
+    def _next_snapshot(self) -> Optional[DocumentContextInfo]:
+        """等待空闲窗口结束后取出最新快照；停止或空闲超时返回 None"""
+        with self._condition:
+            while not self._stopped:
+                if self._pending is None:
+                    if not self._condition.wait(WORKER_IDLE_TIMEOUT) and self._pending is None:
+                        break
+                    continue
+                remaining = self._last_submit + self._debounce_seconds - time.monotonic()
+                if remaining <= 0:
+                    snapshot, self._pending = self._pending, None
+                    return snapshot
+                self._condition.wait(remaining)
+            self._thread = None
+            return None
+
+    def _loop(self) -> None:
+        while True:
+            snapshot = self._next_snapshot()
+            if snapshot is None:
+                return
+            try:
+                self._run(snapshot)
+                self.completed += 1
+            except Exception as e:
+                logger.error(f"文档上下文分析失败 {self.document_id}: {e}")
+
+
 class DocumentContextManager:
     """
     文档上下文管理器
@@ -59,6 +147,10 @@ class DocumentContextManager:
         # 文档上下文缓存
         self._document_contexts: Dict[str, DocumentContextInfo] = {}
         self._context_lock = Lock()
+
+        # 每个文档一个分析工作线程
+        self._analysis_workers: Dict[str, _DocumentAnalysisWorker] = {}
+        self._stale_results = 0
         
         # AI组件注册表
         self._ai_components: Dict[str, Any] = {}
@@ -67,7 +159,18 @@ class DocumentContextManager:
         # 配置参数
         self.auto_analysis_enabled = True
         self.min_content_length = 50
-        self.analysis_debounce_ms = 1000  # 防抖延迟
+        self.analysis_debounce_ms = 1000  # 防抖延迟（最后一次更新后的空闲窗口）
+
+        # 订阅内容变更事件，按增量同步已跟踪文档的上下文
+        if event_bus is not None:
+            try:
+                event_bus.subscribe(
+                    DocumentContentChangedEvent,
+                    self._on_document_content_changed,
+                    subscriber=self
+                )
+            except Exception as e:
+                logger.warning(f"订阅文档内容变更事件失败: {e}")
         
         logger.info("文档上下文管理器初始化完成")
     
@@ -99,32 +202,88 @@ class DocumentContextManager:
     ) -> None:
         """更新文档上下文"""
         with self._context_lock:
+            previous = self._document_contexts.get(document_id)
+            content_changed = previous is None or (previous.content is not content and previous.content != content)
+
             # 创建或更新上下文信息
             context_info = DocumentContextInfo(
                 document_id=document_id,
                 content=content,
                 selected_text=selected_text,
                 cursor_position=cursor_position,
-                last_updated=datetime.now()
+                last_updated=datetime.now(),
+                content_version=previous.content_version + 1 if previous else 0
             )
-            
+            if previous is not None and not content_changed:
+                # 只有选区/光标变化：沿用已有分析结果，不重新分析
+                context_info.content_version = previous.content_version
+                context_info.content_hash = previous.content_hash
+                context_info.analysis_result = previous.analysis_result
+                if previous.analysis_result is not None:
+                    context_info.suggestions = self._build_suggestions(context_info, previous.analysis_result)
+
             self._document_contexts[document_id] = context_info
             logger.debug(f"文档上下文已更新: {document_id}, 内容长度: {len(content)}")
         
         # 异步分析上下文
-        if self.auto_analysis_enabled and len(content) >= self.min_content_length:
-            self._analyze_context_async(document_id)
+        if content_changed and self.auto_analysis_enabled and len(content) >= self.min_content_length:
+            self._analyze_context_async(context_info)
         
-        # 通知所有AI组件
+        # 通知所有AI组件并执行回调
+        self._notify_context_updated(document_id, context_info)
+    
+    def _on_document_content_changed(self, event: DocumentContentChangedEvent) -> None:
+        """
+        按内容变更事件同步上下文（在事件总线的同步处理器线程池中执行，组件通知转到主线程）
+
+        只处理已跟踪的文档。已处于事件的结果版本时忽略；否则直接采用事件提供的全文（不复制），
+        并按增量平移光标位置，不再比较新旧全文。分析器按段落缓存特征，只有改动的段落会重新分析。
+        """
+        with self._context_lock:
+            previous = self._document_contexts.get(event.document_id)
+            if previous is None or previous.content_hash == event.result_hash:
+                return
+            content = event.full_text()
+            if previous.content is content:
+                previous.content_hash = event.result_hash
+                return
+
+            cursor_position = previous.cursor_position
+            removed_end = event.position + event.removed_length
+            if cursor_position >= removed_end:
+                cursor_position += len(event.inserted_text) - event.removed_length
+            elif cursor_position > event.position:
+                cursor_position = event.position + len(event.inserted_text)
+
+            context_info = DocumentContextInfo(
+                document_id=event.document_id,
+                content=content,
+                selected_text=previous.selected_text,
+                cursor_position=cursor_position,
+                last_updated=datetime.now(),
+                content_version=previous.content_version + 1,
+                content_hash=event.result_hash
+            )
+            self._document_contexts[event.document_id] = context_info
+
+        if self.auto_analysis_enabled and len(content) >= self.min_content_length:
+            self._analyze_context_async(context_info)
+
+        # 通知组件和回调必须在主线程
+        from src.shared.utils.async_manager import get_async_manager
+        get_async_manager().callback_signal.emit(
+            lambda: self._notify_context_updated(event.document_id, context_info)
+        )
+
+    def _notify_context_updated(self, document_id: str, context_info: DocumentContextInfo) -> None:
+        """通知AI组件并执行上下文更新回调"""
         self._notify_ai_components(document_id)
-        
-        # 执行回调
         for callback in self._update_callbacks:
             try:
                 callback(document_id, context_info)
             except Exception as e:
                 logger.error(f"上下文更新回调执行失败: {e}")
-    
+
     def get_document_context(self, document_id: str) -> Optional[DocumentContextInfo]:
         """获取文档上下文"""
         with self._context_lock:
@@ -150,7 +309,7 @@ class DocumentContextManager:
             return None
         
         try:
-            analysis_result = self.context_analyzer.analyze_content(context_info.content)
+            analysis_result = self.context_analyzer.analyze_writing_context(context_info.content)
             
             # 更新缓存
             with self._context_lock:
@@ -173,38 +332,7 @@ class DocumentContextManager:
         suggestions = []
         
         try:
-            # 基于内容长度的建议
-            content_length = len(context_info.content)
-            if content_length < 100:
-                suggestions.append("💡 可以添加更多的背景描述或人物介绍")
-            elif content_length > 2000:
-                suggestions.append("📝 内容较长，可以考虑分段或添加小标题")
-            
-            # 基于选中文本的建议
-            if context_info.selected_text:
-                selected_length = len(context_info.selected_text)
-                if selected_length < 50:
-                    suggestions.append("🔍 可以对选中文本进行扩展描述")
-                else:
-                    suggestions.append("✨ 可以对选中文本进行润色优化")
-            
-            # 基于分析结果的建议
-            if context_info.analysis_result:
-                analysis = context_info.analysis_result
-                
-                # 角色相关建议
-                if len(analysis.character_analysis) == 0:
-                    suggestions.append("👥 可以添加更多角色描述和对话")
-                elif len(analysis.character_analysis) > 5:
-                    suggestions.append("🎭 角色较多，注意保持各角色的独特性")
-                
-                # 情感基调建议
-                if analysis.emotional_tone.value == "neutral":
-                    suggestions.append("🎨 可以增强情感表达，让文字更有感染力")
-                
-                # 场景设定建议
-                if not analysis.scene_setting.location:
-                    suggestions.append("🏞️ 可以添加更多场景和环境描述")
+            suggestions = self._build_suggestions(context_info, context_info.analysis_result)
             
             # 更新缓存
             with self._context_lock:
@@ -218,30 +346,95 @@ class DocumentContextManager:
         
         return suggestions
     
+    @staticmethod
+    def _build_suggestions(context_info: DocumentContextInfo, analysis: Optional[WritingContext]) -> List[str]:
+        """根据内容、选中文本和分析结果生成建议（纯计算）"""
+        suggestions = []
+
+        # 基于内容长度的建议
+        content_length = len(context_info.content)
+        if content_length < 100:
+            suggestions.append("💡 可以添加更多的背景描述或人物介绍")
+        elif content_length > 2000:
+            suggestions.append("📝 内容较长，可以考虑分段或添加小标题")
+
+        # 基于选中文本的建议
+        if context_info.selected_text:
+            selected_length = len(context_info.selected_text)
+            if selected_length < 50:
+                suggestions.append("🔍 可以对选中文本进行扩展描述")
+            else:
+                suggestions.append("✨ 可以对选中文本进行润色优化")
+
+        # 基于分析结果的建议
+        if analysis:
+            # 角色相关建议
+            if len(analysis.character_analysis) == 0:
+                suggestions.append("👥 可以添加更多角色描述和对话")
+            elif len(analysis.character_analysis) > 5:
+                suggestions.append("🎭 角色较多，注意保持各角色的独特性")
+
+            # 情感基调建议
+            if analysis.emotional_tone.value == "neutral":
+                suggestions.append("🎨 可以增强情感表达，让文字更有感染力")
+
+            # 场景设定建议
+            if not analysis.scene_setting.location:
+                suggestions.append("🏞️ 可以添加更多场景和环境描述")
+
+        return suggestions
+
     def clear_document_context(self, document_id: str) -> None:
-        """清除文档上下文"""
+        """清除文档上下文（同时停止该文档的分析线程）"""
         with self._context_lock:
             if document_id in self._document_contexts:
                 del self._document_contexts[document_id]
                 logger.debug(f"文档上下文已清除: {document_id}")
+            worker = self._analysis_workers.pop(document_id, None)
+        if worker:
+            worker.stop()
+
+    def shutdown(self) -> None:
+        """停止所有分析线程"""
+        with self._context_lock:
+            workers = list(self._analysis_workers.values())
+            self._analysis_workers.clear()
+        for worker in workers:
+            worker.stop()
     
-    def _analyze_context_async(self, document_id: str) -> None:
-        """异步分析上下文（分析在后台执行，UI更新通过主线程信号）"""
-        import threading
+    def _analyze_context_async(self, snapshot: DocumentContextInfo) -> None:
+        """把快照交给该文档的分析线程（防抖、只分析最新快照）"""
+        with self._context_lock:
+            worker = self._analysis_workers.get(snapshot.document_id)
+            if worker is None:
+                worker = _DocumentAnalysisWorker(snapshot.document_id, self._run_analysis)
+                self._analysis_workers[snapshot.document_id] = worker
+        worker.submit(snapshot, self.analysis_debounce_ms / 1000.0)
 
-        def analyze():
-            try:
-                # 仅做纯计算或数据更新
-                self.analyze_document_context(document_id)
-                self.generate_writing_suggestions(document_id)
-                # 通知组件更新必须在主线程
-                from src.shared.utils.async_manager import get_async_manager
-                get_async_manager().callback_signal.emit(lambda: self._notify_ai_components(document_id))
-            except Exception as e:
-                logger.error(f"异步上下文分析失败: {e}")
+    def _run_analysis(self, snapshot: DocumentContextInfo) -> None:
+        """在分析线程中执行：分析快照内容，结果仍对应最新内容时才写回并通知组件"""
+        document_id = snapshot.document_id
+        # 分析在工作进程中执行，本线程只等待结果
+        analysis_result = get_analysis_pool().analyze_writing_context(
+            snapshot.content, key=f"document_context:{document_id}"
+        )
+        if analysis_result is None:
+            return
 
-        thread = threading.Thread(target=analyze, daemon=True)
-        thread.start()
+        with self._context_lock:
+            current = self._document_contexts.get(document_id)
+            if current is None or current.content_version != snapshot.content_version:
+                # 分析期间内容已变化，新快照已在排队
+                self._stale_results += 1
+                logger.debug(f"丢弃过期的上下文分析结果: {document_id}")
+                return
+            current.analysis_result = analysis_result
+            current.suggestions = self._build_suggestions(current, analysis_result)
+
+        logger.debug(f"文档上下文分析完成: {document_id}, {len(current.suggestions)} 条建议")
+        # 通知组件更新必须在主线程
+        from src.shared.utils.async_manager import get_async_manager
+        get_async_manager().callback_signal.emit(lambda: self._notify_ai_components(document_id))
     
     def _notify_ai_components(self, document_id: str) -> None:
         """通知所有AI组件上下文更新"""
@@ -271,8 +464,15 @@ class DocumentContextManager:
                     doc_type="chapter",
                     metadata={'id': context_info.document_id}
                 )
+                # 设置光标位置（提示词正文窗口的锚点）
+                if hasattr(component, 'update_cursor_position'):
+                    component.update_cursor_position(context_info.cursor_position)
             elif hasattr(component, 'set_context'):
-                component.set_context(context_info.content, context_info.selected_text)
+                component.set_context(
+                    context_info.content,
+                    context_info.selected_text,
+                    cursor_position=context_info.cursor_position
+                )
             
             # 设置选中文本
             if hasattr(component, 'set_selected_text'):
@@ -286,9 +486,15 @@ class DocumentContextManager:
     def get_statistics(self) -> Dict[str, Any]:
         """获取统计信息"""
         with self._context_lock:
+            workers = list(self._analysis_workers.values())
             return {
                 'total_documents': len(self._document_contexts),
                 'registered_components': len(self._ai_components),
                 'update_callbacks': len(self._update_callbacks),
-                'auto_analysis_enabled': self.auto_analysis_enabled
+                'auto_analysis_enabled': self.auto_analysis_enabled,
+                'analysis_workers': len(workers),
+                'pending_analyses': sum(1 for w in workers if w.is_busy),
+                'completed_analyses': sum(w.completed for w in workers),
+                'superseded_snapshots': sum(w.superseded for w in workers),
+                'stale_results_dropped': self._stale_results
             }
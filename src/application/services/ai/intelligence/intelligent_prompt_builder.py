@@ -7,6 +7,8 @@ Author: AI小说编辑器团队
 Date: 2025-08-06
 """
 
+import hashlib
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 from enum import Enum
@@ -15,11 +17,17 @@ from .deep_context_analyzer import (
     DeepContextAnalyzer, WritingContext, NarrativeVoice, 
     WritingComplexity, EmotionalTone, WritingStyle
 )
+from .context_assembler import (
+    ContextAssembler, AssembledContext, DEFAULT_CONTEXT_BUDGET_TOKENS, truncate_to_tokens
+)
 from src.domain.ai.value_objects.ai_request_type import AIRequestType
 from src.shared.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 上下文分析结果缓存条数（按分析文本哈希）
+ANALYSIS_CACHE_SIZE = 16
+
 
 class PromptTemplate(Enum):
     """提示词模板类型"""
@@ -70,9 +78,17 @@ class IntelligentPromptBuilder:
     5. 提供构建推理过程
     """
     
-    def __init__(self, context_analyzer: Optional[DeepContextAnalyzer] = None):
+    def __init__(
+        self,
+        context_analyzer: Optional[DeepContextAnalyzer] = None,
+        context_budget_tokens: int = DEFAULT_CONTEXT_BUDGET_TOKENS
+    ):
         self.context_analyzer = context_analyzer or DeepContextAnalyzer()
         
+        # 按令牌预算组装上下文，只分析和发送光标附近的内容
+        self.context_assembler = ContextAssembler(context_budget_tokens)
+        self._analysis_cache: "OrderedDict[str, WritingContext]" = OrderedDict()
+        
         # 加载提示词模板
         self._load_prompt_templates()
         
@@ -224,7 +240,8 @@ class IntelligentPromptBuilder:
         request_type: AIRequestType,
         selected_text: str = "",
         user_intent: str = "",
-        target_length: int = 300
+        target_length: int = 300,
+        cursor_position: Optional[int] = None
     ) -> IntelligentPrompt:
         """
         构建智能提示词
@@ -235,15 +252,28 @@ class IntelligentPromptBuilder:
             selected_text: 选中文本
             user_intent: 用户意图
             target_length: 目标长度
+            cursor_position: 光标位置，用于确定正文窗口
             
         Returns:
             IntelligentPrompt: 智能提示词
         """
+        assembled: Optional[AssembledContext] = None
         try:
             logger.info(f"开始构建智能提示词: {request_type.value}")
             
-            # 深度分析写作上下文
-            writing_context = self.context_analyzer.analyze_writing_context(content)
+            # 按令牌预算组装上下文
+            assembled = self.context_assembler.assemble(
+                content,
+                cursor_position=cursor_position,
+                selected_text=selected_text
+            )
+            logger.debug(
+                f"上下文组装完成: {assembled.total_tokens}/{assembled.budget_tokens} 令牌，"
+                f"段落 {assembled.window_range[0]}-{assembled.window_range[1]}/{assembled.paragraph_count}"
+            )
+            
+            # 深度分析写作上下文（只分析组装后的窗口）
+            writing_context = self._analyze_context(assembled.window_text or assembled.selected_text)
             
             # 创建提示词上下文
             prompt_context = PromptContext(
@@ -258,7 +288,7 @@ class IntelligentPromptBuilder:
             
             # 构建提示词内容
             prompt_content = self._build_prompt_content(
-                template_type, prompt_context, content, selected_text
+                template_type, prompt_context, assembled
             )
             
             # 优化提示词
@@ -274,6 +304,7 @@ class IntelligentPromptBuilder:
             
             # 提取影响因素
             context_factors = self._extract_context_factors(writing_context)
+            context_factors.append(f"上下文令牌: {assembled.total_tokens}/{assembled.budget_tokens}")
             
             intelligent_prompt = IntelligentPrompt(
                 content=optimized_prompt,
@@ -289,7 +320,25 @@ class IntelligentPromptBuilder:
             
         except Exception as e:
             logger.error(f"构建智能提示词失败: {e}")
-            return self._create_fallback_prompt(content, request_type)
+            fallback_content = (
+                assembled.primary_text if assembled is not None
+                else truncate_to_tokens(content, self.context_assembler.budget_tokens)
+            )
+            return self._create_fallback_prompt(fallback_content, request_type)
+    
+    def _analyze_context(self, text: str) -> WritingContext:
+        """分析写作上下文，相同文本复用最近的分析结果"""
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+        cached = self._analysis_cache.get(key)
+        if cached is not None:
+            self._analysis_cache.move_to_end(key)
+            return cached
+        
+        writing_context = self.context_analyzer.analyze_writing_context(text)
+        self._analysis_cache[key] = writing_context
+        while len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+            self._analysis_cache.popitem(last=False)
+        return writing_context
     
     def _select_optimal_template(
         self, 
@@ -336,8 +385,7 @@ class IntelligentPromptBuilder:
         self,
         template_type: PromptTemplate,
         prompt_context: PromptContext,
-        content: str,
-        selected_text: str
+        assembled: AssembledContext
     ) -> str:
         """构建提示词内容"""
         try:
@@ -346,9 +394,9 @@ class IntelligentPromptBuilder:
             
             # 准备模板变量
             template_vars = {
-                'content': selected_text if selected_text else content,
+                'content': assembled.primary_text,
                 'narrative_voice': writing_context.narrative_voice.description,
-                'text_type': self._determine_text_type(selected_text, content),
+                'text_type': self._determine_text_type(assembled.selected_text, assembled.window_text),
                 'genre': ', '.join(writing_context.genre_indicators) or '文学',
             }
             
@@ -375,11 +423,21 @@ class IntelligentPromptBuilder:
             # 格式化模板
             prompt_content = template_config['base'].format(**template_vars)
             
+            background = self._build_background_section(assembled)
+            if background:
+                prompt_content = f"{background}\n\n{prompt_content}"
+            
             return prompt_content
             
         except Exception as e:
             logger.error(f"构建提示词内容失败: {e}")
-            return f"请处理以下内容：\n\n{content}"
+            return f"请处理以下内容：\n\n{assembled.primary_text}"
+    
+    def _build_background_section(self, assembled: AssembledContext) -> str:
+        """构建背景资料（选区的前后文）"""
+        if assembled.selected_text and assembled.window_text:
+            return f"【前后文】\n{assembled.window_text}"
+        return ""
     
     def _build_writing_requirements(self, writing_context: WritingContext) -> str:
         """构建写作要求"""
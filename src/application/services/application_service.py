@@ -10,7 +10,6 @@ from typing import Optional
 from pathlib import Path
 from datetime import datetime
 import json
-import asyncio
 
 from src.shared.events.event_bus import EventBus
 from src.shared.ioc.container import Container
@@ -131,6 +130,11 @@ class ApplicationService:
     
     @safe_execute("应用程序状态保存")
     def _save_application_state(self) -> None:
+        """保存应用程序状态（同步调用，在应用事件循环上执行写入）"""
+        from src.shared.utils.event_loop import run_coroutine_blocking
+        run_coroutine_blocking(self._save_application_state_async())
+
+    async def _save_application_state_async(self) -> None:
         """保存应用程序状态"""
         try:
             state = {
@@ -147,9 +151,7 @@ class ApplicationService:
             # 统一文件操作进行原子性写入
             from src.shared.utils.file_operations import get_file_operations
             ops = get_file_operations("app_state")
-            import asyncio
-            loop = asyncio.get_event_loop()
-            loop.run_until_complete(ops.save_json_atomic(state_file, state, create_backup=True))
+            await ops.save_json_atomic(state_file, state, create_backup=True)
 
             logger.debug("应用程序状态保存完成")
 
@@ -164,14 +166,14 @@ class ApplicationService:
     async def _on_project_opened(self, event) -> None:
         """处理项目打开事件"""
         self._current_project_id = event.project_id
-        self._save_application_state()
+        await self._save_application_state_async()
         logger.info(f"项目打开: {event.project_name} ({event.project_id})")
     
     async def _on_project_closed(self, event) -> None:
         """处理项目关闭事件"""
         if self._current_project_id == event.project_id:
             self._current_project_id = None
-            self._save_application_state()
+            await self._save_application_state_async()
         logger.info(f"项目关闭: {event.project_name} ({event.project_id})")
     
     @property
@@ -6,23 +6,34 @@
 提供项目备份和版本控制功能
 """
 
+import asyncio
 import os
 import shutil
 import zipfile
 import json
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
-from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, asdict
 
 from src.domain.entities.project import Project
 from src.domain.entities.document import Document
 from src.domain.repositories.project_repository import IProjectRepository
 from src.domain.repositories.document_repository import IDocumentRepository
+from src.infrastructure.repositories.backup_store import (
+    BackupChunkStore, COMPRESS_BATCH_BYTES, DEFAULT_IO_RATE, MANIFEST_FORMAT,
+    MANIFEST_FORMAT_VERSION, MANIFEST_SUFFIX, hash_chunk, split_content_chunks
+)
+from src.infrastructure.repositories.document_catalog import compute_content_hash
 from src.shared.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 仅存在于增量备份清单中的文档字段（恢复时不传给 Document.from_dict）
+MANIFEST_DOCUMENT_KEYS = ("content_hash", "content_chunks")
+
+# 正文读取回调：(文档, 备份中的文档数据) -> 正文；返回None表示备份中没有正文
+ContentReader = Callable[[Document, Dict[str, Any]], Awaitable[Optional[str]]]
 
 @dataclass
 class BackupInfo:
@@ -82,9 +93,11 @@ class BackupService:
     支持手动备份、自动备份和定时备份。
 
     实现方式：
-    - 使用ZIP格式压缩备份文件
+    - 默认创建增量备份：正文切块后存入跨备份共享的内容寻址块存储，
+      每次备份只写一个引用块的清单，未变化的文档直接复用上次备份的块序列
+    - 可选创建完整归档（ZIP格式，自包含，便于拷贝到其他机器）
     - 提供文档版本控制和历史管理
-    - 支持备份清理和空间管理
+    - 支持备份清理和空间管理（删除备份后回收不再被引用的块）
     - 提供备份恢复和版本回滚功能
 
     Attributes:
@@ -92,6 +105,7 @@ class BackupService:
         document_repository: 文档仓储接口
         backup_dir: 备份存储目录
         versions_dir: 版本存储目录
+        chunk_store: 增量备份块存储
         max_backups: 最大备份数量
         auto_backup_interval: 自动备份间隔（分钟）
         max_versions_per_document: 每个文档最大版本数
@@ -101,7 +115,8 @@ class BackupService:
         self,
         project_repository: IProjectRepository,
         document_repository: IDocumentRepository,
-        backup_dir: Path
+        backup_dir: Path,
+        io_rate: Optional[float] = DEFAULT_IO_RATE
     ):
         """
         初始化备份服务
@@ -110,6 +125,7 @@ class BackupService:
             project_repository: 项目仓储接口
             document_repository: 文档仓储接口
             backup_dir: 备份存储目录路径
+            io_rate: 增量备份写盘限速（字节/秒），None 表示不限速
         """
         self.project_repository = project_repository
         self.document_repository = document_repository
@@ -122,22 +138,38 @@ class BackupService:
         self.versions_dir.mkdir(parents=True, exist_ok=True)
         logger.debug(f"版本目录: versions_dir={self.versions_dir}")
 
+        # 增量备份块存储与清单
+        self.chunk_store = BackupChunkStore(backup_dir, io_rate)
+
         # 备份配置
         self.max_backups = 50  # 最大备份数量
         self.auto_backup_interval = 30  # 自动备份间隔（分钟）
         self.max_versions_per_document = 20  # 每个文档最大版本数
 
         logger.debug("备份服务初始化完成")
-    
+
+    def dispose(self) -> None:
+        """释放备份压缩工作进程（容器释放时调用）"""
+        self.chunk_store.close()
+
     async def create_backup(
         self,
         project_id: str,
         description: str = "",
-        backup_type: str = "manual"
+        backup_type: str = "manual",
+        full_archive: bool = False
     ) -> Optional[BackupInfo]:
-        """创建项目备份"""
+        """
+        创建项目备份
+
+        Args:
+            project_id: 项目ID
+            description: 备份描述
+            backup_type: 备份类型（manual/auto/scheduled）
+            full_archive: True 时创建自包含的ZIP完整归档，否则创建增量备份
+        """
         try:
-            logger.info(f"[备份] 开始创建: project_id={project_id}")
+            logger.info(f"[备份] 开始创建: project_id={project_id} full_archive={full_archive}")
             # 获取项目信息
             # 更稳健：优先通过 load 加载（支持自定义路径与索引回退）
             project = await self.project_repository.load(project_id)
@@ -146,77 +178,44 @@ class BackupService:
                 logger.error(f"项目不存在: {project_id}")
                 return None
 
-            # 获取项目文档（完整加载，包含正文）
+            # 获取项目文档（轻量对象，正文按需加载）
             documents = await self.document_repository.list_by_project(project_id)
             logger.info(f"[备份] 文档数量: {len(documents)}")
-            full_documents = []
-            try:
-                for d in documents:
-                    try:
-                        loaded = await self.document_repository.load(d.id)
-                        if loaded:
-                            full_documents.append(loaded)
-                        else:
-                            full_documents.append(d)
-                    except Exception:
-                        full_documents.append(d)
-                logger.info(f"[备份] 完整加载文档数量: {len(full_documents)}")
-            except Exception as e:
-                logger.warning(f"[备份] 完整加载文档失败，回退使用轻量文档: {e}")
-                full_documents = documents
-
-            # 生成备份ID和路径
-            backup_id = f"{project_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            backup_path = self.backup_dir / f"{backup_id}.zip"
-            logger.info(f"[备份] 目标路径: {backup_path}")
-
-            # 创建备份ZIP文件
-            try:
-                with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zipf:
-                    # 添加项目信息（将正文一并写入project.json，作为冗余）
-                    try:
-                        project_data = {
-                            "project": project.to_dict() if hasattr(project, 'to_dict') else {},
-                            "documents": [doc.to_dict() if hasattr(doc, 'to_dict') else {} for doc in full_documents],
-                            "backup_info": {
-                                "id": backup_id,
-                                "created_at": datetime.now().isoformat(),
-                                "description": description,
-                                "backup_type": backup_type
-                            }
-                        }
-
-                        zipf.writestr("project.json", json.dumps(project_data, ensure_ascii=False, indent=2, default=str))
-                        logger.info(f"[备份] 写入project.json，包含文档数: {len(project_data.get('documents', []))}")
 
-                    except Exception as e:
-                        logger.error(f"序列化项目数据失败: {e}")
-                        raise
-
-                    # 添加文档内容（独立正文文件，便于快速恢复）
-                    for doc in full_documents:
-                        try:
-                            content = getattr(doc, 'content', '') or ''
-                            doc_filename = f"documents/{doc.id}.txt"
-                            zipf.writestr(doc_filename, content)
-                            logger.info(f"[备份] 写入文档正文: {doc_filename} len={len(content)}")
-                        except Exception as e:
-                            logger.warning(f"添加文档内容失败 {getattr(doc,'id','?')}: {e}")
-                            continue
-
-            except Exception as e:
-                # 清理失败的备份文件
-                if backup_path.exists():
-                    backup_path.unlink()
-                raise
+            # 生成备份ID
+            created_at = datetime.now()
+            backup_id = self._new_backup_id(project_id, created_at)
+            backup_meta = {
+                "id": backup_id,
+                "project_id": project_id,
+                "created_at": created_at.isoformat(),
+                "description": description,
+                "backup_type": backup_type
+            }
+
+            if full_archive:
+                backup_path = self.backup_dir / f"{backup_id}.zip"
+                logger.info(f"[备份] 目标路径: {backup_path}")
+                full_documents = await self._load_full_documents(documents)
+                # 将正文一并写入project.json，作为冗余
+                project_data = {
+                    "project": project.to_dict() if hasattr(project, 'to_dict') else {},
+                    "documents": [doc.to_dict() if hasattr(doc, 'to_dict') else {} for doc in full_documents],
+                    "backup_info": backup_meta
+                }
+                contents = {doc.id: getattr(doc, 'content', '') or '' for doc in full_documents}
+                await asyncio.to_thread(self._write_full_archive, backup_path, project_data, contents)
+                size = backup_path.stat().st_size
+            else:
+                backup_path, size = await self._create_incremental_backup(project, documents, backup_meta)
 
             # 创建备份信息
             backup_info = BackupInfo(
                 id=backup_id,
                 project_id=project_id,
                 backup_path=backup_path,
-                created_at=datetime.now(),
-                size=backup_path.stat().st_size,
+                created_at=created_at,
+                size=size,
                 description=description,
                 backup_type=backup_type
             )
@@ -230,196 +229,471 @@ class BackupService:
         except Exception as e:
             logger.error(f"创建备份失败: {e}")
             return None
-    
+
+    def _new_backup_id(self, project_id: str, created_at: datetime) -> str:
+        """生成备份ID；同一秒内的多次备份（含不同格式）追加序号避免互相覆盖"""
+        base_id = f"{project_id}_{created_at.strftime('%Y%m%d_%H%M%S')}"
+        backup_id = base_id
+        sequence = 1
+        while (self.backup_dir / f"{backup_id}.zip").exists() or self.chunk_store.manifest_path(backup_id).exists():
+            backup_id = f"{base_id}_{sequence}"
+            sequence += 1
+        return backup_id
+
+    async def _load_full_documents(self, documents: List[Document]) -> List[Document]:
+        """完整加载文档（包含正文），失败时回退使用轻量文档"""
+        full_documents = []
+        try:
+            for d in documents:
+                try:
+                    loaded = await self.document_repository.load(d.id)
+                    full_documents.append(loaded if loaded else d)
+                except Exception:
+                    full_documents.append(d)
+            logger.info(f"[备份] 完整加载文档数量: {len(full_documents)}")
+        except Exception as e:
+            logger.warning(f"[备份] 完整加载文档失败，回退使用轻量文档: {e}")
+            full_documents = documents
+        return full_documents
+
+    @staticmethod
+    def _write_full_archive(backup_path: Path, project_data: Dict[str, Any], contents: Dict[str, str]) -> None:
+        """写入ZIP完整归档（在线程中执行）"""
+        try:
+            with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zipf:
+                zipf.writestr("project.json", json.dumps(project_data, ensure_ascii=False, indent=2, default=str))
+                logger.info(f"[备份] 写入project.json，包含文档数: {len(project_data.get('documents', []))}")
+
+                # 添加文档内容（独立正文文件，便于快速恢复）
+                for doc_id, content in contents.items():
+                    try:
+                        doc_filename = f"documents/{doc_id}.txt"
+                        zipf.writestr(doc_filename, content)
+                        logger.debug(f"[备份] 写入文档正文: {doc_filename} len={len(content)}")
+                    except Exception as e:
+                        logger.warning(f"添加文档内容失败 {doc_id}: {e}")
+                        continue
+        except Exception:
+            # 清理失败的备份文件
+            if backup_path.exists():
+                backup_path.unlink()
+            raise
+
+    async def _create_incremental_backup(
+        self,
+        project: Project,
+        documents: List[Document],
+        backup_meta: Dict[str, Any]
+    ) -> Tuple[Path, int]:
+        """
+        创建增量备份
+
+        正文哈希与上次备份一致的文档不读取正文，直接复用上次的块序列；
+        其余文档切块后只写入块存储中尚不存在的块。
+
+        Returns:
+            Tuple[Path, int]: (清单路径, 本次备份新增占用的字节数)
+        """
+        store = self.chunk_store
+        get_content_hash = getattr(self.document_repository, 'get_content_hash', None)
+
+        async with store.lock:
+            previous = await asyncio.to_thread(store.find_latest_manifest, project.id)
+            previous_docs = {
+                d.get("id"): d for d in (previous or {}).get("documents", []) if isinstance(d, dict)
+            }
+
+            entries = []
+            pending: Dict[str, bytes] = {}
+            pending_bytes = 0
+            new_bytes = 0
+            reused = 0
+            total_chars = 0
+
+            for doc in documents:
+                previous_entry = previous_docs.get(doc.id)
+                current_hash = None
+                if previous_entry and callable(get_content_hash):
+                    try:
+                        current_hash = get_content_hash(doc.id)
+                    except Exception as e:
+                        logger.debug(f"[备份] 读取正文哈希失败: {doc.id}, {e}")
+
+                if current_hash and current_hash == previous_entry.get("content_hash"):
+                    entry = self._manifest_document_entry(doc)
+                    entry["content_hash"] = current_hash
+                    entry["content_chunks"] = list(previous_entry.get("content_chunks", []))
+                    entries.append(entry)
+                    reused += 1
+                    continue
+
+                loaded = None
+                try:
+                    loaded = await self.document_repository.load(doc.id)
+                except Exception as e:
+                    logger.warning(f"[备份] 加载文档失败，使用轻量文档: {doc.id}, {e}")
+                loaded = loaded or doc
+                content = getattr(loaded, 'content', '') or ''
+                total_chars += len(content)
+
+                chunk_hashes = []
+                for chunk in split_content_chunks(content):
+                    data = chunk.encode('utf-8')
+                    chunk_hash = hash_chunk(data)
+                    chunk_hashes.append(chunk_hash)
+                    if chunk_hash not in pending:
+                        pending[chunk_hash] = data
+                        pending_bytes += len(data)
+
+                entry = self._manifest_document_entry(loaded)
+                entry["content_hash"] = compute_content_hash(content)
+                entry["content_chunks"] = chunk_hashes
+                entries.append(entry)
+
+                if pending_bytes >= COMPRESS_BATCH_BYTES:
+                    new_bytes += await store.store_chunks(pending)
+                    pending, pending_bytes = {}, 0
+
+            if pending:
+                new_bytes += await store.store_chunks(pending)
+
+            manifest = {
+                "format": MANIFEST_FORMAT,
+                "version": MANIFEST_FORMAT_VERSION,
+                "backup_info": backup_meta,
+                "project": project.to_dict() if hasattr(project, 'to_dict') else {},
+                "documents": entries,
+                "stats": {
+                    "documents": len(entries),
+                    "reused_documents": reused,
+                    "loaded_chars": total_chars,
+                    "new_bytes": new_bytes
+                }
+            }
+            manifest_path = await store.write_manifest(backup_meta["id"], manifest)
+
+        logger.info(
+            f"[备份] 增量备份完成: 文档 {len(entries)} 个（复用 {reused} 个），"
+            f"新增块数据 {new_bytes} 字节"
+        )
+        return manifest_path, manifest_path.stat().st_size + new_bytes
+
+    @staticmethod
+    def _manifest_document_entry(document: Document) -> Dict[str, Any]:
+        """清单中的文档记录：元数据，不含正文"""
+        entry = document.to_dict() if hasattr(document, 'to_dict') else {"id": document.id}
+        entry.pop("content", None)
+        return entry
+
     async def restore_backup(self, backup_path: Path, target_root_path: Optional[Path] = None) -> Optional[str]:
-        """恢复备份"""
+        """恢复备份（ZIP完整归档或增量备份清单）"""
         try:
             logger.info(f"[恢复] 开始恢复: path={backup_path}")
             if not backup_path.exists():
                 logger.error(f"备份文件不存在: {backup_path}")
                 return None
 
-            # 验证备份文件
-            if not zipfile.is_zipfile(backup_path):
-                logger.error(f"无效的备份文件格式: {backup_path}")
+            if backup_path.suffix == MANIFEST_SUFFIX:
+                project_id = await self._restore_incremental_backup(backup_path, target_root_path)
+            else:
+                # 验证备份文件
+                if not zipfile.is_zipfile(backup_path):
+                    logger.error(f"无效的备份文件格式: {backup_path}")
+                    return None
+
+                with zipfile.ZipFile(backup_path, 'r') as zipf:
+                    # 读取项目信息
+                    project_json = zipf.read("project.json").decode('utf-8')
+                    logger.debug(f"[恢复] project.json 大小: {len(project_json)}")
+                    project_data = json.loads(project_json)
+
+                    async def read_content(document: Document, doc_data: Dict[str, Any]) -> Optional[str]:
+                        try:
+                            return zipf.read(f"documents/{document.id}.txt").decode('utf-8')
+                        except KeyError:
+                            return None
+
+                    project_id = await self._restore_project_data(project_data, target_root_path, read_content)
+
+            if project_id:
+                logger.info(f"备份恢复成功: {backup_path}")
+            return project_id
+
+        except Exception as e:
+            logger.error(f"恢复备份失败: {e}")
+            return None
+
+    async def _restore_incremental_backup(self, manifest_path: Path, target_root_path: Optional[Path]) -> Optional[str]:
+        """从增量备份清单恢复：先校验全部块存在，再改动项目"""
+        store = self.chunk_store
+        manifest = await asyncio.to_thread(store.read_manifest, manifest_path)
+        documents_data = [d for d in manifest.get("documents", []) if isinstance(d, dict)]
+        missing = await asyncio.to_thread(
+            store.missing_chunks,
+            (h for d in documents_data for h in d.get("content_chunks", []))
+        )
+        if missing:
+            logger.error(f"增量备份缺少 {len(missing)} 个数据块，无法恢复: {manifest_path}")
+            return None
+
+        async def read_content(document: Document, doc_data: Dict[str, Any]) -> Optional[str]:
+            chunks = doc_data.get("content_chunks")
+            if chunks is None:
                 return None
+            return await store.read_content(chunks)
 
-            # 解压备份文件
-            with zipfile.ZipFile(backup_path, 'r') as zipf:
-                # 读取项目信息
-                project_json = zipf.read("project.json").decode('utf-8')
-                logger.debug(f"[恢复] project.json 大小: {len(project_json)}")
-                project_data = json.loads(project_json)
-                logger.debug(f"[恢复] 包含文档数: {len(project_data.get('documents', []))}")
+        return await self._restore_project_data(manifest, target_root_path, read_content)
 
-                # 恢复项目
-                project_dict = project_data["project"]
-                try:
-                    project = Project.from_dict(project_dict)
-                except Exception:
-                    # 兼容旧备份格式
-                    project = Project(**project_dict)
+    async def _restore_project_data(
+        self,
+        project_data: Dict[str, Any],
+        target_root_path: Optional[Path],
+        read_content: ContentReader
+    ) -> str:
+        """按备份数据全量回滚项目：保存项目、删除备份中没有的文档、写入备份中的文档"""
+        logger.debug(f"[恢复] 包含文档数: {len(project_data.get('documents', []))}")
+
+        # 恢复项目
+        project_dict = project_data["project"]
+        try:
+            project = Project.from_dict(project_dict)
+        except Exception:
+            # 兼容旧备份格式
+            project = Project(**project_dict)
 
-                # 如果未包含 root_path，则使用目标路径（用于覆盖当前项目目录）
-                try:
-                    if (not getattr(project, 'root_path', None)) and target_root_path:
-                        logger.info(f"[恢复] 设置项目root_path: {target_root_path}")
-                        project.root_path = target_root_path
-                except Exception as e:
-                    logger.debug(f"[恢复] 设置root_path失败: {e}")
+        # 如果未包含 root_path，则使用目标路径（用于覆盖当前项目目录）
+        try:
+            if (not getattr(project, 'root_path', None)) and target_root_path:
+                logger.info(f"[恢复] 设置项目root_path: {target_root_path}")
+                project.root_path = target_root_path
+        except Exception as e:
+            logger.debug(f"[恢复] 设置root_path失败: {e}")
 
-                # 保存项目
-                await self.project_repository.save(project)
+        # 保存项目
+        await self.project_repository.save(project)
 
-                # 恢复文档（全量回滚：先删除现存中不在备份内的文档，再写入备份中的文档）
-                documents_data = project_data.get("documents", [])
-                backup_doc_ids = set()
-                for d in documents_data:
-                    try:
-                        if isinstance(d, dict) and d.get("id"):
-                            backup_doc_ids.add(d.get("id"))
-                    except Exception:
-                        continue
-                logger.info(f"[恢复] 备份文档IDs: {sorted(list(backup_doc_ids))}")
+        # 恢复文档（全量回滚：先删除现存中不在备份内的文档，再写入备份中的文档）
+        documents_data = project_data.get("documents", [])
+        backup_doc_ids = set()
+        for d in documents_data:
+            try:
+                if isinstance(d, dict) and d.get("id"):
+                    backup_doc_ids.add(d.get("id"))
+            except Exception:
+                continue
+        logger.info(f"[恢复] 备份文档IDs: {sorted(list(backup_doc_ids))}")
 
-                # 删除项目中多余的文档（不在备份里的）
+        # 删除项目中多余的文档（不在备份里的）
+        try:
+            # 恢复前清理项目级缓存，确保列出真实文件
+            try:
+                # 优先按项目清理
+                clear_project_fn = getattr(self.document_repository, '_clear_project_cache', None)
+                if callable(clear_project_fn):
+                    clear_project_fn(project.id)
+                    logger.info(f"[恢复] 已清理项目文档缓存: {project.id}")
+                # 兜底：直接删除统一性能管理器中的特定键
+                pm = getattr(self.document_repository, 'performance_manager', None)
+                cache_prefix = getattr(self.document_repository, '_cache_prefix', 'doc_repo')
+                if pm:
+                    pm.cache_delete(f"{cache_prefix}:project_docs:{project.id}")
+                    logger.debug(f"[恢复] 已删除缓存键: {cache_prefix}:project_docs:{project.id}")
+            except Exception as ce:
+                logger.debug(f"[恢复] 清理文档缓存失败: {ce}")
+
+            current_docs = await self.document_repository.list_by_project(project.id)
+            current_ids = [getattr(cd, 'id', None) for cd in (current_docs or [])]
+            logger.info(f"[恢复] 当前项目文档IDs: {current_ids}")
+            for cd in current_docs or []:
                 try:
-                    # 恢复前清理项目级缓存，确保列出真实文件
-                    try:
-                        # 优先按项目清理
-                        clear_project_fn = getattr(self.document_repository, '_clear_project_cache', None)
-                        if callable(clear_project_fn):
-                            clear_project_fn(project.id)
-                            logger.info(f"[恢复] 已清理项目文档缓存: {project.id}")
-                        # 兜底：直接删除统一性能管理器中的特定键
-                        pm = getattr(self.document_repository, 'performance_manager', None)
-                        cache_prefix = getattr(self.document_repository, '_cache_prefix', 'doc_repo')
-                        if pm:
-                            pm.cache_delete(f"{cache_prefix}:project_docs:{project.id}")
-                            logger.debug(f"[恢复] 已删除缓存键: {cache_prefix}:project_docs:{project.id}")
-                    except Exception as ce:
-                        logger.debug(f"[恢复] 清理文档缓存失败: {ce}")
-
-                    current_docs = await self.document_repository.list_by_project(project.id)
-                    current_ids = [getattr(cd, 'id', None) for cd in (current_docs or [])]
-                    logger.info(f"[恢复] 当前项目文档IDs: {current_ids}")
-                    for cd in current_docs or []:
+                    if getattr(cd, 'id', None) and cd.id not in backup_doc_ids:
+                        ok = await self.document_repository.delete(cd.id)
+                        logger.info(f"[恢复] 删除多余文档: {cd.id} ok={ok}")
+                except Exception as de:
+                    logger.warning(f"删除多余文档失败: {getattr(cd, 'id', None)} - {de}")
+
+            # 目录级别兜底清理：直接扫描 documents 目录与类型子目录
+            try:
+                base_path = getattr(self.document_repository, 'base_path', None)
+                if base_path:
+                    logger.info(f"[恢复] 目录清理起点: {base_path}")
+                    to_remove = []
+                    # 收集所有 .json 和 _content.txt
+                    candidates = list(base_path.glob("*.json")) + list(base_path.glob("*_content.txt"))
+                    # 类型子目录
+                    for sub in [p for p in base_path.iterdir() if p.is_dir()]:
+                        candidates += list(sub.glob("*.json")) + list(sub.glob("*_content.txt"))
+                    for f in candidates:
+                        stem = f.stem.replace("_content", "")
+                        if stem and stem not in backup_doc_ids:
+                            to_remove.append(f)
+                    for f in to_remove:
                         try:
-                            if getattr(cd, 'id', None) and cd.id not in backup_doc_ids:
-                                ok = await self.document_repository.delete(cd.id)
-                                logger.info(f"[恢复] 删除多余文档: {cd.id} ok={ok}")
-                        except Exception as de:
-                            logger.warning(f"删除多余文档失败: {getattr(cd, 'id', None)} - {de}")
+                            f.unlink(missing_ok=True)
+                            logger.info(f"[恢复] 目录清理: 删除文件 {f}")
+                        except Exception as fe:
+                            logger.warning(f"[恢复] 目录清理失败: {f} - {fe}")
+            except Exception as de:
+                logger.debug(f"[恢复] 目录级别清理失败: {de}")
+        except Exception as e:
+            logger.warning(f"获取当前项目文档失败，跳过删除多余文档: {e}")
 
-                    # 目录级别兜底清理：直接扫描 documents 目录与类型子目录
-                    try:
-                        base_path = getattr(self.document_repository, 'base_path', None)
-                        if base_path:
-                            logger.info(f"[恢复] 目录清理起点: {base_path}")
-                            to_remove = []
-                            # 收集所有 .json 和 _content.txt
-                            candidates = list(base_path.glob("*.json")) + list(base_path.glob("*_content.txt"))
-                            # 类型子目录
-                            for sub in [p for p in base_path.iterdir() if p.is_dir()]:
-                                candidates += list(sub.glob("*.json")) + list(sub.glob("*_content.txt"))
-                            for f in candidates:
-                                stem = f.stem.replace("_content", "")
-                                if stem and stem not in backup_doc_ids:
-                                    to_remove.append(f)
-                            for f in to_remove:
-                                try:
-                                    f.unlink(missing_ok=True)
-                                    logger.info(f"[恢复] 目录清理: 删除文件 {f}")
-                                except Exception as fe:
-                                    logger.warning(f"[恢复] 目录清理失败: {f} - {fe}")
-                    except Exception as de:
-                        logger.debug(f"[恢复] 目录级别清理失败: {de}")
-                except Exception as e:
-                    logger.warning(f"获取当前项目文档失败，跳过删除多余文档: {e}")
+        # 写入备份中的文档
+        for doc_data in documents_data:
+            document_dict = {k: v for k, v in doc_data.items() if k not in MANIFEST_DOCUMENT_KEYS}
+            try:
+                document = Document.from_dict(document_dict)
+            except Exception:
+                document = Document(**document_dict)
+
+            # 读取文档内容
+            content = await read_content(document, doc_data)
+            if content is not None:
+                document.content = content
+                logger.debug(f"[恢复] 读取正文: id={document.id} len={len(content)}")
+            else:
+                document.content = document.content or ""
+                logger.debug(f"[恢复] 备份缺少正文，使用现有content: id={document.id}")
 
-                # 写入备份中的文档
-                for doc_data in documents_data:
-                    try:
-                        document = Document.from_dict(doc_data)
-                    except Exception:
-                        document = Document(**doc_data)
+            # 保存文档
+            ok = await self.document_repository.save(document)
+            logger.info(f"[恢复] 写入文档: id={document.id} title={getattr(document,'title','')} ok={ok}")
 
-                    # 读取文档内容
-                    doc_filename = f"documents/{document.id}.txt"
-                    try:
-                        document.content = zipf.read(doc_filename).decode('utf-8')
-                        logger.debug(f"[恢复] 读取正文: {doc_filename} len={len(document.content)}")
-                    except KeyError:
-                        document.content = document.content or ""
-                        logger.debug(f"[恢复] 备份缺少正文文件，使用现有content: {doc_filename}")
+        return project.id
+
+    async def export_full_archive(self, backup_id: str, target_path: Optional[Path] = None) -> Optional[Path]:
+        """
+        把增量备份导出为ZIP完整归档（与 create_backup(full_archive=True) 的格式相同）
 
-                    # 保存文档
-                    ok = await self.document_repository.save(document)
-                    logger.info(f"[恢复] 写入文档: id={document.id} title={getattr(document,'title','')} ok={ok}")
+        Args:
+            backup_id: 增量备份ID
+            target_path: 归档路径，默认写到备份目录下的 {backup_id}.zip
+        """
+        try:
+            store = self.chunk_store
+            manifest_path = store.manifest_path(backup_id)
+            if not manifest_path.exists():
+                logger.error(f"增量备份不存在: {backup_id}")
+                return None
 
-            logger.info(f"备份恢复成功: {backup_path}")
-            return project.id
+            manifest = await asyncio.to_thread(store.read_manifest, manifest_path)
+            documents = []
+            contents = {}
+            for doc_data in manifest.get("documents", []):
+                document_dict = {k: v for k, v in doc_data.items() if k not in MANIFEST_DOCUMENT_KEYS}
+                content = await store.read_content(doc_data.get("content_chunks", []))
+                document_dict["content"] = content
+                documents.append(document_dict)
+                contents[document_dict.get("id")] = content
+
+            project_data = {
+                "project": manifest.get("project", {}),
+                "documents": documents,
+                "backup_info": manifest.get("backup_info", {})
+            }
+            target_path = target_path or self.backup_dir / f"{backup_id}.zip"
+            await asyncio.to_thread(self._write_full_archive, target_path, project_data, contents)
+            logger.info(f"增量备份已导出为完整归档: {target_path}")
+            return target_path
 
         except Exception as e:
-            logger.error(f"恢复备份失败: {e}")
+            logger.error(f"导出完整归档失败: {e}")
             return None
-    
+
     async def list_backups(self, project_id: Optional[str] = None) -> List[BackupInfo]:
-        """列出备份"""
+        """列出备份（完整归档与增量备份）"""
         try:
-            backups = []
-            
-            for backup_file in self.backup_dir.glob("*.zip"):
-                try:
-                    # 解析备份文件名
-                    backup_id = backup_file.stem
-                    
-                    # 如果指定了项目ID，过滤备份
-                    if project_id and not backup_id.startswith(project_id):
-                        continue
-                    
-                    # 读取备份信息
-                    with zipfile.ZipFile(backup_file, 'r') as zipf:
-                        project_data = json.loads(zipf.read("project.json").decode('utf-8'))
-                        backup_data = project_data.get("backup_info", {})
-                        
-                        backup_info = BackupInfo(
-                            id=backup_id,
-                            project_id=project_data["project"]["id"],
-                            backup_path=backup_file,
-                            created_at=datetime.fromisoformat(backup_data.get("created_at", datetime.now().isoformat())),
-                            size=backup_file.stat().st_size,
-                            description=backup_data.get("description", ""),
-                            backup_type=backup_data.get("backup_type", "manual")
-                        )
-
-                        backups.append(backup_info)
-
+            backups = await asyncio.to_thread(self._scan_backups, project_id)
 
-                except Exception as e:
-                    logger.warning(f"读取备份文件失败: {backup_file}, {e}")
-                    continue
-            
             # 按创建时间排序
             backups.sort(key=lambda x: x.created_at, reverse=True)
             return backups
-            
+
         except Exception as e:
             logger.error(f"列出备份失败: {e}")
             return []
-    
-    async def delete_backup(self, backup_id: str) -> bool:
-        """删除备份"""
+
+    def _scan_backups(self, project_id: Optional[str]) -> List[BackupInfo]:
+        """扫描备份目录（在线程中执行）"""
+        backups = []
+
+        for backup_file in self.backup_dir.glob("*.zip"):
+            try:
+                # 解析备份文件名
+                backup_id = backup_file.stem
+
+                # 如果指定了项目ID，过滤备份
+                if project_id and not backup_id.startswith(project_id):
+                    continue
+
+                # 读取备份信息
+                with zipfile.ZipFile(backup_file, 'r') as zipf:
+                    project_data = json.loads(zipf.read("project.json").decode('utf-8'))
+                backups.append(self._backup_info_from_data(
+                    backup_id, backup_file, project_data, backup_file.stat().st_size
+                ))
+
+            except Exception as e:
+                logger.warning(f"读取备份文件失败: {backup_file}, {e}")
+                continue
+
+        for manifest_file in self.chunk_store.list_manifests():
+            try:
+                backup_id = manifest_file.stem
+                if project_id and not backup_id.startswith(project_id):
+                    continue
+
+                manifest = self.chunk_store.read_manifest(manifest_file)
+                size = manifest_file.stat().st_size + manifest.get("stats", {}).get("new_bytes", 0)
+                backups.append(self._backup_info_from_data(backup_id, manifest_file, manifest, size))
+
+            except Exception as e:
+                logger.warning(f"读取备份清单失败: {manifest_file}, {e}")
+                continue
+
+        return backups
+
+    @staticmethod
+    def _backup_info_from_data(backup_id: str, backup_path: Path, data: Dict[str, Any], size: int) -> BackupInfo:
+        backup_data = data.get("backup_info", {})
+        return BackupInfo(
+            id=backup_id,
+            project_id=data["project"]["id"],
+            backup_path=backup_path,
+            created_at=datetime.fromisoformat(backup_data.get("created_at", datetime.now().isoformat())),
+            size=size,
+            description=backup_data.get("description", ""),
+            backup_type=backup_data.get("backup_type", "manual")
+        )
+
+    async def delete_backup(self, backup_id: str, collect_garbage: bool = True) -> bool:
+        """
+        删除备份
+
+        Args:
+            backup_id: 备份ID
+            collect_garbage: 删除增量备份后是否立即回收不再被引用的块
+        """
         try:
+            deleted = False
             backup_path = self.backup_dir / f"{backup_id}.zip"
             if backup_path.exists():
                 backup_path.unlink()
                 logger.info(f"备份删除成功: {backup_path}")
-                return True
-            else:
-                logger.warning(f"备份文件不存在: {backup_path}")
-                return False
-                
+                deleted = True
+
+            manifest_path = self.chunk_store.manifest_path(backup_id)
+            if manifest_path.exists():
+                manifest_path.unlink()
+                logger.info(f"备份删除成功: {manifest_path}")
+                deleted = True
+                if collect_garbage:
+                    await self.chunk_store.collect_garbage()
+
+            if not deleted:
+                logger.warning(f"备份文件不存在: {backup_id}")
+            return deleted
+
         except Exception as e:
             logger.error(f"删除备份失败: {e}")
             return False
@@ -519,7 +793,8 @@ class BackupService:
                 # 删除最旧的备份
                 old_backups = backups[self.max_backups:]
                 for backup in old_backups:
-                    await self.delete_backup(backup.id)
+                    await self.delete_backup(backup.id, collect_garbage=False)
+                await self.chunk_store.collect_garbage()
                     
         except Exception as e:
             logger.error(f"清理旧备份失败: {e}")
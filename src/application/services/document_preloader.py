@@ -17,6 +17,7 @@ from collections import defaultdict, deque
 from src.domain.entities.document import Document
 from src.domain.repositories.document_repository import IDocumentRepository
 from src.shared.utils.logger import get_logger
+from src.shared.utils.event_loop import get_app_event_loop
 from src.shared.utils.unified_performance import get_performance_manager
 
 logger = get_logger(__name__)
@@ -84,7 +85,8 @@ class DocumentPreloader:
     def _start_preload_worker(self):
         """启动预加载工作线程"""
         if self._preload_task is None or self._preload_task.done():
-            self._preload_task = asyncio.create_task(self._preload_worker())
+            # 工作协程常驻在应用事件循环中
+            self._preload_task = get_app_event_loop().submit(self._preload_worker())
             logger.debug("预加载工作线程已启动")
     
     async def _preload_worker(self):
@@ -292,7 +294,7 @@ class DocumentPreloader:
             if self._preload_task and not self._preload_task.done():
                 self._preload_task.cancel()
                 try:
-                    await self._preload_task
+                    await asyncio.wrap_future(self._preload_task)
                 except asyncio.CancelledError:
                     pass
             
@@ -6,7 +6,9 @@
 管理文档的创建、编辑、保存等操作
 """
 
-from typing import List, Optional, Dict, Any, TYPE_CHECKING
+import asyncio
+import functools
+from typing import Callable, List, Optional, Dict, Any, Tuple, TYPE_CHECKING
 from pathlib import Path
 
 from src.domain.entities.document import Document, DocumentType, DocumentStatus, create_document
@@ -16,10 +18,12 @@ from src.domain.events.document_events import (
     DocumentSavedEvent, DocumentContentChangedEvent
 )
 from src.shared.events.event_bus import EventBus
+from src.shared.utils.cancellation import CancellationToken
 from src.shared.utils.logger import get_logger
 from src.shared.utils.operation_templates import OperationTemplate, ValidationTemplate
 from src.shared.utils.base_service import BaseService, service_operation
 from src.shared.utils.event_publisher import EventPublisher
+from src.shared.utils.text_delta import chain_hash, compute_text_delta, content_hash
 from src.shared.constants import DEFAULT_RECENT_DOCUMENTS_LIMIT
 
 if TYPE_CHECKING:
@@ -29,6 +33,8 @@ logger = get_logger(__name__)
 
 # 文档服务常量
 COPY_DESCRIPTION_PREFIX = "复制自: "
+# 内容变更事件的合并窗口（秒）：连续输入合并为一个增量再分发
+CONTENT_EVENT_COALESCE_WINDOW = 0.1
 
 
 class DocumentService(BaseService):
@@ -72,6 +78,17 @@ class DocumentService(BaseService):
         self.search_service = search_service
         self._open_documents: Dict[str, Document] = {}
         self._current_document_id: Optional[str] = None
+        try:
+            event_bus.configure_coalescing(
+                DocumentContentChangedEvent,
+                CONTENT_EVENT_COALESCE_WINDOW,
+                key=lambda event: event.document_id,
+                merge=lambda earlier, later: earlier.merged_with(later)
+            )
+        except Exception as e:
+            logger.debug(f"配置内容变更事件合并失败: {e}")
+        # 打开文档的内容版本：文档ID -> (对应的内容对象, 版本哈希)
+        self._content_versions: Dict[str, Tuple[str, str]] = {}
 
         # 创建操作模板
         self._document_operation_template = OperationTemplate[str, bool]("文档操作")
@@ -82,6 +99,11 @@ class DocumentService(BaseService):
 
 
 
+    def _schedule_index_update(self, document: Document) -> None:
+        """保存成功后登记搜索索引更新（由搜索服务的后台队列合并写入）"""
+        if self.search_service:
+            self.search_service.schedule_index_update(document)
+
     def _validate_document_open(self, document_id: str) -> bool:
         """验证文档是否已打开"""
         if document_id not in self._open_documents:
@@ -137,6 +159,7 @@ class DocumentService(BaseService):
             success = await self.document_repository.save(document)
             if success:
                 logger.info(f"💾 文档保存成功: {document.title} (ID: {document.id})")
+                self._schedule_index_update(document)
 
                 # 发布文档创建事件（统一助手）
                 from src.shared.utils.event_helpers import build_document_created_event
@@ -199,6 +222,7 @@ class DocumentService(BaseService):
 
                 # 从打开列表中移除
                 del self._open_documents[document_id]
+                self._content_versions.pop(document_id, None)
 
                 # 如果是当前文档，清除当前文档ID
                 if self._current_document_id == document_id:
@@ -229,6 +253,8 @@ class DocumentService(BaseService):
 
             success = await self.document_repository.save(document)
             if success:
+                self._schedule_index_update(document)
+
                 # 发布文档保存事件（统一助手）
                 from src.shared.utils.event_helpers import build_document_saved_event
                 event = build_document_saved_event(document)
@@ -255,6 +281,7 @@ class DocumentService(BaseService):
                 # 如果文档在打开列表中，更新它
                 if document.id in self._open_documents:
                     self._open_documents[document.id] = document
+                self._schedule_index_update(document)
 
                 # 发布文档保存事件
                 from src.shared.utils.event_helpers import build_document_saved_event
@@ -298,22 +325,43 @@ class DocumentService(BaseService):
             return False
 
     async def update_document_content(self, document_id: str, content: str) -> bool:
-        """更新文档内容"""
+        """
+        更新文档内容
+
+        求出与当前内容的单段替换增量，按增量更新文档统计，
+        发布只携带增量和版本哈希的内容变更事件；内容未变化时不发布事件。
+        """
         try:
             if not self._validate_document_open(document_id):
                 return False
 
             document = self._open_documents[document_id]
-            old_content = document.content
+            old_content = document.content or ""
+            content = content or ""
+
+            delta = compute_text_delta(old_content, content)
+            if delta.is_empty:
+                return True
+
+            base_hash = self._content_version(document_id, old_content)
+            word_count_before = document.statistics.word_count
 
-            # 更新内容
-            document.content = content
+            # 更新内容和统计
+            document.apply_content_delta(content, delta)
+
+            result_hash = chain_hash(base_hash, delta)
+            self._content_versions[document_id] = (content, result_hash)
 
             # 发布内容变更事件
             event = DocumentContentChangedEvent(
                 document_id=document.id,
-                old_content=old_content,
-                new_content=content
+                position=delta.position,
+                removed_length=delta.removed_length,
+                inserted_text=delta.inserted_text,
+                base_hash=base_hash,
+                result_hash=result_hash,
+                word_count_change=document.statistics.word_count - word_count_before,
+                text_provider=lambda: content
             )
             await self.event_publisher.publish_safe(event, "文档内容变更")
 
@@ -324,6 +372,20 @@ class DocumentService(BaseService):
             logger.error(f"更新文档内容失败: {e}")
             return False
 
+    def _content_version(self, document_id: str, content: str) -> str:
+        """
+        文档当前内容的版本哈希
+
+        记录的版本对应的正是当前内容对象时直接复用；内容被其他途径替换过时，
+        对全文重新计算一次哈希作为新的基准。
+        """
+        recorded = self._content_versions.get(document_id)
+        if recorded is not None and recorded[0] is content:
+            return recorded[1]
+        version = content_hash(content)
+        self._content_versions[document_id] = (content, version)
+        return version
+
     async def delete_document(self, document_id: str) -> bool:
         """删除文档"""
         try:
@@ -333,6 +395,8 @@ class DocumentService(BaseService):
 
             success = await self.document_repository.delete(document_id)
             if success:
+                if self.search_service:
+                    self.search_service.schedule_index_removal(document_id)
                 logger.info(f"文档删除成功: {document_id}")
                 return True
             else:
@@ -357,9 +421,10 @@ class DocumentService(BaseService):
     async def search_documents(
         self,
         query: str,
-        project_id: Optional[str] = None
+        project_id: Optional[str] = None,
+        token: Optional[CancellationToken] = None
     ) -> List[Document]:
-        """搜索文档（优先使用SearchService）"""
+        """搜索文档（优先使用SearchService，token 用于取消过时的搜索）"""
         try:
             # 如果有SearchService，使用统一的搜索功能
             if self.search_service:
@@ -372,8 +437,14 @@ class DocumentService(BaseService):
                     filters=SearchFilter(projects={project_id} if project_id else set())
                 )
 
-                # 执行搜索
-                result_set = self.search_service.search(search_query)
+                # 在线程池中执行搜索；等待被取消时同时取消线程中的搜索
+                token = token or CancellationToken()
+                search = functools.partial(self.search_service.search, search_query, token=token)
+                try:
+                    result_set = await asyncio.get_event_loop().run_in_executor(None, search)
+                except asyncio.CancelledError:
+                    token.cancel()
+                    raise
 
                 # 转换结果为Document对象
                 documents = []
@@ -399,7 +470,9 @@ class DocumentService(BaseService):
     async def search_content(
         self,
         query: str,
-        project_id: Optional[str] = None
+        project_id: Optional[str] = None,
+        token: Optional[CancellationToken] = None,
+        on_results: Optional[Callable[[List[Dict[str, Any]]], None]] = None
     ) -> List[Dict[str, Any]]:
         """
         搜索文档内容 - 重构版本
@@ -409,21 +482,30 @@ class DocumentService(BaseService):
         Args:
             query: 搜索查询文本
             project_id: 可选的项目ID，用于限制搜索范围
+            token: 取消令牌，输入新的查询时取消上一次搜索（仅SearchService支持）
+            on_results: 增量结果回调，在搜索线程中调用，参数为一批已转换的结果；
+                返回值是整体排序后的完整结果，应替换已显示的各批结果
 
         Returns:
             List[Dict[str, Any]]: 搜索结果列表
         """
         try:
             if self.search_service:
-                return await self._search_with_service(query, project_id)
+                return await self._search_with_service(query, project_id, token, on_results)
             else:
                 return await self._search_with_repository(query, project_id)
         except Exception as e:
             self.logger.error(f"搜索内容失败: {e}")
             return []
 
-    async def _search_with_service(self, query: str, project_id: Optional[str]) -> List[Dict[str, Any]]:
-        """使用SearchService进行搜索"""
+    async def _search_with_service(
+        self,
+        query: str,
+        project_id: Optional[str],
+        token: Optional[CancellationToken] = None,
+        on_results: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """使用SearchService进行搜索（在线程池中执行，不阻塞事件循环）"""
         from src.application.services.search.search_models import SearchQuery, SearchOptions, SearchFilter
 
         # 构建搜索查询
@@ -438,8 +520,19 @@ class DocumentService(BaseService):
             filters=SearchFilter(projects={project_id} if project_id else set())
         )
 
-        # 执行搜索并转换结果
-        result_set = self.search_service.search(search_query)
+        batch_callback = None
+        if on_results is not None:
+            def batch_callback(batch):
+                on_results(self._convert_search_results(batch))
+
+        # 执行搜索并转换结果；等待被取消时同时取消线程中的搜索
+        token = token or CancellationToken()
+        search = functools.partial(self.search_service.search, search_query, token=token, on_results=batch_callback)
+        try:
+            result_set = await asyncio.get_event_loop().run_in_executor(None, search)
+        except asyncio.CancelledError:
+            token.cancel()
+            raise
         content_results = self._convert_search_results(result_set.results)
 
         self.logger.info(f"内容搜索完成（使用SearchService）: 找到 {len(content_results)} 个匹配")
@@ -461,6 +554,7 @@ class DocumentService(BaseService):
                     "document_title": result.title,
                     "content_preview": result.content_preview,
                     "relevance_score": result.relevance_score,
+                    # 逐行匹配由 SearchService.get_matches 在打开结果时计算，这里只转换已计算的部分
                     "matches": [
                         {
                             "line_number": match.line_number,
@@ -513,6 +607,7 @@ class DocumentService(BaseService):
             # 保存副本
             success = await self.document_repository.save(duplicate)
             if success:
+                self._schedule_index_update(duplicate)
                 logger.info(f"文档复制成功: {new_title}")
                 return duplicate
             else:
@@ -547,6 +642,8 @@ class DocumentService(BaseService):
             # 保存
             success = await self.document_repository.save(document)
             if success:
+                self._schedule_index_update(document)
+
                 # 发布标题变更事件
                 from src.domain.events.document_events import DocumentTitleChangedEvent
                 event = DocumentTitleChangedEvent(
@@ -23,6 +23,7 @@ from .search_models import (
 )
 
 from .search_index import SearchIndex
+from .index_queue import SearchIndexQueue
 from .search_service_refactored import SearchService
 
 __all__ = [
@@ -45,5 +46,6 @@ __all__ = [
     
     # 核心类
     'SearchIndex',
+    'SearchIndexQueue',
     'SearchService'
 ]
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全文检索分词
+
+为SQLite FTS5索引提供CJK感知的分词：中文连续片段被编码为重叠的字符二元组（bigram），
+可选地附加jieba分词结果，用于提升排序质量。
+
+编码约定：
+- CJK片段内的二元组以 ``\\x1f`` 连接，片段两端以 ``\\x1e`` 包围；
+- FTS5的unicode61分词器把这两个控制字符视为分隔符，因此每个二元组是一个独立词元；
+- 其余文本（标点、换行、拉丁单词）原样保留，交给unicode61处理。
+
+由于编码文本保留了原文的分隔符，``snippet()``/``highlight()`` 的输出可以通过
+:func:`decode_fts_text` 还原为可读原文。
+"""
+
+import re
+from functools import partial
+from typing import FrozenSet, List, Optional, Tuple
+
+from src.shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# jieba 为可选依赖：存在时为索引附加词语级词元（经共享分词服务调用）
+from src.shared.utils.text_segmenter import JIEBA_AVAILABLE, get_text_segmenter
+
+
+# CJK统一表意文字（含扩展A区和兼容区）
+CJK_CHAR_CLASS = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+CJK_RUN_PATTERN = re.compile(f'[{CJK_CHAR_CLASS}]+')
+QUERY_TOKEN_PATTERN = re.compile(f'[{CJK_CHAR_CLASS}]+|[^\\W_{CJK_CHAR_CLASS}]+')
+
+# 逐行匹配：检索词之间允许的分隔内容，以及拉丁/数字词的词边界（CJK字符也视为边界）
+_TERM_SEPARATOR = r'[\W_]*'
+_LATIN_WORD_START = f'(?<![^\\W_{CJK_CHAR_CLASS}])'
+_LATIN_WORD_END = f'(?![^\\W_{CJK_CHAR_CLASS}])'
+
+# 编码分隔符（unicode61视为分隔符，正常文本中不会出现）
+BIGRAM_JOINER = '\x1f'
+RUN_BOUNDARY = '\x1e'
+
+# snippet()/highlight() 使用的标记
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+
+_ENCODED_RUN_PATTERN = re.compile(
+    f'[{MATCH_START}{MATCH_END}{CJK_CHAR_CLASS}]+'
+    f'(?:{BIGRAM_JOINER}[{MATCH_START}{MATCH_END}{CJK_CHAR_CLASS}]+)+'
+)
+
+
+def cjk_bigrams(run: str) -> List[str]:
+    """将CJK连续片段切分为重叠二元组（单字片段返回自身）"""
+    if len(run) < 2:
+        return [run] if run else []
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def encode_for_index(text: str) -> str:
+    """将原文编码为FTS5索引文本"""
+    if not text:
+        return ""
+
+    def _encode_run(match: 're.Match') -> str:
+        run = match.group(0)
+        tokens = cjk_bigrams(run)
+        if len(run) > 1:
+            # 末字单独成词元，使单字前缀查询也能命中片段末尾的字
+            tokens.append(run[-1])
+        return RUN_BOUNDARY + BIGRAM_JOINER.join(tokens) + RUN_BOUNDARY
+
+    return CJK_RUN_PATTERN.sub(_encode_run, text)
+
+
+def extract_terms(text: str) -> str:
+    """使用jieba提取词语级词元（jieba不可用时返回空字符串）"""
+    segmenter = get_text_segmenter()
+    if not text or not segmenter.available:
+        return ""
+    try:
+        words = {
+            word for word in segmenter.cut_for_search(text)
+            if len(word) >= 2 and CJK_RUN_PATTERN.fullmatch(word)
+        }
+        return " ".join(sorted(words))
+    except Exception as e:
+        logger.debug(f"jieba分词失败，跳过词语索引: {e}")
+        return ""
+
+
+def query_terms(query: str) -> List[List[str]]:
+    """
+    将查询文本切分为检索词列表
+
+    每个以空白分隔的查询片段得到一组检索词（CJK连续片段或拉丁/数字词），
+    标点被忽略；没有检索词的片段被丢弃。MATCH表达式和逐行匹配都基于这一结果。
+    """
+    terms = []
+    for part in query.split():
+        pieces = [match.group(0) for match in QUERY_TOKEN_PATTERN.finditer(part.lower())]
+        if pieces:
+            terms.append(pieces)
+    return terms
+
+
+def tokenize_query(query: str) -> List[List[str]]:
+    """
+    将查询文本切分为短语列表
+
+    每个以空白分隔的查询片段生成一个短语，短语内的词元与索引编码一致，
+    因此可以作为FTS5短语查询精确匹配任意长度的子串。
+    """
+    phrases = []
+    for pieces in query_terms(query):
+        tokens: List[str] = []
+        for index, piece in enumerate(pieces):
+            if CJK_RUN_PATTERN.fullmatch(piece):
+                tokens.extend(cjk_bigrams(piece))
+                if len(piece) > 1 and index < len(pieces) - 1:
+                    # 与索引编码一致：片段后还有词元时，末字单字词元位于两者之间
+                    tokens.append(piece[-1])
+            else:
+                tokens.append(piece)
+        if tokens:
+            phrases.append(tokens)
+    return phrases
+
+
+def build_match_query(query: str, columns: str = "{title body}") -> Optional[str]:
+    """
+    构建FTS5 MATCH表达式
+
+    多个查询片段以OR连接，由bm25()决定排序。单个汉字使用前缀查询，
+    以匹配以该字开头的二元组；短语末尾的拉丁/数字词元也按前缀查询（“hel”命中“hello”）。
+
+    Returns:
+        Optional[str]: MATCH表达式，查询中没有可检索词元时返回None
+    """
+    expressions = []
+    for tokens in tokenize_query(query):
+        phrase = '"' + " ".join(token.replace('"', '""') for token in tokens) + '"'
+        if _is_prefix_phrase(tokens):
+            phrase += " *"
+        expressions.append(f"{columns} : {phrase}")
+
+        # 词语列只参与排序：整词命中时bm25得分更高
+        if JIEBA_AVAILABLE and len(tokens) > 1 and all(CJK_RUN_PATTERN.fullmatch(t) for t in tokens):
+            word = tokens[0] + "".join(t[-1] for t in tokens[1:])
+            expressions.append(f'terms : "{word}"')
+
+    if not expressions:
+        return None
+    return " OR ".join(expressions)
+
+
+def build_line_pattern(query: str, whole_words: bool = False) -> Optional[str]:
+    """
+    构建与MATCH表达式一致的逐行匹配正则
+
+    与 :func:`build_match_query` 使用同一组检索词：各查询片段以“或”连接，片段内的检索词之间
+    允许出现标点和空白；拉丁/数字词要求从词首开始匹配，片段末尾的拉丁词按前缀匹配。
+    正则按小写检索词生成，调用方按需添加忽略大小写标志。
+
+    Returns:
+        Optional[str]: 正则表达式，查询中没有检索词时返回None
+    """
+    alternatives = []
+    for pieces in query_terms(query):
+        parts = []
+        for piece in pieces:
+            escaped = re.escape(piece)
+            if not CJK_RUN_PATTERN.fullmatch(piece):
+                escaped = _LATIN_WORD_START + escaped
+            parts.append(escaped)
+        body = _TERM_SEPARATOR.join(parts)
+        if whole_words and not CJK_RUN_PATTERN.fullmatch(pieces[-1]):
+            body += _LATIN_WORD_END
+        alternatives.append(f"(?:{body})")
+
+    if not alternatives:
+        return None
+    return "|".join(alternatives)
+
+
+def _is_prefix_phrase(tokens: List[str]) -> bool:
+    """单个汉字的短语、以及以非CJK词元结尾的短语按前缀查询"""
+    return _is_single_char_phrase(tokens) or not CJK_RUN_PATTERN.fullmatch(tokens[-1])
+
+
+def _is_single_char_phrase(tokens: List[str]) -> bool:
+    """短语是否只有一个汉字"""
+    return len(tokens) == 1 and len(tokens[0]) == 1 and bool(CJK_RUN_PATTERN.fullmatch(tokens[0]))
+
+
+def _prefix_highlight_terms(query: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """查询中的单字前缀词元，以及全部查询词元（用于判断命中的二元组是否只由前缀匹配）"""
+    phrases = tokenize_query(query)
+    prefixes = frozenset(tokens[0] for tokens in phrases if _is_single_char_phrase(tokens))
+    terms = frozenset(token for tokens in phrases for token in tokens)
+    return prefixes, terms
+
+
+def decode_fts_text(text: str, highlight: bool = True, query: Optional[str] = None) -> str:
+    """
+    将FTS5输出（snippet/highlight结果）还原为原文
+
+    Args:
+        text: 编码后的文本，可能含有匹配标记
+        highlight: 是否把匹配标记转换为 ``<mark>`` 标签，否则直接移除
+        query: 生成该输出的查询文本；提供时，单字前缀查询命中的二元组只标记首字
+    """
+    if not text:
+        return ""
+
+    text = text.replace(RUN_BOUNDARY, "")
+    prefixes, terms = _prefix_highlight_terms(query) if query else (frozenset(), frozenset())
+    text = _ENCODED_RUN_PATTERN.sub(partial(_decode_run, prefixes=prefixes, terms=terms), text)
+
+    if highlight:
+        text = text.replace(MATCH_START, HIGHLIGHT_START).replace(MATCH_END, HIGHLIGHT_END)
+        return text.replace(HIGHLIGHT_END + HIGHLIGHT_START, "")
+    return text.replace(MATCH_START, "").replace(MATCH_END, "")
+
+
+def _decode_run(
+    match: 're.Match',
+    prefixes: FrozenSet[str] = frozenset(),
+    terms: FrozenSet[str] = frozenset()
+) -> str:
+    """
+    还原一个二元组片段，并把词元级标记映射到字符级
+
+    单独命中的二元组如果首字是前缀查询字、且自身不是查询词元，只标记首字
+    （查询“龙”命中“龙王”时只高亮“龙”）。
+    """
+    chars: List[str] = []
+    marked: List[bool] = []
+    in_match = False
+
+    for index, token in enumerate(match.group(0).split(BIGRAM_JOINER)):
+        if token.startswith(MATCH_START):
+            in_match = True
+        token_marked = in_match or MATCH_END in token
+        if token.endswith(MATCH_END):
+            in_match = False
+
+        clean = token.replace(MATCH_START, "").replace(MATCH_END, "")
+        if not clean:
+            continue
+        prefix_only = (
+            len(clean) == 2 and clean[0] in prefixes and clean not in terms
+            and token.startswith(MATCH_START) and token.endswith(MATCH_END)
+        )
+        if index == 0 or not chars:
+            chars.extend(clean)
+            if prefix_only:
+                marked.extend([True, False])
+            else:
+                marked.extend([token_marked] * len(clean))
+        elif len(clean) == 1:
+            # 片段末字的单字词元：字符已输出，只合并标记
+            if token_marked:
+                marked[-1] = True
+        else:
+            # 重叠二元组：首字已由前一个词元给出
+            if token_marked:
+                marked[-1] = True
+            chars.append(clean[-1])
+            marked.append(token_marked and not prefix_only)
+
+    pieces = []
+    previous = False
+    for char, is_marked in zip(chars, marked):
+        if is_marked and not previous:
+            pieces.append(MATCH_START)
+        elif previous and not is_marked:
+            pieces.append(MATCH_END)
+        pieces.append(char)
+        previous = is_marked
+    if previous:
+        pieces.append(MATCH_END)
+    return "".join(pieces)
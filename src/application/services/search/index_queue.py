@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台索引队列
+
+保存文档时只把文档快照放入队列，由后台线程写入搜索索引，保存路径不再等待分词和数据库写入：
+- 入队时复制文档的标题、正文和元数据（IndexedDocument），后台线程只读取快照，
+  不会把之后尚未保存的编辑写入索引
+- 同一文档在合并窗口内的多次保存只保留最新一次（移除操作覆盖之前的更新）
+- 队列空闲 coalesce_delay 秒后，把积累的所有变更在一个事务中批量写入
+- 后台线程在队列长时间为空时退出，有新任务时再启动
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from src.domain.entities.document import Document
+from src.shared.utils.logger import get_logger
+
+from .search_index import SearchIndex
+from .search_models import IndexedDocument
+
+logger = get_logger(__name__)
+
+# 合并窗口（秒）：最后一次保存后等待这么久再写入索引
+INDEX_COALESCE_DELAY = 1.0
+# 合并窗口的上限，持续保存时也至少每隔这么久写入一次
+INDEX_MAX_DELAY = 5.0
+# 后台线程空闲多久后退出（秒）
+INDEX_WORKER_IDLE_TIMEOUT = 30.0
+
+
+class SearchIndexQueue:
+    """合并同一文档连续保存的后台索引队列"""
+
+    def __init__(
+        self,
+        search_index: SearchIndex,
+        coalesce_delay: float = INDEX_COALESCE_DELAY,
+        max_delay: float = INDEX_MAX_DELAY
+    ):
+        self.search_index = search_index
+        self.coalesce_delay = coalesce_delay
+        self.max_delay = max(max_delay, coalesce_delay)
+
+        # 文档ID -> (文档快照, 是否移除)，按首次入队顺序写入
+        self._pending: "OrderedDict[str, Tuple[Optional[IndexedDocument], bool]]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._first_enqueued: Optional[float] = None
+        self._last_enqueued = 0.0
+        self._in_flight = False
+        self._closed = False
+
+        self.enqueued = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.failed_batches = 0
+
+    def enqueue_update(self, document: Document) -> None:
+        """登记文档的索引更新（非阻塞；在调用线程中复制文档快照）"""
+        self._enqueue(document.id, IndexedDocument.from_document(document), False)
+
+    def enqueue_removal(self, document_id: str) -> None:
+        """登记文档的索引移除（非阻塞）"""
+        self._enqueue(document_id, None, True)
+
+    def _enqueue(self, document_id: str, document: Optional[IndexedDocument], removed: bool) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            now = time.monotonic()
+            if document_id in self._pending:
+                self.coalesced += 1
+            self._pending[document_id] = (document, removed)
+            self.enqueued += 1
+            if self._first_enqueued is None:
+                self._first_enqueued = now
+            self._last_enqueued = now
+            self._ensure_worker()
+            self._condition.notify()
+
+    def _ensure_worker(self) -> None:
+        """确保后台线程在运行（调用方持有锁）"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="search-indexer", daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                batch = self._wait_for_batch()
+                if batch is None:
+                    if self._worker is threading.current_thread():
+                        self._worker = None
+                    return
+                self._in_flight = True
+            try:
+                self._apply(batch)
+            finally:
+                with self._condition:
+                    self._in_flight = False
+                    self._condition.notify_all()
+
+    def _wait_for_batch(self) -> Optional[Dict[str, Tuple[Optional[IndexedDocument], bool]]]:
+        """等待合并窗口结束并取出整批变更；空闲超时或已关闭时返回 None（调用方持有锁）"""
+        idle_deadline = time.monotonic() + INDEX_WORKER_IDLE_TIMEOUT
+        while True:
+            now = time.monotonic()
+            if self._pending:
+                ready_at = min(
+                    self._last_enqueued + self.coalesce_delay,
+                    self._first_enqueued + self.max_delay
+                )
+                if self._closed or now >= ready_at:
+                    batch = dict(self._pending)
+                    self._pending.clear()
+                    self._first_enqueued = None
+                    return batch
+                self._condition.wait(ready_at - now)
+            else:
+                if self._closed or now >= idle_deadline:
+                    return None
+                self._condition.wait(idle_deadline - now)
+
+    def _apply(self, batch: Dict[str, Tuple[Optional[IndexedDocument], bool]]) -> None:
+        documents = [document for document, removed in batch.values() if not removed]
+        removed_ids = [document_id for document_id, (_, removed) in batch.items() if removed]
+        started = time.perf_counter()
+        if self.search_index.apply_updates(documents, removed_ids):
+            self.batches += 1
+            logger.debug(
+                f"搜索索引已更新: {len(documents)} 个文档, 移除 {len(removed_ids)} 个, "
+                f"耗时 {(time.perf_counter() - started) * 1000:.1f}ms"
+            )
+        else:
+            self.failed_batches += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        立即写入所有排队的变更并等待完成
+
+        Returns:
+            bool: 在超时前全部写入返回 True
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            # 结束当前合并窗口
+            if self._pending:
+                self._first_enqueued = float('-inf')
+                self._ensure_worker()
+                self._condition.notify_all()
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def shutdown(self, timeout: Optional[float] = 5.0) -> None:
+        """写入剩余变更后停止后台线程"""
+        self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            'pending': len(self._pending),
+            'enqueued': self.enqueued,
+            'coalesced': self.coalesced,
+            'batches': self.batches,
+            'failed_batches': self.failed_batches,
+        }
@@ -3,286 +3,465 @@
 """
 搜索索引
 
-提供文档索引的创建、更新和查询功能
+提供文档索引的创建、更新和查询功能。
+
+全文检索基于SQLite FTS5虚拟表，中文按字符二元组编码（见 fts_tokenizer），
+查询使用索引化的MATCH表达式，并通过bm25()排序、snippet()/highlight()生成预览。
+
+FTS表按段落（行）存储：标题和每个不同的非空段落各占一行，document_paragraphs
+记录 (文档, 段落内容哈希) -> FTS行号。更新文档时比较新旧段落哈希集合，只删除消失的段落、
+编码并插入新出现的段落，未改动的段落不再重新编码和分词；所有变更在一个事务中批量写入。
 """
 
+import hashlib
 import sqlite3
 import json
-import threading
-from typing import List, Dict, Any, Optional, Set
+from typing import Iterable, List, Dict, Any, Optional, Tuple, Union
 from pathlib import Path
 from datetime import datetime
-from collections import defaultdict, Counter
 
-from .search_models import SearchResult, SearchMatch, IndexStatus, IndexException
+from .search_models import IndexStatus, IndexException, IndexedDocument
+from .fts_tokenizer import (
+    encode_for_index, extract_terms, build_match_query, tokenize_query, decode_fts_text,
+    MATCH_START, MATCH_END
+)
 from src.domain.entities.document import Document
 from src.shared.utils.logger import get_logger
+from src.shared.utils.cancellation import CancellationToken
+from src.shared.utils.sqlite_database import QueryInterrupted, SQLiteDatabase
 from src.shared.utils.unified_performance import get_performance_manager, performance_monitor
+from src.shared.utils.tracing import set_span_attributes
 
 logger = get_logger(__name__)
 
+# 索引结构版本（PRAGMA user_version）
+# 1: document_index + word_index（LIKE全表扫描）
+# 2: document_index + document_fts（FTS5，每个文档一行）
+# 3: document_fts 按段落存储 + document_paragraphs（增量更新）
+INDEX_SCHEMA_VERSION = 3
+
+# bm25列权重：doc_id, title, body, terms
+BM25_WEIGHTS = (0.0, 3.0, 1.0, 2.0)
+
+# snippet() 参数：body列索引、省略符、最大词元数（二元组编码下约等于字符数）
+SNIPPET_COLUMN = 2
+SNIPPET_ELLIPSIS = "..."
+SNIPPET_TOKENS = 48
+# 没有正文命中（只命中标题）时，预览使用正文开头的字符数；结果不携带全文
+PREVIEW_HEAD_CHARS = 200
+
+# 段落哈希长度（字节）；标题行使用独立的哈希域，不会与正文段落冲突
+PARAGRAPH_HASH_SIZE = 16
+TITLE_HASH_PERSON = b"title"
+
 
 class SearchIndex:
     """搜索索引"""
 
     def __init__(self, db_path: Path):
         self.db_path = db_path
-        self._lock = threading.RLock()
+        # 单写连接 + 只读连接池；索引写入在写线程中执行，不阻塞界面的搜索
+        self._db = SQLiteDatabase(
+            db_path, initializer=self._create_schema, row_factory=sqlite3.Row, name="search-index"
+        )
         self.performance_manager = get_performance_manager()  # 统一性能管理器
+        # 每次写入索引后递增，作为搜索结果缓存键的一部分，使旧结果失效
+        self._generation = 0
+        self.paragraphs_inserted = 0
+        self.paragraphs_deleted = 0
+        self.paragraphs_reused = 0
         self._ensure_database()
-        
+
     def _ensure_database(self):
-        """确保数据库存在"""
+        """确保数据库存在，并把旧版索引迁移到按段落存储的FTS5表"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS document_index (
-                        id TEXT PRIMARY KEY,
-                        title TEXT,
-                        content TEXT,
-                        document_type TEXT,
-                        project_id TEXT,
-                        metadata TEXT,
-                        word_count INTEGER,
-                        created_at TEXT,
-                        updated_at TEXT,
-                        indexed_at TEXT
-                    )
-                """)
-                
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS word_index (
-                        word TEXT,
-                        document_id TEXT,
-                        frequency INTEGER,
-                        positions TEXT,
-                        PRIMARY KEY (word, document_id)
-                    )
-                """)
-                
-                conn.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_word_index_word 
-                    ON word_index(word)
-                """)
-                
-                conn.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_document_index_project 
-                    ON document_index(project_id)
-                """)
-                
-                conn.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_document_index_type 
-                    ON document_index(document_type)
-                """)
-                
-                conn.commit()
-                
+            self._db.open()
         except Exception as e:
             logger.error(f"创建搜索索引数据库失败: {e}")
             raise IndexException(f"无法创建搜索索引: {e}")
-    
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        """建表与迁移（在写线程的初始化事务中执行）"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS document_index (
+                id TEXT PRIMARY KEY,
+                title TEXT,
+                content TEXT,
+                document_type TEXT,
+                project_id TEXT,
+                metadata TEXT,
+                word_count INTEGER,
+                created_at TEXT,
+                updated_at TEXT,
+                indexed_at TEXT
+            )
+        """)
+
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS document_fts USING fts5(
+                doc_id UNINDEXED,
+                title,
+                body,
+                terms,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """)
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS document_paragraphs (
+                doc_id TEXT NOT NULL,
+                para_hash BLOB NOT NULL,
+                fts_rowid INTEGER NOT NULL,
+                PRIMARY KEY (doc_id, para_hash)
+            ) WITHOUT ROWID
+        """)
+
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS document_fts_vocab
+            USING fts5vocab(document_fts, 'col')
+        """)
+
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_document_index_project
+            ON document_index(project_id)
+        """)
+
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_document_index_type
+            ON document_index(document_type)
+        """)
+
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < INDEX_SCHEMA_VERSION:
+            self._migrate_to_fts(conn)
+            conn.execute(f"PRAGMA user_version = {INDEX_SCHEMA_VERSION}")
+
+    def _migrate_to_fts(self, conn: sqlite3.Connection):
+        """从旧版结构（word_index 或整篇一行的FTS表）迁移：用已索引内容按段落重建FTS表"""
+        conn.execute("DELETE FROM document_fts")
+        conn.execute("DELETE FROM document_paragraphs")
+
+        cursor = conn.execute("SELECT id, title, content FROM document_index")
+        migrated = 0
+        for doc_id, title, content in cursor.fetchall():
+            self._sync_paragraphs(conn, doc_id, title or "", content or "")
+            migrated += 1
+
+        conn.execute("DROP INDEX IF EXISTS idx_word_index_word")
+        conn.execute("DROP TABLE IF EXISTS word_index")
+
+        if migrated:
+            logger.info(f"搜索索引已迁移到FTS5: {migrated} 个文档")
+
     def add_document(self, document: Document) -> bool:
-        """添加文档到索引"""
-        try:
-            with self._lock:
-                with sqlite3.connect(self.db_path) as conn:
-                    # 删除旧索引
-                    self._remove_document_from_index(conn, document.id)
-                    
-                    # 添加文档信息
-                    conn.execute("""
-                        INSERT OR REPLACE INTO document_index 
-                        (id, title, content, document_type, project_id, metadata, 
-                         word_count, created_at, updated_at, indexed_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        document.id,
-                        document.title,
-                        document.content,
-                        document.document_type.value if document.document_type else "",
-                        document.project_id,
-                        json.dumps(document.metadata or {}),
-                        len(document.content.split()) if document.content else 0,
-                        document.created_at.isoformat() if document.created_at else "",
-                        document.updated_at.isoformat() if document.updated_at else "",
-                        datetime.now().isoformat()
-                    ))
-                    
-                    # 构建词汇索引
-                    self._build_word_index(conn, document)
-                    
-                    conn.commit()
-                    return True
-                    
-        except Exception as e:
-            logger.error(f"添加文档到索引失败: {e}")
-            return False
-    
+        """添加或更新文档索引（只重新索引变化的段落）"""
+        return self.apply_updates([document], [])
+
     def remove_document(self, document_id: str) -> bool:
         """从索引中移除文档"""
+        return self.apply_updates([], [document_id])
+
+    def apply_updates(
+        self,
+        documents: Iterable[Union[Document, IndexedDocument]],
+        removed_ids: Iterable[str] = ()
+    ) -> bool:
+        """
+        在一个事务中批量更新和移除文档
+
+        Args:
+            documents: 需要添加或更新的文档（Document 在调用时转为快照）
+            removed_ids: 需要移除的文档ID
+        """
+        documents = [_snapshot(document) for document in documents]
+        removed_ids = list(removed_ids)
+
+        def apply(conn: sqlite3.Connection):
+            for document_id in removed_ids:
+                self._remove_document_from_index(conn, document_id)
+            for document in documents:
+                self._add_document_to_connection(conn, document)
+            self._generation += 1
+
         try:
-            with self._lock:
-                with sqlite3.connect(self.db_path) as conn:
-                    self._remove_document_from_index(conn, document_id)
-                    conn.commit()
-                    return True
-                    
+            self._db.write(apply)
+            return True
+
         except Exception as e:
-            logger.error(f"从索引移除文档失败: {e}")
+            logger.error(f"更新搜索索引失败: {e}")
             return False
-    
+
     def _remove_document_from_index(self, conn: sqlite3.Connection, document_id: str):
         """从索引中移除文档（内部方法）"""
         conn.execute("DELETE FROM document_index WHERE id = ?", (document_id,))
-        conn.execute("DELETE FROM word_index WHERE document_id = ?", (document_id,))
-    
-    def _build_word_index(self, conn: sqlite3.Connection, document: Document):
-        """构建词汇索引"""
-        if not document.content:
-            return
-        
-        # 简单的词汇分割（可以改进为更复杂的分词）
-        words = self._tokenize(document.content + " " + document.title)
-        word_freq = Counter(words)
-        
-        for word, frequency in word_freq.items():
-            if len(word) < 2:  # 忽略太短的词
-                continue
-                
-            # 查找词汇位置
-            positions = self._find_word_positions(document.content, word)
-            
-            conn.execute("""
-                INSERT OR REPLACE INTO word_index 
-                (word, document_id, frequency, positions)
-                VALUES (?, ?, ?, ?)
-            """, (
-                word.lower(),
-                document.id,
-                frequency,
-                json.dumps(positions)
-            ))
-    
+        rowids = [
+            (row[0],) for row in
+            conn.execute("SELECT fts_rowid FROM document_paragraphs WHERE doc_id = ?", (document_id,))
+        ]
+        conn.executemany("DELETE FROM document_fts WHERE rowid = ?", rowids)
+        conn.execute("DELETE FROM document_paragraphs WHERE doc_id = ?", (document_id,))
+        self.paragraphs_deleted += len(rowids)
+
+    @staticmethod
+    def _paragraph_hash(paragraph: str) -> bytes:
+        return hashlib.blake2b(
+            paragraph.encode('utf-8', 'surrogatepass'), digest_size=PARAGRAPH_HASH_SIZE
+        ).digest()
+
+    @classmethod
+    def _index_rows(cls, title: str, content: str) -> Dict[bytes, Tuple[str, str]]:
+        """把标题和正文拆成FTS行：段落哈希 -> (标题, 正文段落)，重复段落只保留一行"""
+        rows: Dict[bytes, Tuple[str, str]] = {}
+        if title:
+            title_hash = hashlib.blake2b(
+                title.encode('utf-8', 'surrogatepass'),
+                digest_size=PARAGRAPH_HASH_SIZE, person=TITLE_HASH_PERSON
+            ).digest()
+            rows[title_hash] = (title, "")
+        for paragraph in content.split("\n"):
+            if paragraph.strip():
+                rows.setdefault(cls._paragraph_hash(paragraph), ("", paragraph))
+        return rows
+
+    def _sync_paragraphs(self, conn: sqlite3.Connection, doc_id: str, title: str, content: str) -> Tuple[int, int]:
+        """
+        比较新旧段落，只删除消失的段落、插入新出现的段落
+
+        Returns:
+            Tuple[int, int]: (插入的行数, 删除的行数)
+        """
+        rows = self._index_rows(title, content)
+        existing = {
+            row[0]: row[1] for row in
+            conn.execute("SELECT para_hash, fts_rowid FROM document_paragraphs WHERE doc_id = ?", (doc_id,))
+        }
+
+        removed = [(para_hash, rowid) for para_hash, rowid in existing.items() if para_hash not in rows]
+        added = [(para_hash, row) for para_hash, row in rows.items() if para_hash not in existing]
+
+        if removed:
+            conn.executemany("DELETE FROM document_fts WHERE rowid = ?", [(rowid,) for _, rowid in removed])
+            conn.executemany(
+                "DELETE FROM document_paragraphs WHERE doc_id = ? AND para_hash = ?",
+                [(doc_id, para_hash) for para_hash, _ in removed]
+            )
+
+        if added:
+            # 显式分配行号，段落映射无需逐行读取 last_insert_rowid
+            next_rowid = self._next_fts_rowid(conn)
+            fts_rows = []
+            mappings = []
+            for offset, (para_hash, (row_title, body)) in enumerate(added):
+                rowid = next_rowid + offset
+                fts_rows.append((
+                    rowid,
+                    doc_id,
+                    encode_for_index(row_title),
+                    encode_for_index(body),
+                    extract_terms(row_title or body)
+                ))
+                mappings.append((doc_id, para_hash, rowid))
+            conn.executemany("""
+                INSERT INTO document_fts (rowid, doc_id, title, body, terms)
+                VALUES (?, ?, ?, ?, ?)
+            """, fts_rows)
+            conn.executemany("""
+                INSERT INTO document_paragraphs (doc_id, para_hash, fts_rowid)
+                VALUES (?, ?, ?)
+                ON CONFLICT(doc_id, para_hash) DO UPDATE SET fts_rowid = excluded.fts_rowid
+            """, mappings)
+
+        self.paragraphs_inserted += len(added)
+        self.paragraphs_deleted += len(removed)
+        self.paragraphs_reused += len(rows) - len(added)
+        return len(added), len(removed)
+
+    @staticmethod
+    def _next_fts_rowid(conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT rowid FROM document_fts ORDER BY rowid DESC LIMIT 1").fetchone()
+        return (row[0] if row else 0) + 1
+
     def _tokenize(self, text: str) -> List[str]:
-        """分词"""
-        import re
-        # 简单的分词，可以改进
-        words = re.findall(r'\b\w+\b', text.lower())
-        return words
-    
-    def _find_word_positions(self, text: str, word: str) -> List[int]:
-        """查找词汇在文本中的位置（优化版本）"""
-        # 使用对象池获取位置列表
-        from src.shared.utils.object_pool import acquire_object, release_object
-
-        positions = acquire_object('list')
-        try:
-            word_lower = word.lower()
-            text_lower = text.lower()
-            word_len = len(word_lower)
-
-            # 使用更高效的搜索算法
-            start = 0
-            while start < len(text_lower):
-                pos = text_lower.find(word_lower, start)
-                if pos == -1:
-                    break
-                positions.append(pos)
-                start = pos + word_len  # 跳过整个词，避免重叠匹配
-
-            # 复制结果并释放池对象
-            result = positions.copy()
-            return result
-
-        finally:
-            release_object('list', positions)
-    
+        """分词（与FTS索引编码一致的查询词元）"""
+        return [token for phrase in tokenize_query(text) for token in phrase]
+
     @performance_monitor("搜索执行")
-    def search(self, query: str, limit: int = 100) -> List[Dict[str, Any]]:
-        """搜索文档（优化版本，带缓存）"""
-        # 生成缓存键
-        cache_key = f"search:{query.strip().lower()}:{limit}"
+    def search(self, query: str, limit: int = 100, token: Optional[CancellationToken] = None) -> List[Dict[str, Any]]:
+        """
+        搜索文档（FTS5 MATCH + bm25排序，带缓存）
+
+        返回的每个结果额外包含 ``snippet``：以匹配位置为中心、
+        用 ``<mark>`` 标记命中内容的预览片段。文档得分为各命中段落bm25之和，
+        预览取自得分最高的正文段落。结果不包含全文，只带正文开头 ``content_head``
+        （最多 PREVIEW_HEAD_CHARS 个字符）；需要全文时使用 :meth:`get_document_content`。
+
+        传入 token 时，查询执行期间由 SQLite 进度回调检查取消状态，
+        取消或超时会中止查询并抛出 OperationCancelled（中止的结果不写入缓存）。
+        """
+        # 生成缓存键（包含索引版本，索引更新后旧结果不再命中）
+        cache_key = f"search:{self._generation}:{query.strip().lower()}:{limit}"
 
         # 尝试从缓存获取结果
         cache_result = self.performance_manager.cache_get(cache_key)
+        set_span_attributes(cache_hit=cache_result.success)
         if cache_result.success:
             logger.debug(f"搜索缓存命中: {query}")
             return cache_result.data
 
+        match_query = build_match_query(query)
+        if not match_query:
+            return []
+
+        if token is not None:
+            token.raise_if_cancelled()
+
         try:
-            with self._lock:
-                with sqlite3.connect(self.db_path) as conn:
-                    conn.row_factory = sqlite3.Row
-
-                    # 优化的搜索实现
-                    words = self._tokenize(query)
-                    if not words:
-                        return []
-
-                    # 使用更高效的查询策略
-                    if len(words) == 1:
-                        # 单词搜索优化
-                        cursor = conn.execute("""
-                            SELECT d.*, w.frequency as relevance_score
-                            FROM document_index d
-                            JOIN word_index w ON d.id = w.document_id
-                            WHERE w.word LIKE ?
-                            ORDER BY w.frequency DESC, d.updated_at DESC
-                            LIMIT ?
-                        """, [f"%{words[0]}%", limit])
-                    else:
-                        # 多词搜索优化
-                        placeholders = " OR ".join(["w.word LIKE ?"] * len(words))
-                        search_params = [f"%{word}%" for word in words]
-
-                        cursor = conn.execute(f"""
-                            SELECT d.*,
-                                   SUM(w.frequency) as relevance_score,
-                                   COUNT(DISTINCT w.word) as word_matches
-                            FROM document_index d
-                            JOIN word_index w ON d.id = w.document_id
-                            WHERE {placeholders}
-                            GROUP BY d.id
-                            ORDER BY word_matches DESC, relevance_score DESC, d.updated_at DESC
-                            LIMIT ?
-                        """, search_params + [limit])
-                    
-                    results = []
-                    for row in cursor:
-                        result = {
-                            'id': row['id'],
-                            'title': row['title'],
-                            'content': row['content'],
-                            'document_type': row['document_type'],
-                            'project_id': row['project_id'],
-                            'metadata': json.loads(row['metadata'] or '{}'),
-                            'word_count': row['word_count'],
-                            'relevance_score': float(row['total_frequency']),
-                            'created_at': row['created_at'],
-                            'updated_at': row['updated_at']
-                        }
-                        results.append(result)
-
-                    # 缓存搜索结果
-                    self.performance_manager.cache_set(cache_key, results, ttl=300)  # 5分钟缓存
-                    logger.debug(f"搜索结果已缓存: {query}")
-
-                    return results
-                    
+            with self._db.reader(token.is_cancelled if token is not None else None) as conn:
+                # 第一步只计算bm25并挑出每个文档的最佳段落，不为每个命中段落生成snippet
+                rows = conn.execute(f"""
+                    WITH hits AS (
+                        SELECT rowid AS fts_rowid, doc_id,
+                               bm25(document_fts, {", ".join(map(str, BM25_WEIGHTS))}) AS rank_score,
+                               body = '' AS title_only
+                        FROM document_fts
+                        WHERE document_fts MATCH ?
+                    ),
+                    ranked AS (
+                        SELECT doc_id, fts_rowid,
+                               SUM(rank_score) OVER (PARTITION BY doc_id) AS doc_score,
+                               ROW_NUMBER() OVER (
+                                   PARTITION BY doc_id ORDER BY title_only, rank_score
+                               ) AS position
+                        FROM hits
+                    )
+                    SELECT d.id, d.title, substr(d.content, 1, ?) AS content_head,
+                           d.document_type, d.project_id, d.metadata, d.word_count,
+                           d.created_at, d.updated_at,
+                           r.doc_score AS rank_score, r.fts_rowid AS fts_rowid
+                    FROM ranked r
+                    JOIN document_index d ON d.id = r.doc_id
+                    WHERE r.position = 1
+                    ORDER BY rank_score, d.updated_at DESC
+                    LIMIT ?
+                """, (match_query, PREVIEW_HEAD_CHARS, limit)).fetchall()
+
+                # 第二步只为返回的文档生成预览片段
+                snippets = self._fetch_snippets(conn, query, match_query, [row['fts_rowid'] for row in rows])
+
+                results = []
+                for row in rows:
+                    result = {
+                        'id': row['id'],
+                        'title': row['title'],
+                        'content_head': row['content_head'] or '',
+                        'document_type': row['document_type'],
+                        'project_id': row['project_id'],
+                        'metadata': json.loads(row['metadata'] or '{}'),
+                        'word_count': row['word_count'],
+                        # bm25() 越小越相关，取反后越大越相关
+                        'relevance_score': -float(row['rank_score']),
+                        'snippet': snippets.get(row['fts_rowid'], ''),
+                        'created_at': row['created_at'],
+                        'updated_at': row['updated_at']
+                    }
+                    results.append(result)
+
+                # 缓存搜索结果
+                self.performance_manager.cache_set(cache_key, results, ttl=300)  # 5分钟缓存
+                logger.debug(f"搜索结果已缓存: {query}")
+
+                return results
+
+        except QueryInterrupted:
+            logger.debug(f"搜索查询已中止: {query}")
+            token.raise_if_cancelled()
+            raise
         except Exception as e:
             logger.error(f"搜索失败: {e}")
             return []
-    
+
+    @staticmethod
+    def _fetch_snippets(
+        conn: sqlite3.Connection, query: str, match_query: str, fts_rowids: List[int]
+    ) -> Dict[int, str]:
+        """为指定FTS行生成snippet（FTS行号 -> 解码后的预览片段）"""
+        if not fts_rowids:
+            return {}
+        placeholders = ", ".join("?" * len(fts_rowids))
+        cursor = conn.execute(f"""
+            SELECT rowid, snippet(document_fts, ?, ?, ?, ?, ?)
+            FROM document_fts
+            WHERE document_fts MATCH ? AND rowid IN ({placeholders})
+        """, (
+            SNIPPET_COLUMN, MATCH_START, MATCH_END, SNIPPET_ELLIPSIS, SNIPPET_TOKENS,
+            match_query, *fts_rowids
+        ))
+        return {rowid: decode_fts_text(snippet, query=query) for rowid, snippet in cursor}
+
+    def get_document_content(self, document_id: str) -> Optional[str]:
+        """读取已索引的文档全文（文档不在索引中时返回None）"""
+        try:
+            with self._db.reader() as conn:
+                row = conn.execute(
+                    "SELECT content FROM document_index WHERE id = ?", (document_id,)
+                ).fetchone()
+                return None if row is None else (row[0] or "")
+        except Exception as e:
+            logger.error(f"读取索引文档内容失败: {e}")
+            return None
+
+    def highlight(self, document_id: str, query: str) -> Optional[str]:
+        """
+        返回整篇文档内容，命中位置以 ``<mark>`` 标记
+
+        Returns:
+            Optional[str]: 高亮后的正文；文档不在索引中或未命中时返回None
+        """
+        match_query = build_match_query(query)
+        if not match_query:
+            return None
+
+        try:
+            with self._db.reader() as conn:
+                row = conn.execute(
+                    "SELECT content FROM document_index WHERE id = ?", (document_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                # 命中的段落按内容哈希对应回原文中的行
+                highlighted: Dict[bytes, str] = {}
+                cursor = conn.execute("""
+                    SELECT p.para_hash, highlight(document_fts, ?, ?, ?)
+                    FROM document_fts f
+                    JOIN document_paragraphs p ON p.doc_id = f.doc_id AND p.fts_rowid = f.rowid
+                    WHERE document_fts MATCH ? AND f.doc_id = ? AND f.body != ''
+                """, (SNIPPET_COLUMN, MATCH_START, MATCH_END, match_query, document_id))
+                for para_hash, text in cursor:
+                    highlighted[para_hash] = decode_fts_text(text, query=query)
+                if not highlighted:
+                    return None
+
+                lines = (row[0] or "").split("\n")
+                return "\n".join(
+                    highlighted.get(self._paragraph_hash(line), line) if line.strip() else line
+                    for line in lines
+                )
+
+        except Exception as e:
+            logger.error(f"生成高亮内容失败: {e}")
+            return None
+
     def get_status(self) -> IndexStatus:
         """获取索引状态"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._db.reader() as conn:
                 cursor = conn.execute("SELECT COUNT(*) FROM document_index")
                 total_docs = cursor.fetchone()[0]
-                
+
                 # 获取数据库文件大小
                 db_size = self.db_path.stat().st_size if self.db_path.exists() else 0
-                
+
                 # 获取最后更新时间
                 cursor = conn.execute("""
                     SELECT MAX(indexed_at) FROM document_index
@@ -294,7 +473,7 @@ class SearchIndex:
                         last_update = datetime.fromisoformat(last_update_str)
                     except:
                         pass
-                
+
                 return IndexStatus(
                     total_documents=total_docs,
                     indexed_documents=total_docs,
@@ -303,103 +482,137 @@ class SearchIndex:
                     is_building=False,
                     build_progress=100.0
                 )
-                
+
         except Exception as e:
             logger.error(f"获取索引状态失败: {e}")
             return IndexStatus(errors=[str(e)])
-    
+
     def rebuild_index(self, documents: List[Document]) -> bool:
         """重建索引"""
+        documents = [_snapshot(document) for document in documents]
+
+        def rebuild(conn: sqlite3.Connection):
+            # 清空现有索引
+            conn.execute("DELETE FROM document_index")
+            conn.execute("DELETE FROM document_fts")
+            conn.execute("DELETE FROM document_paragraphs")
+
+            # 重新添加所有文档
+            for document in documents:
+                self._add_document_to_connection(conn, document)
+
+            # 合并FTS段，提高后续查询速度
+            conn.execute("INSERT INTO document_fts(document_fts) VALUES ('optimize')")
+            self._generation += 1
+
         try:
-            with self._lock:
-                with sqlite3.connect(self.db_path) as conn:
-                    # 清空现有索引
-                    conn.execute("DELETE FROM document_index")
-                    conn.execute("DELETE FROM word_index")
-                    conn.commit()
-                    
-                    # 重新添加所有文档
-                    for document in documents:
-                        self._add_document_to_connection(conn, document)
-                    
-                    conn.commit()
-                    return True
-                    
+            self._db.write(rebuild)
+            return True
+
         except Exception as e:
             logger.error(f"重建索引失败: {e}")
             return False
-    
-    def _add_document_to_connection(self, conn: sqlite3.Connection, document: Document):
-        """在给定连接上添加文档（内部方法）"""
+
+    def _add_document_to_connection(self, conn: sqlite3.Connection, document: IndexedDocument):
+        """在给定连接上添加或更新文档快照（内部方法）：文档信息整行覆盖，全文索引按段落增量更新"""
         # 添加文档信息
         conn.execute("""
-            INSERT OR REPLACE INTO document_index 
-            (id, title, content, document_type, project_id, metadata, 
+            INSERT OR REPLACE INTO document_index
+            (id, title, content, document_type, project_id, metadata,
              word_count, created_at, updated_at, indexed_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             document.id,
             document.title,
             document.content,
-            document.document_type.value if document.document_type else "",
+            document.document_type,
             document.project_id,
-            json.dumps(document.metadata or {}),
+            document.metadata_json,
             len(document.content.split()) if document.content else 0,
-            document.created_at.isoformat() if document.created_at else "",
-            document.updated_at.isoformat() if document.updated_at else "",
+            document.created_at,
+            document.updated_at,
             datetime.now().isoformat()
         ))
-        
-        # 构建词汇索引
-        self._build_word_index(conn, document)
-    
+
+        # 增量更新全文索引
+        self._sync_paragraphs(conn, document.id, document.title, document.content)
+
     def get_word_suggestions(self, prefix: str, limit: int = 10) -> List[str]:
-        """获取词汇建议"""
+        """获取词汇建议（优先使用jieba词语列，其次为正文词元）"""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute("""
-                    SELECT DISTINCT word 
-                    FROM word_index 
-                    WHERE word LIKE ? 
-                    ORDER BY word 
-                    LIMIT ?
-                """, (f"{prefix.lower()}%", limit))
-                
-                return [row[0] for row in cursor]
-                
+            with self._db.reader() as conn:
+                suggestions: List[str] = []
+                for column in ("terms", "body"):
+                    cursor = conn.execute("""
+                        SELECT term
+                        FROM document_fts_vocab
+                        WHERE col = ? AND term >= ? AND term < ?
+                        ORDER BY cnt DESC, term
+                        LIMIT ?
+                    """, (column, prefix, prefix + "\U0010ffff", limit))
+                    for (term,) in cursor:
+                        if term not in suggestions:
+                            suggestions.append(term)
+                    if len(suggestions) >= limit:
+                        break
+
+                return suggestions[:limit]
+
         except Exception as e:
             logger.error(f"获取词汇建议失败: {e}")
             return []
-    
+
+    def close(self) -> None:
+        """等待排队的写入完成并关闭数据库连接"""
+        self._db.close()
+
     def get_statistics(self) -> Dict[str, Any]:
         """获取索引统计信息"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._db.reader() as conn:
                 stats = {}
-                
+
                 # 文档统计
                 cursor = conn.execute("SELECT COUNT(*) FROM document_index")
                 stats['total_documents'] = cursor.fetchone()[0]
-                
+
                 # 词汇统计
-                cursor = conn.execute("SELECT COUNT(DISTINCT word) FROM word_index")
+                cursor = conn.execute("SELECT COUNT(DISTINCT term) FROM document_fts_vocab")
                 stats['unique_words'] = cursor.fetchone()[0]
-                
+
                 # 平均词汇数
                 cursor = conn.execute("SELECT AVG(word_count) FROM document_index")
                 avg_words = cursor.fetchone()[0]
                 stats['average_words_per_document'] = float(avg_words) if avg_words else 0
-                
+
                 # 文档类型分布
                 cursor = conn.execute("""
-                    SELECT document_type, COUNT(*) 
-                    FROM document_index 
+                    SELECT document_type, COUNT(*)
+                    FROM document_index
                     GROUP BY document_type
                 """)
                 stats['document_types'] = dict(cursor.fetchall())
-                
+
+                # 段落级增量索引
+                cursor = conn.execute("SELECT COUNT(*) FROM document_paragraphs")
+                stats['indexed_paragraphs'] = cursor.fetchone()[0]
+                stats['paragraphs_inserted'] = self.paragraphs_inserted
+                stats['paragraphs_deleted'] = self.paragraphs_deleted
+                stats['paragraphs_reused'] = self.paragraphs_reused
+                stats['database'] = self._db.get_statistics()
+
                 return stats
-                
+
         except Exception as e:
             logger.error(f"获取索引统计失败: {e}")
             return {}
+
+
+def _snapshot(document: Union[Document, IndexedDocument]) -> IndexedDocument:
+    if isinstance(document, IndexedDocument):
+        return document
+    return IndexedDocument.from_document(document)
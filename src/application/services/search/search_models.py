@@ -6,6 +6,7 @@
 包含搜索匹配项、搜索结果、搜索选项等数据类
 """
 
+import json
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional, Set
 from datetime import datetime
@@ -36,6 +37,37 @@ class SearchResult:
     created_at: datetime = field(default_factory=datetime.now)
 
 
+@dataclass(frozen=True)
+class IndexedDocument:
+    """
+    写入搜索索引的文档快照
+
+    在入队（保存）时从 Document 复制出来，索引线程只读取快照，
+    不会读到之后尚未保存的编辑，也不与事件循环线程共享可变的 Document。
+    """
+    id: str
+    title: str
+    content: str
+    document_type: str
+    project_id: Optional[str]
+    metadata_json: str
+    created_at: str
+    updated_at: str
+
+    @classmethod
+    def from_document(cls, document) -> "IndexedDocument":
+        return cls(
+            id=document.id,
+            title=document.title or "",
+            content=document.content or "",
+            document_type=document.document_type.value if document.document_type else "",
+            project_id=document.project_id,
+            metadata_json=json.dumps(document.to_dict()["metadata"], ensure_ascii=False),
+            created_at=document.metadata.created_at.isoformat(),
+            updated_at=document.metadata.updated_at.isoformat()
+        )
+
+
 @dataclass
 class SearchOptions:
     """搜索选项"""
@@ -143,6 +175,17 @@ class SearchQuery:
         return query
 
 
+def sort_search_results(results: List[SearchResult], query: SearchQuery) -> None:
+    """按查询的排序方式原地排序（结果集和增量交付的每一批使用同一规则）"""
+    reverse = query.sort_order == "desc"
+    if query.sort_by == "relevance":
+        results.sort(key=lambda r: r.relevance_score, reverse=reverse)
+    elif query.sort_by == "date":
+        results.sort(key=lambda r: r.created_at, reverse=reverse)
+    elif query.sort_by == "title":
+        results.sort(key=lambda r: r.title.lower(), reverse=reverse)
+
+
 class SearchResultSet:
     """搜索结果集"""
     
@@ -152,6 +195,8 @@ class SearchResultSet:
         self.total_count = len(self.results)
         self.search_time = 0.0
         self.timestamp = datetime.now()
+        # 搜索被取消或超时，results 只包含已处理完的部分
+        self.cancelled = False
     
     def add_result(self, result: SearchResult):
         """添加搜索结果"""
@@ -160,15 +205,7 @@ class SearchResultSet:
     
     def sort_results(self):
         """排序结果"""
-        if self.query.sort_by == "relevance":
-            self.results.sort(key=lambda r: r.relevance_score, 
-                            reverse=(self.query.sort_order == "desc"))
-        elif self.query.sort_by == "date":
-            self.results.sort(key=lambda r: r.created_at, 
-                            reverse=(self.query.sort_order == "desc"))
-        elif self.query.sort_by == "title":
-            self.results.sort(key=lambda r: r.title.lower(), 
-                            reverse=(self.query.sort_order == "desc"))
+        sort_search_results(self.results, self.query)
     
     def filter_results(self, max_results: int = None) -> List[SearchResult]:
         """过滤结果"""
@@ -209,6 +246,7 @@ class SearchResultSet:
                 }
                 for r in self.results
             ],
+            'cancelled': self.cancelled,
             'statistics': self.get_statistics()
         }
 
@@ -9,7 +9,7 @@
 import re
 import json
 import threading
-from typing import List, Dict, Any, Optional, Set, Tuple
+from typing import Callable, List, Dict, Any, Optional, Pattern, Set, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
 from collections import defaultdict, Counter
@@ -21,18 +21,29 @@ from src.domain.repositories.project_repository import IProjectRepository
 from src.domain.repositories.document_repository import IDocumentRepository
 from src.domain.events.document_events import DocumentSearchedEvent
 from src.shared.events.event_bus import EventBus
+from src.shared.utils.cancellation import CancellationToken, OperationCancelled
 from src.shared.utils.logger import get_logger
 
 # 导入拆分的模块
 from .search_models import (
     SearchMatch, SearchResult, SearchOptions, SearchHistoryItem, 
     SearchStatistics, SearchQuery, SearchResultSet, SearchFilter,
-    SearchException, SearchTimeoutException
+    SearchException, sort_search_results
 )
 from .search_index import SearchIndex
+from .fts_tokenizer import build_line_pattern
+from .index_queue import SearchIndexQueue
 
 logger = get_logger(__name__)
 
+# 增量交付：首批结果尽快交给界面，其余按批追加
+FIRST_BATCH_SIZE = 20
+RESULT_BATCH_SIZE = 20
+# 每个文档最多记录的匹配数
+MAX_MATCHES_PER_RESULT = 200
+# 逐行匹配时每隔多少行检查一次取消
+MATCH_CANCEL_CHECK_LINES = 256
+
 
 class SearchService:
     """
@@ -54,6 +65,7 @@ class SearchService:
         document_repository: 文档仓储接口
         event_bus: 事件总线
         search_index: 搜索索引实例
+        index_queue: 后台索引队列（合并连续保存后批量写入索引）
         search_history: 搜索历史记录
         search_statistics: 搜索统计信息
     """
@@ -84,6 +96,7 @@ class SearchService:
         index_path.parent.mkdir(parents=True, exist_ok=True)
 
         self.search_index = SearchIndex(index_path)
+        self.index_queue = SearchIndexQueue(self.search_index)
 
         # 搜索历史和统计
         self.search_history: List[SearchHistoryItem] = []
@@ -94,7 +107,13 @@ class SearchService:
 
         logger.info("搜索服务初始化完成")
 
-    def search(self, query: SearchQuery, timeout: float = 30.0) -> SearchResultSet:
+    def search(
+        self,
+        query: SearchQuery,
+        timeout: float = 30.0,
+        token: Optional[CancellationToken] = None,
+        on_results: Optional[Callable[[List[SearchResult]], None]] = None
+    ) -> SearchResultSet:
         """
         执行搜索操作（增强健壮性版本）
 
@@ -104,17 +123,22 @@ class SearchService:
 
         实现方式：
         - 输入验证和边界条件检查
-        - 使用线程锁确保并发安全
-        - 超时保护机制（Unix系统）
-        - 记录搜索开始时间和历史
-        - 调用内部搜索方法执行实际搜索
+        - 超时通过取消令牌的截止时间实现：索引查询由 SQLite 进度回调中止，
+          结果处理在每个结果之间检查，可在任意线程中使用
+        - 调用内部搜索方法执行实际搜索，结果按批交给 on_results
         - 对结果进行排序和后处理
-        - 更新搜索统计信息
+        - 线程锁只保护搜索历史和统计信息，多个搜索可以并发执行
         - 安全发布搜索完成事件
 
+        取消或超时时返回已处理完的部分结果，结果集的 cancelled 为 True。
+
         Args:
             query: 搜索查询对象，包含搜索文本和选项
             timeout: 搜索超时时间（秒），默认30秒
+            token: 调用方的取消令牌（例如输入新的查询时取消上一次搜索）
+            on_results: 增量结果回调，在搜索线程中调用；首批最多 FIRST_BATCH_SIZE 个结果，
+                之后每批最多 RESULT_BATCH_SIZE 个。每批内部按查询的排序方式排好序，
+                但批与批之间保持索引相关度顺序；返回的结果集整体排序，应替换已显示的各批结果
 
         Returns:
             SearchResultSet: 搜索结果集，包含匹配的文档和统计信息
@@ -134,105 +158,126 @@ class SearchService:
             query.text = query.text[:1000]
 
         start_time = datetime.now()
+        search_token = token.child(timeout) if token is not None else CancellationToken(timeout)
+        results: List[SearchResult] = []
 
         try:
-            # 使用超时机制（仅在Unix系统上）
-            import signal
-
-            def timeout_handler(signum, frame):
-                raise SearchTimeoutException(f"搜索超时: {timeout}秒")
-
-            # 设置超时（仅在Unix系统上）
-            old_handler = None
-            if hasattr(signal, 'SIGALRM'):
-                old_handler = signal.signal(signal.SIGALRM, timeout_handler)
-                signal.alarm(int(timeout))
-
+            # 执行搜索（结果边处理边追加，取消时保留已处理的部分）
+            cancelled = False
             try:
-                with self._lock:
-                    # 记录搜索历史
-                    history_item = SearchHistoryItem(
-                        id=str(uuid4()),
-                        query=query.text,
-                        options=query.options,
-                        timestamp=start_time,
-                        result_count=0
-                    )
+                self._perform_search(query, search_token, results, on_results)
+            except OperationCancelled as e:
+                cancelled = True
+                if e.timed_out:
+                    logger.warning(f"搜索超时: '{query.text}' ({timeout}秒)，返回 {len(results)} 个已处理结果")
+                    self.search_statistics.timeout_count += 1
+                else:
+                    logger.info(f"搜索已取消: '{query.text}'")
+
+            # 创建结果集
+            result_set = SearchResultSet(query, results)
+            result_set.cancelled = cancelled
+            result_set.search_time = (datetime.now() - start_time).total_seconds()
+
+            # 排序结果
+            result_set.sort_results()
+
+            # 更新历史和统计
+            with self._lock:
+                self.search_history.append(SearchHistoryItem(
+                    id=str(uuid4()),
+                    query=query.text,
+                    options=query.options,
+                    timestamp=start_time,
+                    result_count=len(results)
+                ))
+                self._update_statistics(query, len(results), result_set.search_time)
+
+            # 发布搜索事件（安全发布）
+            try:
+                self.event_bus.publish(DocumentSearchedEvent(
+                    query=query.text,
+                    result_count=len(results),
+                    search_time=result_set.search_time
+                ))
+            except Exception as event_error:
+                logger.warning(f"发布搜索事件失败: {event_error}")
+
+            logger.info(f"搜索完成: '{query.text}' -> {len(results)} 个结果")
+            return result_set
 
-                    # 执行搜索
-                    results = self._perform_search(query)
-
-                    # 创建结果集
-                    result_set = SearchResultSet(query, results)
-                    result_set.search_time = (datetime.now() - start_time).total_seconds()
-
-                    # 排序结果
-                    result_set.sort_results()
-
-                    # 更新历史和统计
-                    history_item.result_count = len(results)
-                    self.search_history.append(history_item)
-                    self._update_statistics(query, len(results), result_set.search_time)
-
-                    # 发布搜索事件（安全发布）
-                    try:
-                        self.event_bus.publish(DocumentSearchedEvent(
-                            query=query.text,
-                            result_count=len(results),
-                            search_time=result_set.search_time
-                        ))
-                    except Exception as event_error:
-                        logger.warning(f"发布搜索事件失败: {event_error}")
-
-                    logger.info(f"搜索完成: '{query.text}' -> {len(results)} 个结果")
-                    return result_set
-
-            finally:
-                # 清除超时设置
-                if hasattr(signal, 'SIGALRM') and old_handler is not None:
-                    signal.alarm(0)
-                    signal.signal(signal.SIGALRM, old_handler)
-
-        except SearchTimeoutException as e:
-            logger.error(f"搜索超时: {e}")
-            if hasattr(self.search_statistics, 'timeout_count'):
-                self.search_statistics.timeout_count += 1
-            return SearchResultSet(query, [])
         except Exception as e:
             logger.error(f"搜索失败: {e}")
-            if hasattr(self.search_statistics, 'error_count'):
+            with self._lock:
                 self.search_statistics.error_count += 1
             return SearchResultSet(query, [])
 
-    def _perform_search(self, query: SearchQuery) -> List[SearchResult]:
-        """执行实际搜索"""
-        results = []
-        
+    def _perform_search(
+        self,
+        query: SearchQuery,
+        token: CancellationToken,
+        results: List[SearchResult],
+        on_results: Optional[Callable[[List[SearchResult]], None]] = None
+    ) -> None:
+        """
+        执行实际搜索，把结果追加到 results
+
+        结果只使用索引返回的元数据和预览片段，不读取、不扫描文档全文；
+        逐行匹配在打开结果时由 :meth:`get_matches` 按需计算。
+        """
         # 使用索引搜索
-        index_results = self.search_index.search(query.text, query.options.max_results)
-        
+        index_results = self.search_index.search(query.text, query.options.max_results, token)
+
+        batch: List[SearchResult] = []
+        batch_size = FIRST_BATCH_SIZE
         for index_result in index_results:
+            token.raise_if_cancelled()
+
+            # 预览优先使用索引返回的snippet，避免再次扫描全文
+            preview = index_result.get('snippet')
+            if preview:
+                if not query.options.highlight_matches:
+                    preview = preview.replace("<mark>", "").replace("</mark>", "")
+            else:
+                preview = self._generate_preview(index_result['content_head'], query.text)
+
             # 转换为SearchResult
             search_result = SearchResult(
                 item_type="document",
                 item_id=index_result['id'],
                 title=index_result['title'],
-                content_preview=self._generate_preview(index_result['content'], query.text),
+                content_preview=preview,
                 relevance_score=index_result['relevance_score'],
                 metadata=index_result['metadata']
             )
-            
-            # 查找匹配项
-            matches = self._find_matches(index_result['content'], query.text, query.options)
-            search_result.matches = matches
-            
+
+            # 应用过滤器
+            if query.filters and not self._matches_filters(search_result, query.filters):
+                continue
+
             results.append(search_result)
-        
-        # 应用过滤器
-        if query.filters:
-            results = self._apply_filters(results, query.filters)
-        
-        return results
+            batch.append(search_result)
+            if len(batch) >= batch_size:
+                self._deliver_batch(batch, query, on_results)
+                batch = []
+                batch_size = RESULT_BATCH_SIZE
+
+        self._deliver_batch(batch, query, on_results)
+
+    def _deliver_batch(
+        self,
+        batch: List[SearchResult],
+        query: SearchQuery,
+        on_results: Optional[Callable[[List[SearchResult]], None]]
+    ) -> None:
+        """把一批结果排序后交给增量回调（回调异常不影响搜索）"""
+        if not batch or on_results is None:
+            return
+        sort_search_results(batch, query)
+        try:
+            on_results(batch)
+        except Exception as e:
+            logger.warning(f"增量搜索结果回调失败: {e}")
 
     def _generate_preview(self, content: str, query: str, max_length: int = 200) -> str:
         """生成内容预览"""
@@ -260,56 +305,104 @@ class SearchService:
         
         return preview
 
-    def _find_matches(self, content: str, query: str, options: SearchOptions) -> List[SearchMatch]:
-        """查找匹配项"""
-        matches = []
-        
-        if not content or not query:
-            return matches
-        
-        # 构建搜索模式
-        pattern = query
+    def get_matches(
+        self,
+        result: SearchResult,
+        query: SearchQuery,
+        token: Optional[CancellationToken] = None
+    ) -> List[SearchMatch]:
+        """
+        计算搜索结果中的逐行匹配（打开结果时调用）
+
+        从索引读取该文档的全文，用与索引查询相同的检索词逐行匹配，
+        结果同时写入 result.matches。
+        """
+        if result.item_type != "document":
+            return result.matches
+
+        content = self.search_index.get_document_content(result.item_id)
+        pattern = self._compile_pattern(query.text, query.options)
+        result.matches = self._find_matches(content or "", pattern, query.options, token)
+        return result.matches
+
+    def _compile_pattern(self, query: str, options: SearchOptions) -> Optional[Pattern[str]]:
+        """
+        构建逐行匹配使用的正则表达式
+
+        默认与索引的MATCH表达式使用同一组检索词（见 fts_tokenizer.build_line_pattern），
+        多个检索词的查询逐行匹配任意一个；use_regex 时按原样作为正则表达式。
+        """
+        if not query:
+            return None
+
         flags = 0
-        
+
         if not options.case_sensitive:
             flags |= re.IGNORECASE
-        
-        if options.whole_words:
-            pattern = r'\b' + re.escape(pattern) + r'\b'
-        elif not options.use_regex:
-            pattern = re.escape(pattern)
-        
+
+        if options.use_regex:
+            pattern = query
+        else:
+            pattern = build_line_pattern(query, options.whole_words)
+            if pattern is None:
+                return None
+
         try:
-            # 按行搜索
-            lines = content.split('\n')
-            for line_num, line in enumerate(lines, 1):
-                for match in re.finditer(pattern, line, flags):
-                    search_match = SearchMatch(
-                        line_number=line_num,
-                        line_content=line,
-                        match_start=match.start(),
-                        match_end=match.end()
-                    )
-                    
-                    # 添加上下文
-                    if options.include_context:
-                        search_match.context_before = self._get_context_before(
-                            lines, line_num - 1, options.context_lines
-                        )
-                        search_match.context_after = self._get_context_after(
-                            lines, line_num - 1, options.context_lines
-                        )
-                    
-                    # 高亮匹配内容
-                    search_match.highlighted_content = self._highlight_match(
-                        line, match.start(), match.end()
-                    )
-                    
-                    matches.append(search_match)
-                    
+            return re.compile(pattern, flags)
         except re.error as e:
             logger.warning(f"正则表达式错误: {e}")
-        
+            return None
+
+    def _find_matches(
+        self,
+        content: str,
+        pattern: Optional[Pattern[str]],
+        options: SearchOptions,
+        token: Optional[CancellationToken] = None
+    ) -> List[SearchMatch]:
+        """
+        查找匹配项
+
+        全文没有任何匹配时不再拆分行；每个文档最多记录 MAX_MATCHES_PER_RESULT 个匹配，
+        每扫描 MATCH_CANCEL_CHECK_LINES 行检查一次取消。
+        """
+        matches = []
+
+        if not content or pattern is None or not pattern.search(content):
+            return matches
+
+        # 按行搜索
+        lines = content.split('\n')
+        for line_num, line in enumerate(lines, 1):
+            if token is not None and line_num % MATCH_CANCEL_CHECK_LINES == 0:
+                token.raise_if_cancelled()
+
+            for match in pattern.finditer(line):
+                search_match = SearchMatch(
+                    line_number=line_num,
+                    line_content=line,
+                    match_start=match.start(),
+                    match_end=match.end()
+                )
+
+                # 添加上下文
+                if options.include_context:
+                    search_match.context_before = self._get_context_before(
+                        lines, line_num - 1, options.context_lines
+                    )
+                    search_match.context_after = self._get_context_after(
+                        lines, line_num - 1, options.context_lines
+                    )
+
+                # 高亮匹配内容
+                search_match.highlighted_content = self._highlight_match(
+                    line, match.start(), match.end()
+                )
+
+                matches.append(search_match)
+                if len(matches) >= MAX_MATCHES_PER_RESULT:
+                    return matches
+
         return matches
 
     def _get_context_before(self, lines: List[str], line_index: int, context_lines: int) -> str:
@@ -332,39 +425,38 @@ class SearchService:
 
     def _apply_filters(self, results: List[SearchResult], filters: SearchFilter) -> List[SearchResult]:
         """应用搜索过滤器"""
-        filtered_results = []
-        
-        for result in results:
-            # 应用各种过滤条件
-            if filters.document_types and result.metadata.get('document_type') not in filters.document_types:
-                continue
-            
-            if filters.projects and result.metadata.get('project_id') not in filters.projects:
-                continue
-            
-            # 日期过滤
-            if filters.date_created_start or filters.date_created_end:
-                created_at = result.metadata.get('created_at')
-                if created_at:
-                    try:
-                        created_date = datetime.fromisoformat(created_at)
-                        if filters.date_created_start and created_date < filters.date_created_start:
-                            continue
-                        if filters.date_created_end and created_date > filters.date_created_end:
-                            continue
-                    except:
-                        pass
-            
-            # 字数过滤
-            word_count = result.metadata.get('word_count', 0)
-            if filters.min_word_count and word_count < filters.min_word_count:
-                continue
-            if filters.max_word_count and word_count > filters.max_word_count:
-                continue
-            
-            filtered_results.append(result)
-        
-        return filtered_results
+        return [result for result in results if self._matches_filters(result, filters)]
+
+    def _matches_filters(self, result: SearchResult, filters: SearchFilter) -> bool:
+        """单个结果是否满足过滤条件"""
+        # 应用各种过滤条件
+        if filters.document_types and result.metadata.get('document_type') not in filters.document_types:
+            return False
+
+        if filters.projects and result.metadata.get('project_id') not in filters.projects:
+            return False
+
+        # 日期过滤
+        if filters.date_created_start or filters.date_created_end:
+            created_at = result.metadata.get('created_at')
+            if created_at:
+                try:
+                    created_date = datetime.fromisoformat(created_at)
+                    if filters.date_created_start and created_date < filters.date_created_start:
+                        return False
+                    if filters.date_created_end and created_date > filters.date_created_end:
+                        return False
+                except:
+                    pass
+
+        # 字数过滤
+        word_count = result.metadata.get('word_count', 0)
+        if filters.min_word_count and word_count < filters.min_word_count:
+            return False
+        if filters.max_word_count and word_count > filters.max_word_count:
+            return False
+
+        return True
 
     def _update_statistics(self, query: SearchQuery, result_count: int, search_time: float):
         """更新搜索统计"""
@@ -397,6 +489,29 @@ class SearchService:
             logger.error(f"添加文档到索引失败: {e}")
             return False
 
+    def schedule_index_update(self, document: Document) -> None:
+        """保存后登记索引更新，由后台队列合并后写入（不阻塞调用方）"""
+        try:
+            self.index_queue.enqueue_update(document)
+        except Exception as e:
+            logger.error(f"登记索引更新失败: {e}")
+
+    def schedule_index_removal(self, document_id: str) -> None:
+        """删除后登记索引移除，由后台队列写入（不阻塞调用方）"""
+        try:
+            self.index_queue.enqueue_removal(document_id)
+        except Exception as e:
+            logger.error(f"登记索引移除失败: {e}")
+
+    def flush_index_updates(self, timeout: Optional[float] = None) -> bool:
+        """立即写入排队中的索引变更并等待完成"""
+        return self.index_queue.flush(timeout)
+
+    def shutdown(self) -> None:
+        """写入剩余的索引变更，停止后台索引线程并关闭索引数据库"""
+        self.index_queue.shutdown()
+        self.search_index.close()
+
     def remove_document_from_index(self, document_id: str) -> bool:
         """从索引中移除文档"""
         try:
@@ -7,7 +7,6 @@
 """
 
 import json
-import asyncio
 from pathlib import Path
 from typing import Any, Dict, Optional
 from datetime import datetime
@@ -265,13 +264,8 @@ class SettingsService(BaseConfigManager):
                         new_value=value
                     )
 
-                    # 检查是否有运行的事件循环
-                    try:
-                        _ = asyncio.get_running_loop()
-                        asyncio.create_task(self.event_bus.publish_async(event))
-                    except RuntimeError:
-                        logger.debug(f"没有运行的事件循环，跳过事件发布: {key}")
-                        pass
+                    # 事件在应用事件循环中处理，同步调用方不被阻塞
+                    self.event_bus.publish(event)
 
                 except Exception as e:
                     logger.warning(f"发布设置变更事件失败: {e}")
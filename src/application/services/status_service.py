@@ -11,11 +11,16 @@ from typing import Dict, Any, List, Optional
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 
 from src.shared.utils.logger import get_logger
+from src.shared.monitoring.metrics import STANDARD_WINDOWS, WINDOW_10_MINUTES, get_metrics_registry
 from src.domain.entities.project import Project
 from src.domain.entities.document import Document
+from src.domain.events.document_events import DocumentContentChangedEvent
 
 logger = get_logger(__name__)
 
+# AI 响应时间直方图在指标注册表中的名称
+AI_RESPONSE_TIME_METRIC = "ai.response_time"
+
 
 class StatusService(QObject):
     """状态服务 - 收集真实的应用程序状态数据"""
@@ -47,7 +52,6 @@ class StatusService(QObject):
         self.performance_data = {
             "memory_usage": 0.0,
             "cpu_usage": 0.0,
-            "response_times": [],
             "error_count": 0,
             "cache_hits": 0,
             "cache_misses": 0
@@ -62,6 +66,17 @@ class StatusService(QObject):
         self.update_timer = QTimer()
         self.update_timer.timeout.connect(self._collect_system_data)
         self.update_timer.start(5000)  # 每5秒更新一次
+
+        # 会话字数由内容变更事件携带的字数变化累计，无需比较全文
+        try:
+            from src.shared.events.event_bus import get_event_bus
+            get_event_bus().subscribe(
+                DocumentContentChangedEvent,
+                self._on_document_content_changed,
+                subscriber=self
+            )
+        except Exception as e:
+            logger.warning(f"订阅文档内容变更事件失败: {e}")
         
         logger.info("状态服务初始化完成")
     
@@ -193,10 +208,7 @@ class StatusService(QObject):
             self.performance_data["error_count"] += 1
 
         if response_time > 0:
-            self.performance_data["response_times"].append(response_time)
-            # 只保留最近100次的响应时间
-            if len(self.performance_data["response_times"]) > 100:
-                self.performance_data["response_times"] = self.performance_data["response_times"][-100:]
+            get_metrics_registry().record_latency(AI_RESPONSE_TIME_METRIC, response_time, success)
 
         logger.debug(f"AI请求记录: 成功={success}, 响应时间={response_time:.3f}s")
 
@@ -211,6 +223,11 @@ class StatusService(QObject):
         # 立即发送状态更新信号
         self.status_updated.emit(self.get_all_statistics())
 
+    def _on_document_content_changed(self, event: DocumentContentChangedEvent):
+        """按内容变更事件累计会话字数（本服务是 QObject，事件总线把处理器投递到界面线程执行）"""
+        if event.word_count_change:
+            self.record_session_words(event.word_count_change)
+
     def set_ai_status(self, status: str):
         """设置AI状态"""
         self.ai_status = status
@@ -238,12 +255,13 @@ class StatusService(QObject):
             return 100.0
         return (self.statistics["ai_success_count"] / total_requests) * 100
     
+    def get_response_time_summary(self, window: str = WINDOW_10_MINUTES) -> Dict[str, Any]:
+        """AI 响应时间在窗口内的汇总（平均值与 p50/p95/p99）"""
+        return get_metrics_registry().summarize(AI_RESPONSE_TIME_METRIC, STANDARD_WINDOWS[window]) or {}
+
     def get_average_response_time(self) -> float:
-        """获取平均响应时间"""
-        response_times = self.performance_data["response_times"]
-        if not response_times:
-            return 0.0
-        return sum(response_times) / len(response_times)
+        """获取最近10分钟的平均响应时间"""
+        return self.get_response_time_summary().get('mean', 0.0)
     
     def get_cache_hit_rate(self) -> float:
         """获取缓存命中率"""
@@ -255,6 +273,7 @@ class StatusService(QObject):
     def get_all_statistics(self) -> Dict[str, Any]:
         """获取所有统计数据"""
         session_duration = self.get_session_duration()
+        response_times = self.get_response_time_summary()
         
         return {
             # 基础统计
@@ -265,7 +284,8 @@ class StatusService(QObject):
             # AI统计
             "ai_requests": self.statistics["ai_requests"],
             "ai_success_rate": self.get_ai_success_rate(),
-            "ai_avg_response_time": self.get_average_response_time(),
+            "ai_avg_response_time": response_times.get('mean', 0.0),
+            "ai_p95_response_time": response_times.get('p95', 0.0),
             
             # 会话信息
             "session_duration_minutes": int(session_duration.total_seconds() / 60),
@@ -18,6 +18,7 @@ from collections import defaultdict, deque
 
 from src.application.services.ai.intelligence.deep_context_analyzer import WritingContext
 from src.application.services.ai.intelligence.singleton import get_deep_context_analyzer
+from src.application.services.ai.intelligence.analysis_process_pool import get_analysis_pool
 from src.application.services.ai.intelligence.intelligent_prompt_builder import IntelligentPromptBuilder
 from src.shared.utils.logger import get_logger
 
@@ -221,8 +222,11 @@ class IntelligentWritingAssistant:
             # 更新写作统计
             self._update_writing_stats(text)
             
+            # 深度上下文分析在分析进程池中执行，建议和洞察共用同一份结果
+            writing_context = self._analyze_writing_context(text)
+            
             # 生成写作建议
-            suggestions = self._generate_suggestions(text, cursor_position, selected_text)
+            suggestions = self._generate_suggestions(text, cursor_position, selected_text, writing_context)
             
             # 处理新建议
             for suggestion in suggestions:
@@ -230,20 +234,34 @@ class IntelligentWritingAssistant:
             
             # 生成写作洞察
             if len(text) > 500:  # 只对较长文本生成洞察
-                insights = self._generate_insights(text)
+                insights = self._generate_insights(text, writing_context)
                 for insight in insights:
                     self._add_insight(insight)
             
         except Exception as e:
             logger.error(f"处理分析请求失败: {e}")
     
-    def _generate_suggestions(self, text: str, cursor_position: int, selected_text: str) -> List[WritingSuggestion]:
+    def _analyze_writing_context(self, text: str) -> WritingContext:
+        """分析写作上下文（优先在分析进程池中执行，失败时在本进程执行）"""
+        writing_context = get_analysis_pool().analyze_writing_context(text, key=f"writing_assistant:{id(self)}")
+        if writing_context is None:
+            writing_context = self._context_analyzer.analyze_writing_context(text)
+        return writing_context
+
+    def _generate_suggestions(
+        self,
+        text: str,
+        cursor_position: int,
+        selected_text: str,
+        writing_context: Optional[WritingContext] = None
+    ) -> List[WritingSuggestion]:
         """生成写作建议"""
         suggestions = []
         
         try:
             # 分析写作上下文
-            writing_context = self._context_analyzer.analyze_writing_context(text)
+            if writing_context is None:
+                writing_context = self._analyze_writing_context(text)
             
             # 语法检查建议
             grammar_suggestions = self._check_grammar(text, writing_context)
@@ -503,13 +521,14 @@ class IntelligentWritingAssistant:
         
         return suggestions
     
-    def _generate_insights(self, text: str) -> List[WritingInsight]:
+    def _generate_insights(self, text: str, context: Optional[WritingContext] = None) -> List[WritingInsight]:
         """生成写作洞察"""
         insights = []
         
         try:
             # 分析写作上下文
-            context = self._context_analyzer.analyze_writing_context(text)
+            if context is None:
+                context = self._analyze_writing_context(text)
             
             # 写作风格洞察
             style_insight = WritingInsight(
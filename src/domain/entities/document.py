@@ -12,6 +12,7 @@ from enum import Enum
 from typing import Dict, List, Optional, Set, Any, Union
 from uuid import uuid4
 
+from src.shared.utils.text_delta import TextDelta, count_changed_segments
 from src.shared.constants import (
     MAX_DOCUMENT_WORD_COUNT, MIN_WORD_COUNT_FOR_ANALYSIS,
     DOCUMENT_TYPES
@@ -24,6 +25,8 @@ READING_SPEED_WPM = 250.0  # 每分钟阅读字数
 MAX_TITLE_LENGTH = 200
 MAX_CONTENT_LENGTH = MAX_DOCUMENT_WORD_COUNT
 DEFAULT_OUTLINE_STRUCTURE = "三幕式"
+PARAGRAPH_SEPARATOR = "\n\n"
+SENTENCE_SEPARATOR = "."
 
 # 简化验证结果类，避免外部依赖
 class ValidationResult:
@@ -169,12 +172,36 @@ class DocumentStatistics:
     def update_from_content(self, content: str):
         """从内容更新统计"""
         self.character_count = len(content)
-        self.word_count = len(content.split())
-        self.paragraph_count = len([p for p in content.split('\n\n') if p.strip()])
-        self.sentence_count = len([s for s in content.split('.') if s.strip()])
+        self.word_count = _count_words(content)
+        self.paragraph_count = _count_paragraphs(content)
+        self.sentence_count = _count_sentences(content)
         # 估算阅读时间
         self.reading_time_minutes = self.word_count / READING_SPEED_WPM
 
+    def apply_delta(self, old_content: str, new_content: str, delta: TextDelta):
+        """按文本增量更新统计（只重新统计变更附近的文本）"""
+        self.character_count = len(new_content)
+        self.word_count += count_changed_segments(old_content, new_content, delta, _count_words)
+        self.paragraph_count += count_changed_segments(
+            old_content, new_content, delta, _count_paragraphs, PARAGRAPH_SEPARATOR
+        )
+        self.sentence_count += count_changed_segments(
+            old_content, new_content, delta, _count_sentences, SENTENCE_SEPARATOR
+        )
+        self.reading_time_minutes = self.word_count / READING_SPEED_WPM
+
+
+def _count_words(content: str) -> int:
+    return len(content.split())
+
+
+def _count_paragraphs(content: str) -> int:
+    return len([p for p in content.split(PARAGRAPH_SEPARATOR) if p.strip()])
+
+
+def _count_sentences(content: str) -> int:
+    return len([s for s in content.split(SENTENCE_SEPARATOR) if s.strip()])
+
 
 @dataclass
 class DocumentTypeConfig:
@@ -337,6 +364,12 @@ class Document:
         self.statistics.update_from_content(new_content)
         self.metadata.touch()
 
+    def apply_content_delta(self, new_content: str, delta: TextDelta):
+        """按文本增量更新内容（编辑器输入），统计只重新计算变更附近的文本"""
+        old_content = self.content or ""
+        self.content = new_content
+        self.statistics.apply_delta(old_content, new_content, delta)
+
     def change_status(self, new_status: DocumentStatus):
         """更改状态"""
         if not isinstance(new_status, DocumentStatus):
@@ -6,11 +6,12 @@
 定义文档生命周期中的各种事件
 """
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Callable, Optional
 
 from src.shared.events.event_bus import Event
 from src.domain.entities.document import DocumentStatus, DocumentType
+from src.shared.utils.text_delta import TextDelta
 
 
 @dataclass
@@ -106,22 +107,65 @@ class DocumentTitleChangedEvent(Event):
 
 @dataclass
 class DocumentContentChangedEvent(Event):
-    """文档内容变更事件"""
+    """
+    文档内容变更事件
+
+    只携带单段替换形式的增量：在 position 处删除 removed_length 个字符并插入 inserted_text，
+    事件大小与编辑大小成正比，而不是携带变更前后的两份全文。
+
+    base_hash/result_hash 为变更前后的内容版本哈希（见 text_delta.chain_hash）：
+    订阅方持有的版本等于 base_hash 时可直接应用增量；版本不一致时通过 full_text()
+    取变更后的全文重新同步。full_text() 返回文档已持有的字符串，不复制内容。
+    """
     document_id: str = ""
-    old_content: str = ""
-    new_content: str = ""
+    position: int = 0
+    removed_length: int = 0
+    inserted_text: str = ""
+    base_hash: str = ""
+    result_hash: str = ""
     word_count_change: int = 0
-    
+    text_provider: Optional[Callable[[], str]] = field(default=None, repr=False, compare=False)
+
     def __post_init__(self):
         super().__post_init__()
         self.source = "document_entity"
-        # 安全计算字数变化
-        try:
-            old_words = len(self.old_content.split()) if self.old_content else 0
-            new_words = len(self.new_content.split()) if self.new_content else 0
-            self.word_count_change = new_words - old_words
-        except (AttributeError, TypeError):
-            self.word_count_change = 0
+
+    @property
+    def delta(self) -> TextDelta:
+        return TextDelta(self.position, self.removed_length, self.inserted_text)
+
+    def full_text(self) -> str:
+        """变更后的全文（按需获取）"""
+        return self.text_provider() if self.text_provider is not None else ""
+
+    def apply_to(self, text: str) -> str:
+        """把增量应用到基准版本的文本上"""
+        return self.delta.apply(text)
+
+    def merged_with(self, later: "DocumentContentChangedEvent") -> "DocumentContentChangedEvent":
+        """
+        与紧随其后的变更事件合并为一个（用于事件总线的高频事件合并）
+
+        合并后的增量覆盖两次改动之间的整个区间，插入文本取自后一事件的全文，
+        开销与该区间长度成正比。
+        """
+        if later.base_hash != self.result_hash:
+            return later
+
+        # 以中间版本的坐标表示两次改动的覆盖区间
+        start = min(self.position, later.position)
+        end = max(self.position + len(self.inserted_text), later.position + later.removed_length)
+        result_end = end + len(later.inserted_text) - later.removed_length
+        return DocumentContentChangedEvent(
+            document_id=self.document_id,
+            position=start,
+            removed_length=end - start - len(self.inserted_text) + self.removed_length,
+            inserted_text=later.full_text()[start:result_end],
+            base_hash=self.base_hash,
+            result_hash=later.result_hash,
+            word_count_change=self.word_count_change + later.word_count_change,
+            text_provider=later.text_provider
+        )
 
 
 @dataclass
@@ -13,10 +13,19 @@ from .clients.openai_client import OpenAIClient
 from .clients.deepseek_client import DeepSeekClient
 from .clients.ai_client_factory import AIClientFactory
 
+# 健康跟踪与熔断
+from .provider_health import ProviderHealth, CircuitState, CircuitOpenError, ErrorClass
+
 __all__ = [
     # 客户端
     'BaseAIClient',
     'OpenAIClient',
     'DeepSeekClient',
-    'AIClientFactory'
+    'AIClientFactory',
+
+    # 健康跟踪与熔断
+    'ProviderHealth',
+    'CircuitState',
+    'CircuitOpenError',
+    'ErrorClass'
 ]
@@ -69,7 +69,7 @@ class BaseAIClient(ABC):
     @abstractmethod
     async def is_healthy(self) -> bool:
         """
-        检查客户端健康状态
+        检查客户端健康状态（被动检查，不应发起网络请求）
         
         Returns:
             bool: 是否健康
@@ -124,16 +124,8 @@ class OpenAIClient(BaseAIClient):
         Returns:
             bool: 是否健康
         """
-        if not self.is_connected or not self.client:
-            return False
-        
-        try:
-            # 简单的健康检查
-            await self._test_connection()
-            return True
-        except Exception as e:
-            logger.warning(f"OpenAI客户端健康检查失败: {e}")
-            return False
+        # 被动检查：不发送探测请求，真实请求的成功率与熔断状态由客户端管理器跟踪
+        return self.is_connected and self.client is not None
     
     async def get_capabilities(self) -> List[AICapability]:
         """
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI提供商健康跟踪与熔断器
+
+健康状态完全由真实请求的结果被动推导（成功率、延迟EWMA、错误分类），
+不再在每次请求前发送探测请求。每个提供商一个熔断器：
+
+- CLOSED：正常放行请求，记录结果
+- OPEN：连续失败或近期失败率过高时打开，请求直接快速失败；
+  经过退避时间后由后台探测任务尝试恢复
+- HALF_OPEN：后台探测进行中，探测成功则关闭熔断器，失败则重新打开并加倍退避
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 健康统计
+OUTCOME_WINDOW_SIZE = 20  # 用于计算成功率的最近请求数
+LATENCY_EWMA_ALPHA = 0.2
+
+# 熔断策略
+FAILURE_THRESHOLD = 5  # 连续失败次数
+FAILURE_RATE_THRESHOLD = 0.5  # 窗口内失败率
+FAILURE_RATE_MIN_SAMPLES = 10  # 失败率判定所需的最少样本数
+OPEN_BASE_SECONDS = 15.0  # 首次打开后的等待时间
+OPEN_MAX_SECONDS = 300.0  # 退避上限
+
+
+class CircuitState(Enum):
+    """熔断器状态"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class ErrorClass(Enum):
+    """请求错误分类"""
+    TIMEOUT = "timeout"
+    RATE_LIMIT = "rate_limit"
+    AUTH = "auth"
+    SERVER = "server"
+    NETWORK = "network"
+    CLIENT = "client"  # 请求本身有误（参数、内容），不计入提供商健康
+    UNKNOWN = "unknown"
+
+
+# 不代表提供商故障的错误类型
+NON_HEALTH_ERRORS = frozenset({ErrorClass.CLIENT})
+
+
+class CircuitOpenError(RuntimeError):
+    """提供商熔断器处于打开状态，请求被快速拒绝"""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"AI提供商暂不可用（熔断中）: {provider}，约 {retry_after:.0f} 秒后重试")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+def classify_error(error: BaseException) -> ErrorClass:
+    """
+    根据异常类型和HTTP状态码对错误分类
+
+    按类名和 status_code 属性判断，不直接依赖 openai / httpx 的异常类型。
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return ErrorClass.TIMEOUT
+
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    if isinstance(status, int):
+        if status == 429:
+            return ErrorClass.RATE_LIMIT
+        if status in (401, 403):
+            return ErrorClass.AUTH
+        if status >= 500:
+            return ErrorClass.SERVER
+        if status == 408:
+            return ErrorClass.TIMEOUT
+        if 400 <= status < 500:
+            return ErrorClass.CLIENT
+
+    name = type(error).__name__.lower()
+    if "timeout" in name:
+        return ErrorClass.TIMEOUT
+    if "ratelimit" in name:
+        return ErrorClass.RATE_LIMIT
+    if "authentication" in name or "permission" in name:
+        return ErrorClass.AUTH
+    if "connect" in name or "network" in name or isinstance(error, (ConnectionError, OSError)):
+        return ErrorClass.NETWORK
+    return ErrorClass.UNKNOWN
+
+
+class ProviderHealth:
+    """
+    单个提供商的健康状态与熔断器
+
+    所有方法都在应用事件循环中调用，无需加锁。
+    """
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.state = CircuitState.CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=OUTCOME_WINDOW_SIZE)
+        self.latency_ewma: Optional[float] = None
+        self.consecutive_failures = 0
+        self.total_requests = 0
+        self.total_failures = 0
+        self.error_counts: Dict[str, int] = {}
+        self.last_error: Optional[str] = None
+        self.last_success_at: Optional[float] = None
+        self.last_failure_at: Optional[float] = None
+        self._open_seconds = OPEN_BASE_SECONDS
+        self._open_until = 0.0
+        self._probe_task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # 结果记录
+    # ------------------------------------------------------------------
+
+    def record_success(self, latency: float) -> None:
+        self.total_requests += 1
+        self._outcomes.append(True)
+        self.consecutive_failures = 0
+        self.last_success_at = time.monotonic()
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += LATENCY_EWMA_ALPHA * (latency - self.latency_ewma)
+
+    def record_failure(self, error: BaseException) -> ErrorClass:
+        """记录失败，返回错误分类；必要时打开熔断器"""
+        error_class = classify_error(error)
+        self.error_counts[error_class.value] = self.error_counts.get(error_class.value, 0) + 1
+        self.last_error = str(error)
+        if error_class in NON_HEALTH_ERRORS:
+            return error_class
+
+        self.total_requests += 1
+        self.total_failures += 1
+        self._outcomes.append(False)
+        self.consecutive_failures += 1
+        self.last_failure_at = time.monotonic()
+
+        if self.state == CircuitState.CLOSED and self._should_open():
+            self._open()
+        return error_class
+
+    def _should_open(self) -> bool:
+        if self.consecutive_failures >= FAILURE_THRESHOLD:
+            return True
+        if len(self._outcomes) >= FAILURE_RATE_MIN_SAMPLES:
+            return 1.0 - self.success_rate >= FAILURE_RATE_THRESHOLD
+        return False
+
+    # ------------------------------------------------------------------
+    # 状态
+    # ------------------------------------------------------------------
+
+    @property
+    def success_rate(self) -> float:
+        if not self._outcomes:
+            return 1.0
+        return sum(self._outcomes) / len(self._outcomes)
+
+    @property
+    def is_healthy(self) -> bool:
+        return self.state == CircuitState.CLOSED
+
+    def retry_after(self) -> float:
+        return max(0.0, self._open_until - time.monotonic())
+
+    def ensure_available(self) -> None:
+        """熔断器未关闭时抛出 CircuitOpenError（快速失败）"""
+        if self.state != CircuitState.CLOSED:
+            raise CircuitOpenError(self.provider, self.retry_after())
+
+    def _open(self) -> None:
+        self.state = CircuitState.OPEN
+        self._open_until = time.monotonic() + self._open_seconds
+        logger.warning(
+            f"AI提供商熔断打开: {self.provider}，连续失败 {self.consecutive_failures} 次，"
+            f"成功率 {self.success_rate:.0%}，{self._open_seconds:.0f} 秒后探测"
+        )
+
+    def _close(self) -> None:
+        self.state = CircuitState.CLOSED
+        self._open_seconds = OPEN_BASE_SECONDS
+        self.consecutive_failures = 0
+        self._outcomes.clear()
+        logger.info(f"AI提供商恢复可用: {self.provider}")
+
+    # ------------------------------------------------------------------
+    # 后台探测
+    # ------------------------------------------------------------------
+
+    def schedule_probe(self, probe: Callable[[], Awaitable[Any]]) -> None:
+        """熔断器打开时启动后台探测任务（已有探测任务时不重复启动）"""
+        if self.state == CircuitState.CLOSED:
+            return
+        if self._probe_task is not None and not self._probe_task.done():
+            return
+        self._probe_task = asyncio.get_running_loop().create_task(self._probe_loop(probe))
+
+    async def _probe_loop(self, probe: Callable[[], Awaitable[Any]]) -> None:
+        while self.state != CircuitState.CLOSED:
+            await asyncio.sleep(self.retry_after())
+            self.state = CircuitState.HALF_OPEN
+            start = time.monotonic()
+            try:
+                await probe()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.record_failure(e)
+                self._open_seconds = min(self._open_seconds * 2, OPEN_MAX_SECONDS)
+                self._open()
+                continue
+            self.record_success(time.monotonic() - start)
+            self._close()
+
+    def cancel_probe(self) -> None:
+        if self._probe_task is not None and not self._probe_task.done():
+            self._probe_task.cancel()
+        self._probe_task = None
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            'state': self.state.value,
+            'success_rate': self.success_rate,
+            'latency_ewma': self.latency_ewma,
+            'consecutive_failures': self.consecutive_failures,
+            'total_requests': self.total_requests,
+            'total_failures': self.total_failures,
+            'error_counts': dict(self.error_counts),
+            'last_error': self.last_error,
+            'retry_after': self.retry_after() if self.state != CircuitState.CLOSED else 0.0,
+        }
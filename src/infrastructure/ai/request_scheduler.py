@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI请求调度器
+
+所有AI调用在发往提供商之前都在这里排队取得执行槽位：
+- 三个优先级队列：交互（用户主动发起）> 自动建议 > 后台分析，由 AIPriority 映射而来
+- 全局并发上限和每个提供商的并发上限；每个提供商为交互请求保留槽位，
+  长时间运行的后台流式请求不会占满提供商
+- 每个提供商可配置 RPM / TPM 令牌桶，额度不足时请求留在队列中，额度恢复后再派发
+- 交互请求排队时取消同一提供商仍在排队的后台请求（抛出 RequestPreemptedError）
+
+派发严格按优先级：某个提供商的高优先级请求受阻时，该提供商的低优先级请求也不会越过它。
+所有方法在应用事件循环中调用，无需加锁。
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from src.domain.ai.value_objects.ai_priority import AIPriority
+from src.shared.monitoring.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENT = 3
+RESERVED_INTERACTIVE_SLOTS = 1  # 每个提供商为交互请求保留的槽位数
+WAIT_STATS_WINDOW = 600.0  # 等待时间统计窗口（秒）
+WAIT_METRIC_PREFIX = "ai.scheduler.wait."  # 等待时间直方图名称前缀（后接队列名）
+
+
+class RequestTier(IntEnum):
+    """调度队列（数值越小越优先）"""
+    INTERACTIVE = 0
+    SUGGESTION = 1
+    BACKGROUND = 2
+
+
+def tier_for_priority(priority: Optional[AIPriority]) -> RequestTier:
+    """AIPriority -> 调度队列：HIGH及以上为交互，NORMAL为自动建议，LOW为后台分析"""
+    if priority is None:
+        return RequestTier.SUGGESTION
+    if priority.weight >= AIPriority.HIGH.weight:
+        return RequestTier.INTERACTIVE
+    if priority == AIPriority.LOW:
+        return RequestTier.BACKGROUND
+    return RequestTier.SUGGESTION
+
+
+def estimate_request_tokens(prompt: str, context: str, max_tokens: int) -> int:
+    """估算一次请求消耗的令牌数（输入按UTF-8字节数/3粗估，加上输出上限）"""
+    input_bytes = len((prompt or "").encode("utf-8")) + len((context or "").encode("utf-8"))
+    return input_bytes // 3 + max(0, int(max_tokens or 0))
+
+
+class RequestPreemptedError(RuntimeError):
+    """排队中的请求被更高优先级的请求取消"""
+
+
+class TokenBucket:
+    """按分钟额度匀速恢复的令牌桶"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._last = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def delay_for(self, amount: float) -> float:
+        """取得 amount 个令牌还需等待的秒数（0表示现在即可）；超过容量的请求按满桶计"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+@dataclass(order=True)
+class _Waiter:
+    tier: RequestTier
+    sequence: int
+    provider: str = field(compare=False)
+    tokens: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+class _TierStats:
+    def __init__(self, tier: RequestTier):
+        self.granted = 0
+        self.preempted = 0
+        self.cancelled = 0
+        # 排队等待时间写入全局指标注册表（各队列一个直方图）
+        self.waits = get_metrics_registry().histogram(f"{WAIT_METRIC_PREFIX}{tier.name.lower()}")
+
+    def record_wait(self, seconds: float) -> None:
+        self.granted += 1
+        self.waits.record(seconds)
+
+    def snapshot(self, depth: int) -> Dict[str, Any]:
+        waits = self.waits.window(WAIT_STATS_WINDOW).summary()
+        return {
+            'queue_depth': depth,
+            'granted': self.granted,
+            'preempted': self.preempted,
+            'cancelled': self.cancelled,
+            'avg_wait': waits['mean'],
+            'p95_wait': waits['p95'],
+            'max_wait': waits['max'],
+        }
+
+
+class AIRequestScheduler:
+    """
+    AI请求调度器
+
+    用法：
+        async with scheduler.slot(provider, AIPriority.HIGH, estimated_tokens):
+            ...  # 向提供商发起请求（流式请求在整个流期间持有槽位）
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        provider_limits: Optional[Dict[str, Dict[str, Any]]] = None,
+        preempt_background: bool = True
+    ):
+        """
+        Args:
+            max_concurrent: 全局并发上限，也是未单独配置的提供商的并发上限
+            provider_limits: 提供商 -> {'max_concurrent', 'rpm', 'tpm'}
+            preempt_background: 交互请求排队时是否取消排队中的后台请求
+        """
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.preempt_background = preempt_background
+        self._provider_limits: Dict[str, Dict[str, Any]] = {}
+        self._rpm: Dict[str, TokenBucket] = {}
+        self._tpm: Dict[str, TokenBucket] = {}
+        self._waiters: List[_Waiter] = []
+        self._running: Dict[str, int] = {}
+        self._running_total = 0
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._stats = {tier: _TierStats(tier) for tier in RequestTier}
+        self.rate_limited = 0
+        self.configure(max_concurrent, provider_limits)
+
+    def configure(self, max_concurrent: Optional[int] = None, provider_limits: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """更新并发和限速配置（已在运行的请求不受影响）"""
+        if max_concurrent is not None:
+            self.max_concurrent = max(1, int(max_concurrent))
+        if provider_limits is not None:
+            self._provider_limits = {p: dict(limits or {}) for p, limits in provider_limits.items()}
+            self._rpm = {
+                p: TokenBucket(limits['rpm']) for p, limits in self._provider_limits.items() if limits.get('rpm')
+            }
+            self._tpm = {
+                p: TokenBucket(limits['tpm']) for p, limits in self._provider_limits.items() if limits.get('tpm')
+            }
+        # 可能在界面线程中更新配置：只在事件循环中派发，否则留给下一次获取/释放
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._dispatch()
+
+    def _provider_capacity(self, provider: str) -> int:
+        limit = self._provider_limits.get(provider, {}).get('max_concurrent')
+        return max(1, int(limit)) if limit else self.max_concurrent
+
+    # ------------------------------------------------------------------
+    # 获取/释放槽位
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        provider: str,
+        priority: Optional[AIPriority] = None,
+        estimated_tokens: int = 0
+    ) -> AsyncIterator[None]:
+        """排队取得执行槽位，退出时释放"""
+        await self.acquire(provider, priority, estimated_tokens)
+        try:
+            yield
+        finally:
+            self.release(provider)
+
+    async def acquire(self, provider: str, priority: Optional[AIPriority] = None, estimated_tokens: int = 0) -> None:
+        tier = tier_for_priority(priority)
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(
+            tier=tier,
+            sequence=next(self._sequence),
+            provider=provider,
+            tokens=estimated_tokens,
+            future=loop.create_future(),
+            enqueued_at=time.monotonic()
+        )
+        self._waiters.append(waiter)
+        self._waiters.sort()
+        self._dispatch()
+
+        if not waiter.future.done() and tier == RequestTier.INTERACTIVE and self.preempt_background:
+            self._preempt(provider)
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # 已分配槽位但调用方被取消：归还槽位
+                self.release(provider)
+            else:
+                self._remove_waiter(waiter)
+                self._stats[tier].cancelled += 1
+            raise
+
+    def release(self, provider: str) -> None:
+        self._running[provider] = max(0, self._running.get(provider, 0) - 1)
+        self._running_total = max(0, self._running_total - 1)
+        self._dispatch()
+
+    def _remove_waiter(self, waiter: _Waiter) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _preempt(self, provider: str) -> None:
+        """取消同一提供商排队中的后台请求"""
+        preempted = [
+            w for w in self._waiters
+            if w.provider == provider and w.tier == RequestTier.BACKGROUND and not w.future.done()
+        ]
+        for waiter in preempted:
+            self._remove_waiter(waiter)
+            waiter.future.set_exception(RequestPreemptedError("后台AI请求被交互请求取消"))
+            self._stats[waiter.tier].preempted += 1
+        if preempted:
+            logger.debug(f"交互请求排队，取消 {len(preempted)} 个后台请求: {provider}")
+
+    # ------------------------------------------------------------------
+    # 派发
+    # ------------------------------------------------------------------
+
+    def _dispatch(self) -> None:
+        """按优先级把可用槽位分配给排队的请求"""
+        blocked: Set[str] = set()
+        retry_after: Optional[float] = None
+
+        for waiter in list(self._waiters):
+            interactive = waiter.tier == RequestTier.INTERACTIVE
+            # 队列按优先级有序：全局槽位不足时后面的请求同样无法派发
+            if self._running_total >= self._capacity(self.max_concurrent, interactive):
+                break
+            if waiter.future.done():
+                self._remove_waiter(waiter)
+                continue
+            provider = waiter.provider
+            if provider in blocked:
+                continue
+
+            if self._running.get(provider, 0) >= self._capacity(self._provider_capacity(provider), interactive):
+                blocked.add(provider)
+                continue
+
+            delay = self._rate_delay(provider, waiter.tokens)
+            if delay > 0:
+                blocked.add(provider)
+                self.rate_limited += 1
+                retry_after = delay if retry_after is None else min(retry_after, delay)
+                continue
+
+            self._grant(waiter)
+
+        if retry_after is not None:
+            self._schedule_wakeup(retry_after)
+
+    @staticmethod
+    def _capacity(limit: int, interactive: bool) -> int:
+        """非交互请求可用的槽位扣除为交互请求保留的部分"""
+        if interactive or limit <= RESERVED_INTERACTIVE_SLOTS:
+            return limit
+        return limit - RESERVED_INTERACTIVE_SLOTS
+
+    def _rate_delay(self, provider: str, tokens: int) -> float:
+        delay = 0.0
+        rpm = self._rpm.get(provider)
+        if rpm is not None:
+            delay = max(delay, rpm.delay_for(1))
+        tpm = self._tpm.get(provider)
+        if tpm is not None and tokens:
+            delay = max(delay, tpm.delay_for(tokens))
+        return delay
+
+    def _grant(self, waiter: _Waiter) -> None:
+        self._remove_waiter(waiter)
+        provider = waiter.provider
+        if provider in self._rpm:
+            self._rpm[provider].take(1)
+        if provider in self._tpm and waiter.tokens:
+            self._tpm[provider].take(waiter.tokens)
+        self._running[provider] = self._running.get(provider, 0) + 1
+        self._running_total += 1
+        self._stats[waiter.tier].record_wait(time.monotonic() - waiter.enqueued_at)
+        waiter.future.set_result(None)
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        """额度恢复后重新派发（已有更早的唤醒时保留它）"""
+        loop = asyncio.get_running_loop()
+        when = loop.time() + delay
+        if self._wakeup is not None:
+            if self._wakeup.when() <= when:
+                return
+            self._wakeup.cancel()
+        self._wakeup = loop.call_at(when, self._on_wakeup)
+
+    def _on_wakeup(self) -> None:
+        self._wakeup = None
+        self._dispatch()
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+
+    def queue_depth(self, tier: Optional[RequestTier] = None) -> int:
+        return sum(1 for w in self._waiters if tier is None or w.tier == tier)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            'max_concurrent': self.max_concurrent,
+            'running': dict(self._running),
+            'running_total': self._running_total,
+            'queue_depth': self.queue_depth(),
+            'rate_limited': self.rate_limited,
+            'tiers': {
+                tier.name.lower(): self._stats[tier].snapshot(self.queue_depth(tier))
+                for tier in RequestTier
+            },
+        }
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI响应持久缓存
+
+WAL模式的SQLite缓存，重启后仍然有效：
+- 键由规范化后的提示词、上下文和生成参数计算，空白差异不会产生不同的键
+- 每条记录带提供商和模型，可按提供商/模型整体失效
+- 按总字节数设上限，超出时按最近访问时间淘汰（LRU）；记录另有过期时间
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.shared.utils.file_utils import get_user_cache_dir
+from src.shared.utils.sqlite_database import SQLiteDatabase
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE_NAME = "ai_response_cache.db"
+CACHE_READERS = 2
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 24 * 3600
+EVICT_TARGET_RATIO = 0.9  # 淘汰到上限的90%，避免每次写入都触发淘汰
+TEMPERATURE_PRECISION = 3
+
+_WHITESPACE_RE = re.compile(r"[ \t\u3000]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def get_default_cache_path() -> Path:
+    """用户级缓存目录下的默认缓存文件（与日志目录的定位方式一致）"""
+    return get_user_cache_dir() / CACHE_FILE_NAME
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """规范化文本：统一换行和Unicode形式，合并行内空白，去掉行尾空白和多余空行"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFC", text.replace("\r\n", "\n").replace("\r", "\n"))
+    lines = [_WHITESPACE_RE.sub(" ", line).rstrip() for line in text.split("\n")]
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def make_cache_key(
+    prompt: str,
+    context: str,
+    provider: str,
+    model: Optional[str],
+    **params: Any
+) -> str:
+    """由规范化的提示词、上下文、提供商/模型和生成参数计算缓存键"""
+    if isinstance(params.get("temperature"), float):
+        params["temperature"] = round(params["temperature"], TEMPERATURE_PRECISION)
+    payload = json.dumps(
+        {
+            "prompt": normalize_text(prompt),
+            "context": normalize_text(context),
+            "provider": provider or "",
+            "model": model or "",
+            "params": params,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+
+class AIResponseCache:
+    """
+    AI响应持久缓存
+
+    读取使用只读连接池；写入（包括命中时刷新访问时间）在写线程中执行，
+    命中路径只有一次索引查询，可在事件循环中直接调用。
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS
+    ):
+        self.db_path = db_path or get_default_cache_path()
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._db = SQLiteDatabase(
+            self.db_path, initializer=self._create_schema, readers=CACHE_READERS, name="ai-response-cache"
+        )
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_scope ON responses(provider, model)")
+        self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存（命中时异步刷新访问时间；过期记录视为未命中并异步删除）"""
+        try:
+            now = time.time()
+            with self._db.reader() as conn:
+                row = conn.execute(
+                    "SELECT content, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            content, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._db.submit(lambda conn: self._delete_expired(conn, key, created_at))
+                self.misses += 1
+                return None
+            self._db.submit(lambda conn: conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            ))
+            self.hits += 1
+            return content
+        except Exception as e:
+            logger.warning(f"读取AI响应缓存失败: {e}")
+            return None
+
+    def _delete_expired(self, conn: sqlite3.Connection, key: str, created_at: float) -> None:
+        row = conn.execute(
+            "SELECT size FROM responses WHERE key = ? AND created_at = ?", (key, created_at)
+        ).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._total_bytes -= row[0]
+
+    def put(self, key: str, content: str, provider: str, model: Optional[str]) -> None:
+        """写入缓存，超出容量时按最近访问时间淘汰"""
+        if not content:
+            return
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        def put(conn: sqlite3.Connection) -> None:
+            now = time.time()
+            old = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, provider, model, content, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider or "", model or "", content, size, now, now)
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict(conn, keep_key=key)
+
+        try:
+            self._db.write(put)
+        except Exception as e:
+            logger.warning(f"写入AI响应缓存失败: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, keep_key: str) -> None:
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        removed = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            if self._total_bytes <= target:
+                break
+            if key == keep_key:
+                continue
+            removed.append((key,))
+            self._total_bytes -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", removed)
+        self.evictions += len(removed)
+
+    def invalidate(self, provider: Optional[str] = None, model: Optional[str] = None) -> int:
+        """按提供商/模型失效缓存（都为空时清空），返回删除条数"""
+        clauses, params = [], []
+        if provider:
+            clauses.append("provider = ?")
+            params.append(provider)
+        if model:
+            clauses.append("model = ?")
+            params.append(model)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        def invalidate(conn: sqlite3.Connection) -> int:
+            deleted = conn.execute(f"DELETE FROM responses{where}", params).rowcount
+            self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            return deleted
+
+        try:
+            return self._db.write(invalidate)
+        except Exception as e:
+            logger.warning(f"清理AI响应缓存失败: {e}")
+            return 0
+
+    def close(self) -> None:
+        """等待排队的写入完成并关闭连接"""
+        self._db.close()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'path': str(self.db_path),
+            'total_bytes': self._total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+        }
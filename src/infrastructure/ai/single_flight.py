@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+相同请求合并（single-flight）
+
+同一个键的并发请求只向上游发起一次：
+- do()：普通协程，所有等待者共享同一个结果或异常
+- stream()：流式生成，上游在独立任务中运行，每个块分发给所有订阅者；
+  中途加入的订阅者先补发已产生的块，再接收后续块
+
+调用方可以额外给出 join_keys：这些键上进行中的请求优先加入（例如更高优先级的同一请求），
+其次加入 key 上的请求，都没有时才以 key 新建请求。所有等待者都离开后，仍在运行的上游任务会被取消。所有方法在同一事件循环中调用。
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar('F')
+
+
+class _Call:
+    """一次进行中的普通请求"""
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class _StreamFlight:
+    """一次进行中的流式请求"""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self.condition = asyncio.Condition()
+
+
+class SingleFlight:
+    """相同键的并发请求合并"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _StreamFlight] = {}
+        self.upstream_calls = 0
+        self.shared_calls = 0
+
+    @staticmethod
+    def _find(flights: Dict[str, F], key: str, join_keys: Iterable[str]) -> Optional[F]:
+        """按 join_keys 的顺序优先加入，最后才是 key 本身"""
+        for join_key in join_keys:
+            flight = flights.get(join_key)
+            if flight is not None:
+                return flight
+        return flights.get(key)
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]], join_keys: Iterable[str] = ()) -> Any:
+        """执行或加入键为 key（或 join_keys 之一）的请求"""
+        call = self._find(self._calls, key, join_keys)
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _t, k=key, c=call: self._forget_call(k, c))
+            self.upstream_calls += 1
+        else:
+            self.shared_calls += 1
+            logger.debug(f"合并相同的AI请求: {key[:12]}")
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _forget_call(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def stream(
+        self,
+        key: str,
+        factory: Callable[[], AsyncIterator[str]],
+        join_keys: Iterable[str] = ()
+    ) -> AsyncIterator[str]:
+        """订阅键为 key（或 join_keys 之一）的流式请求（都不存在时以 key 启动）"""
+        flight = self._find(self._streams, key, join_keys)
+        if flight is None:
+            flight = _StreamFlight()
+            self._streams[key] = flight
+            flight.task = asyncio.get_running_loop().create_task(self._pump(key, flight, factory))
+            self.upstream_calls += 1
+        else:
+            self.shared_calls += 1
+            logger.debug(f"合并相同的AI流式请求: {key[:12]}，补发 {len(flight.chunks)} 个块")
+
+        flight.subscribers += 1
+        index = 0
+        try:
+            while True:
+                async with flight.condition:
+                    await flight.condition.wait_for(lambda: index < len(flight.chunks) or flight.done)
+                    pending = flight.chunks[index:]
+                    finished = flight.done
+                index += len(pending)
+                for chunk in pending:
+                    yield chunk
+                if finished:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done and flight.task is not None:
+                flight.task.cancel()
+
+    async def _pump(self, key: str, flight: _StreamFlight, factory: Callable[[], AsyncIterator[str]]) -> None:
+        """运行上游生成器，把每个块分发给订阅者"""
+        try:
+            async for chunk in factory():
+                async with flight.condition:
+                    flight.chunks.append(chunk)
+                    flight.condition.notify_all()
+        except asyncio.CancelledError as e:
+            flight.error = e
+        except Exception as e:
+            flight.error = e
+        finally:
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+            async with flight.condition:
+                flight.done = True
+                flight.condition.notify_all()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            'in_flight': len(self._calls) + len(self._streams),
+            'upstream_calls': self.upstream_calls,
+            'shared_calls': self.shared_calls,
+        }
@@ -4,17 +4,27 @@
 统一AI客户端管理器
 
 整合AI客户端工厂和旧的AI服务仓储功能，提供统一的AI客户端管理接口。
+客户端健康状态由真实请求结果被动推导，每个提供商配有熔断器（见 provider_health）。
+生成结果写入持久响应缓存（见 response_cache），相同的并发请求只向上游发起一次（见 single_flight）；
+合并按调度队列区分，请求只加入同级或更优先的进行中请求，后台请求被抢占时不会波及前台调用方。
+发往提供商的请求按优先级排队，受并发和 RPM/TPM 限制（见 request_scheduler）。
 """
 
-import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 
 from .clients.ai_client_factory import AIClientFactory
 from .clients.base_ai_client import BaseAIClient
+from .provider_health import ProviderHealth, CircuitOpenError
+from .response_cache import AIResponseCache, DEFAULT_MAX_BYTES, DEFAULT_TTL_SECONDS, make_cache_key
+from .single_flight import SingleFlight
+from .request_scheduler import AIRequestScheduler, RequestTier, estimate_request_tokens, tier_for_priority
 from src.domain.ai.entities.ai_request import AIRequest
 from src.domain.ai.entities.ai_response import AIResponse, AIResponseStatus
+from src.domain.ai.value_objects.ai_priority import AIPriority
 from src.domain.ai.value_objects.ai_request_type import AIRequestType
 from src.shared.utils.base_utils import BaseUtility, UtilResult, timed_operation
 from src.shared.utils.unified_performance import get_performance_manager
@@ -46,20 +56,27 @@ class UnifiedAIClientManager(BaseUtility):
 
         # 客户端池
         self._active_clients: Dict[str, BaseAIClient] = {}
-        self._client_health: Dict[str, bool] = {}
+        self._client_health: Dict[str, ProviderHealth] = {}
 
         # 性能管理
         self.performance_manager = get_performance_manager()
         self.error_handler = get_error_handler()
         self.network_manager = get_network_manager()
 
-        # 并发控制
-        max_concurrent = self.config.get('max_concurrent_requests', AI_MAX_CONCURRENT_REQUESTS)
-        self._semaphore = asyncio.Semaphore(max_concurrent)
+        # 请求调度（优先级队列、并发上限、RPM/TPM限速）
+        self.scheduler = AIRequestScheduler(
+            max_concurrent=self.config.get('max_concurrent_requests', AI_MAX_CONCURRENT_REQUESTS),
+            provider_limits=self._provider_limits(),
+            preempt_background=self.config.get('preempt_background_requests', True)
+        )
 
         # 默认提供商
         self.default_provider = self.config.get('default_provider', 'deepseek')
 
+        # 持久响应缓存与相同请求合并
+        self.response_cache = self._create_response_cache()
+        self._single_flight = SingleFlight()
+
         self.logger.info(f"统一AI客户端管理器初始化完成，默认提供商: {self.default_provider}")
 
     def update_config(self, config: Dict[str, Any]) -> None:
@@ -74,11 +91,35 @@ class UnifiedAIClientManager(BaseUtility):
             # 更新相关配置
             if 'default_provider' in config:
                 self.default_provider = config['default_provider']
-            if 'max_concurrent_requests' in config:
-                max_concurrent = config['max_concurrent_requests']
-                self._semaphore = asyncio.Semaphore(max_concurrent)
+            self.scheduler.configure(
+                max_concurrent=config.get('max_concurrent_requests'),
+                provider_limits=self._provider_limits()
+            )
             self.logger.info("配置已更新")
 
+    def _provider_limits(self) -> Dict[str, Dict[str, Any]]:
+        """从各提供商配置中读取调度限制（max_concurrent / rpm / tpm）"""
+        limits = {}
+        for provider, provider_config in (self.config.get('providers') or {}).items():
+            if isinstance(provider_config, dict):
+                limits[provider] = {
+                    key: provider_config[key]
+                    for key in ('max_concurrent', 'rpm', 'tpm')
+                    if provider_config.get(key)
+                }
+        return limits
+
+    def _create_response_cache(self) -> Optional[AIResponseCache]:
+        """按配置创建持久响应缓存（response_cache_enabled 为 False 时不缓存）"""
+        if self.config.get('response_cache_enabled', True) is False:
+            return None
+        cache_path = self.config.get('response_cache_path')
+        return AIResponseCache(
+            db_path=Path(cache_path) if cache_path else None,
+            max_bytes=int(self.config.get('response_cache_max_bytes', DEFAULT_MAX_BYTES)),
+            ttl_seconds=self.config.get('response_cache_ttl', DEFAULT_TTL_SECONDS)
+        )
+
     @timed_operation("get_client")
     async def get_client(self, provider: str = None) -> UtilResult[BaseAIClient]:
         """
@@ -91,35 +132,26 @@ class UnifiedAIClientManager(BaseUtility):
             UtilResult[BaseAIClient]: 客户端获取结果
         """
         provider = provider or self.default_provider
+        health = self._get_health(provider)
 
         try:
-            # 检查是否已有活跃客户端
-            if provider in self._active_clients:
-                client = self._active_clients[provider]
-
-                # 检查客户端健康状态
-                if await self._check_client_health(client):
-                    return UtilResult.success_result(client)
-                else:
-                    # 客户端不健康，移除并重新创建
-                    await self._remove_client(provider)
-
-            # 创建新客户端
-            client_config = self._get_provider_config(provider)
-            client = await self.factory.create_and_connect_client(
-                provider=provider,
-                config=client_config,
-                use_cache=True
-            )
+            # 熔断器打开时快速失败，不再发起网络请求
+            health.ensure_available()
 
-            # 添加到活跃客户端池
-            self._active_clients[provider] = client
-            self._client_health[provider] = True
+            # 已有活跃客户端直接复用（健康状态由请求结果被动维护，不做额外探测）
+            client = self._active_clients.get(provider)
+            if client is not None and client.is_connected:
+                return UtilResult.success_result(client)
 
-            return UtilResult.success_result(client)
+            return UtilResult.success_result(await self._connect_client(provider))
+
+        except CircuitOpenError as e:
+            self.logger.debug(str(e))
+            return UtilResult.failure_result(str(e), retry_after=e.retry_after)
 
         except Exception as e:
             error_msg = f"获取AI客户端失败: {provider}, 错误: {e}"
+            self._record_failure(provider, e)
             self.error_handler.handle_error(
                 error=e,
                 operation="get_client",
@@ -128,6 +160,52 @@ class UnifiedAIClientManager(BaseUtility):
             )
             return UtilResult.failure_result(error_msg)
 
+    async def _connect_client(self, provider: str) -> BaseAIClient:
+        """创建并连接客户端，加入活跃客户端池"""
+        await self._remove_client(provider)
+        client_config = self._get_provider_config(provider)
+        client = await self.factory.create_and_connect_client(
+            provider=provider,
+            config=client_config,
+            use_cache=True
+        )
+
+        # 添加到活跃客户端池
+        self._active_clients[provider] = client
+        return client
+
+    def _get_health(self, provider: str) -> ProviderHealth:
+        """获取提供商健康状态（不存在时创建）"""
+        health = self._client_health.get(provider)
+        if health is None:
+            health = ProviderHealth(provider)
+            self._client_health[provider] = health
+        return health
+
+    def _record_success(self, provider: str, latency: float) -> None:
+        self._get_health(provider).record_success(latency)
+
+    def _record_failure(self, provider: str, error: BaseException) -> None:
+        """记录失败；熔断器因此打开时启动后台探测"""
+        health = self._get_health(provider)
+        error_class = health.record_failure(error)
+        self.logger.debug(f"AI请求失败: {provider}, 分类: {error_class.value}")
+        if not health.is_healthy:
+            health.schedule_probe(lambda: self._connect_client(provider))
+
+    async def _tracked_generate(self, provider: str, client: BaseAIClient, ai_request: AIRequest, timeout: float):
+        """执行一次生成请求并把结果计入提供商健康状态"""
+        # 重试过程中熔断器可能已打开，此时不再发起请求
+        self._get_health(provider).ensure_available()
+        start = time.monotonic()
+        try:
+            response = await client.generate_text(ai_request, timeout)
+        except Exception as e:
+            self._record_failure(provider, e)
+            raise
+        self._record_success(provider, time.monotonic() - start)
+        return response
+
     @timed_operation("simple_generate")
     async def simple_generate(
         self,
@@ -136,7 +214,8 @@ class UnifiedAIClientManager(BaseUtility):
         max_tokens: int = 2000,
         temperature: float = 0.7,
         model: Optional[str] = None,
-        provider: str = None
+        provider: str = None,
+        priority: Optional[AIPriority] = None
     ) -> str:
         """
         简单文本生成（向后兼容接口）
@@ -148,19 +227,40 @@ class UnifiedAIClientManager(BaseUtility):
             temperature: 温度参数
             model: 模型名称
             provider: 提供商名称
+            priority: 调度优先级（默认按自动建议排队）
 
         Returns:
             str: 生成的文本
         """
-        async with self._semaphore:
-            # 检查缓存
-            cache_key = self._generate_cache_key(prompt, context, max_tokens, temperature, model, provider)
-            cache_result = self.performance_manager.cache_get(cache_key)
-
-            if cache_result.success:
+        provider = provider or self.default_provider
+        cache_key = self._generate_cache_key(prompt, context, max_tokens, temperature, model, provider)
+        if self.response_cache is not None:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
                 self.logger.debug("使用缓存的AI响应")
-                return cache_result.data
+                return cached
 
+        flight_key, join_keys = self._flight_keys(cache_key, priority)
+        return await self._single_flight.do(
+            flight_key,
+            lambda: self._generate_upstream(cache_key, prompt, context, max_tokens, temperature, model, provider, priority),
+            join_keys
+        )
+
+    async def _generate_upstream(
+        self,
+        cache_key: str,
+        prompt: str,
+        context: str,
+        max_tokens: int,
+        temperature: float,
+        model: Optional[str],
+        provider: str,
+        priority: Optional[AIPriority]
+    ) -> str:
+        """向提供商发起一次非流式生成，成功后写入缓存"""
+        estimated_tokens = estimate_request_tokens(prompt, context, max_tokens)
+        async with self.scheduler.slot(provider, priority, estimated_tokens):
             try:
                 # 获取客户端
                 client_result = await self.get_client(provider)
@@ -189,17 +289,13 @@ class UnifiedAIClientManager(BaseUtility):
                 # 使用配置化的重试次数
                 configured_retries = int(self.config.get('retry_attempts', 3))
                 response = await self.network_manager.retry_with_backoff(
-                    lambda: client.generate_text(ai_request, timeout),
+                    lambda: self._tracked_generate(provider, client, ai_request, timeout),
                     max_retries=configured_retries
                 )
 
                 # 缓存响应
                 if response and response.content:
-                    self.performance_manager.cache_set(
-                        cache_key,
-                        response.content,
-                        ttl=3600  # 1小时
-                    )
+                    self._store_response(cache_key, response.content, provider, model)
 
                 return response.content if response else ""
 
@@ -212,6 +308,10 @@ class UnifiedAIClientManager(BaseUtility):
                 )
                 raise RuntimeError(f"AI文本生成失败: {e}")
 
+    def _store_response(self, cache_key: str, content: str, provider: str, model: Optional[str]) -> None:
+        if self.response_cache is not None:
+            self.response_cache.put(cache_key, content, provider, model)
+
     @timed_operation("generate_text_stream")
     async def generate_text_stream(
         self,
@@ -220,7 +320,8 @@ class UnifiedAIClientManager(BaseUtility):
         max_tokens: int = 2000,
         temperature: float = 0.7,
         model: Optional[str] = None,
-        provider: str = None
+        provider: str = None,
+        priority: Optional[AIPriority] = None
     ):
         """
         流式文本生成
@@ -232,11 +333,60 @@ class UnifiedAIClientManager(BaseUtility):
             temperature: 温度参数
             model: 模型名称
             provider: 提供商名称
+            priority: 调度优先级（默认按自动建议排队）
 
         Yields:
             str: 文本块
         """
-        async with self._semaphore:
+        provider = provider or self.default_provider
+
+        # 如果配置关闭了流式输出，则退回非流式生成，将整段作为一个块输出
+        if self.config is not None and self.config.get('enable_streaming') is False:
+            content = await self.simple_generate(
+                prompt=prompt,
+                context=context,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                model=model,
+                provider=provider,
+                priority=priority
+            )
+            if content:
+                yield content
+            return
+
+        # 完整响应已缓存时整段输出
+        cache_key = self._generate_cache_key(prompt, context, max_tokens, temperature, model, provider)
+        if self.response_cache is not None:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                self.logger.debug("使用缓存的AI响应（流式）")
+                yield cached
+                return
+
+        # 相同的并发流式请求共享一次上游调用，每个块分发给所有调用方
+        flight_key, join_keys = self._flight_keys(cache_key, priority)
+        async for chunk in self._single_flight.stream(
+            flight_key,
+            lambda: self._stream_upstream(cache_key, prompt, context, max_tokens, temperature, model, provider, priority),
+            join_keys
+        ):
+            yield chunk
+
+    async def _stream_upstream(
+        self,
+        cache_key: str,
+        prompt: str,
+        context: str,
+        max_tokens: int,
+        temperature: float,
+        model: Optional[str],
+        provider: str,
+        priority: Optional[AIPriority]
+    ) -> AsyncIterator[str]:
+        """向提供商发起一次流式生成，完整结束后写入缓存（整个流期间持有调度槽位）"""
+        estimated_tokens = estimate_request_tokens(prompt, context, max_tokens)
+        async with self.scheduler.slot(provider, priority, estimated_tokens):
             try:
                 # 获取客户端
                 client_result = await self.get_client(provider)
@@ -259,30 +409,20 @@ class UnifiedAIClientManager(BaseUtility):
 
                 # 获取最优超时时间
                 timeout_result = await self.network_manager.get_optimal_timeout()
-
-                # 如果配置关闭了流式输出，则退回非流式生成
-                try:
-                    if self.config is not None and self.config.get('enable_streaming') is False:
-                        # 退回简单生成，将整段作为一个块输出
-                        content = await self.simple_generate(
-                            prompt=prompt,
-                            context=context,
-                            max_tokens=max_tokens,
-                            temperature=temperature,
-                            model=model,
-                            provider=provider
-                        )
-                        if content:
-                            yield content
-                        return
-                except Exception:
-                    pass
-
                 timeout = timeout_result.data if timeout_result.success else 30.0
 
-                # 流式生成
-                async for chunk in client.generate_text_stream(ai_request, timeout):
-                    yield chunk
+                # 流式生成（以完整流的结果计入健康状态）
+                chunks: List[str] = []
+                start = time.monotonic()
+                try:
+                    async for chunk in client.generate_text_stream(ai_request, timeout):
+                        chunks.append(chunk)
+                        yield chunk
+                except Exception as e:
+                    self._record_failure(provider, e)
+                    raise
+                self._record_success(provider, time.monotonic() - start)
+                self._store_response(cache_key, "".join(chunks), provider, model)
 
             except Exception as e:
                 self.error_handler.handle_error(
@@ -293,14 +433,6 @@ class UnifiedAIClientManager(BaseUtility):
                 )
                 raise RuntimeError(f"AI流式生成失败: {e}")
 
-    async def _check_client_health(self, client: BaseAIClient) -> bool:
-        """检查客户端健康状态"""
-        try:
-            return await client.is_healthy()
-        except Exception as e:
-            self.logger.warning(f"客户端健康检查失败: {e}")
-            return False
-
     async def _remove_client(self, provider: str) -> None:
         """移除客户端"""
         if provider in self._active_clients:
@@ -310,8 +442,6 @@ class UnifiedAIClientManager(BaseUtility):
             except Exception as e:
                 self.logger.warning(f"断开客户端连接失败: {e}")
 
-        self._client_health.pop(provider, None)
-
     def _get_provider_config(self, provider: str) -> Dict[str, Any]:
         """获取提供商配置"""
         provider_config = self.config.get('providers', {}).get(provider, {})
@@ -323,10 +453,42 @@ class UnifiedAIClientManager(BaseUtility):
 
     def _generate_cache_key(self, prompt: str, context: str, max_tokens: int,
                           temperature: float, model: Optional[str], provider: Optional[str]) -> str:
-        """生成缓存键"""
-        import hashlib
-        content = f"{prompt}|{context}|{max_tokens}|{temperature}|{model}|{provider}"
-        return hashlib.md5(content.encode()).hexdigest()
+        """生成缓存键（规范化提示词和参数，按提供商/模型区分）"""
+        return make_cache_key(
+            prompt, context, provider or self.default_provider, model,
+            max_tokens=max_tokens, temperature=temperature
+        )
+
+    @staticmethod
+    def _flight_keys(cache_key: str, priority: Optional[AIPriority]) -> Tuple[str, List[str]]:
+        """
+        请求合并键：按调度队列区分
+
+        上游请求以发起者的队列排队，排队中的后台请求可能被交互请求抢占。调用方只加入同级或
+        更优先队列中进行中的请求，因此被抢占的后台请求上不会有前台调用方，
+        前台调用方也不会排在较低优先级的请求后面。
+        """
+        tier = tier_for_priority(priority)
+        join_keys = [f"{cache_key}:{other.name}" for other in RequestTier if other < tier]
+        return f"{cache_key}:{tier.name}", join_keys
+
+    def get_provider_health(self, provider: str = None) -> Dict[str, Any]:
+        """获取提供商健康状态（成功率、延迟EWMA、错误分类、熔断状态）"""
+        return self._get_health(provider or self.default_provider).get_statistics()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        return {
+            'default_provider': self.default_provider,
+            'active_clients': list(self._active_clients.keys()),
+            'response_cache': self.response_cache.get_statistics() if self.response_cache else None,
+            'single_flight': self._single_flight.get_statistics(),
+            'scheduler': self.scheduler.get_statistics(),
+            'providers': {
+                provider: health.get_statistics()
+                for provider, health in self._client_health.items()
+            }
+        }
 
     def get_supported_providers(self) -> List[str]:
         """获取支持的提供商列表"""
@@ -347,12 +509,16 @@ class UnifiedAIClientManager(BaseUtility):
     async def cleanup(self) -> UtilResult[bool]:
         """清理资源"""
         try:
-            # 断开所有客户端连接
+            # 停止后台探测并断开所有客户端连接
+            for health in self._client_health.values():
+                health.cancel_probe()
             for provider in list(self._active_clients.keys()):
                 await self._remove_client(provider)
 
             # 清空工厂缓存
             self.factory.clear_cache()
+            if self.response_cache is not None:
+                self.response_cache.close()
 
             return UtilResult.success_result(True)
 
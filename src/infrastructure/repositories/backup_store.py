@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量备份存储
+
+各次备份共享一个内容寻址的块存储，每次备份只写入一个引用块哈希的清单：
+
+    <backup_dir>/store/<哈希前2位>/<哈希>   zlib压缩的块（跨备份去重）
+    <backup_dir>/manifests/<backup_id>.json  备份清单（项目、文档元数据和正文块序列）
+
+正文按行做内容定义切块（行哈希命中掩码时切分），在章节中间插入或删除内容
+只会改变附近的一两个块。新块的压缩在后台工作进程中完成，写盘经过限速，
+不会在备份期间占满磁盘带宽；删除备份后由标记-清除回收不再被引用的块。
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 存储布局
+CHUNK_STORE_DIR = "store"
+MANIFEST_DIR = "manifests"
+MANIFEST_SUFFIX = ".json"
+MANIFEST_FORMAT = "incremental"
+MANIFEST_FORMAT_VERSION = 1
+
+# 切块：按字符数计的下限/上限，掩码决定平均块大小（约每64行一个边界）
+CHUNK_MIN_CHARS = 2 * 1024
+CHUNK_MAX_CHARS = 32 * 1024
+CHUNK_BOUNDARY_MASK = 0x3F
+
+COMPRESSION_LEVEL = 6
+COMPRESS_BATCH_BYTES = 4 * 1024 * 1024  # 每次交给工作进程的原始字节数上限
+# 压缩进程从事件循环线程创建，用 spawn 启动，避免 fork 复制其他线程持有的锁
+COMPRESS_START_METHOD = "spawn"
+
+# 限速：默认 8MB/s，突发 1MB；每批写入不超过 256KB
+DEFAULT_IO_RATE = 8 * 1024 * 1024
+IO_BURST_BYTES = 1024 * 1024
+IO_BATCH_BYTES = 256 * 1024
+
+
+def hash_chunk(data: bytes) -> str:
+    """计算块的内容哈希"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def split_content_chunks(content: str) -> List[str]:
+    """
+    按行做内容定义切块（拼接即可还原原文）
+
+    块边界只取决于附近的行内容，而不是在全文中的偏移，因此局部修改不会让后面的块全部变化。
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in content.splitlines(keepends=True):
+        # 超长的单行直接按上限切开
+        while len(line) > CHUNK_MAX_CHARS:
+            if current:
+                chunks.append(''.join(current))
+                current, size = [], 0
+            chunks.append(line[:CHUNK_MAX_CHARS])
+            line = line[CHUNK_MAX_CHARS:]
+        if not line:
+            continue
+
+        current.append(line)
+        size += len(line)
+        if size >= CHUNK_MAX_CHARS or (
+            size >= CHUNK_MIN_CHARS
+            and zlib.crc32(line.encode('utf-8')) & CHUNK_BOUNDARY_MASK == 0
+        ):
+            chunks.append(''.join(current))
+            current, size = [], 0
+
+    if current:
+        chunks.append(''.join(current))
+    return chunks
+
+
+def compress_chunks(items: List[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+    """压缩一批块（在工作进程中执行，必须是模块级函数）"""
+    return [(chunk_hash, zlib.compress(data, COMPRESSION_LEVEL)) for chunk_hash, data in items]
+
+
+class IOThrottle:
+    """
+    异步令牌桶限速器
+
+    consume() 在令牌不足时休眠，rate 为 None 或 0 时不限速。
+    """
+
+    def __init__(self, rate: Optional[float] = DEFAULT_IO_RATE, burst: int = IO_BURST_BYTES):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+
+    async def consume(self, size: int) -> None:
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        self._tokens -= size
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+class BackupChunkStore:
+    """
+    备份块存储与清单管理
+
+    所有方法在应用事件循环中调用；文件读写在线程中执行，压缩在工作进程中执行。
+    创建备份与回收块通过同一把异步锁互斥，回收不会删除正在写入的备份所用的块。
+    """
+
+    def __init__(self, root: Path, io_rate: Optional[float] = DEFAULT_IO_RATE):
+        self.root = root
+        self.chunks_dir = root / CHUNK_STORE_DIR
+        self.manifests_dir = root / MANIFEST_DIR
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+        self.throttle = IOThrottle(io_rate)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._process_pool_failed = False
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def close(self) -> None:
+        """关闭压缩工作进程"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # ------------------------------------------------------------------
+    # 块
+    # ------------------------------------------------------------------
+
+    def chunk_path(self, chunk_hash: str) -> Path:
+        return self.chunks_dir / chunk_hash[:2] / chunk_hash
+
+    def has_chunk(self, chunk_hash: str) -> bool:
+        return self.chunk_path(chunk_hash).exists()
+
+    def missing_chunks(self, chunk_hashes: Iterable[str]) -> List[str]:
+        """块序列中缺失的块（恢复前校验）"""
+        return [h for h in dict.fromkeys(chunk_hashes) if not self.has_chunk(h)]
+
+    async def store_chunks(self, chunks: Dict[str, bytes]) -> int:
+        """
+        写入尚未存在的块
+
+        Args:
+            chunks: 块哈希 -> 原始字节
+
+        Returns:
+            int: 实际写入的压缩字节数
+        """
+        missing = await asyncio.to_thread(
+            lambda: [(h, data) for h, data in chunks.items() if not self.has_chunk(h)]
+        )
+        if not missing:
+            return 0
+
+        written = 0
+        for batch in self._batches(missing, COMPRESS_BATCH_BYTES):
+            compressed = await self._compress(batch)
+            for write_batch in self._batches(compressed, IO_BATCH_BYTES):
+                size = sum(len(data) for _, data in write_batch)
+                await self.throttle.consume(size)
+                await asyncio.to_thread(self._write_chunk_files, write_batch)
+                written += size
+        return written
+
+    @staticmethod
+    def _batches(items: List[Tuple[str, bytes]], limit: int) -> Iterable[List[Tuple[str, bytes]]]:
+        batch: List[Tuple[str, bytes]] = []
+        size = 0
+        for item in items:
+            batch.append(item)
+            size += len(item[1])
+            if size >= limit:
+                yield batch
+                batch, size = [], 0
+        if batch:
+            yield batch
+
+    async def _compress(self, batch: List[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+        """在工作进程中压缩；进程池不可用时退回到线程"""
+        if not self._process_pool_failed:
+            try:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=1,
+                        mp_context=multiprocessing.get_context(COMPRESS_START_METHOD)
+                    )
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, compress_chunks, batch)
+            except (BrokenProcessPool, OSError, RuntimeError) as e:
+                logger.warning(f"备份压缩进程不可用，改为在线程中压缩: {e}")
+                self._process_pool_failed = True
+                self.close()
+        return await asyncio.to_thread(compress_chunks, batch)
+
+    def _write_chunk_files(self, items: List[Tuple[str, bytes]]) -> None:
+        for chunk_hash, data in items:
+            path = self.chunk_path(chunk_hash)
+            if path.exists():
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+    async def read_content(self, chunk_hashes: List[str]) -> str:
+        """按块序列还原正文"""
+        def _read() -> str:
+            parts = []
+            for chunk_hash in chunk_hashes:
+                with open(self.chunk_path(chunk_hash), "rb") as f:
+                    parts.append(zlib.decompress(f.read()).decode("utf-8"))
+            return ''.join(parts)
+        return await asyncio.to_thread(_read)
+
+    # ------------------------------------------------------------------
+    # 清单
+    # ------------------------------------------------------------------
+
+    def manifest_path(self, backup_id: str) -> Path:
+        return self.manifests_dir / f"{backup_id}{MANIFEST_SUFFIX}"
+
+    def list_manifests(self) -> List[Path]:
+        return sorted(self.manifests_dir.glob(f"*{MANIFEST_SUFFIX}"))
+
+    async def write_manifest(self, backup_id: str, manifest: Dict[str, Any]) -> Path:
+        """原子写入清单"""
+        path = self.manifest_path(backup_id)
+        data = json.dumps(manifest, ensure_ascii=False, default=str).encode("utf-8")
+        await self.throttle.consume(len(data))
+
+        def _write() -> None:
+            tmp_path = path.with_name(path.name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        await asyncio.to_thread(_write)
+        return path
+
+    @staticmethod
+    def read_manifest(path: Path) -> Dict[str, Any]:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != MANIFEST_FORMAT:
+            raise ValueError(f"不是增量备份清单: {path}")
+        return manifest
+
+    def find_latest_manifest(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """项目最近一次增量备份的清单（用于复用未变化文档的块序列）"""
+        latest: Optional[Dict[str, Any]] = None
+        for path in self.list_manifests():
+            if not path.stem.startswith(project_id):
+                continue
+            try:
+                manifest = self.read_manifest(path)
+            except Exception as e:
+                logger.debug(f"读取备份清单失败: {path}, {e}")
+                continue
+            if manifest.get("backup_info", {}).get("project_id") != project_id:
+                continue
+            created_at = manifest.get("backup_info", {}).get("created_at", "")
+            if latest is None or created_at > latest.get("backup_info", {}).get("created_at", ""):
+                latest = manifest
+        return latest
+
+    # ------------------------------------------------------------------
+    # 回收
+    # ------------------------------------------------------------------
+
+    def _referenced_chunks(self) -> Optional[Set[str]]:
+        """所有清单引用的块；有清单无法解析时返回 None（此时不回收，宁可少删）"""
+        referenced: Set[str] = set()
+        for path in self.list_manifests():
+            try:
+                manifest = self.read_manifest(path)
+            except Exception as e:
+                logger.warning(f"备份清单无法读取，跳过块回收: {path}, {e}")
+                return None
+            for doc in manifest.get("documents", []):
+                referenced.update(doc.get("content_chunks", []))
+        return referenced
+
+    async def collect_garbage(self) -> int:
+        """删除不再被任何清单引用的块，返回删除数量"""
+        async with self.lock:
+            def _sweep() -> int:
+                referenced = self._referenced_chunks()
+                if referenced is None:
+                    return 0
+                removed = 0
+                for chunk_file in self.chunks_dir.glob("*/*"):
+                    if chunk_file.name.endswith(".tmp") or chunk_file.name not in referenced:
+                        try:
+                            chunk_file.unlink()
+                            removed += 1
+                        except OSError as e:
+                            logger.debug(f"删除备份块失败: {chunk_file}, {e}")
+                return removed
+
+            removed = await asyncio.to_thread(_sweep)
+            if removed:
+                logger.info(f"回收未引用的备份块: {removed} 个")
+            return removed
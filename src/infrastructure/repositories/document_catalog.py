@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档目录索引
+
+每个项目文档目录下一个WAL模式的SQLite目录库，记录文档的ID、类型、标题、路径、
+更新时间、字数、内容哈希和状态，使列表、最近文档和按ID定位都成为索引查询，
+不再需要遍历各类型子目录并逐个解析元数据JSON。
+
+目录库同时记录各文档目录的修改时间；当磁盘上的目录时间与记录不一致时
+（例如在应用外增删了文件），由一致性扫描从磁盘重建目录库。
+"""
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.shared.utils.logger import get_logger
+from src.shared.utils.sqlite_database import SQLiteDatabase
+
+logger = get_logger(__name__)
+
+# 目录库放在独立子目录中，避免数据库及WAL文件的增删改变文档目录的修改时间
+CATALOG_DIR_NAME = ".catalog"
+CATALOG_FILE_NAME = "documents.db"
+# 1: 初始版本
+# 2: 项目ID严格匹配，旧文档在重建时回填项目ID（升级时清空目录时间，触发一次重建）
+CATALOG_SCHEMA_VERSION = 2
+CATALOG_READERS = 2
+
+CATALOG_COLUMNS = (
+    "id", "project_id", "type", "title", "path",
+    "updated_at", "word_count", "content_hash", "status", "data"
+)
+
+
+def compute_content_hash(content: str) -> str:
+    """计算文档内容哈希"""
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class DocumentCatalog:
+    """
+    文档目录库
+
+    每个写操作在写线程的单个事务内完成；查询使用只读连接池，不等待写入。
+    数据库在首次访问时打开。
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._db = SQLiteDatabase(
+            db_path,
+            initializer=self._create_schema,
+            readers=CATALOG_READERS,
+            row_factory=sqlite3.Row,
+            name="document-catalog"
+        )
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id TEXT PRIMARY KEY,
+                project_id TEXT,
+                type TEXT,
+                title TEXT,
+                path TEXT NOT NULL,
+                updated_at TEXT,
+                word_count INTEGER DEFAULT 0,
+                content_hash TEXT,
+                status TEXT,
+                data TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_documents_project_updated
+            ON documents(project_id, updated_at DESC)
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_documents_project_type
+            ON documents(project_id, type)
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_documents_status
+            ON documents(status)
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS directory_state (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER
+            )
+        """)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < CATALOG_SCHEMA_VERSION:
+            # 旧版目录库中可能有缺少项目ID的记录：清空目录时间，下次访问时从磁盘重建并回填
+            conn.execute("DELETE FROM directory_state")
+            conn.execute(f"PRAGMA user_version = {CATALOG_SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self._db.close()
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _row_from_data(doc_data: Dict[str, Any], doc_path: Path, content_hash: str) -> Tuple:
+        metadata = doc_data.get("metadata") or {}
+        statistics = doc_data.get("statistics") or {}
+        return (
+            doc_data["id"],
+            doc_data.get("project_id") or "",
+            doc_data.get("type") or doc_data.get("document_type") or "chapter",
+            metadata.get("title") or doc_data.get("title", ""),
+            str(doc_path),
+            metadata.get("updated_at") or doc_data.get("updated_at", ""),
+            statistics.get("word_count", 0) or 0,
+            content_hash,
+            doc_data.get("status", "draft"),
+            json.dumps(doc_data, ensure_ascii=False),
+        )
+
+    def upsert(
+        self,
+        doc_data: Dict[str, Any],
+        doc_path: Path,
+        content_hash: str = "",
+        directories: Iterable[Path] = ()
+    ) -> None:
+        """写入或更新一条文档记录，并同步记录目录时间（同一事务）"""
+        row = self._row_from_data(doc_data, doc_path, content_hash)
+
+        def upsert(conn: sqlite3.Connection) -> None:
+            conn.execute(f"""
+                INSERT OR REPLACE INTO documents ({", ".join(CATALOG_COLUMNS)})
+                VALUES ({", ".join("?" * len(CATALOG_COLUMNS))})
+            """, row)
+            self._record_directories(conn, directories)
+
+        self._db.write(upsert)
+
+    def delete(self, document_id: str, directories: Iterable[Path] = ()) -> None:
+        """删除文档记录，并同步记录目录时间（同一事务）"""
+        def delete(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+            self._record_directories(conn, directories)
+
+        self._db.write(delete)
+
+    @staticmethod
+    def _record_directories(conn: sqlite3.Connection, directories: Iterable[Path]) -> None:
+        rows = []
+        for directory in directories:
+            try:
+                rows.append((str(directory), directory.stat().st_mtime_ns))
+            except FileNotFoundError:
+                rows.append((str(directory), None))
+        if rows:
+            conn.executemany(
+                "INSERT OR REPLACE INTO directory_state (path, mtime_ns) VALUES (?, ?)", rows
+            )
+
+    def record_directories(self, directories: Iterable[Path]) -> None:
+        """记录目录当前的修改时间（本进程写入文件后调用）"""
+        self._db.write(lambda conn: self._record_directories(conn, directories))
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def get_path(self, document_id: str) -> Optional[Path]:
+        """按ID定位文档元数据文件"""
+        with self._db.reader() as conn:
+            row = conn.execute(
+                "SELECT path FROM documents WHERE id = ?", (document_id,)
+            ).fetchone()
+        return Path(row["path"]) if row else None
+
+    def get_entry(self, document_id: str) -> Optional[Dict[str, Any]]:
+        with self._db.reader() as conn:
+            row = conn.execute(
+                "SELECT * FROM documents WHERE id = ?", (document_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def _query_data(self, where: str, params: Tuple, order: str = "", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        sql = f"SELECT data FROM documents WHERE {where}"
+        if order:
+            sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = params + (limit,)
+        with self._db.reader() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        results = []
+        for row in rows:
+            try:
+                results.append(json.loads(row["data"]))
+            except (TypeError, ValueError):
+                continue
+        return results
+
+    @staticmethod
+    def _project_filter(project_id: Optional[str]) -> Tuple[str, Tuple]:
+        # 严格按项目ID过滤；缺少项目ID的旧文档在重建时回填
+        if project_id is None:
+            return "1 = 1", ()
+        return "project_id = ?", (project_id,)
+
+    def list_by_project(self, project_id: str) -> List[Dict[str, Any]]:
+        where, params = self._project_filter(project_id)
+        return self._query_data(where, params, order="updated_at DESC")
+
+    def list_recent(self, limit: int, project_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        where, params = self._project_filter(project_id)
+        return self._query_data(where, params, order="updated_at DESC", limit=limit)
+
+    def list_by_type(self, document_type: str, project_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        where, params = self._project_filter(project_id)
+        return self._query_data(f"type = ? AND {where}", (document_type,) + params, order="title")
+
+    def list_by_status(self, status: str, project_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        where, params = self._project_filter(project_id)
+        return self._query_data(f"status = ? AND {where}", (status,) + params, order="updated_at DESC")
+
+    def search_candidates(self, query: str, project_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按标题/元数据粗筛候选文档（调用方负责精确匹配）"""
+        where, params = self._project_filter(project_id)
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        return self._query_data(
+            f"(title LIKE ? ESCAPE '\\' OR data LIKE ? ESCAPE '\\') AND {where}",
+            (pattern, pattern) + params,
+            order="updated_at DESC"
+        )
+
+    def count(self) -> int:
+        with self._db.reader() as conn:
+            return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # 一致性扫描
+    # ------------------------------------------------------------------
+
+    def is_consistent(self, directories: Iterable[Path]) -> bool:
+        """比较目录当前修改时间与记录值，全部一致时返回True"""
+        with self._db.reader() as conn:
+            recorded = {
+                row["path"]: row["mtime_ns"]
+                for row in conn.execute("SELECT path, mtime_ns FROM directory_state")
+            }
+
+        for directory in directories:
+            try:
+                current = directory.stat().st_mtime_ns
+            except FileNotFoundError:
+                current = None
+            if str(directory) not in recorded or recorded[str(directory)] != current:
+                return False
+        return True
+
+    def rebuild(
+        self,
+        entries: Iterable[Tuple[Dict[str, Any], Path, str]],
+        directories: Iterable[Path],
+        project_id: str = ""
+    ) -> int:
+        """
+        用磁盘扫描结果整体替换目录库内容
+
+        Args:
+            entries: (文档元数据, 元数据文件路径, 内容哈希) 序列
+            directories: 扫描过的目录，用于记录修改时间
+            project_id: 这些目录所属的项目ID，回填给缺少项目ID的旧文档
+
+        Returns:
+            int: 写入的文档数量
+        """
+        rows = []
+        for data, path, content_hash in entries:
+            if project_id and not data.get("project_id"):
+                data = dict(data, project_id=project_id)
+            rows.append(self._row_from_data(data, path, content_hash))
+
+        def rebuild(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM documents")
+            conn.execute("DELETE FROM directory_state")
+            conn.executemany(f"""
+                INSERT OR REPLACE INTO documents ({", ".join(CATALOG_COLUMNS)})
+                VALUES ({", ".join("?" * len(CATALOG_COLUMNS))})
+            """, rows)
+            self._record_directories(conn, directories)
+
+        self._db.write(rebuild)
+        return len(rows)
@@ -16,9 +16,16 @@ import asyncio
 from src.domain.entities.document import Document, DocumentType, DocumentStatus, create_document
 from src.domain.repositories.document_repository import IDocumentRepository
 from src.shared.utils.logger import get_logger
-from src.shared.utils.unified_performance import get_performance_manager, performance_monitor
+from src.shared.utils.unified_performance import (
+    get_performance_manager, performance_monitor, register_cache_sizer
+)
 from src.shared.utils.unified_error_handler import get_error_handler, ErrorCategory, ErrorSeverity
+from src.shared.utils.tracing import set_span_attributes, trace_span
 from src.shared.utils.file_operations import get_file_operations
+from src.infrastructure.repositories.version_store import DeltaVersionStore, DocumentVersionPack
+from src.infrastructure.repositories.document_catalog import (
+    DocumentCatalog, CATALOG_DIR_NAME, CATALOG_FILE_NAME, compute_content_hash
+)
 from src.shared.constants import (
     ENCODING_FORMATS, CACHE_EXPIRE_SECONDS, VERSION_KEEP_COUNT
 )
@@ -30,8 +37,6 @@ DEFAULT_DOCUMENTS_DIR = ".novel_editor/documents"
 DOCUMENT_METADATA_EXT = ".json"
 DOCUMENT_CONTENT_SUFFIX = "_content.txt"
 TEMP_FILE_EXT = ".tmp"
-VERSION_FILE_PREFIX = "_v"
-VERSION_META_SUFFIX = ".meta.json"
 DEFAULT_ENCODING = ENCODING_FORMATS['utf8']
 FALLBACK_ENCODING = ENCODING_FORMATS['gbk']
 CACHE_PREFIX = "doc_repo"
@@ -54,6 +59,15 @@ DEFAULT_CHUNK_SIZE = 8192
 DEFAULT_LINE_COUNT = 1000
 CONTEXT_LINES = 2  # 搜索上下文行数
 ASYNC_SLEEP_MS = 0.001  # 异步睡眠时间
+DOCUMENT_SIZE_OVERHEAD = 2048  # 文档对象（元数据、统计等）的估算固定开销（字节）
+
+
+def _estimate_document_size(document: Document) -> int:
+    """估算缓存中文档对象的大小（O(1)，按正文和标题长度计）"""
+    return len(document.content or "") + len(document.title or "") + DOCUMENT_SIZE_OVERHEAD
+
+
+register_cache_sizer(Document, _estimate_document_size)
 
 
 class FileDocumentRepository(IDocumentRepository):
@@ -91,6 +105,12 @@ class FileDocumentRepository(IDocumentRepository):
         # 统一文件操作工具
         self.file_ops = get_file_operations("document_repo")
 
+        # 增量版本存储（每个文档一个打包文件）
+        self.version_store = DeltaVersionStore()
+
+        # 文档目录库（SQLite索引，替代遍历目录解析元数据）
+        self.catalog = DocumentCatalog(self.base_path / CATALOG_DIR_NAME / CATALOG_FILE_NAME)
+
         # 缓存键前缀
         self._cache_prefix = CACHE_PREFIX
 
@@ -181,34 +201,96 @@ class FileDocumentRepository(IDocumentRepository):
             logger.error(f"构建文档对象失败: {e}")
             return None
 
-    async def _find_document_in_projects(self, document_id: str) -> tuple[Optional[Path], Optional[Path]]:
-        """在所有项目目录中查找文档（带缓存优化）"""
+    def _catalog_directories(self) -> List[Path]:
+        """目录库覆盖的文档目录：根目录 + 各类型子目录"""
+        return [self.base_path] + [self.base_path / sub for sub in sorted(set(DOC_TYPE_DIRS.values()))]
+
+    def _scan_catalog_entries(self) -> List[tuple]:
+        """扫描磁盘上的文档元数据（一致性扫描，在线程池中执行）"""
+        entries = []
+        seen_ids = set()
+        for directory in self._catalog_directories():
+            if not directory.exists():
+                continue
+            for doc_file in directory.glob(f"*{DOCUMENT_METADATA_EXT}"):
+                if doc_file.name.endswith('.meta.json'):
+                    continue
+                try:
+                    with open(doc_file, 'r', encoding=DEFAULT_ENCODING) as f:
+                        doc_data = json.load(f)
+                    if not isinstance(doc_data, dict):
+                        continue
+
+                    # 缺少ID的旧文件：从文件名推断
+                    doc_data.setdefault('id', doc_file.stem)
+                    if doc_data['id'] in seen_ids:
+                        continue
+                    seen_ids.add(doc_data['id'])
+
+                    content_file = doc_file.with_name(f"{doc_data['id']}{DOCUMENT_CONTENT_SUFFIX}")
+                    content_hash = ""
+                    if content_file.exists():
+                        content_hash = compute_content_hash(
+                            content_file.read_text(encoding=DEFAULT_ENCODING, errors='replace')
+                        )
+                    entries.append((doc_data, doc_file, content_hash))
+
+                except (OSError, ValueError) as e:
+                    logger.warning(f"读取文档元数据失败: {doc_file}, {e}")
+        return entries
+
+    def _owning_project_id(self, entries: List[tuple]) -> str:
+        """
+        文档目录所属的项目ID
+
+        优先读取项目根目录（content/documents 的上两级）的 project.json；
+        没有时，若已记录项目ID的文档都属于同一个项目，则取该项目。
+        """
+        project_file = self.base_path.parent.parent / "project.json"
         try:
-            # 检查统一缓存
-            cache_key = f"{self._cache_prefix}:doc_paths:{document_id}"
-            cache_result = self.performance_manager.cache_get(cache_key)
+            with open(project_file, 'r', encoding=DEFAULT_ENCODING) as f:
+                project_id = json.load(f).get('id')
+            if project_id:
+                return project_id
+        except (OSError, ValueError, AttributeError):
+            pass
+
+        project_ids = {doc_data.get('project_id') for doc_data, _, _ in entries} - {None, ""}
+        return project_ids.pop() if len(project_ids) == 1 else ""
+
+    def _rebuild_catalog_sync(self) -> int:
+        directories = self._catalog_directories()
+        entries = self._scan_catalog_entries()
+        return self.catalog.rebuild(entries, directories, self._owning_project_id(entries))
+
+    async def _ensure_catalog(self) -> None:
+        """目录时间与记录不一致时从磁盘重建目录库"""
+        try:
+            if self.catalog.is_consistent(self._catalog_directories()):
+                return
 
-            if cache_result.success:
-                cached_paths = cache_result.data
-                if cached_paths[0] and cached_paths[0].exists():
-                    logger.debug(f"⚡ 从缓存中找到文档: {cached_paths[0]}")
-                    return cached_paths
-                else:
-                    # 缓存的路径不存在，移除缓存
-                    self.performance_manager.cache_delete(cache_key)
-
-            # 在所有类型子目录中查找（优先缓存）
-            for sub in set(DOC_TYPE_DIRS.values()) | {""}:
-                base = self.base_path / sub if sub else self.base_path
-                doc_path = base / f"{document_id}.json"
-                content_path = base / f"{document_id}_content.txt"
-                if doc_path.exists():
-                    logger.debug(f"🔍 在项目目录中找到文档: {doc_path}")
-                    cache_key = f"{self._cache_prefix}:doc_paths:{document_id}"
-                    self.performance_manager.cache_set(cache_key, (doc_path, content_path), ttl=LONG_CACHE_TTL)
-                    return doc_path, content_path
+            count = await asyncio.get_event_loop().run_in_executor(None, self._rebuild_catalog_sync)
+            logger.info(f"文档目录库已从磁盘重建: {count} 个文档")
 
-            return None, None
+        except Exception as e:
+            logger.error(f"重建文档目录库失败: {e}")
+
+    async def rebuild_catalog(self) -> int:
+        """强制从磁盘重建文档目录库"""
+        return await asyncio.get_event_loop().run_in_executor(None, self._rebuild_catalog_sync)
+
+    async def _find_document_in_projects(self, document_id: str) -> tuple[Optional[Path], Optional[Path]]:
+        """通过目录库定位文档（记录缺失或失效时先做一致性扫描）"""
+        try:
+            doc_path = self.catalog.get_path(document_id)
+            if not doc_path or not doc_path.exists():
+                await self._ensure_catalog()
+                doc_path = self.catalog.get_path(document_id)
+                if not doc_path or not doc_path.exists():
+                    return None, None
+
+            content_path = doc_path.with_name(f"{document_id}{DOCUMENT_CONTENT_SUFFIX}")
+            return doc_path, content_path
 
         except Exception as e:
             logger.error(f"在项目中查找文档失败: {e}")
@@ -294,6 +376,17 @@ class FileDocumentRepository(IDocumentRepository):
                     logger.warning(f"创建版本备份失败: {e}")
                     # 版本创建失败不影响文档保存
 
+            # 更新目录库（同一事务内记录目录时间，避免下次被误判为外部修改）
+            try:
+                self.catalog.upsert(
+                    doc_data,
+                    doc_path,
+                    content_hash=compute_content_hash(content or ''),
+                    directories=[doc_path.parent]
+                )
+            except Exception as e:
+                logger.warning(f"更新文档目录库失败: {e}")
+
             # 清理相关缓存
             self._clear_project_cache(document.project_id)
 
@@ -318,24 +411,14 @@ class FileDocumentRepository(IDocumentRepository):
     @performance_monitor("文档加载")
     async def load(self, document_id: str) -> Optional[Document]:
         """根据ID加载文档（性能优化版本）"""
+        set_span_attributes(document_id=document_id)
         try:
-            # 首先尝试从默认路径加载
-            # 在所有类型子目录中尝试定位
-            doc_path = None
-            content_path = None
-            for sub in set(DOC_TYPE_DIRS.values()) | {""}:
-                base = self.base_path / sub if sub else self.base_path
-                test_doc = base / f"{document_id}.json"
-                test_content = base / f"{document_id}_content.txt"
-                if test_doc.exists():
-                    doc_path, content_path = test_doc, test_content
-                    break
-
-            # 如果未找到，尝试在项目中查找
-            if not doc_path:
+            # 通过目录库一次定位
+            with trace_span("文档加载.定位"):
                 doc_path, content_path = await self._find_document_in_projects(document_id)
-                if not doc_path or not doc_path.exists():
-                    return None
+            if not doc_path:
+                set_span_attributes(found=False)
+                return None
 
             # 使用统一文件操作加载元数据
             cache_key = f"metadata:{document_id}"
@@ -359,9 +442,11 @@ class FileDocumentRepository(IDocumentRepository):
                 content = await self.file_ops.load_text(content_path) or ""
 
             # 使用统一的构建方法
-            document = self._build_document_from_data(doc_data, content)
+            with trace_span("文档加载.构建实体"):
+                document = self._build_document_from_data(doc_data, content)
             if not document:
                 return None
+            set_span_attributes(found=True, characters=len(content))
 
             logger.info(f"⚡ 文档加载成功: {document.title} ({document.id})")
             return document
@@ -373,25 +458,19 @@ class FileDocumentRepository(IDocumentRepository):
     async def delete(self, document_id: str) -> bool:
         """删除文档"""
         try:
-            # 按所有类型子目录尝试删除
-            deleted = False
-            for sub in set(DOC_TYPE_DIRS.values()) | {""}:
-                base = self.base_path / sub if sub else self.base_path
-                doc_path = base / f"{document_id}.json"
-                content_path = base / f"{document_id}_content.txt"
-                if doc_path.exists():
-                    doc_path.unlink()
-                    deleted = True
-                if content_path.exists():
-                    content_path.unlink()
-                    deleted = True
-            if not deleted:
-                # 兜底：项目范围查找
-                doc_path, content_path = await self._find_document_in_projects(document_id)
-                if doc_path and doc_path.exists():
-                    doc_path.unlink()
-                if content_path and content_path.exists():
-                    content_path.unlink()
+            doc_path, content_path = await self._find_document_in_projects(document_id)
+            entry = self.catalog.get_entry(document_id)
+            if doc_path and doc_path.exists():
+                doc_path.unlink()
+            if content_path and content_path.exists():
+                content_path.unlink()
+
+            self.catalog.delete(
+                document_id,
+                directories=[doc_path.parent] if doc_path else []
+            )
+            if entry:
+                self._clear_project_cache(entry.get('project_id'))
 
             logger.info(f"文档删除成功: {document_id}")
             return True
@@ -402,16 +481,17 @@ class FileDocumentRepository(IDocumentRepository):
 
     async def exists(self, document_id: str) -> bool:
         """检查文档是否存在"""
-        # 首先检查默认路径
-        # 在所有类型子目录中查找
-        for sub in set(DOC_TYPE_DIRS.values()) | {""}:
-            base = self.base_path / sub if sub else self.base_path
-            if (base / f"{document_id}.json").exists():
-                return True
+        doc_path, _ = await self._find_document_in_projects(document_id)
+        return doc_path is not None
 
-        # 如果未找到，检查项目目录
-        found_paths = await self._find_document_in_projects(document_id)
-        return found_paths is not None
+    def get_content_hash(self, document_id: str) -> Optional[str]:
+        """目录库中记录的正文哈希（不读取正文；未记录时返回None）"""
+        try:
+            entry = self.catalog.get_entry(document_id)
+            return (entry or {}).get('content_hash') or None
+        except Exception as e:
+            logger.debug(f"读取文档正文哈希失败: {document_id}, {e}")
+            return None
 
     async def list_by_project(self, project_id: str) -> List[Document]:
         """列出项目中的所有文档（性能优化版本）"""
@@ -429,57 +509,14 @@ class FileDocumentRepository(IDocumentRepository):
                 logger.info(f"⚡ 从缓存获取项目文档: {len(cached_documents)} 个")
                 return cached_documents
 
-            documents = []
-            found_doc_ids = set()
-
-            # 优化的文档查找策略
-            search_paths = await self._get_project_document_paths(project_id)
-
-            for search_path in search_paths:
-                if not search_path.exists():
-                    continue
+            # 目录库索引查询（目录与记录不一致时先重建）
+            await self._ensure_catalog()
 
-                logger.debug(f"🔍 搜索路径: {search_path}")
-
-                # 批量读取文档元数据，避免逐个加载完整文档
-                # 排除版本元数据文件和其他非文档文件
-                all_json_files = list(search_path.glob("*.json"))
-                doc_files = [
-                    f for f in all_json_files
-                    if not f.name.endswith('.meta.json') and '_v' not in f.stem
-                ]
-                logger.debug(f"📄 找到 {len(all_json_files)} 个JSON文件，其中 {len(doc_files)} 个是文档文件")
-
-                for doc_file in doc_files:
-                    try:
-                        # 只读取元数据，不加载内容
-                        doc_data = await self.file_ops.load_json_cached(
-                            file_path=doc_file,
-                            cache_key=f"{self._cache_prefix}:meta:{doc_file.stem}",
-                            cache_ttl=300
-                        )
-
-                        # 验证文档数据的基本结构
-                        if not self._validate_document_data(doc_data, project_id):
-                            # 尝试修复缺少ID的文档数据
-                            if await self._try_fix_document_data(doc_data, doc_file, project_id):
-                                logger.info(f"成功修复文档数据: {doc_file.name}")
-                            else:
-                                logger.warning(f"跳过无效的文档文件: {doc_file.name}")
-                                continue
-
-                        if doc_data.get('id') not in found_doc_ids:
-                            # 创建轻量级文档对象（不加载内容）
-                            document = await self._create_lightweight_document(doc_data)
-                            if document:
-                                documents.append(document)
-                                found_doc_ids.add(document.id)
-                                logger.debug(f"✅ 成功加载文档: {document.title}")
-
-                    except json.JSONDecodeError as e:
-                        logger.warning(f"JSON格式错误: {doc_file}, {e}")
-                    except Exception as e:
-                        logger.warning(f"读取文档元数据失败: {doc_file}, {e}")
+            documents = []
+            for doc_data in self.catalog.list_by_project(project_id):
+                document = await self._create_lightweight_document(doc_data)
+                if document:
+                    documents.append(document)
 
             # 缓存结果到统一缓存管理器
             cache_key = f"{self._cache_prefix}:project_docs:{project_id}"
@@ -494,21 +531,6 @@ class FileDocumentRepository(IDocumentRepository):
             logger.error(f"❌ 获取项目文档列表失败: {e}")
             return []
 
-    async def _get_project_document_paths(self, project_id: str) -> List[Path]:
-        """获取项目文档的搜索路径（包含类型子目录）"""
-        try:
-            # 基于 base_path 构建：根目录 + 各类型子目录
-            paths = [self.base_path]
-            for sub in set(DOC_TYPE_DIRS.values()):
-                paths.append(self.base_path / sub)
-
-            logger.debug(f"项目 {project_id} 的文档搜索路径: {[str(p) for p in paths]}")
-            return paths
-
-        except Exception as e:
-            logger.error(f"获取项目文档路径失败: {e}")
-            return [self.base_path]
-
     async def _get_project_root_path(self, project_id: str) -> Optional[Path]:
         """获取项目根路径"""
         try:
@@ -559,104 +581,6 @@ class FileDocumentRepository(IDocumentRepository):
             logger.debug(f"获取项目根路径失败: {e}")
             return None
 
-    def _validate_document_data(self, doc_data: dict, project_id: str) -> bool:
-        """验证文档数据的基本结构"""
-        try:
-            # 检查基本字段
-            if not isinstance(doc_data, dict):
-                logger.debug("文档数据不是字典类型")
-                return False
-
-            # 检查ID - 如果缺少，尝试从文件名推断
-            if not doc_data.get('id'):
-                logger.debug("文档数据缺少ID字段，可能是旧版本文件")
-                return False
-
-            # 检查项目ID匹配
-            doc_project_id = doc_data.get('project_id')
-            if doc_project_id != project_id:
-                logger.debug(f"项目ID不匹配: 期望 {project_id}, 实际 {doc_project_id}")
-                # 严格匹配项目ID，避免加载其他项目的文档
-                return False
-
-            # 检查文档类型
-            doc_type = doc_data.get('type') or doc_data.get('document_type')
-            if not doc_type:
-                logger.debug("文档数据缺少类型字段，使用默认类型")
-                # 不直接返回False，而是在后续处理中设置默认类型
-
-            return True
-
-        except Exception as e:
-            logger.debug(f"验证文档数据失败: {e}")
-            return False
-
-    async def _try_fix_document_data(self, doc_data: dict, doc_file: Path, project_id: str) -> bool:
-        """尝试修复缺少字段的文档数据"""
-        try:
-            fixed = False
-
-            # 修复缺少的ID字段
-            if not doc_data.get('id'):
-                # 从文件名推断ID
-                file_stem = doc_file.stem
-                if file_stem and file_stem != 'document':
-                    doc_data['id'] = file_stem
-                    fixed = True
-                    logger.debug(f"从文件名推断文档ID: {file_stem}")
-                else:
-                    # 生成新的ID
-                    import uuid
-                    doc_data['id'] = str(uuid.uuid4())
-                    fixed = True
-                    logger.debug(f"生成新的文档ID: {doc_data['id']}")
-
-            # 修复缺少的项目ID
-            if not doc_data.get('project_id'):
-                doc_data['project_id'] = project_id
-                fixed = True
-                logger.debug(f"设置文档项目ID: {project_id}")
-
-            # 修复缺少的文档类型
-            if not (doc_data.get('type') or doc_data.get('document_type')):
-                doc_data['type'] = 'chapter'  # 默认类型
-                fixed = True
-                logger.debug("设置默认文档类型: chapter")
-
-            # 修复缺少的元数据
-            if not doc_data.get('metadata'):
-                doc_data['metadata'] = {
-                    'title': doc_data.get('title', '未命名文档'),
-                    'description': '',
-                    'tags': [],
-                    'author': '',
-                    'created_at': datetime.now().isoformat(),
-                    'updated_at': datetime.now().isoformat()
-                }
-                fixed = True
-                logger.debug("添加默认元数据")
-
-            # 如果进行了修复，保存修复后的文件
-            if fixed:
-                try:
-                    await self.file_ops.save_json_atomic(
-                        file_path=doc_file,
-                        data=doc_data,
-                        create_backup=True,
-                        cache_key=f"{self._cache_prefix}:meta:{doc_file.stem}",
-                        cache_ttl=300
-                    )
-                    logger.info(f"已保存修复后的文档数据: {doc_file.name}")
-                except Exception as e:
-                    logger.error(f"保存修复后的文档数据失败: {e}")
-                    return False
-
-            return True
-
-        except Exception as e:
-            logger.error(f"修复文档数据失败: {e}")
-            return False
-
     async def _create_lightweight_document(self, doc_data: dict):
         """创建轻量级文档对象（不加载内容）"""
         try:
@@ -834,31 +758,28 @@ class FileDocumentRepository(IDocumentRepository):
         except Exception as e:
             logger.error(f"清理所有缓存失败: {e}")
 
+    async def _load_catalog_documents(self, entries: List[Dict[str, Any]]) -> List[Document]:
+        """按目录库查询结果加载完整文档"""
+        documents = []
+        for doc_data in entries:
+            try:
+                document = await self.load(doc_data['id'])
+                if document:
+                    documents.append(document)
+            except Exception as e:
+                logger.warning(f"加载文档失败: {doc_data.get('id')}, {e}")
+        return documents
+
     async def list_by_type(
         self,
         document_type: DocumentType,
         project_id: Optional[str] = None
     ) -> List[Document]:
         """根据类型列出文档"""
-        documents = []
-
-        for doc_file in self.base_path.glob("*.json"):
-            try:
-                doc_data = await self.file_ops.load_json_cached(
-                    file_path=doc_file,
-                    cache_key=f"{self._cache_prefix}:meta:{doc_file.stem}",
-                    cache_ttl=300
-                )
-
-                if (doc_data.get('document_type') == document_type.value and
-                    (project_id is None or doc_data.get('project_id') == project_id)):
-                    document = await self.load(doc_data['id'])
-                    if document:
-                        documents.append(document)
-            except Exception as e:
-                logger.warning(f"加载文档失败: {doc_file}, {e}")
-
-        return documents
+        await self._ensure_catalog()
+        return await self._load_catalog_documents(
+            self.catalog.list_by_type(document_type.value, project_id)
+        )
 
     async def list_by_status(
         self,
@@ -866,62 +787,34 @@ class FileDocumentRepository(IDocumentRepository):
         project_id: Optional[str] = None
     ) -> List[Document]:
         """根据状态列出文档"""
-        documents = []
-
-        for doc_file in self.base_path.glob("*.json"):
-            try:
-                doc_data = await self.file_ops.load_json_cached(
-                    file_path=doc_file,
-                    cache_key=f"{self._cache_prefix}:meta:{doc_file.stem}",
-                    cache_ttl=300
-                )
-
-                if (doc_data.get('status') == status.value and
-                    (project_id is None or doc_data.get('project_id') == project_id)):
-                    document = await self.load(doc_data['id'])
-                    if document:
-                        documents.append(document)
-            except Exception as e:
-                logger.warning(f"加载文档失败: {doc_file}, {e}")
-
-        return documents
+        await self._ensure_catalog()
+        return await self._load_catalog_documents(
+            self.catalog.list_by_status(status.value, project_id)
+        )
 
     async def search(
         self,
         query: str,
         project_id: Optional[str] = None
     ) -> List[Document]:
-        """搜索文档"""
-        documents = []
+        """搜索文档（标题、描述和标签）"""
+        await self._ensure_catalog()
         query_lower = query.lower()
 
-        for doc_file in self.base_path.glob("*.json"):
-            try:
-                doc_data = await self.file_ops.load_json_cached(
-                    file_path=doc_file,
-                    cache_key=f"{self._cache_prefix}:meta:{doc_file.stem}",
-                    cache_ttl=300
-                )
+        matched = []
+        for doc_data in self.catalog.search_candidates(query, project_id):
+            # 目录库按子串粗筛，这里精确匹配标题/描述/标签
+            metadata = doc_data.get('metadata', {})
+            title = metadata.get('title', '').lower()
+            description = metadata.get('description', '').lower()
+            tags = metadata.get('tags', [])
 
-                if project_id and doc_data.get('project_id') != project_id:
-                    continue
+            if (query_lower in title or
+                query_lower in description or
+                any(query_lower in tag.lower() for tag in tags)):
+                matched.append(doc_data)
 
-                # 搜索标题和描述
-                metadata = doc_data.get('metadata', {})
-                title = metadata.get('title', '').lower()
-                description = metadata.get('description', '').lower()
-                tags = metadata.get('tags', [])
-
-                if (query_lower in title or
-                    query_lower in description or
-                    any(query_lower in tag.lower() for tag in tags)):
-                    document = await self.load(doc_data['id'])
-                    if document:
-                        documents.append(document)
-            except Exception as e:
-                logger.warning(f"搜索文档失败: {doc_file}, {e}")
-
-        return documents
+        return await self._load_catalog_documents(matched)
 
     async def search_content(
         self,
@@ -991,32 +884,8 @@ class FileDocumentRepository(IDocumentRepository):
         project_id: Optional[str] = None
     ) -> List[Document]:
         """获取最近编辑的文档"""
-        documents = []
-
-        for doc_file in self.base_path.glob("*.json"):
-            try:
-                doc_data = await self.file_ops.load_json_cached(
-                    file_path=doc_file,
-                    cache_key=f"{self._cache_prefix}:meta:{doc_file.stem}",
-                    cache_ttl=300
-                )
-
-                if project_id and doc_data.get('project_id') != project_id:
-                    continue
-
-                document = await self.load(doc_data['id'])
-                if document:
-                    documents.append(document)
-            except Exception as e:
-                logger.warning(f"加载文档失败: {doc_file}, {e}")
-
-        # 按更新时间排序
-        documents.sort(
-            key=lambda d: d.metadata.updated_at,
-            reverse=True
-        )
-
-        return documents[:limit]
+        await self._ensure_catalog()
+        return await self._load_catalog_documents(self.catalog.list_recent(limit, project_id))
 
     async def update_content(self, document_id: str, content: str) -> bool:
         """更新文档内容"""
@@ -1095,45 +964,64 @@ class FileDocumentRepository(IDocumentRepository):
             logger.error(f"获取文档统计信息失败: {e}")
             return {}
 
-    # 版本管理方法（简单实现）
-    async def cleanup_old_versions(self, document_id: str, keep_count: int = 10) -> bool:
-        """清理旧版本"""
+    # 版本管理方法（基于增量版本存储）
+    async def _resolve_version_pack(self, document_id: str) -> Optional[DocumentVersionPack]:
+        """定位文档所在目录并返回其版本打包文件"""
+        doc_path = self._get_document_path(document_id)
+        if not doc_path.exists():
+            doc_path, _ = await self._find_document_in_projects(document_id)
+            if not doc_path or not doc_path.exists():
+                return None
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, self.version_store.get_pack, doc_path.parent, document_id
+        )
+
+    async def list_versions(self, document_id: str) -> List[Dict[str, Any]]:
+        """列出文档版本（按创建时间倒序）"""
         try:
-            # 首先尝试默认路径
-            doc_path = self._get_document_path(document_id)
+            pack = await self._resolve_version_pack(document_id)
+            if not pack:
+                return []
+            versions = await asyncio.get_event_loop().run_in_executor(None, pack.list_versions)
+            return list(reversed(versions))
 
-            # 如果默认路径不存在，尝试在项目目录中查找
-            if not doc_path.exists():
-                found_paths = await self._find_document_in_projects(document_id)
-                if found_paths:
-                    doc_path, _ = found_paths
-                else:
-                    logger.warning(f"文档不存在，无法清理版本: {document_id}")
-                    return False
+        except Exception as e:
+            logger.error(f"列出文档版本失败: {e}")
+            return []
 
-            # 版本文件存储在同目录下，以 {document_id}_v{timestamp}.txt 命名
-            doc_dir = doc_path.parent
-            version_pattern = f"{document_id}_v*.txt"
-            version_files = list(doc_dir.glob(version_pattern))
+    async def get_version_content(self, document_id: str, version_id: str) -> Optional[str]:
+        """获取指定版本的内容"""
+        try:
+            pack = await self._resolve_version_pack(document_id)
+            if not pack:
+                logger.warning(f"文档不存在: {document_id}")
+                return None
+            return await asyncio.get_event_loop().run_in_executor(None, pack.get_content, version_id)
 
-            if len(version_files) <= keep_count:
-                logger.debug(f"版本数量({len(version_files)})未超过保留数量({keep_count})，无需清理")
-                return True
+        except Exception as e:
+            logger.error(f"读取版本内容失败: {e}")
+            return None
 
-            # 按修改时间排序，删除最旧的版本
-            version_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
-            files_to_delete = version_files[keep_count:]
+    async def cleanup_old_versions(self, document_id: str, keep_count: int = 10) -> bool:
+        """清理旧版本（保留最新的 keep_count 个版本并压缩版本文件）"""
+        try:
+            pack = await self._resolve_version_pack(document_id)
+            if not pack:
+                logger.warning(f"文档不存在，无法清理版本: {document_id}")
+                return False
 
-            deleted_count = 0
-            for version_file in files_to_delete:
-                try:
-                    version_file.unlink()
-                    deleted_count += 1
-                    logger.debug(f"删除旧版本文件: {version_file.name}")
-                except Exception as e:
-                    logger.warning(f"删除版本文件失败 {version_file}: {e}")
+            loop = asyncio.get_event_loop()
+            versions = await loop.run_in_executor(None, pack.list_versions)
+            if len(versions) <= keep_count:
+                logger.debug(f"版本数量({len(versions)})未超过保留数量({keep_count})，无需清理")
+                return True
+
+            keep_ids = [v["version_id"] for v in versions[-keep_count:]] if keep_count > 0 else []
+            deleted_count = await loop.run_in_executor(None, pack.retain, keep_ids)
 
-            logger.info(f"清理完成，删除了 {deleted_count} 个旧版本文件")
+            logger.info(f"清理完成，删除了 {deleted_count} 个旧版本")
             return True
 
         except Exception as e:
@@ -1143,26 +1031,19 @@ class FileDocumentRepository(IDocumentRepository):
     async def delete_version(self, document_id: str, version_id: str) -> bool:
         """删除指定版本"""
         try:
-            # 首先尝试默认路径
-            doc_path = self._get_document_path(document_id)
-
-            # 如果默认路径不存在，尝试在项目目录中查找
-            if not doc_path.exists():
-                found_paths = await self._find_document_in_projects(document_id)
-                if found_paths:
-                    doc_path, _ = found_paths
-                else:
-                    logger.warning(f"文档不存在: {document_id}")
-                    return False
-
-            doc_dir = doc_path.parent
-            version_file = doc_dir / f"{document_id}_v{version_id}.txt"
+            pack = await self._resolve_version_pack(document_id)
+            if not pack:
+                logger.warning(f"文档不存在: {document_id}")
+                return False
 
-            if not version_file.exists():
-                logger.warning(f"版本文件不存在: {version_file}")
+            loop = asyncio.get_event_loop()
+            versions = await loop.run_in_executor(None, pack.list_versions)
+            keep_ids = [v["version_id"] for v in versions if v["version_id"] != version_id]
+            if len(keep_ids) == len(versions):
+                logger.warning(f"版本不存在: {document_id} 版本 {version_id}")
                 return False
 
-            version_file.unlink()
+            await loop.run_in_executor(None, pack.retain, keep_ids)
             logger.info(f"删除版本成功: {document_id} 版本 {version_id}")
             return True
 
@@ -1171,34 +1052,13 @@ class FileDocumentRepository(IDocumentRepository):
             return False
 
     async def _create_version_with_path(self, document_id: str, content: str, doc_path: Path, description: str = "") -> Optional[str]:
-        """使用指定路径创建文档版本（内部方法）"""
+        """使用指定路径创建文档版本（内部方法，内容未变化时复用最新版本）"""
         try:
-            # 生成版本ID（使用时间戳）
-            version_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]  # 精确到毫秒
-
-            # 创建版本文件
-            doc_dir = doc_path.parent
-            version_file = doc_dir / f"{document_id}_v{version_id}.txt"
-
-            # 保存版本内容（委托统一实现，原子写入+备份）
-            await self.file_ops.save_text_atomic(version_file, content, create_backup=True)
-
-            # 创建版本元数据文件
-            version_meta_file = doc_dir / f"{document_id}_v{version_id}.meta.json"
-            version_meta = {
-                "version_id": version_id,
-                "document_id": document_id,
-                "created_at": datetime.now().isoformat(),
-                "description": description
-            }
-
-            await self.file_ops.save_json_atomic(
-                file_path=version_meta_file,
-                data=version_meta,
-                create_backup=False,
-                cache_key=f"{self._cache_prefix}:version_meta:{document_id}:{version_id}",
-                cache_ttl=300
+            loop = asyncio.get_event_loop()
+            pack = await loop.run_in_executor(
+                None, self.version_store.get_pack, doc_path.parent, document_id
             )
+            version_id = await loop.run_in_executor(None, pack.add_version, content, description)
 
             logger.debug(f"版本创建成功: {document_id} -> {version_id}")
             return version_id
@@ -1229,30 +1089,24 @@ class FileDocumentRepository(IDocumentRepository):
     async def get_version_diff(self, document_id: str, version1_id: str, version2_id: str) -> Optional[Dict[str, Any]]:
         """获取版本差异"""
         try:
-            doc_path = self._get_document_path(document_id)
-            if not doc_path.exists():
+            pack = await self._resolve_version_pack(document_id)
+            if not pack:
                 logger.warning(f"文档不存在: {document_id}")
                 return None
 
-            doc_dir = doc_path.parent
-
             # 获取两个版本的内容
-            version1_file = doc_dir / f"{document_id}_v{version1_id}.txt"
-            version2_file = doc_dir / f"{document_id}_v{version2_id}.txt"
+            loop = asyncio.get_event_loop()
+            content1 = await loop.run_in_executor(None, pack.get_content, version1_id)
+            content2 = await loop.run_in_executor(None, pack.get_content, version2_id)
 
-            if not version1_file.exists():
-                logger.warning(f"版本1文件不存在: {version1_file}")
+            if content1 is None:
+                logger.warning(f"版本1不存在: {version1_id}")
                 return None
 
-            if not version2_file.exists():
-                logger.warning(f"版本2文件不存在: {version2_file}")
+            if content2 is None:
+                logger.warning(f"版本2不存在: {version2_id}")
                 return None
 
-            # 读取版本内容
-            content1 = await self._read_text_file_safe(version1_file)
-            content2 = await self._read_text_file_safe(version2_file)
-
-            # 简单的差异分析
             lines1 = content1.splitlines()
             lines2 = content2.splitlines()
 
@@ -1313,44 +1167,29 @@ class FileDocumentRepository(IDocumentRepository):
     async def restore_version(self, document_id: str, version_id: str) -> bool:
         """恢复到指定版本"""
         try:
-            doc_path = self._get_document_path(document_id)
-            if not doc_path.exists():
-                logger.warning(f"文档不存在: {document_id}")
-                return False
-
-            doc_dir = doc_path.parent
-            version_file = doc_dir / f"{document_id}_v{version_id}.txt"
-
-            if not version_file.exists():
-                logger.warning(f"版本文件不存在: {version_file}")
+            version_content = await self.get_version_content(document_id, version_id)
+            if version_content is None:
+                logger.warning(f"版本不存在: {document_id} 版本 {version_id}")
                 return False
 
-            # 读取版本内容
-            version_content = await self._read_text_file_safe(version_file)
-
             # 获取当前文档
-            document = await self.get_by_id(document_id)
+            document = await self.load(document_id)
             if not document:
                 logger.warning(f"无法获取文档: {document_id}")
                 return False
 
-            # 在恢复前创建当前版本的备份
-            current_content_path = doc_dir / f"{document_id}_content.txt"
-            if current_content_path.exists():
-                current_content = await self._read_text_file_safe(current_content_path)
-
-                # 创建恢复前的备份
+            # 在恢复前创建当前版本的备份（内容与最新版本相同时不会重复存储）
+            if document.content:
                 backup_version_id = await self.create_version(
                     document_id,
-                    current_content,
+                    document.content,
                     f"恢复前备份 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
                 )
                 if backup_version_id:
                     logger.info(f"已创建恢复前备份: {backup_version_id}")
 
             # 更新文档内容
-            document.content = version_content
-            document.updated_at = datetime.now()
+            document.update_content(version_content)
 
             # 保存文档
             success = await self.save(document)
@@ -1366,6 +1205,25 @@ class FileDocumentRepository(IDocumentRepository):
             logger.error(f"恢复版本失败: {e}")
             return False
 
+    async def import_legacy_versions(self) -> int:
+        """
+        一次性导入旧版 ``{id}_v{ts}.txt`` 全量快照到增量版本存储
+
+        Returns:
+            int: 导入的快照数量
+        """
+        try:
+            imported = await asyncio.get_event_loop().run_in_executor(
+                None, self.version_store.import_all_legacy_snapshots, self.base_path
+            )
+            if imported:
+                logger.info(f"旧版本快照导入完成: {imported} 个")
+            return imported
+
+        except Exception as e:
+            logger.error(f"导入旧版本快照失败: {e}")
+            return 0
+
     async def load_content_streaming(self, document_id: str, chunk_size: int = 8192) -> AsyncGenerator[str, None]:
         """
         流式加载文档内容
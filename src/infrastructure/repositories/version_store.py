@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档版本存储
+
+基于内容寻址的增量版本存储：每个文档一个打包文件（pack），文本按行切分为块，
+块以内容哈希去重；版本记录为相对上一版本的块序列增量，并定期写入关键帧，
+使任意版本的重建代价有上界（不超过 KEYFRAME_INTERVAL 次增量应用）。
+
+打包文件格式（追加写入）：
+    [记录类型 1字节][载荷长度 4字节大端][载荷]
+记录类型：
+    C - 块：载荷为32字节十六进制内容哈希 + zlib压缩的块文本（哈希不压缩，扫描时无需解压）
+    K - 关键帧版本：载荷为zlib压缩的JSON，包含完整块哈希序列
+    D - 增量版本：载荷为zlib压缩的JSON，包含相对上一版本的替换操作
+"""
+
+import difflib
+import hashlib
+import json
+import os
+import struct
+import threading
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Any
+
+from src.shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 版本存储常量
+VERSION_PACK_SUFFIX = ".vpack"
+VERSION_PACK_DIR = ".versions"
+KEYFRAME_INTERVAL = 16          # 每隔多少个版本写入一次关键帧
+COMPRESSION_LEVEL = 6
+CHUNK_CACHE_LIMIT = 4096        # 内存中缓存的已解压块数量上限
+RECORD_HEADER = struct.Struct(">cI")
+RECORD_CHUNK = b"C"
+RECORD_KEYFRAME = b"K"
+RECORD_DELTA = b"D"
+CHUNK_HASH_SIZE = 32
+LEGACY_VERSION_GLOB = "{document_id}_v*.txt"
+LEGACY_META_SUFFIX = ".meta.json"
+CORRUPT_SUFFIX = ".corrupt"  # 损坏的记录和无法解析的尾部在丢弃前转存到该文件
+
+
+@dataclass
+class VersionRecord:
+    """版本记录（内存索引）"""
+    version_id: str
+    created_at: str
+    description: str = ""
+    content_hash: str = ""
+    size: int = 0
+    keyframe: bool = False
+    # 关键帧：完整块序列；增量：[(start, end, [hash...]), ...]
+    chunks: List[str] = field(default_factory=list)
+    ops: List[Tuple[int, int, List[str]]] = field(default_factory=list)
+
+    def to_info(self) -> Dict[str, Any]:
+        """转换为对外暴露的版本信息"""
+        return {
+            "version_id": self.version_id,
+            "created_at": self.created_at,
+            "description": self.description,
+            "content_hash": self.content_hash,
+            "size": self.size,
+        }
+
+
+def _hash_text(text: str) -> str:
+    """计算文本内容哈希"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def split_chunks(content: str) -> List[str]:
+    """按行切分内容（保留换行符，拼接即可还原原文）"""
+    return content.splitlines(keepends=True)
+
+
+class DocumentVersionPack:
+    """
+    单个文档的版本打包文件
+
+    线程安全；首次访问时扫描打包文件建立内存索引（块只记录偏移，按需读取）。
+    边界完整但内容损坏的记录被跳过，其后的记录照常读取；损坏数据在被丢弃前转存到 .corrupt 文件。
+    """
+
+    def __init__(self, pack_path: Path):
+        self.pack_path = pack_path
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._chunk_offsets: Dict[str, Tuple[int, int]] = {}
+        self._chunk_cache: Dict[str, str] = {}
+        self._versions: List[VersionRecord] = []
+        self._index: Dict[str, int] = {}
+        self._skipped_ranges: List[Tuple[int, int]] = []  # 跳过的损坏记录 (起始偏移, 结束偏移)
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._chunk_offsets.clear()
+        self._chunk_cache.clear()
+        self._versions.clear()
+        self._index.clear()
+        self._skipped_ranges.clear()
+
+        if self.pack_path.exists():
+            valid_end = 0
+            file_size = self.pack_path.stat().st_size
+            with open(self.pack_path, "rb") as f:
+                while True:
+                    header = f.read(RECORD_HEADER.size)
+                    if len(header) < RECORD_HEADER.size:
+                        break
+                    record_type, length = RECORD_HEADER.unpack(header)
+                    offset = f.tell()
+                    if offset + length > file_size:
+                        break
+                    try:
+                        if record_type == RECORD_CHUNK:
+                            # 块记录只登记偏移，正文按需读取
+                            chunk_hash = f.read(CHUNK_HASH_SIZE).decode("ascii")
+                            self._chunk_offsets[chunk_hash] = (
+                                offset + CHUNK_HASH_SIZE, length - CHUNK_HASH_SIZE
+                            )
+                        elif record_type in (RECORD_KEYFRAME, RECORD_DELTA):
+                            self._register_version(record_type, f.read(length))
+                        else:
+                            raise ValueError(f"未知记录类型 {record_type!r}")
+                    except Exception as e:
+                        # 记录边界完整：跳过这一条，继续读取后面的记录
+                        self._skipped_ranges.append((offset - RECORD_HEADER.size, offset + length))
+                        logger.warning(f"跳过损坏的版本记录: {self.pack_path} @ {offset}, {e}")
+                    f.seek(offset + length)
+                    valid_end = f.tell()
+
+            # 写入中断留下的不完整尾部：转存后截断
+            if valid_end < file_size:
+                self._quarantine_tail(valid_end)
+
+        self._loaded = True
+
+    def _quarantine(self, ranges: List[Tuple[int, int]]) -> None:
+        """把打包文件中的指定字节区间追加到 .corrupt 文件"""
+        corrupt_path = self.pack_path.with_suffix(self.pack_path.suffix + CORRUPT_SUFFIX)
+        with open(self.pack_path, "rb") as f, open(corrupt_path, "ab") as corrupt:
+            for start, end in ranges:
+                f.seek(start)
+                corrupt.write(f.read(end - start))
+            corrupt.flush()
+            os.fsync(corrupt.fileno())
+        logger.warning(f"已转存 {len(ranges)} 段损坏数据: {corrupt_path}")
+
+    def _quarantine_tail(self, valid_end: int) -> None:
+        """转存无法解析的尾部，再从打包文件中截断"""
+        logger.warning(f"截断版本文件不完整的尾部: {self.pack_path}")
+        self._quarantine([(valid_end, self.pack_path.stat().st_size)])
+        with open(self.pack_path, "r+b") as f:
+            f.truncate(valid_end)
+
+    def _register_version(self, record_type: bytes, payload: bytes) -> None:
+        data = json.loads(zlib.decompress(payload).decode("utf-8"))
+        record = VersionRecord(
+            version_id=data["version_id"],
+            created_at=data.get("created_at", ""),
+            description=data.get("description", ""),
+            content_hash=data.get("content_hash", ""),
+            size=data.get("size", 0),
+            keyframe=record_type == RECORD_KEYFRAME,
+            chunks=data.get("chunks", []),
+            ops=[(op[0], op[1], op[2]) for op in data.get("ops", [])],
+        )
+        self._index[record.version_id] = len(self._versions)
+        self._versions.append(record)
+
+    def _read_chunk(self, chunk_hash: str, f) -> str:
+        cached = self._chunk_cache.get(chunk_hash)
+        if cached is not None:
+            return cached
+        offset, length = self._chunk_offsets[chunk_hash]
+        f.seek(offset)
+        text = zlib.decompress(f.read(length)).decode("utf-8")
+        if len(self._chunk_cache) >= CHUNK_CACHE_LIMIT:
+            self._chunk_cache.clear()
+        self._chunk_cache[chunk_hash] = text
+        return text
+
+    def _chunk_sequence(self, position: int) -> List[str]:
+        """重建指定位置版本的块哈希序列（从最近的关键帧开始应用增量）"""
+        start = position
+        while not self._versions[start].keyframe:
+            start -= 1
+
+        sequence = list(self._versions[start].chunks)
+        for record in self._versions[start + 1:position + 1]:
+            # 操作按倒序应用，保证前面的下标不受影响
+            for op_start, op_end, hashes in reversed(record.ops):
+                sequence[op_start:op_end] = hashes
+        return sequence
+
+    def list_versions(self) -> List[Dict[str, Any]]:
+        """列出全部版本（按创建顺序）"""
+        with self._lock:
+            self._ensure_loaded()
+            return [record.to_info() for record in self._versions]
+
+    def has_version(self, version_id: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return version_id in self._index
+
+    def get_content(self, version_id: str) -> Optional[str]:
+        """
+        重建指定版本的内容
+
+        依赖的块或增量记录损坏时（缺块、无法解压，或重建结果与记录的内容哈希不符）返回None。
+        """
+        with self._lock:
+            self._ensure_loaded()
+            position = self._index.get(version_id)
+            if position is None:
+                return None
+            record = self._versions[position]
+            try:
+                sequence = self._chunk_sequence(position)
+                with open(self.pack_path, "rb") as f:
+                    content = "".join(self._read_chunk(h, f) for h in sequence)
+            except (KeyError, IndexError, zlib.error, UnicodeDecodeError) as e:
+                logger.warning(f"无法重建版本 {version_id}: {self.pack_path}, {e}")
+                return None
+            if record.content_hash and _hash_text(content) != record.content_hash:
+                logger.warning(f"版本 {version_id} 重建结果与内容哈希不符: {self.pack_path}")
+                return None
+            return content
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def add_version(
+        self,
+        content: str,
+        description: str = "",
+        version_id: Optional[str] = None,
+        created_at: Optional[str] = None,
+        dedupe: bool = True
+    ) -> str:
+        """
+        追加一个版本
+
+        内容与最新版本完全相同时不写入，直接返回最新版本ID；
+        dedupe 为 False 时仍然追加（重建打包文件时保留原有版本，如历史 A、B、A 只保留第1和第3个）。
+        """
+        with self._lock:
+            self._ensure_loaded()
+
+            content_hash = _hash_text(content)
+            if dedupe and self._versions and self._versions[-1].content_hash == content_hash:
+                return self._versions[-1].version_id
+
+            version_id = version_id or datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+            if version_id in self._index:
+                version_id = f"{version_id}_{len(self._versions)}"
+
+            chunks = split_chunks(content)
+            hashes = [_hash_text(chunk) for chunk in chunks]
+
+            record = VersionRecord(
+                version_id=version_id,
+                created_at=created_at or datetime.now().isoformat(),
+                description=description,
+                content_hash=content_hash,
+                size=len(content),
+            )
+
+            if self._needs_keyframe():
+                record.keyframe = True
+                record.chunks = hashes
+            else:
+                previous = self._chunk_sequence(len(self._versions) - 1)
+                matcher = difflib.SequenceMatcher(None, previous, hashes, autojunk=False)
+                record.ops = [
+                    (i1, i2, hashes[j1:j2])
+                    for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+                    if tag != "equal"
+                ]
+
+            self.pack_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.pack_path, "ab") as f:
+                for chunk, chunk_hash in zip(chunks, hashes):
+                    if chunk_hash not in self._chunk_offsets:
+                        self._chunk_offsets[chunk_hash] = self._write_chunk(f, chunk_hash, chunk)
+                self._write_version_record(f, record)
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._index[record.version_id] = len(self._versions)
+            self._versions.append(record)
+            return record.version_id
+
+    def _needs_keyframe(self) -> bool:
+        if not self._versions:
+            return True
+        since_keyframe = 0
+        for record in reversed(self._versions):
+            if record.keyframe:
+                break
+            since_keyframe += 1
+        return since_keyframe + 1 >= KEYFRAME_INTERVAL
+
+    @staticmethod
+    def _write_chunk(f, chunk_hash: str, chunk: str) -> Tuple[int, int]:
+        """写入块记录，返回压缩正文的 (偏移, 长度)"""
+        payload = zlib.compress(chunk.encode("utf-8"), COMPRESSION_LEVEL)
+        f.write(RECORD_HEADER.pack(RECORD_CHUNK, CHUNK_HASH_SIZE + len(payload)))
+        f.write(chunk_hash.encode("ascii"))
+        offset = f.tell()
+        f.write(payload)
+        return offset, len(payload)
+
+    def _write_version_record(self, f, record: VersionRecord) -> None:
+        data = {
+            "version_id": record.version_id,
+            "created_at": record.created_at,
+            "description": record.description,
+            "content_hash": record.content_hash,
+            "size": record.size,
+        }
+        if record.keyframe:
+            data["chunks"] = record.chunks
+            record_type = RECORD_KEYFRAME
+        else:
+            data["ops"] = [list(op) for op in record.ops]
+            record_type = RECORD_DELTA
+        raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        payload = zlib.compress(raw, COMPRESSION_LEVEL)
+        f.write(RECORD_HEADER.pack(record_type, len(payload)))
+        f.write(payload)
+
+    def retain(self, keep_version_ids: List[str]) -> int:
+        """
+        仅保留指定版本并压缩打包文件
+
+        重写打包文件：重新生成关键帧/增量链并回收不再引用的块。
+        无法重建的版本（依赖损坏的记录）不写入新文件。
+
+        Returns:
+            int: 删除的版本数量
+        """
+        with self._lock:
+            self._ensure_loaded()
+            keep = set(keep_version_ids)
+            kept = [r for r in self._versions if r.version_id in keep]
+            if len(kept) == len(self._versions) and not self._skipped_ranges:
+                return 0
+
+            contents = []
+            for record in kept:
+                content = self.get_content(record.version_id)
+                if content is not None:
+                    contents.append((record, content))
+            removed = len(self._versions) - len(contents)
+            kept = [record for record, _ in contents]
+
+            temp_path = self.pack_path.with_suffix(self.pack_path.suffix + ".tmp")
+            rebuilt = DocumentVersionPack(temp_path)
+            if temp_path.exists():
+                temp_path.unlink()
+            for record, content in contents:
+                rebuilt.add_version(
+                    content, record.description, record.version_id, record.created_at, dedupe=False
+                )
+
+            # 重写会丢弃跳过的损坏记录：先转存
+            if self._skipped_ranges:
+                self._quarantine(self._skipped_ranges)
+
+            if kept:
+                os.replace(temp_path, self.pack_path)
+            elif self.pack_path.exists():
+                self.pack_path.unlink()
+
+            self._loaded = False
+            return removed
+
+    def delete(self) -> None:
+        """删除整个打包文件"""
+        with self._lock:
+            if self.pack_path.exists():
+                self.pack_path.unlink()
+            self._loaded = False
+
+
+class DeltaVersionStore:
+    """
+    文档版本存储
+
+    管理文档目录下的版本打包文件（``<文档目录>/.versions/<文档ID>.vpack``），
+    并负责把旧版的 ``{id}_v{ts}.txt`` 全量快照导入打包文件。
+    """
+
+    def __init__(self):
+        self._packs: Dict[Path, DocumentVersionPack] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create_pack(self, doc_dir: Path, document_id: str) -> Tuple[DocumentVersionPack, bool]:
+        pack_path = doc_dir / VERSION_PACK_DIR / f"{document_id}{VERSION_PACK_SUFFIX}"
+        with self._lock:
+            pack = self._packs.get(pack_path)
+            if pack is not None:
+                return pack, False
+            pack = DocumentVersionPack(pack_path)
+            self._packs[pack_path] = pack
+            return pack, True
+
+    def get_pack(self, doc_dir: Path, document_id: str) -> DocumentVersionPack:
+        """获取文档的版本打包文件（首次访问时自动导入旧版快照）"""
+        pack, created = self._get_or_create_pack(doc_dir, document_id)
+        if created:
+            self._import_snapshots(pack, doc_dir, document_id)
+        return pack
+
+    def import_legacy_snapshots(self, doc_dir: Path, document_id: str) -> int:
+        """
+        导入旧版全量快照
+
+        按版本ID（时间戳）顺序写入打包文件，成功后删除快照及其元数据文件。
+
+        Returns:
+            int: 导入的快照数量
+        """
+        pack, _ = self._get_or_create_pack(doc_dir, document_id)
+        return self._import_snapshots(pack, doc_dir, document_id)
+
+    def _import_snapshots(self, pack: DocumentVersionPack, doc_dir: Path, document_id: str) -> int:
+        snapshots = sorted(doc_dir.glob(LEGACY_VERSION_GLOB.format(document_id=document_id)))
+        if not snapshots:
+            return 0
+
+        imported = 0
+        prefix = f"{document_id}_v"
+        for snapshot in snapshots:
+            version_id = snapshot.stem[len(prefix):]
+            meta_file = snapshot.with_name(f"{snapshot.stem}{LEGACY_META_SUFFIX}")
+            try:
+                meta = {}
+                if meta_file.exists():
+                    with open(meta_file, "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                with open(snapshot, "r", encoding="utf-8", errors="replace") as f:
+                    content = f.read()
+
+                if not pack.has_version(version_id):
+                    pack.add_version(
+                        content,
+                        meta.get("description", ""),
+                        version_id=version_id,
+                        created_at=meta.get("created_at")
+                    )
+                snapshot.unlink()
+                if meta_file.exists():
+                    meta_file.unlink()
+                imported += 1
+            except Exception as e:
+                logger.warning(f"导入旧版本快照失败: {snapshot}, {e}")
+
+        if imported:
+            logger.info(f"已导入旧版本快照: {document_id} ({imported} 个)")
+        return imported
+
+    def import_all_legacy_snapshots(self, root: Path) -> int:
+        """扫描目录树，导入所有文档的旧版快照（一次性迁移）"""
+        total = 0
+        seen = set()
+        for snapshot in list(root.rglob("*_v*.txt")):
+            document_id = snapshot.stem.rsplit("_v", 1)[0]
+            key = (snapshot.parent, document_id)
+            if key in seen or not (snapshot.parent / f"{document_id}.json").exists():
+                continue
+            seen.add(key)
+            total += self.import_legacy_snapshots(snapshot.parent, document_id)
+        return total
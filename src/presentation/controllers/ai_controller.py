@@ -84,11 +84,13 @@ class AIController(BaseService, QObject):
             self.status_message.emit("正在处理AI请求...")
             
             # 创建AI请求
+            from src.domain.ai.value_objects.ai_priority import AIPriority
             from src.domain.ai.value_objects.ai_request_type import AIRequestType
             ai_request = AIRequest(
                 request_type=AIRequestType.TEXT_GENERATION,
                 prompt=prompt,
                 context=context,
+                priority=AIPriority.HIGH,
                 parameters=parameters or {}
             )
             
@@ -151,11 +153,13 @@ class AIController(BaseService, QObject):
             self.status_message.emit("正在流式处理AI请求...")
             
             # 创建AI请求
+            from src.domain.ai.value_objects.ai_priority import AIPriority
             from src.domain.ai.value_objects.ai_request_type import AIRequestType
             ai_request = AIRequest(
                 request_type=AIRequestType.TEXT_GENERATION,
                 prompt=prompt,
                 context=context,
+                priority=AIPriority.HIGH,
                 parameters=parameters or {}
             )
             
@@ -112,6 +112,7 @@ from src.domain.events.document_events import DocumentCreatedEvent, DocumentSave
 from src.shared.utils.logger import get_logger
 from src.shared.utils.error_handler import controller_error_handler, async_controller_error_handler
 from src.shared.utils.async_manager import get_async_manager, async_task
+from src.shared.utils.cancellation import CancellationToken
 from src.shared.constants import (
     UI_IMMEDIATE_DELAY, UI_SHORT_DELAY, UI_MEDIUM_DELAY, UI_LONG_DELAY,
     ASYNC_SHORT_TIMEOUT, ASYNC_MEDIUM_TIMEOUT, ASYNC_LONG_TIMEOUT,
@@ -233,9 +234,11 @@ class MainController(QObject):
         self._creating_documents = set()  # 正在创建的文档标题集合（防重复创建）
         self._opening_documents = set()  # 正在打开的文档ID集合（防重复打开）
         self._last_open_time = {}  # 最后打开时间记录
+        self._pending_content_updates = {}  # 待同步的文档内容（document_id -> 最新内容，后到覆盖先到）
 
         # 对话框
         self._find_replace_dialog: Optional[FindReplaceDialog] = None
+        self._project_search_token: Optional[CancellationToken] = None  # 正在进行的全项目搜索
         self._settings_dialog: Optional[SettingsDialog] = None
         self._project_wizard: Optional[ProjectWizard] = None
         self._word_count_dialog: Optional[WordCountDialog] = None
@@ -302,6 +305,10 @@ class MainController(QObject):
     @controller_error_handler("清理资源", show_user_error=False)
     def cleanup(self):
         """清理资源"""
+        if self._project_search_token is not None:
+            self._project_search_token.cancel()
+            self._project_search_token = None
+
         # 取消所有活跃的异步任务
         if hasattr(self, 'async_manager'):
             cancelled_count = self.async_manager.cancel_all_tasks()
@@ -1721,17 +1728,26 @@ class MainController(QObject):
             return None
 
     def document_content_changed(self, document_id: str, content: str) -> None:
-        """文档内容变更"""
+        """文档内容变更（同一文档未执行的更新合并为一次，只同步最新内容）"""
         try:
-            # 使用文档控制器委派内容更新
-            QTimer.singleShot(0, lambda: self._run_async_task(
-                self.document_controller.update_document_content(document_id, content),
-                success_callback=lambda _: logger.debug(f"文档内容更新成功: {document_id}"),
-                error_callback=lambda e: logger.error(f"异步更新文档内容失败: {e}")
-            ))
+            already_scheduled = document_id in self._pending_content_updates
+            self._pending_content_updates[document_id] = content
+            if not already_scheduled:
+                QTimer.singleShot(0, lambda: self._flush_document_content(document_id))
         except Exception as e:
             logger.error(f"更新文档内容失败: {e}")
 
+    def _flush_document_content(self, document_id: str) -> None:
+        """把合并后的最新内容委派给文档控制器"""
+        content = self._pending_content_updates.pop(document_id, None)
+        if content is None:
+            return
+        self._run_async_task(
+            self.document_controller.update_document_content(document_id, content),
+            success_callback=lambda _: logger.debug(f"文档内容更新成功: {document_id}"),
+            error_callback=lambda e: logger.error(f"异步更新文档内容失败: {e}")
+        )
+
     def get_document_by_id(self, document_id: str) -> Optional['Document']:
         """根据ID获取文档"""
         try:
@@ -1896,6 +1912,7 @@ class MainController(QObject):
             self._find_replace_dialog.find_requested.connect(self._on_find_requested)
             self._find_replace_dialog.replace_requested.connect(self._on_replace_requested)
             self._find_replace_dialog.replace_all_requested.connect(self._on_replace_all_requested)
+            self._find_replace_dialog.project_search_requested.connect(self._on_project_search_requested)
 
     def _show_find_replace_dialog(self, tab_index: int = 0) -> None:
         """显示查找替换对话框的通用方法"""
@@ -2096,6 +2113,62 @@ class MainController(QObject):
             logger.error(f"查找失败: {e}")
             self._show_error("查找失败", str(e))
 
+    def _on_project_search_requested(self, search_text: str, options: dict):
+        """
+        在所有文档中搜索（边输入边搜索）
+
+        每次输入都取消上一次搜索并创建新的取消令牌；搜索在线程池中执行，
+        每批结果经 callback_emitter 转到主线程追加显示，完成后用排序后的完整结果替换。
+        令牌已被取消（即已有更新的查询）的批次和结果直接丢弃。
+        """
+        if self._project_search_token is not None:
+            self._project_search_token.cancel()
+            self._project_search_token = None
+
+        dialog = self._find_replace_dialog
+        if not dialog or not search_text.strip():
+            return
+
+        current_project = self.project_service.current_project
+        project_id = current_project.id if current_project else None
+
+        token = CancellationToken()
+        self._project_search_token = token
+        dialog.begin_results_preview()
+
+        def on_results(batch):
+            # 在搜索线程中调用
+            if not token.is_cancelled:
+                self.callback_emitter.emit_callback(self._on_project_search_batch, token, batch)
+
+        self.async_manager.submit(
+            self.document_service.search_content(search_text, project_id, token, on_results),
+            on_finished=lambda results: self._on_project_search_finished(token, results),
+            parent=self
+        )
+
+    def _on_project_search_batch(self, token: CancellationToken, batch: list):
+        """主线程：追加一批全项目搜索结果"""
+        if token is self._project_search_token and self._find_replace_dialog:
+            self._find_replace_dialog.append_results_preview(self._to_preview_items(batch))
+
+    def _on_project_search_finished(self, token: CancellationToken, results: list):
+        """主线程：用排序后的完整结果替换已显示的各批结果"""
+        if token is not self._project_search_token:
+            return
+        self._project_search_token = None
+        if self._find_replace_dialog:
+            self._find_replace_dialog.finish_results_preview(self._to_preview_items(results))
+
+    @staticmethod
+    def _to_preview_items(results: list) -> list:
+        """把内容搜索结果转换为预览条目"""
+        items = []
+        for result in results:
+            preview = (result.get("content_preview") or "").replace("<mark>", "").replace("</mark>", "")
+            items.append({"context": f"{result.get('document_title', '')}: {preview}"})
+        return items
+
     def _on_replace_requested(self, find_text: str, replace_text: str, options: dict):
         """处理替换请求"""
         try:
@@ -12,13 +12,14 @@ from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QSplitter,
     QListWidget, QListWidgetItem, QTextEdit, QLineEdit, QPushButton,
     QLabel, QGroupBox, QTabWidget, QWidget, QMessageBox, QInputDialog,
-    QFileDialog, QProgressBar, QComboBox
+    QFileDialog, QProgressBar, QComboBox, QCheckBox
 )
 from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from PyQt6.QtGui import QFont
 
 from src.application.services.backup_service import BackupService, BackupInfo, VersionInfo
 from src.shared.utils.logger import get_logger
+from src.shared.utils.event_loop import run_coroutine_blocking
 
 from PyQt6.QtCore import QThreadPool, QRunnable, QObject
 
@@ -112,6 +113,10 @@ class BackupManagerDialog(QDialog):
         title_label.setFont(QFont("", 12, QFont.Weight.Bold))
         title_row.addWidget(title_label)
         title_row.addStretch()
+        # 完整归档：生成自包含的ZIP（默认创建增量备份）
+        self.full_archive_check = QCheckBox("完整归档(ZIP)")
+        self.full_archive_check.setToolTip("勾选后生成可单独拷贝的ZIP完整归档；默认只保存与上次备份相比变化的内容")
+        title_row.addWidget(self.full_archive_check)
         # 创建备份按钮
         self.create_backup_btn = QPushButton("➕ 创建备份")
         self.create_backup_btn.clicked.connect(self._create_backup)
@@ -413,7 +418,7 @@ class BackupManagerDialog(QDialog):
                 logger.error(f"加载备份列表失败: {msg}")
                 QMessageBox.warning(self, "错误", f"加载备份列表失败: {msg}")
             # 在线程池中执行
-            self._run_task(lambda: __import__('asyncio').run(self.backup_service.list_backups(self.project_id)), on_ok, on_fail)
+            self._run_task(lambda: run_coroutine_blocking(self.backup_service.list_backups(self.project_id)), on_ok, on_fail)
 
         except Exception as e:
             logger.error(f"加载备份列表失败: {e}")
@@ -553,7 +558,8 @@ class BackupManagerDialog(QDialog):
                 self.restore_backup_btn.setEnabled(False)
                 self.delete_backup_btn.setEnabled(False)
                 self.create_backup_btn.setEnabled(False)
-                self._run_task(lambda: __import__('asyncio').run(self.backup_service.create_backup(self.project_id, description, "manual")), on_ok, on_fail)
+                full_archive = self.full_archive_check.isChecked()
+                self._run_task(lambda: run_coroutine_blocking(self.backup_service.create_backup(self.project_id, description, "manual", full_archive=full_archive)), on_ok, on_fail)
 
             except Exception as e:
                 logger.error(f"创建备份失败: {e}")
@@ -623,7 +629,7 @@ class BackupManagerDialog(QDialog):
                 self.restore_backup_btn.setEnabled(False)
                 self.delete_backup_btn.setEnabled(False)
                 self.create_backup_btn.setEnabled(False)
-                self._run_task(lambda: __import__('asyncio').run(self.backup_service.restore_backup(self.current_backup.backup_path, target_root)), on_ok, on_fail)
+                self._run_task(lambda: run_coroutine_blocking(self.backup_service.restore_backup(self.current_backup.backup_path, target_root)), on_ok, on_fail)
 
             except Exception as e:
                 logger.error(f"恢复备份失败: {e}")
@@ -672,8 +678,8 @@ class BackupManagerDialog(QDialog):
 
                 # 删除后刷新列表并校验文件系统是否确实不存在
                 def wrapped_delete():
-                    import asyncio, os
-                    ok = asyncio.run(self.backup_service.delete_backup(self.current_backup.id))
+                    import os
+                    ok = run_coroutine_blocking(self.backup_service.delete_backup(self.current_backup.id))
                     try:
                         p = self.current_backup.backup_path
                         still_exists = os.path.exists(str(p))
@@ -26,6 +26,7 @@ class FindReplaceDialog(QDialog):
     find_requested = pyqtSignal(str, dict)  # search_text, options
     replace_requested = pyqtSignal(str, str, dict)  # find_text, replace_text, options
     replace_all_requested = pyqtSignal(str, str, dict)  # find_text, replace_text, options
+    project_search_requested = pyqtSignal(str, dict)  # search_text, options（范围为所有文档时每次输入都会发出）
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -33,6 +34,7 @@ class FindReplaceDialog(QDialog):
         self._setup_connections()
         self._search_history = []
         self._replace_history = []
+        self._preview_results = []
         
         logger.debug("查找替换对话框初始化完成")
     
@@ -267,6 +269,10 @@ class FindReplaceDialog(QDialog):
         self.regex_check.toggled.connect(self.replace_regex_check.setChecked)
         self.replace_regex_check.toggled.connect(self.regex_check.setChecked)
         
+        # 范围为所有文档时边输入边搜索
+        self.find_edit.textChanged.connect(self._request_project_search)
+        self.all_documents_radio.toggled.connect(self._request_project_search)
+        
         # 回车键查找
         self.find_edit.returnPressed.connect(self.find_next)
         self.replace_find_edit.returnPressed.connect(self.find_next)
@@ -451,6 +457,12 @@ class FindReplaceDialog(QDialog):
             self.replace_find_edit.setText(find_text)
             self.replace_edit.setText(replace_text)
     
+    def _request_project_search(self, *_):
+        """请求在所有文档中搜索（调用方负责取消上一次搜索）"""
+        if not self.all_documents_radio.isChecked():
+            return
+        self.project_search_requested.emit(self.find_edit.text(), self._get_search_options())
+    
     def find_next(self):
         """查找下一个"""
         search_text = self.find_edit.text()
@@ -539,3 +551,18 @@ class FindReplaceDialog(QDialog):
             preview_text += f"\n... 还有 {len(results) - 10} 个结果"
         
         self.results_preview.setText(preview_text)
+
+    def begin_results_preview(self):
+        """开始新一次搜索的结果预览（清空上一次的结果）"""
+        self._preview_results = []
+        self.results_preview.setText("正在搜索...")
+    
+    def append_results_preview(self, results: list):
+        """追加一批增量搜索结果"""
+        self._preview_results.extend(results)
+        self.show_results_preview(self._preview_results)
+    
+    def finish_results_preview(self, results: list):
+        """用排序后的完整结果替换已追加的各批结果"""
+        self._preview_results = list(results)
+        self.show_results_preview(self._preview_results)
@@ -6,6 +6,7 @@
 显示详细的字数统计信息
 """
 
+import asyncio
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QTabWidget,
     QWidget, QLabel, QProgressBar, QGroupBox, QTableWidget,
@@ -13,7 +14,7 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QObject, QThread, QThreadPool, QRunnable
 from PyQt6.QtGui import QFont
-from ._stats_loader import StatsTask
+from src.shared.utils.async_manager import get_async_manager
 # 图表功能暂时禁用，需要安装PyQt6-Charts
 # from PyQt6.QtCharts import QChart, QChartView, QPieSeries, QBarSeries, QBarSet
 
@@ -416,18 +417,28 @@ class WordCountDialog(QDialog):
         # 若上一个任务尚未完成，不能重复提交，避免数据错乱
         if self._pending_task is not None:
             return
-        task = StatsTask(self.document_service, project)
-        self._pending_task = task
-        task.signals.finished.connect(self._on_stats_loaded)
-        task.signals.failed.connect(self._on_stats_failed)
-        # 任务完成后清理占位引用
-        def _clear_pending(*args, **kwargs):
-            self._pending_task = None
-        task.signals.finished.connect(_clear_pending)
-        task.signals.failed.connect(_clear_pending)
-        self._thread_pool.start(task)
+        if project is None:
+            self._on_stats_failed("项目为空")
+            return
 
+        def _loaded(documents):
+            self._pending_task = None
+            self._on_stats_loaded(project, documents)
 
+        def _failed(error):
+            self._pending_task = None
+            if not isinstance(error, asyncio.CancelledError):
+                self._on_stats_failed(str(error))
+
+        # 协程在应用事件循环上执行，结果经Qt信号回到界面线程；
+        # 先记录句柄再开始转发，立即完成的任务也能正确清理占位引用
+        handle = get_async_manager().submit(
+            self.document_service.list_documents_by_project(project.id), parent=self
+        )
+        handle.finished.connect(_loaded)
+        handle.failed.connect(_failed)
+        self._pending_task = handle
+        handle.start()
 
     def _on_stats_loaded(self, project, documents):
         try:
@@ -670,6 +681,8 @@ class WordCountDialog(QDialog):
             self.update_timer.stop()
         except Exception:
             pass
-        # 无需显式停止线程池任务；通过 _pending_task 引用防重入
-        self._pending_task = None
+        # 取消尚未完成的加载任务
+        if self._pending_task is not None:
+            self._pending_task.cancel()
+            self._pending_task = None
         event.accept()
@@ -319,8 +319,9 @@ class MainWindow(QMainWindow):
             self.project_tree.document_copy_requested.connect(self.controller.copy_document)
 
         # 编辑器信号
+        if hasattr(self.editor_widget, 'word_count_changed'):
+            self.editor_widget.word_count_changed.connect(self._update_word_count)
         if hasattr(self.editor_widget, 'content_changed'):
-            self.editor_widget.content_changed.connect(self._update_word_count)
             self.editor_widget.content_changed.connect(self._on_content_changed)
             # 插件钩子：文本变化（节流在插件侧或框架侧实现）
             try:
@@ -91,6 +91,8 @@ class AIConsoleWidget(QWidget):
         # 兼容 ModernAIWidget 风格
         if hasattr(ai_widget, 'status_changed'):
             ai_widget.status_changed.connect(lambda msg, typ: self.append_html(f"<div style='color:#999'>ℹ {msg} ({typ})</div>"))
+        if hasattr(ai_widget, 'stream_delta_signal'):
+            ai_widget.stream_delta_signal.connect(lambda delta: self._on_stream_delta(wid, delta))
         if hasattr(ai_widget, 'ui_update_signal'):
             ai_widget.ui_update_signal.connect(lambda content: self._on_stream_update(wid, content))
 
@@ -120,6 +122,17 @@ class AIConsoleWidget(QWidget):
         safe = error_message.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
         self.append_html(f"<div style='color:#c00'>[{ts}] ❌ 失败: <b>{request_id}</b> — {safe}</div>")
 
+    @ensure_main_thread
+    def _on_stream_delta(self, wid: int, delta: str) -> None:
+        """流式增量直接追加到末尾"""
+        if not delta:
+            return
+        self._streaming_active[wid] = True
+        self._last_stream_content[wid] = self._last_stream_content.get(wid, "") + delta
+        self.output.moveCursor(QTextCursor.MoveOperation.End)
+        self.output.insertPlainText(delta)
+        self.output.moveCursor(QTextCursor.MoveOperation.End)
+
     def _on_stream_update(self, wid: int, content: str) -> None:
         """聚合同一请求的流式输出，只追加新增部分，避免全量重复"""
         prev = self._last_stream_content.get(wid, "")
@@ -72,6 +72,7 @@ class BaseAIWidget(QWidget):
         # 上下文信息
         self.document_context = ""
         self.selected_text = ""
+        self.cursor_position: Optional[int] = None
         self.document_id: Optional[str] = None
         self.document_type = "chapter"
         
@@ -211,7 +212,8 @@ class BaseAIWidget(QWidget):
         document_context: str = "",
         selected_text: str = "",
         document_id: Optional[str] = None,
-        document_type: str = "chapter"
+        document_type: str = "chapter",
+        cursor_position: Optional[int] = None
     ) -> None:
         """
         设置上下文信息
@@ -221,9 +223,12 @@ class BaseAIWidget(QWidget):
             selected_text: 选中文字
             document_id: 文档ID
             document_type: 文档类型
+            cursor_position: 光标位置，用于确定提示词的正文窗口；为None时沿用当前值
         """
         self.document_context = document_context
         self.selected_text = selected_text
+        if cursor_position is not None:
+            self.cursor_position = cursor_position
         self.document_id = document_id
         self.document_type = document_type
 
@@ -236,7 +241,8 @@ class BaseAIWidget(QWidget):
         document_id: Optional[str],
         content: str,
         selected_text: str = "",
-        document_type: Optional[str] = None
+        document_type: Optional[str] = None,
+        cursor_position: Optional[int] = None
     ) -> None:
         try:
             if document_type is None:
@@ -246,11 +252,19 @@ class BaseAIWidget(QWidget):
                 selected_text=selected_text or "",
                 document_id=document_id,
                 document_type=document_type,
+                cursor_position=cursor_position,
             )
         except Exception as e:
             import logging
             logging.getLogger(__name__).warning(f"更新AI上下文失败: {e}")
 
+    def update_cursor_position(self, position: int) -> None:
+        """由编辑器通知光标位置，用于确定提示词的正文窗口"""
+        try:
+            self.cursor_position = int(position)
+        except (TypeError, ValueError):
+            self.cursor_position = None
+
     def _on_context_updated(self) -> None:
         """上下文更新回调（子类可重写）"""
         pass
@@ -300,7 +314,8 @@ class BaseAIWidget(QWidget):
                 selected_text=self.selected_text,
                 parameters={
                     'document_id': self.document_id,
-                    'document_type': self.document_type
+                    'document_type': self.document_type,
+                    'cursor_position': self.cursor_position
                 }
             )
             
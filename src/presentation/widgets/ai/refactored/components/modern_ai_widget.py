@@ -14,7 +14,7 @@ from PyQt6.QtWidgets import (
     QProgressBar, QSizePolicy, QDialog, QDialogButtonBox
 )
 from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QPropertyAnimation, QEasingCurve, QRect
-from PyQt6.QtGui import QFont, QColor, QPalette, QGuiApplication
+from PyQt6.QtGui import QFont, QColor, QPalette, QGuiApplication, QTextCursor
 
 from src.presentation.styles.ai_panel_styles import (
     get_complete_ai_style, SPECIAL_BUTTON_STYLES, COLORS
@@ -23,6 +23,9 @@ from ..utils.ai_config_validator import AIConfigValidator
 
 logger = logging.getLogger(__name__)
 
+# 流式输出：增量在界面线程中合并，每帧最多追加一次
+STREAM_FLUSH_INTERVAL_MS = 16
+
 
 class ModernAIWidget(QWidget):
     """现代化AI组件基类"""
@@ -38,6 +41,10 @@ class ModernAIWidget(QWidget):
 
     # 线程安全的UI更新信号
     ui_update_signal = pyqtSignal(str)  # 用于线程安全的UI更新
+    # 流式输出信号（跨线程排队投递，顺序与发出顺序一致）
+    stream_started_signal = pyqtSignal()
+    stream_delta_signal = pyqtSignal(str)  # 新增的文本片段
+    stream_finished_signal = pyqtSignal(str, bool)  # 完整内容、是否渲染Markdown
     # 上下文来源提示
     context_source_changed = pyqtSignal(str)
 
@@ -80,6 +87,16 @@ class ModernAIWidget(QWidget):
         # 连接线程安全的UI更新信号
         self.ui_update_signal.connect(self._handle_ui_update)
 
+        # 流式增量：先缓存，定时器每帧最多追加一次到输出区
+        self._pending_stream_deltas: List[str] = []
+        self._stream_flush_timer = QTimer(self)
+        self._stream_flush_timer.setSingleShot(True)
+        self._stream_flush_timer.setInterval(STREAM_FLUSH_INTERVAL_MS)
+        self._stream_flush_timer.timeout.connect(self._flush_stream_deltas)
+        self.stream_started_signal.connect(self._begin_streaming_output)
+        self.stream_delta_signal.connect(self._queue_stream_delta)
+        self.stream_finished_signal.connect(self._finish_streaming_output)
+
         # 初始化文档上下文管理器
         self._initialize_context_manager()
 
@@ -175,8 +192,10 @@ class ModernAIWidget(QWidget):
         """初始化文档上下文管理器"""
         try:
             from src.application.services.ai.intelligence.document_context_manager import DocumentContextManager
+            from src.shared.events.event_bus import get_event_bus
 
-            self.context_manager = DocumentContextManager()
+            # 传入事件总线：编辑内容通过内容变更事件按增量同步
+            self.context_manager = DocumentContextManager(get_event_bus())
 
             # 注册当前组件
             component_id = f"ai_widget_{id(self)}"
@@ -610,13 +629,15 @@ class ModernAIWidget(QWidget):
         logger.debug(f"设置选中文本: {len(text)} 字符")
 
     # ===== 兼容旧版/外部调用的上下文接口 =====
-    def set_context(self, document_context: str = "", selected_text: str = "", document_id: Optional[str] = None, document_type: str = "chapter"):
+    def set_context(self, document_context: str = "", selected_text: str = "", document_id: Optional[str] = None, document_type: str = "chapter", cursor_position: Optional[int] = None):
         self.document_context = document_context or ""
         self.selected_text = selected_text or ""
         self._current_document_id = document_id
         self.document_type = document_type or "chapter"
+        if cursor_position is not None:
+            self.update_cursor_position(cursor_position)
 
-    def update_document_context_external(self, document_id: Optional[str], content: str, selected_text: str = "", document_type: Optional[str] = None) -> None:
+    def update_document_context_external(self, document_id: Optional[str], content: str, selected_text: str = "", document_type: Optional[str] = None, cursor_position: Optional[int] = None) -> None:
         try:
             if document_type is None:
                 document_type = self.document_type or "chapter"
@@ -625,6 +646,7 @@ class ModernAIWidget(QWidget):
                 selected_text=selected_text or "",
                 document_id=document_id,
                 document_type=document_type,
+                cursor_position=cursor_position,
             )
         except Exception as e:
             logger = logging.getLogger(__name__)
@@ -741,7 +763,7 @@ class ModernAIWidget(QWidget):
                 prompt=full_prompt,
                 context=self.document_context,
                 request_type=AIRequestType.TEXT_GENERATION,
-                priority=AIPriority.NORMAL,
+                priority=AIPriority.HIGH,  # 用户主动发起，按交互请求调度
                 parameters=options,
                 metadata={'function_name': function_name},
                 is_streaming=use_streaming
@@ -833,6 +855,11 @@ class ModernAIWidget(QWidget):
         except Exception:
             self._cursor_position = None
 
+        # 转发给内嵌的AI面板，供其确定提示词的正文窗口
+        if self._cursor_position is not None and getattr(self, 'ai_panel', None) is not None:
+            if hasattr(self.ai_panel, 'update_cursor_position'):
+                self.ai_panel.update_cursor_position(self._cursor_position)
+
     def _display_ai_response(self, content: str):
         """显示AI响应 - 统一使用流式输出方法"""
         logger.debug(f"🎯 _display_ai_response 被调用，内容长度: {len(content)}")
@@ -960,52 +987,37 @@ class ModernAIWidget(QWidget):
         self._debug_output_area_status()
 
         try:
-            # 在主线程中清空输出区域并显示开始状态
-            logger.debug("📝 清空输出区域并设置状态")
-            self._safe_ui_update(lambda: self._clear_output())
+            # 清空输出区域并显示开始状态（经由信号排队，保证先于后续增量执行）
+            self.stream_started_signal.emit()
             self._safe_ui_update(lambda: self.show_status(f"正在{function_name}...", "info"))
 
-            # 累积响应内容
-            accumulated_content = ""
-            chunk_count = 0
+            # 收集响应片段，界面只接收增量
+            chunks: List[str] = []
+            total_length = 0
 
             logger.info(f"🔄 开始接收流式响应...")
-            # 处理流式响应
             async for chunk in self.ai_orchestration_service.process_request_stream(request):
                 if chunk:  # 确保chunk不为空
-                    accumulated_content += chunk
-                    chunk_count += 1
-                    logger.debug(f"📦 收到chunk {chunk_count}: '{chunk[:50]}...' (长度: {len(chunk)})")
-                    logger.debug(f"📊 累积内容长度: {len(accumulated_content)}")
-
-                    # 每5个chunk或每100个字符更新一次UI，避免过于频繁的更新
-                    should_update = chunk_count % 5 == 0 or len(accumulated_content) % 100 < len(chunk)
-                    if should_update:
-                        # 使用信号进行线程安全的UI更新
-                        content_to_display = str(accumulated_content)
-                        logger.debug(f"🖥️ 更新UI显示，内容长度: {len(content_to_display)}")
-                        self.ui_update_signal.emit(content_to_display)
-
-            # 最终更新 - 确保显示完整内容
-            logger.info(f"✅ 流式接收完成，总共 {chunk_count} 个chunk，总长度 {len(accumulated_content)}")
+                    chunks.append(chunk)
+                    total_length += len(chunk)
+                    self.stream_delta_signal.emit(chunk)
+
+            chunk_count = len(chunks)
+            accumulated_content = "".join(chunks)
+            logger.info(f"✅ 流式接收完成，总共 {chunk_count} 个chunk，总长度 {total_length}")
             if accumulated_content:
-                final_content = str(accumulated_content)
-                logger.info(f"🎯 最终更新UI，内容: '{final_content[:100]}...'")
-                # 最终一次支持Markdown渲染（强制主线程执行）
+                # 最终一次支持Markdown渲染
                 try:
-                    if self.settings_service and self.settings_service.get('ai.render_markdown', True):
-                        self._safe_ui_update(lambda fc=final_content: self._render_to_output(fc))
-                    else:
-                        # 通过信号进入主线程
-                        self.ui_update_signal.emit(final_content)
+                    render_markdown = bool(self.settings_service and self.settings_service.get('ai.render_markdown', True))
                 except Exception:
-                    self.ui_update_signal.emit(final_content)
+                    render_markdown = False
+                self.stream_finished_signal.emit(accumulated_content, render_markdown)
             else:
                 logger.warning("⚠️ 没有接收到任何内容！")
 
             # 流式完成
             self._safe_ui_update(lambda: self.show_status(f"{function_name} 完成", "success"))
-            logger.info(f"🎉 流式处理完成，共处理 {chunk_count} 个块，总长度 {len(accumulated_content)} 字符")
+            logger.info(f"🎉 流式处理完成，共处理 {chunk_count} 个块，总长度 {total_length} 字符")
 
             # 智能续写默认自动插入（支持 options 覆盖设置）
             try:
@@ -1220,13 +1232,16 @@ class ModernAIWidget(QWidget):
         except Exception as e:
             logger.error(f"上下文更新回调失败: {e}")
 
-    def update_document_context_external(self, document_id: str, content: str, selected_text: str = "") -> None:
+    def update_document_context_external(self, document_id: str, content: str, selected_text: str = "", cursor_position: Optional[int] = None) -> None:
         """外部调用更新文档上下文"""
+        if cursor_position is not None:
+            self.update_cursor_position(cursor_position)
         if hasattr(self, 'context_manager') and self.context_manager:
             self.context_manager.update_document_context(
                 document_id=document_id,
                 content=content,
-                selected_text=selected_text
+                selected_text=selected_text,
+                cursor_position=self._cursor_position or 0
             )
 
     def _update_streaming_output(self, content: str):
@@ -1239,6 +1254,11 @@ class ModernAIWidget(QWidget):
                 logger.error("❌ output_area 不存在！")
                 return
 
+            # 整体替换内容时丢弃尚未追加的流式增量
+            if hasattr(self, '_stream_flush_timer'):
+                self._stream_flush_timer.stop()
+                self._pending_stream_deltas.clear()
+
             # 检查output_text是否存在
             if hasattr(self.output_area, 'output_text'):
                 text_widget = self.output_area.output_text
@@ -1265,6 +1285,56 @@ class ModernAIWidget(QWidget):
         except Exception as e:
             logger.error(f"❌ 更新流式输出失败: {e}", exc_info=True)
 
+    def _output_text_widget(self) -> Optional[QTextEdit]:
+        if not hasattr(self, 'output_area') or not self.output_area:
+            return None
+        return getattr(self.output_area, 'output_text', None)
+
+    def _begin_streaming_output(self):
+        """开始新的流式输出：丢弃未追加的增量并清空输出区（主线程）"""
+        self._stream_flush_timer.stop()
+        self._pending_stream_deltas.clear()
+        self._clear_output()
+
+    def _queue_stream_delta(self, delta: str):
+        """缓存一段增量，定时器未启动时启动（主线程）"""
+        self._pending_stream_deltas.append(delta)
+        if not self._stream_flush_timer.isActive():
+            self._stream_flush_timer.start()
+
+    def _flush_stream_deltas(self):
+        """把缓存的增量一次性追加到输出区末尾（主线程）"""
+        if not self._pending_stream_deltas:
+            return
+        text = "".join(self._pending_stream_deltas)
+        self._pending_stream_deltas.clear()
+
+        text_widget = self._output_text_widget()
+        if text_widget is None:
+            return
+        try:
+            # 直接在文档末尾插入，不重排已有内容，也不移动用户的选择
+            cursor = QTextCursor(text_widget.document())
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            cursor.insertText(text)
+
+            scrollbar = text_widget.verticalScrollBar()
+            if scrollbar:
+                scrollbar.setValue(scrollbar.maximum())
+        except Exception as e:
+            logger.error(f"❌ 追加流式输出失败: {e}", exc_info=True)
+
+    def _finish_streaming_output(self, content: str, render_markdown: bool):
+        """流式结束：Markdown一次性渲染，否则补齐剩余增量（主线程）"""
+        self._stream_flush_timer.stop()
+        if render_markdown:
+            self._pending_stream_deltas.clear()
+            self._render_to_output(content)
+        else:
+            self._flush_stream_deltas()
+            # 兼容通过 ui_update_signal 接收完整内容的监听者
+            self.ui_update_signal.emit(content)
+
     def _render_to_output(self, markdown_text: str):
         """将Markdown渲染成HTML并显示到输出区（最终完成时调用）"""
         try:
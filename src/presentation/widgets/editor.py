@@ -18,9 +18,11 @@ from PyQt6.QtGui import QFont, QTextCursor, QTextDocument, QAction, QTextCharFor
 from src.domain.entities.document import Document, DocumentType
 from src.presentation.widgets.syntax_highlighter import NovelSyntaxHighlighter, MarkdownSyntaxHighlighter
 from src.presentation.widgets.virtual_text_editor import VirtualTextEditor, get_virtual_editor_manager
+from src.presentation.widgets.editor_change_dispatcher import EditorChangeDispatcher
 from src.application.services.document_preloader import get_document_preloader
 from src.shared.monitoring.performance_monitor import get_performance_monitor, monitor_performance
 from src.shared.utils.logger import get_logger
+from src.shared.utils.event_loop import submit_coroutine
 from src.shared.utils.thread_safety import ensure_main_thread
 
 logger = get_logger(__name__)
@@ -38,7 +40,7 @@ class DocumentTab(QWidget):
     - 集成语法高亮器提供代码着色
     - 支持AI助手面板的动态加载
     - 提供自动保存和手动保存功能
-    - 实时统计字数和内容变化
+    - 通过 EditorChangeDispatcher 合并按键增量，分档更新字数、自动保存和内容同步
 
     Attributes:
         document: 关联的文档实例
@@ -77,6 +79,13 @@ class DocumentTab(QWidget):
         self.use_virtual_editor = self._should_use_virtual_editor()
         self.virtual_editor = None
 
+        # 变更分发器：合并按键增量并分档分发（UI/统计/内容同步）
+        self._change_dispatcher = EditorChangeDispatcher(self)
+        self._change_dispatcher.ui_flush.connect(self._on_ui_flush)
+        self._change_dispatcher.stats_flush.connect(self._on_stats_flush)
+        self._change_dispatcher.sync_flush.connect(self._on_sync_flush)
+        self._auto_save_interval_ms = self._load_auto_save_interval()
+
         self._setup_ui()
         self._setup_connections()
         self._setup_syntax_highlighting()
@@ -314,8 +323,8 @@ class DocumentTab(QWidget):
                 # 记录文档访问
                 preloader.record_document_access(self.document.id)
 
-                # 异步预加载相邻文档
-                QTimer.singleShot(1000, lambda: asyncio.create_task(
+                # 异步预加载相邻文档（在应用事件循环中执行）
+                QTimer.singleShot(1000, lambda: submit_coroutine(
                     preloader.preload_adjacent_documents(self.document.id, self.document.project_id)
                 ))
 
@@ -729,65 +738,77 @@ class DocumentTab(QWidget):
 
     def _setup_connections(self):
         """设置信号连接"""
-        self.text_edit.textChanged.connect(self._on_text_changed)
+        self._change_dispatcher.attach(self.text_edit.document())
         self.text_edit.cursorPositionChanged.connect(self._on_cursor_position_changed)
         self.text_edit.selectionChanged.connect(self._on_selection_changed)
 
-    def _on_text_changed(self):
-        """文本变更处理"""
+    def _load_auto_save_interval(self) -> int:
+        """读取自动保存间隔（ui.auto_save_interval，单位秒），返回毫秒；仅在创建标签页时读取一次"""
         try:
-            logger.debug(f"文本变更检测到: {self.document.title}")
+            from src.shared.ioc.container import get_global_container
+            container = get_global_container()
+            if container is not None:
+                try:
+                    from src.application.services.settings_service import SettingsService
+                    ss = container.try_get(SettingsService)
+                except Exception:
+                    ss = None
+                if ss is not None:
+                    interval_sec = int(ss.get_setting("ui.auto_save_interval", 30))
+                    return max(1000, interval_sec * 1000)
+        except Exception:
+            pass
+        return 2000
 
-            # 更新字数统计
-            self._update_word_count()
+    def _on_ui_flush(self, word_count: int):
+        """UI档：刷新字数标签并重启自动保存定时器（约一帧一次）"""
+        try:
+            self.word_count_label.setText(f"{word_count} 字")
+            self.auto_save_timer.start(self._auto_save_interval_ms)
+        except Exception as e:
+            logger.error(f"处理文本变更失败: {e}")
+
+    def _on_stats_flush(self, word_count: int):
+        """统计档：发出字数变更信号"""
+        self.word_count_changed.emit(word_count)
+
+    def _on_sync_flush(self, content: str, changes: list):
+        """同步档：把合并后的全文同步到AI面板上下文和外部监听者"""
+        try:
+            logger.debug(f"内容同步: {self.document.title}, 合并 {len(changes)} 次变更")
 
             # 发出内容变更信号
-            content = self.text_edit.toPlainText()
             self.content_changed.emit(self.document.id, content)
 
             # 更新AI面板上下文
             if self.ai_panel:
-                selected_text = self.text_edit.textCursor().selectedText()
-                cursor_position = self.text_edit.textCursor().position()
+                text_cursor = self.text_edit.textCursor()
+                selected_text = text_cursor.selectedText()
 
                 # 使用新的上下文管理方法
                 if hasattr(self.ai_panel, 'update_document_context_external'):
                     self.ai_panel.update_document_context_external(
                         document_id=self.document.id,
                         content=content,
-                        selected_text=selected_text
+                        selected_text=selected_text,
+                        cursor_position=text_cursor.position()
                     )
                 else:
                     # 回退到原有方法
                     self.ai_panel.set_context(content, selected_text)
 
-            # 启动自动保存定时器（读取 ui.auto_save_interval，单位秒）
-            try:
-                from src.shared.ioc.container import get_global_container
-                container = get_global_container()
-                interval_ms = 2000
-                if container is not None:
-                    try:
-                        from src.application.services.settings_service import SettingsService
-                        ss = container.try_get(SettingsService)
-                    except Exception:
-                        ss = None
-                    if ss is not None:
-                        interval_sec = int(ss.get_setting("ui.auto_save_interval", 30))
-                        interval_ms = max(1000, interval_sec * 1000)
-                self.auto_save_timer.start(interval_ms)
-                logger.debug(f"自动保存定时器已启动: {self.document.title}, {interval_ms}ms")
-            except Exception:
-                self.auto_save_timer.start(2000)
-                logger.debug(f"自动保存定时器已启动: {self.document.title}")
-
         except Exception as e:
-            logger.error(f"处理文本变更失败: {e}")
+            logger.error(f"同步文本变更失败: {e}")
+
+    def flush_pending_changes(self):
+        """立即分发尚未同步的变更（保存或关闭前调用）"""
+        self._change_dispatcher.flush()
 
     def _on_selection_changed(self):
         """选中文字变化处理"""
         try:
-            selected_text = self.text_edit.textCursor().selectedText()
+            text_cursor = self.text_edit.textCursor()
+            selected_text = text_cursor.selectedText()
             self.selection_changed.emit(self.document.id, selected_text)
 
             # 更新AI面板选中文字和上下文
@@ -798,7 +819,8 @@ class DocumentTab(QWidget):
                     self.ai_panel.update_document_context_external(
                         document_id=self.document.id,
                         content=content,
-                        selected_text=selected_text
+                        selected_text=selected_text,
+                        cursor_position=text_cursor.position()
                     )
                 elif hasattr(self.ai_panel, 'set_selected_text'):
                     # 回退到原有方法
@@ -847,15 +869,10 @@ class DocumentTab(QWidget):
             logger.error(f"处理光标位置变化失败: {e}")
 
     def _update_word_count(self):
-        """更新字数统计"""
+        """更新字数统计（字数由变更分发器增量维护）"""
         try:
-            content = self.text_edit.toPlainText()
-
-            # 计算字数（中文字符 + 英文单词）
-            chinese_chars = len([c for c in content if '\u4e00' <= c <= '\u9fff'])
-            english_words = len([w for w in content.split() if w.strip() and any(c.isalpha() for c in w)])
-
-            total_words = chinese_chars + english_words
+            self._change_dispatcher.attach(self.text_edit.document())
+            total_words = self._change_dispatcher.word_count
 
             # 更新显示
             self.word_count_label.setText(f"{total_words} 字")
@@ -896,6 +913,9 @@ class DocumentTab(QWidget):
             # 停止自动保存定时器
             self.auto_save_timer.stop()
 
+            # 先分发尚未同步的变更
+            self._change_dispatcher.flush()
+
             # 更新文档内容
             current_content = self.text_edit.toPlainText()
             self.document.content = current_content
@@ -1308,6 +1328,9 @@ class EditorWidget(QWidget):
         try:
             widget = self.tab_widget.widget(index)
             if isinstance(widget, DocumentTab):
+                # 先分发尚未同步的变更
+                widget.flush_pending_changes()
+
                 # 从记录中移除
                 document_id = widget.document.id
                 if document_id in self._document_tabs:
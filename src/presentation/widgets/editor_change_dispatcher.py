@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+编辑器变更分发器
+
+每个文档标签页一个分发器，监听 QTextDocument.contentsChange(pos, removed, added)，
+按段落（文本块）增量维护字数，并把连续的按键合并后按不同节奏分发：
+
+- UI档（默认16ms，约一帧）：字数标签、自动保存计时等轻量更新
+- 统计档（默认300ms）：字数变化信号、状态栏统计
+- 同步档（默认1500ms）：全文内容同步到AI上下文、控制器和插件
+
+每次按键只做一次块级重算和定时器检查，耗时与章节长度无关；
+全文 toPlainText() 只在同步档触发时执行一次。
+"""
+
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtGui import QTextDocument
+
+from src.shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 默认分发节奏（毫秒）：(防抖延迟, 最长等待)
+# 最长等待保证连续输入时各档仍会定期触发，不会被无限推迟
+DEFAULT_TIERS: Dict[str, Tuple[int, int]] = {
+    "ui": (16, 16),
+    "stats": (300, 1000),
+    "sync": (1500, 5000),
+}
+
+CHINESE_CHAR_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+WORD_PATTERN = re.compile(r'\S+')
+ALPHA_PATTERN = re.compile(r'[^\W\d_]')
+
+
+def count_words(text: str) -> int:
+    """计算字数（中文字符 + 含字母的英文单词），与文档统计口径一致"""
+    if not text:
+        return 0
+    chinese_chars = len(CHINESE_CHAR_PATTERN.findall(text))
+    english_words = sum(1 for w in WORD_PATTERN.findall(text) if ALPHA_PATTERN.search(w))
+    return chinese_chars + english_words
+
+
+class _DispatchTier:
+    """单个分发档位：防抖 + 最长等待"""
+
+    def __init__(self, name: str, delay_ms: int, max_wait_ms: int, callback):
+        self.name = name
+        self.delay_ms = max(0, int(delay_ms))
+        self.max_wait_ms = max(self.delay_ms, int(max_wait_ms))
+        self._first_pending: Optional[float] = None
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(callback)
+
+    def schedule(self) -> None:
+        now = time.monotonic()
+        if self._first_pending is None:
+            self._first_pending = now
+        elif self.delay_ms == self.max_wait_ms and self._timer.isActive():
+            # 节流档：已有待触发的定时器，无需重启
+            return
+        waited_ms = (now - self._first_pending) * 1000
+        self._timer.start(int(max(0, min(self.delay_ms, self.max_wait_ms - waited_ms))))
+
+    def fired(self) -> None:
+        self._first_pending = None
+
+    def cancel(self) -> None:
+        self._timer.stop()
+        self._first_pending = None
+
+    @property
+    def pending(self) -> bool:
+        return self._first_pending is not None
+
+
+class EditorChangeDispatcher(QObject):
+    """
+    编辑器变更分发器
+
+    收集 contentsChange 增量，按文本块缓存字数，合并后分档发出信号。
+
+    Signals:
+        ui_flush: UI档触发(word_count)
+        stats_flush: 统计档触发(word_count)
+        sync_flush: 同步档触发(content, changes)，changes为期间累计的(pos, removed, added)列表
+    """
+
+    ui_flush = pyqtSignal(int)
+    stats_flush = pyqtSignal(int)
+    sync_flush = pyqtSignal(str, list)
+
+    def __init__(self, parent: Optional[QObject] = None, tiers: Optional[Dict[str, Tuple[int, int]]] = None):
+        super().__init__(parent)
+        self._document: Optional[QTextDocument] = None
+        self._block_counts: List[int] = []
+        self._word_count = 0
+        self._revision = 0
+        self._pending_changes: List[Tuple[int, int, int]] = []
+
+        config = dict(DEFAULT_TIERS)
+        if tiers:
+            config.update(tiers)
+        self._tiers: Dict[str, _DispatchTier] = {
+            "ui": _DispatchTier("ui", *config["ui"], self._flush_ui),
+            "stats": _DispatchTier("stats", *config["stats"], self._flush_stats),
+            "sync": _DispatchTier("sync", *config["sync"], self._flush_sync),
+        }
+
+    # ------------------------------------------------------------------
+    # 文档绑定
+    # ------------------------------------------------------------------
+
+    def attach(self, document: QTextDocument) -> None:
+        """绑定文档（重复绑定同一文档无副作用），并做一次全量字数统计"""
+        if document is self._document:
+            return
+        self.detach()
+        self._document = document
+        document.contentsChange.connect(self._on_contents_change)
+        self._rebuild_counts()
+
+    def detach(self) -> None:
+        if self._document is not None:
+            try:
+                self._document.contentsChange.disconnect(self._on_contents_change)
+            except (TypeError, RuntimeError):
+                pass
+        self._document = None
+        self._block_counts = []
+        self._word_count = 0
+        self._pending_changes.clear()
+        for tier in self._tiers.values():
+            tier.cancel()
+
+    def set_tier(self, name: str, delay_ms: int, max_wait_ms: Optional[int] = None) -> None:
+        """调整某一档的延迟（毫秒）"""
+        tier = self._tiers[name]
+        tier.delay_ms = max(0, int(delay_ms))
+        tier.max_wait_ms = max(tier.delay_ms, int(max_wait_ms if max_wait_ms is not None else delay_ms))
+
+    @property
+    def word_count(self) -> int:
+        return self._word_count
+
+    @property
+    def revision(self) -> int:
+        """内容修订号，每次 contentsChange 递增"""
+        return self._revision
+
+    @property
+    def has_pending_sync(self) -> bool:
+        return self._tiers["sync"].pending
+
+    # ------------------------------------------------------------------
+    # 增量统计
+    # ------------------------------------------------------------------
+
+    def _rebuild_counts(self) -> None:
+        self._block_counts = []
+        if self._document is not None:
+            block = self._document.begin()
+            while block.isValid():
+                self._block_counts.append(count_words(block.text()))
+                block = block.next()
+        self._word_count = sum(self._block_counts)
+
+    def _on_contents_change(self, position: int, removed: int, added: int) -> None:
+        try:
+            document = self._document
+            if document is None:
+                return
+            self._revision += 1
+            self._pending_changes.append((position, removed, added))
+
+            # 变更后受影响的块区间 [first, last]；Qt 对整篇替换可能报告超出文末的长度
+            end = min(position + added, max(0, document.characterCount() - 1))
+            first = document.findBlock(position).blockNumber()
+            last = document.findBlock(end).blockNumber()
+            if first < 0 or last < first:
+                self._rebuild_counts()
+            else:
+                # 块数变化量即被删除/新增的段落数，据此确定旧缓存中被替换的区间
+                block_delta = document.blockCount() - len(self._block_counts)
+                old_last = last - block_delta
+                if old_last < first or old_last >= len(self._block_counts):
+                    self._rebuild_counts()
+                else:
+                    new_counts = []
+                    block = document.findBlockByNumber(first)
+                    for _ in range(last - first + 1):
+                        new_counts.append(count_words(block.text()))
+                        block = block.next()
+                    removed_total = sum(self._block_counts[first:old_last + 1])
+                    self._block_counts[first:old_last + 1] = new_counts
+                    self._word_count += sum(new_counts) - removed_total
+
+            for tier in self._tiers.values():
+                tier.schedule()
+        except Exception as e:
+            logger.error(f"处理编辑器内容增量失败: {e}")
+
+    # ------------------------------------------------------------------
+    # 分发
+    # ------------------------------------------------------------------
+
+    def _flush_ui(self) -> None:
+        self._tiers["ui"].fired()
+        self.ui_flush.emit(self._word_count)
+
+    def _flush_stats(self) -> None:
+        self._tiers["stats"].fired()
+        self.stats_flush.emit(self._word_count)
+
+    def _flush_sync(self) -> None:
+        self._tiers["sync"].fired()
+        if self._document is None:
+            return
+        changes = self._pending_changes
+        self._pending_changes = []
+        self.sync_flush.emit(self._document.toPlainText(), changes)
+
+    def flush(self) -> None:
+        """立即触发所有待分发的档位（保存、关闭或切换文档前调用）"""
+        for name, handler in (("ui", self._flush_ui), ("stats", self._flush_stats), ("sync", self._flush_sync)):
+            tier = self._tiers[name]
+            if tier.pending:
+                tier.cancel()
+                handler()
@@ -468,10 +468,11 @@ class StatusPanelWidget(QWidget):
         if "cpu_usage" in stats:
             self.cpu_progress.setValue(int(stats["cpu_usage"]))
 
-        # 响应时间
+        # 响应时间（最近10分钟）
         if "ai_avg_response_time" in stats:
             avg_time_ms = stats['ai_avg_response_time'] * 1000
-            self.response_time_label.setText(f"平均响应时间: {avg_time_ms:.0f}ms")
+            p95_time_ms = stats.get('ai_p95_response_time', 0.0) * 1000
+            self.response_time_label.setText(f"平均响应时间: {avg_time_ms:.0f}ms (p95 {p95_time_ms:.0f}ms)")
 
         # 错误率
         if "error_count" in stats and "ai_requests" in stats:
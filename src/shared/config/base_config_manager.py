@@ -11,8 +11,6 @@ import json
 import shutil
 from pathlib import Path
 from typing import Any, Dict, Optional
-import threading
-import asyncio
 from datetime import datetime
 from abc import ABC, abstractmethod
 
@@ -85,27 +83,6 @@ class BaseConfigManager(ABC):
             logger.error(f"创建配置目录失败: {e}")
             raise
     
-    def _run_coro_blocking(self, coro):
-        """在当前线程安全地运行协程，无论事件循环是否已在运行"""
-        try:
-            asyncio.get_running_loop()
-        except RuntimeError:
-            # 没有运行中的事件循环，直接运行
-            return asyncio.run(coro)
-        # 有运行中的事件循环，改用线程执行避免嵌套循环错误
-        result_ref: Dict[str, Any] = {}
-        def runner():
-            try:
-                result_ref['result'] = asyncio.run(coro)
-            except Exception as e:
-                result_ref['error'] = e
-        t = threading.Thread(target=runner, daemon=True)
-        t.start()
-        t.join()
-        if 'error' in result_ref:
-            raise result_ref['error']
-        return result_ref.get('result')
-
     def _load_config(self) -> None:
         """加载配置"""
         try:
@@ -113,7 +90,7 @@ class BaseConfigManager(ABC):
                 # 统一读取 JSON（线程安全地调用异步实现）
                 from src.shared.utils.file_operations import get_file_operations
                 ops = get_file_operations("config")
-                loaded_config = self._run_coro_blocking(ops.load_json_cached(self.config_file))
+                loaded_config = ops.load_json_sync(self.config_file)
                 if loaded_config is None:
                     raise ValueError("配置文件读取失败")
                 # 验证数据格式
@@ -189,7 +166,7 @@ class BaseConfigManager(ABC):
             ops = get_file_operations("config")
             existing: Dict[str, Any] = {}
             try:
-                loaded = self._run_coro_blocking(ops.load_json_cached(self.config_file)) if self.config_file.exists() else None
+                loaded = ops.load_json_sync(self.config_file) if self.config_file.exists() else None
                 if isinstance(loaded, dict):
                     existing = loaded
             except Exception:
@@ -207,7 +184,7 @@ class BaseConfigManager(ABC):
             merged = deep_merge(existing, self.config_data)
 
             # 原子写入 + 备份
-            ok = self._run_coro_blocking(ops.save_json_atomic(self.config_file, merged, create_backup=True))
+            ok = ops.save_json_atomic_sync(self.config_file, merged, create_backup=True)
             if ok:
                 logger.debug(f"配置保存成功: {self.config_file}")
                 # 回写到内存，保持一致
@@ -363,7 +340,7 @@ class BaseConfigManager(ABC):
             # 统一原子写入导出
             from src.shared.utils.file_operations import get_file_operations
             ops = get_file_operations("config_export")
-            self._run_coro_blocking(ops.save_json_atomic(export_path, export_data, create_backup=True))
+            ops.save_json_atomic_sync(export_path, export_data, create_backup=True)
 
             logger.info(f"配置导出成功: {export_path}")
             return True
@@ -381,10 +358,8 @@ class BaseConfigManager(ABC):
 
             # 统一读取导入 JSON
             from src.shared.utils.file_operations import get_file_operations
-            import asyncio
             ops = get_file_operations("config_import")
-            loop = asyncio.get_event_loop()
-            import_data = loop.run_until_complete(ops.load_json_cached(import_path))
+            import_data = ops.load_json_sync(import_path)
             if import_data is None:
                 return False
 
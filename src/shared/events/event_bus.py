@@ -4,30 +4,41 @@
 事件总线系统
 
 实现发布-订阅模式，支持：
-- 类型安全的事件处理
-- 异步事件处理
+- 类型安全的事件处理（订阅基类事件可收到子类事件）
+- 异步事件处理（常驻应用事件循环，线程安全发布）
 - 事件优先级
 - 事件过滤
+- 处理器并发执行、单次处理超时
+- 高频事件合并
 - 错误处理和重试
 """
 
 import asyncio
+import concurrent.futures
 import logging
 import threading
 import weakref
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Set, Type, TypeVar, Union
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple, Type, TypeVar, Union
 from uuid import uuid4
 
 from src.shared.utils.logger import get_logger
+from src.shared.utils.event_loop import get_app_event_loop
 
 logger = get_logger(__name__)
 
 T = TypeVar('T', bound='Event')
 
+# 单次事件处理的默认超时（秒）
+DEFAULT_HANDLER_TIMEOUT = 30.0
+# 同步处理器线程池大小
+EVENT_HANDLER_WORKERS = 4
+# 处理失败重试的退避基数（秒）
+RETRY_BASE_DELAY = 0.1
+
 
 class EventPriority(Enum):
     """
@@ -93,6 +104,19 @@ class EventSubscription:
     max_retries: int
     subscriber_ref: Optional[weakref.ref]
     subscription_id: str
+    timeout: Optional[float] = DEFAULT_HANDLER_TIMEOUT
+    # 同步处理器是否在界面线程中执行（订阅者为 QObject 时默认开启）
+    gui_thread: bool = False
+    # 该订阅最近一次处理任务；同一订阅的事件依次处理，不同订阅之间互不等待
+    lane_tail: Optional[asyncio.Future] = field(default=None, repr=False, compare=False)
+
+
+@dataclass
+class CoalescingRule:
+    """高频事件合并规则：窗口内同一键的事件合并为一个"""
+    window: float
+    key: Optional[Callable[[Event], Hashable]] = None
+    merge: Optional[Callable[[Event, Event], Event]] = None
 
 
 class EventHandler(ABC):
@@ -112,20 +136,27 @@ class EventBus:
     提供事件的发布、订阅和异步处理功能。
 
     实现方式：
-    - 使用字典存储事件类型到订阅者的映射
-    - 支持同步和异步事件处理
-    - 使用弱引用避免内存泄漏
-    - 提供线程安全的订阅管理
-    - 支持事件过滤和优先级处理
+    - 所有分发都在应用常驻事件循环中进行；publish() 可在任意线程调用，
+      通过 call_soon_threadsafe 把事件交给循环线程，不再轮询队列
+    - 事件类型 -> 处理器列表的分发表按 MRO 汇总基类上的订阅，首次分发时计算并缓存，
+      订阅变化时才失效重建
+    - 每个订阅是一条独立的处理通道：同一订阅按发布顺序依次处理事件，
+      不同订阅并发执行，慢处理器只拖慢自己的通道；异步处理器超时后被取消
+    - 同步处理器在专用线程池中执行，不阻塞事件循环；超时只记录警告，
+      通道仍等待其执行完毕，线程池被占满时其他同步处理器需排队
+    - 订阅者（或绑定方法的所属对象）是 QObject、或订阅时指定 gui_thread=True 的同步处理器
+      投递到界面线程执行，可以直接操作控件和定时器
+    - 可为高频事件类型配置合并窗口，窗口内同一键的事件合并后只分发一次
+    - 使用弱引用避免内存泄漏，订阅管理线程安全
 
     Attributes:
         _subscriptions: 事件订阅映射字典
         _lock: 线程锁，确保订阅操作的线程安全
-        _event_queue: 异步事件队列
-        _processing: 是否正在处理事件
+        _dispatch_table: 事件类型 -> 按优先级排序的订阅（含基类订阅）的缓存
+        _coalescing: 事件类型 -> 合并规则
     """
 
-    def __init__(self):
+    def __init__(self, handler_workers: int = EVENT_HANDLER_WORKERS):
         """
         初始化事件总线
 
@@ -134,25 +165,46 @@ class EventBus:
         self._subscriptions: Dict[Type[Event], List[EventSubscription]] = {}
         self._lock = threading.RLock()
         self._is_running = True
-        self._event_queue = asyncio.Queue()
-        self._processing_task: Optional[asyncio.Task] = None
 
-        # 启动事件处理任务
-        self._start_processing()
+        self._dispatch_table: Dict[Type[Event], Tuple[EventSubscription, ...]] = {}
+        self._coalescing: Dict[Type[Event], CoalescingRule] = {}
+        # 合并中的事件（只在循环线程中访问）：(事件类型, 键) -> [事件, 定时器]
+        self._coalesce_pending: Dict[Tuple[Type[Event], Hashable], List[Any]] = {}
+        self._active_tasks: Set[asyncio.Future] = set()
+
+        self._handler_workers = max(1, handler_workers)
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+        self.published_count = 0
+        self.dispatched_count = 0
+        self.coalesced_count = 0
+        self.handler_error_count = 0
+        self.handler_timeout_count = 0
+        self.table_rebuilds = 0
 
     def subscribe(
         self,
         event_type: Type[T],
-        handler: Union[Callable[[T], None], Callable[[T], asyncio.coroutine]],
+        handler: Union[Callable[[T], None], Callable[[T], Awaitable[None]]],
         priority: EventPriority = EventPriority.NORMAL,
         filter_func: Optional[Callable[[T], bool]] = None,
         max_retries: int = 3,
-        subscriber: Optional[Any] = None
+        subscriber: Optional[Any] = None,
+        timeout: Optional[float] = DEFAULT_HANDLER_TIMEOUT,
+        gui_thread: Optional[bool] = None
     ) -> str:
-        """订阅事件"""
+        """
+        订阅事件
+
+        订阅基类事件时也会收到其子类事件。timeout 为单次处理的超时（秒），None 表示不限制。
+        gui_thread 指定同步处理器是否在界面线程中执行；None 时按订阅者（或处理器所属对象）
+        是否为 QObject 自动判断。异步处理器始终在事件循环中执行。
+        """
         with self._lock:
             # 检查处理器是否为异步
             is_async = asyncio.iscoroutinefunction(handler)
+            if gui_thread is None:
+                gui_thread = _is_qobject(subscriber) or _is_qobject(getattr(handler, '__self__', None))
 
             # 创建弱引用（如果提供了订阅者）
             subscriber_ref = None
@@ -160,7 +212,6 @@ class EventBus:
                 subscriber_ref = weakref.ref(subscriber, self._cleanup_subscription)
 
             # 创建订阅信息
-            from uuid import uuid4
             subscription = EventSubscription(
                 handler=handler,
                 event_type=event_type,
@@ -169,7 +220,9 @@ class EventBus:
                 filter_func=filter_func,
                 max_retries=max_retries,
                 subscriber_ref=subscriber_ref,
-                subscription_id=str(uuid4())
+                subscription_id=str(uuid4()),
+                timeout=timeout,
+                gui_thread=bool(gui_thread) and not is_async
             )
 
             # 添加到订阅列表
@@ -191,6 +244,7 @@ class EventBus:
                 key=lambda s: s.priority.value,
                 reverse=True
             )
+            self._invalidate_dispatch_table()
 
             logger.debug(f"订阅事件 {event_type.__name__}，处理器: {handler}")
             return subscription.subscription_id
@@ -230,87 +284,144 @@ class EventBus:
             # 如果没有订阅者了，移除事件类型
             if not subscriptions:
                 del self._subscriptions[event_type]
+            if to_remove:
+                self._invalidate_dispatch_table()
+
+    def configure_coalescing(
+        self,
+        event_type: Type[T],
+        window: float,
+        key: Optional[Callable[[T], Hashable]] = None,
+        merge: Optional[Callable[[T, T], T]] = None
+    ) -> None:
+        """
+        为高频事件类型配置合并窗口
+
+        同一键（默认整个类型共用一个键）的事件在第一个事件到达后的 window 秒内合并为一个再分发；
+        merge(先到的事件, 后到的事件) 返回合并后的事件，未提供时保留最新的事件。
+        window <= 0 时取消合并。
+        """
+        with self._lock:
+            if window <= 0:
+                self._coalescing.pop(event_type, None)
+            else:
+                self._coalescing[event_type] = CoalescingRule(window, key, merge)
+
+    # ------------------------------------------------------------------
+    # 发布
+    # ------------------------------------------------------------------
 
     def publish(self, event: Event) -> None:
-        """发布事件（同步）"""
+        """发布事件（任意线程可调用，事件在应用事件循环中异步分发）"""
         if not self._is_running:
             return
 
-        # 若未启动后台处理任务，直接处理事件作为兜底
-        if self._processing_task is None or self._processing_task.done():
-            try:
-                asyncio.run(self._process_event(event))
-                return
-            except Exception:
-                pass
-        # 添加到事件队列
         try:
-            asyncio.create_task(self._event_queue.put(event))
-        except RuntimeError:
-            # 如果没有事件循环，直接处理
-            asyncio.run(self._process_event(event))
+            get_app_event_loop().call_soon(self._accept_event, event)
+        except Exception as e:
+            logger.error(f"发布事件失败: {type(event).__name__}, {e}")
 
     async def publish_async(self, event: Event) -> None:
-        """发布事件（异步）"""
+        """发布事件（异步；在循环线程中调用时立即进入分发）"""
         if not self._is_running:
             return
 
-        # 确保处理任务已启动；若未启动则直接处理，避免无人消费
-        if self._processing_task is None or self._processing_task.done():
-            try:
-                await self._process_event(event)
-                return
-            except Exception:
-                # 兜底：仍尝试放回队列
-                pass
-
-        await self._event_queue.put(event)
+        if get_app_event_loop().in_loop_thread():
+            self._accept_event(event)
+        else:
+            self.publish(event)
 
     def start_in_background(self) -> None:
-        """在后台事件循环中启动事件处理任务（可多次安全调用）。"""
-        if self._processing_task is not None and not self._processing_task.done():
-            return
+        """确保应用事件循环已启动（可多次安全调用）"""
         try:
-            loop = asyncio.get_event_loop()
-            self._processing_task = loop.create_task(self._process_events())
-        except RuntimeError:
-            # 没有运行中的事件循环则跳过，保留 publish/publish_async 的兜底逻辑
-            pass
-
-    def _start_processing(self) -> None:
-        """启动事件处理任务"""
-        try:
-            loop = asyncio.get_event_loop()
-            self._processing_task = loop.create_task(self._process_events())
-        except RuntimeError:
-            # 没有事件循环，稍后启动
-            pass
-
-    async def _process_events(self) -> None:
-        """处理事件队列"""
-        while self._is_running:
+            get_app_event_loop().start()
+        except RuntimeError as e:
+            logger.warning(f"启动事件循环失败: {e}")
+
+    # ------------------------------------------------------------------
+    # 分发（以下方法只在循环线程中执行）
+    # ------------------------------------------------------------------
+
+    def _accept_event(self, event: Event) -> None:
+        """接收事件：需要合并的事件进入合并窗口，其余直接分发"""
+        if not self._is_running:
+            return
+        self.published_count += 1
+
+        event_type = type(event)
+        rule = self._coalescing.get(event_type)
+        if rule is None:
+            self._dispatch(event)
+            return
+
+        coalesce_key = (event_type, rule.key(event) if rule.key is not None else None)
+        pending = self._coalesce_pending.get(coalesce_key)
+        if pending is not None:
             try:
-                # 等待事件
-                event = await asyncio.wait_for(self._event_queue.get(), timeout=1.0)
-                await self._process_event(event)
-            except asyncio.TimeoutError:
-                continue
+                pending[0] = rule.merge(pending[0], event) if rule.merge is not None else event
             except Exception as e:
-                logger.error(f"事件处理错误: {e}")
+                logger.error(f"合并事件失败: {event_type.__name__}, {e}")
+                pending[0] = event
+            self.coalesced_count += 1
+            return
 
-    async def _process_event(self, event: Event) -> None:
-        """处理单个事件"""
-        event_type = type(event)
+        loop = asyncio.get_running_loop()
+        timer = loop.call_later(rule.window, self._flush_coalesced, coalesce_key)
+        self._coalesce_pending[coalesce_key] = [event, timer]
 
-        with self._lock:
-            subscriptions = self._subscriptions.get(event_type, []).copy()
+    def _flush_coalesced(self, coalesce_key: Tuple[Type[Event], Hashable]) -> None:
+        pending = self._coalesce_pending.pop(coalesce_key, None)
+        if pending is not None and self._is_running:
+            self._dispatch(pending[0])
 
+    def _dispatch(self, event: Event) -> None:
+        """为每个匹配的订阅在其通道上创建处理任务（不等待处理完成）"""
+        subscriptions = self._get_subscriptions(type(event))
         if not subscriptions:
             return
+        self.dispatched_count += 1
 
-        # 处理所有订阅
+        loop = asyncio.get_running_loop()
         for subscription in subscriptions:
-            await self._handle_subscription(event, subscription)
+            previous = subscription.lane_tail
+            if previous is not None and previous.done():
+                previous = None
+            task = loop.create_task(self._run_in_lane(previous, event, subscription))
+            subscription.lane_tail = task
+            self._active_tasks.add(task)
+            task.add_done_callback(self._active_tasks.discard)
+
+    def _get_subscriptions(self, event_type: Type[Event]) -> Tuple[EventSubscription, ...]:
+        """事件类型对应的订阅（含基类订阅，按优先级排序），首次使用时计算并缓存"""
+        subscriptions = self._dispatch_table.get(event_type)
+        if subscriptions is not None:
+            return subscriptions
+
+        with self._lock:
+            collected: List[EventSubscription] = []
+            for klass in event_type.__mro__:
+                collected.extend(self._subscriptions.get(klass, ()))
+            # 稳定排序：同优先级时具体类型的订阅在前
+            collected.sort(key=lambda s: s.priority.value, reverse=True)
+            subscriptions = tuple(collected)
+            self._dispatch_table[event_type] = subscriptions
+            self.table_rebuilds += 1
+        return subscriptions
+
+    def _invalidate_dispatch_table(self) -> None:
+        """订阅变化后使分发表失效（调用方持有锁）"""
+        self._dispatch_table = {}
+
+    async def _run_in_lane(
+        self,
+        previous: Optional[asyncio.Future],
+        event: Event,
+        subscription: EventSubscription
+    ) -> None:
+        """等待同一订阅的上一个事件处理完，再处理本事件"""
+        if previous is not None:
+            await asyncio.wait([previous])
+        await self._handle_subscription(event, subscription)
 
     async def _handle_subscription(self, event: Event, subscription: EventSubscription) -> None:
         """处理单个订阅"""
@@ -331,14 +442,19 @@ class EventBus:
             retry_count = 0
             while retry_count <= subscription.max_retries:
                 try:
-                    if subscription.is_async:
-                        await subscription.handler(event)
-                    else:
-                        subscription.handler(event)
+                    await self._invoke_handler(event, subscription)
+                    break
+                except asyncio.TimeoutError:
+                    self.handler_timeout_count += 1
+                    logger.warning(
+                        f"事件处理超时 ({subscription.timeout}秒): "
+                        f"{type(event).__name__} -> {subscription.handler}"
+                    )
                     break
                 except Exception as e:
                     retry_count += 1
                     if retry_count > subscription.max_retries:
+                        self.handler_error_count += 1
                         logger.error(
                             f"事件处理失败 (重试 {subscription.max_retries} 次): "
                             f"{subscription.handler}, 错误: {e}"
@@ -348,11 +464,59 @@ class EventBus:
                         logger.warning(
                             f"事件处理失败，重试 {retry_count}/{subscription.max_retries}: {e}"
                         )
-                        await asyncio.sleep(0.1 * retry_count)  # 指数退避
+                        await asyncio.sleep(RETRY_BASE_DELAY * retry_count)  # 退避
 
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"订阅处理错误: {e}")
 
+    async def _invoke_handler(self, event: Event, subscription: EventSubscription) -> None:
+        """
+        执行处理器
+
+        异步处理器在循环中运行，超时后被取消。同步处理器在线程池中运行，线程无法中途停止，
+        因此超时只记录一次超时警告，仍等待线程执行完毕再处理该订阅的下一个事件，
+        保证同一订阅不会并发执行、按发布顺序收到事件。长时间阻塞的同步处理器会占用
+        线程池中的一个线程（共 EVENT_HANDLER_WORKERS 个），耗时操作应使用异步处理器。
+        gui_thread 订阅的同步处理器改为投递到界面线程执行，等待方式相同。
+        """
+        if subscription.is_async:
+            if subscription.timeout is None:
+                await subscription.handler(event)
+            else:
+                await asyncio.wait_for(subscription.handler(event), subscription.timeout)
+            return
+
+        concurrent_future = None
+        if subscription.gui_thread:
+            concurrent_future = _call_in_gui_thread(subscription.handler, event)
+        if concurrent_future is None:
+            concurrent_future = self._get_executor().submit(subscription.handler, event)
+        future = asyncio.wrap_future(concurrent_future)
+        if subscription.timeout is not None:
+            done, _ = await asyncio.wait([future], timeout=subscription.timeout)
+            if not done:
+                self.handler_timeout_count += 1
+                logger.warning(
+                    f"同步事件处理超时 ({subscription.timeout}秒)，等待其执行完毕: "
+                    f"{type(event).__name__} -> {subscription.handler}"
+                )
+        await future
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self._handler_workers, thread_name_prefix="event-handler"
+                    )
+        return self._executor
+
+    # ------------------------------------------------------------------
+    # 订阅管理与生命周期
+    # ------------------------------------------------------------------
+
     def _cleanup_subscription(self, weak_ref: weakref.ref) -> None:
         """清理已失效的订阅"""
         with self._lock:
@@ -364,6 +528,7 @@ class EventBus:
 
                 if not subscriptions:
                     del self._subscriptions[event_type]
+            self._invalidate_dispatch_table()
 
     def get_subscription_count(self, event_type: Optional[Type[Event]] = None) -> int:
         """获取订阅数量"""
@@ -380,60 +545,106 @@ class EventBus:
                 self._subscriptions.clear()
             else:
                 self._subscriptions.pop(event_type, None)
+            self._invalidate_dispatch_table()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取分发统计"""
+        return {
+            'subscriptions': self.get_subscription_count(),
+            'published': self.published_count,
+            'dispatched': self.dispatched_count,
+            'coalesced': self.coalesced_count,
+            'coalescing_pending': len(self._coalesce_pending),
+            'active_handlers': len(self._active_tasks),
+            'handler_errors': self.handler_error_count,
+            'handler_timeouts': self.handler_timeout_count,
+            'dispatch_table_rebuilds': self.table_rebuilds,
+        }
+
+    def _cancel_pending(self) -> None:
+        """取消合并窗口中的事件和未完成的处理任务（在循环线程中执行）"""
+        for _, timer in self._coalesce_pending.values():
+            timer.cancel()
+        self._coalesce_pending.clear()
+        for task in list(self._active_tasks):
+            task.cancel()
 
     def shutdown(self) -> None:
         """关闭事件总线（同步版本）"""
         self._is_running = False
 
-        if self._processing_task is not None:
-            self._processing_task.cancel()
+        loop = get_app_event_loop()
+        if loop.is_running:
+            loop.call_soon(self._cancel_pending)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
 
         self.clear_subscriptions()
         logger.info("事件总线已关闭")
 
     async def shutdown_async(self) -> None:
-        """关闭事件总线（异步版本，跨事件循环安全）"""
+        """关闭事件总线（异步版本）"""
         self._is_running = False
 
-        task = self._processing_task
-        if task is not None and not task.done():
-            logger.info("取消事件处理任务...")
-            # 尝试在任务所属事件循环中取消
-            try:
-                task_loop = task.get_loop()
-            except Exception:
-                task_loop = None
-            if task_loop:
-                try:
-                    task_loop.call_soon_threadsafe(task.cancel)
-                except Exception:
-                    try:
-                        task.cancel()
-                    except Exception:
-                        pass
-            else:
-                try:
-                    task.cancel()
-                except Exception:
-                    pass
-
-            # 仅当当前运行循环与任务循环相同时才等待
-            try:
-                current_loop = asyncio.get_running_loop()
-            except RuntimeError:
-                current_loop = None
-            if current_loop is not None and task_loop is current_loop:
-                try:
-                    await task
-                except asyncio.CancelledError:
-                    logger.info("事件处理任务已取消")
-                except Exception as e:
-                    logger.warning(f"取消事件处理任务时出错: {e}")
+        if get_app_event_loop().in_loop_thread():
+            tasks = list(self._active_tasks)
+            self._cancel_pending()
+            if tasks:
+                logger.info(f"取消 {len(tasks)} 个事件处理任务...")
+                await asyncio.gather(*tasks, return_exceptions=True)
+        else:
+            get_app_event_loop().call_soon(self._cancel_pending)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
 
         self.clear_subscriptions()
         logger.info("事件总线已关闭")
 
 
+def _is_qobject(obj: Any) -> bool:
+    """obj 是否为 QObject（未安装 PyQt6 时总是 False）"""
+    if obj is None:
+        return False
+    try:
+        from PyQt6.QtCore import QObject
+    except ImportError:
+        return False
+    return isinstance(obj, QObject)
+
+
+def _call_in_gui_thread(handler: Callable, event: Event) -> Optional[concurrent.futures.Future]:
+    """
+    通过异步任务管理器的回调信号在界面线程中执行处理器
+
+    返回完成时带有处理结果的 Future；没有运行中的 Qt 应用时返回 None，由调用方改用线程池。
+    """
+    try:
+        from PyQt6.QtCore import QCoreApplication
+        if QCoreApplication.instance() is None:
+            return None
+        from src.shared.utils.async_manager import get_async_manager
+        manager = get_async_manager()
+        if manager.thread() is not QCoreApplication.instance().thread():
+            # 管理器不在界面线程（如首次在其他线程创建），回调信号不会进入界面线程
+            return None
+    except Exception as e:
+        logger.debug(f"界面线程不可用，同步处理器改在线程池中执行: {e}")
+        return None
+
+    future: concurrent.futures.Future = concurrent.futures.Future()
+
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(handler(event))
+        except BaseException as e:
+            future.set_exception(e)
+
+    manager.callback_signal.emit(run)
+    return future
+
+
 # 全局事件总线实例
 _global_event_bus: Optional[EventBus] = None
 
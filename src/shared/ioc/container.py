@@ -8,15 +8,28 @@
 - 构造函数注入
 - 接口到实现的映射
 - 循环依赖检测
+- 预编译的解析计划和单例快速路径
 """
 
 import inspect
 import threading
-from typing import Any, Callable, Dict, Type, TypeVar, Union, Optional, Set, get_origin, get_args
+import time
+from typing import Any, Callable, Dict, List, Tuple, Type, TypeVar, Union, Optional, Set, get_origin, get_args
 from abc import ABC, abstractmethod
 
+from src.shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
 T = TypeVar('T')
 
+# 单例缓存中“尚未创建”的标记（实例本身可能是 None）
+_MISSING = object()
+
+
+def _type_name(service_type: Any) -> str:
+    return getattr(service_type, '__name__', str(service_type))
+
 
 class LifetimeScope:
     """
@@ -80,6 +93,24 @@ class ServiceDescriptor:
             raise ValueError("Either factory or implementation_type must be provided")
 
 
+class ContainerValidationError(ValueError):
+    """冻结容器时发现依赖图问题"""
+
+    def __init__(self, problems: List[str]):
+        super().__init__("依赖图校验失败:\n" + "\n".join(problems))
+        self.problems = problems
+
+
+class ResolutionStats:
+    """单个服务类型的解析统计（耗时包含其依赖的解析）"""
+
+    __slots__ = ('count', 'total_time')
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+
+
 class Container:
     """
     依赖注入容器
@@ -93,12 +124,18 @@ class Container:
     - 提供单例和瞬态生命周期管理
     - 包含循环依赖检测机制
     - 线程安全的实例创建
+    - 每个服务第一次解析时编译解析计划：签名反射和参数类型分析只做一次，
+      计划是预先绑定了依赖获取方式的闭包；注册新的服务类型时计划失效并按需重新编译
+    - 已创建的单例走无锁快速路径（一次字典查找）
+    - freeze() 在启动时校验整个依赖图并预编译所有计划
+    - 按服务类型统计解析次数和耗时
 
     Attributes:
         _services: 服务描述符字典
         _instances: 单例实例缓存
         _lock: 线程锁
         _resolving: 正在解析的服务集合（用于循环依赖检测）
+        _plans: 已编译的解析计划
     """
     
     def __init__(self):
@@ -111,6 +148,11 @@ class Container:
         self._instances: Dict[Type, Any] = {}
         self._lock = threading.RLock()
         self._resolving: Set[Type] = set()
+        self._plans: Dict[Any, Callable[[], Any]] = {}
+        self._plan_dependencies: Dict[Any, List[Any]] = {}
+        self._frozen = False
+        self._stats: Dict[Any, ResolutionStats] = {}
+        self._stats_lock = threading.Lock()
 
     def register_singleton(
         self,
@@ -187,6 +229,7 @@ class Container:
                 lifetime=LifetimeScope.SINGLETON,
                 instance=instance
             )
+            self._invalidate_plans(service_type)
             self._services[service_type] = descriptor
             self._instances[service_type] = instance
         return self
@@ -206,13 +249,40 @@ class Container:
                 factory=factory,
                 lifetime=lifetime
             )
+            self._invalidate_plans(service_type)
             self._services[service_type] = descriptor
+            # 重新注册的单例按新的注册方式重新创建
+            self._instances.pop(service_type, None)
         return self
+
+    def _invalidate_plans(self, service_type: Any) -> None:
+        """
+        注册变化后使解析计划失效（调用方持有锁）
+
+        新的服务类型可能被其他计划作为依赖注入，全部失效；
+        替换已有注册只影响该类型自身的计划。
+        """
+        if service_type in self._services:
+            self._plans.pop(service_type, None)
+            self._plan_dependencies.pop(service_type, None)
+        else:
+            self._plans.clear()
+            self._plan_dependencies.clear()
+        if self._frozen:
+            logger.debug(f"容器冻结后注册服务: {_type_name(service_type)}")
     
     def get(self, service_type: Type[T]) -> T:
         """获取服务实例"""
-        with self._lock:
-            return self._resolve(service_type)
+        # 快速路径：已创建的单例无需加锁，只计次数（一次字典查找的耗时不计）
+        instance = self._instances.get(service_type, _MISSING)
+        if instance is _MISSING:
+            with self._lock:
+                return self._resolve(service_type)
+        stats = self._stats.get(service_type)
+        if stats is not None:
+            # 统计值允许在并发时偶尔少计，不为此加锁
+            stats.count += 1
+        return instance
     
     def try_get(self, service_type: Type[T]) -> Optional[T]:
         """尝试获取服务实例，失败时返回None"""
@@ -227,88 +297,110 @@ class Container:
     
     def _resolve(self, service_type: Type[T]) -> T:
         """解析服务实例"""
+        started = time.perf_counter()
+
         # 检查循环依赖
         if service_type in self._resolving:
             raise RuntimeError(f"Circular dependency detected for {service_type}")
         
-        # 检查是否已注册
-        if service_type not in self._services:
-            raise ValueError(f"Service {service_type} is not registered")
-        
-        descriptor = self._services[service_type]
-        
         # 如果是单例且已创建实例，直接返回
-        if descriptor.lifetime == LifetimeScope.SINGLETON:
-            if service_type in self._instances:
-                return self._instances[service_type]
-            elif descriptor.instance is not None:
-                return descriptor.instance
+        instance = self._instances.get(service_type, _MISSING)
+        if instance is not _MISSING:
+            self._record_resolution(service_type, time.perf_counter() - started)
+            return instance
+
+        plan = self._plans.get(service_type)
+        if plan is None:
+            plan = self._compile_plan(service_type)
+        descriptor = self._services[service_type]
         
         # 标记正在解析
         self._resolving.add(service_type)
         
         try:
             # 创建实例
-            if descriptor.factory:
-                instance = self._create_from_factory(descriptor.factory)
-            else:
-                instance = self._create_from_type(descriptor.implementation_type)
+            instance = plan()
             
             # 如果是单例，缓存实例
             if descriptor.lifetime == LifetimeScope.SINGLETON:
                 self._instances[service_type] = instance
             
+            self._record_resolution(service_type, time.perf_counter() - started)
             return instance
             
         finally:
             # 移除解析标记
             self._resolving.discard(service_type)
-    
-    def _create_from_factory(self, factory: Callable) -> Any:
-        """从工厂函数创建实例"""
+
+    def _compile_plan(self, service_type: Any) -> Callable[[], Any]:
+        """编译解析计划（调用方持有锁）"""
+        # 检查是否已注册
+        if service_type not in self._services:
+            raise ValueError(f"Service {service_type} is not registered")
+
+        descriptor = self._services[service_type]
+        if descriptor.instance is not None:
+            instance = descriptor.instance
+            plan, dependencies = (lambda: instance), []
+        elif descriptor.factory:
+            plan, dependencies = self._compile_factory(descriptor.factory)
+        else:
+            plan, dependencies = self._compile_type(descriptor.implementation_type)
+
+        self._plans[service_type] = plan
+        self._plan_dependencies[service_type] = [key for _, key in dependencies]
+        return plan
+
+    def _compile_factory(self, factory: Callable) -> Tuple[Callable[[], Any], List[Tuple[str, Any]]]:
+        """为工厂函数编译计划：有类型注解且已注册的参数自动注入"""
         # 检查工厂函数的参数
         sig = inspect.signature(factory)
-        
+        dependencies = []
+        for param_name, param in sig.parameters.items():
+            if param.annotation != inspect.Parameter.empty:
+                key = self._dependency_key(param.annotation)
+                if key is not None:
+                    dependencies.append((param_name, key))
+
         if not sig.parameters:
-            # 无参数工厂函数
-            return factory()
-        else:
-            # 有参数工厂函数，注入依赖
-            kwargs = {}
-            for param_name, param in sig.parameters.items():
-                if param.annotation != inspect.Parameter.empty:
-                    resolved_value = self._resolve_parameter(param.annotation)
-                    if resolved_value is not None:
-                        kwargs[param_name] = resolved_value
-            return factory(**kwargs)
-    
-    def _create_from_type(self, implementation_type: Type) -> Any:
-        """从类型创建实例"""
+            # 无参数工厂函数直接作为计划
+            return factory, dependencies
+        return self._bind(factory, dependencies), dependencies
+
+    def _compile_type(self, implementation_type: Type) -> Tuple[Callable[[], Any], List[Tuple[str, Any]]]:
+        """为实现类型编译计划：构造函数中有类型注解且已注册的参数自动注入"""
         # 获取构造函数签名
         sig = inspect.signature(implementation_type.__init__)
-        
-        # 准备构造函数参数
-        kwargs = {}
+        dependencies = []
         for param_name, param in sig.parameters.items():
             if param_name == 'self':
                 continue
-            
+            # 有类型注解，尝试解析依赖；其余参数使用默认值
             if param.annotation != inspect.Parameter.empty:
-                # 有类型注解，尝试解析依赖
-                resolved_value = self._resolve_parameter(param.annotation)
-                if resolved_value is not None:
-                    kwargs[param_name] = resolved_value
-            elif param.default != inspect.Parameter.empty:
-                # 有默认值，使用默认值
-                kwargs[param_name] = param.default
-            else:
-                # 无类型注解且无默认值，跳过
-                continue
-        
-        return implementation_type(**kwargs)
+                key = self._dependency_key(param.annotation)
+                if key is not None:
+                    dependencies.append((param_name, key))
+        return self._bind(implementation_type, dependencies), dependencies
 
-    def _resolve_parameter(self, annotation: Type) -> Any:
-        """解析参数类型"""
+    def _bind(self, target: Callable, dependencies: List[Tuple[str, Any]]) -> Callable[[], Any]:
+        """生成预先绑定依赖的创建函数；依赖解析失败或为 None 时不传该参数"""
+        resolve = self._resolve
+
+        def plan():
+            kwargs = {}
+            for param_name, key in dependencies:
+                try:
+                    value = resolve(key)
+                except Exception:
+                    continue
+                if value is not None:
+                    kwargs[param_name] = value
+            return target(**kwargs)
+
+        return plan
+
+    def _dependency_key(self, annotation: Any) -> Any:
+        """参数注解对应的已注册服务类型；Optional[T] 取 T，未注册时返回 None"""
         try:
             # 处理Optional类型
             origin = get_origin(annotation)
@@ -317,23 +409,120 @@ class Container:
                 # Optional[T] 等价于 Union[T, None]
                 if len(args) == 2 and type(None) in args:
                     # 获取非None的类型
-                    actual_type = args[0] if args[1] is type(None) else args[1]
-                    # 如果实际类型已注册，则解析它；否则返回None
-                    if self.is_registered(actual_type):
-                        return self._resolve(actual_type)
-                    else:
-                        return None
+                    annotation = args[0] if args[1] is type(None) else args[1]
 
             # 处理普通类型
-            if self.is_registered(annotation):
-                return self._resolve(annotation)
-            else:
-                return None
+            return annotation if self.is_registered(annotation) else None
 
         except Exception:
-            # 如果解析失败，返回None
+            # 如果解析失败，不注入
             return None
 
+    # ------------------------------------------------------------------
+    # 冻结与统计
+    # ------------------------------------------------------------------
+
+    def freeze(self, strict: bool = True) -> List[str]:
+        """
+        校验依赖图并预编译所有解析计划（启动时在注册完成后调用）
+
+        检查实现类型构造函数中无法注入、也没有默认值的参数，以及依赖环。
+        工厂函数内部通过容器获取的依赖无法静态分析，不在校验范围内。
+        冻结后仍允许注册（插件管理器、热重载的设置等在启动后注册），新注册使相关计划失效。
+
+        Args:
+            strict: 发现问题时抛出 ContainerValidationError；否则只记录警告
+
+        Returns:
+            List[str]: 发现的问题
+        """
+        started = time.perf_counter()
+        problems: List[str] = []
+        with self._lock:
+            for service_type, descriptor in list(self._services.items()):
+                try:
+                    if service_type not in self._plans:
+                        self._compile_plan(service_type)
+                except Exception as e:
+                    problems.append(f"{_type_name(service_type)}: 无法编译解析计划: {e}")
+                    continue
+                if descriptor.instance is None and not descriptor.factory:
+                    problems.extend(self._find_missing_parameters(service_type, descriptor.implementation_type))
+            problems.extend(self._find_cycles())
+            self._frozen = True
+
+        elapsed = (time.perf_counter() - started) * 1000
+        if problems:
+            for problem in problems:
+                logger.warning(f"依赖图问题: {problem}")
+            if strict:
+                raise ContainerValidationError(problems)
+        logger.info(f"容器已冻结: {len(self._plans)} 个解析计划, 耗时 {elapsed:.1f}ms")
+        return problems
+
+    @property
+    def is_frozen(self) -> bool:
+        return self._frozen
+
+    def _find_missing_parameters(self, service_type: Any, implementation_type: Type) -> List[str]:
+        """构造函数中既无法注入也没有默认值的参数"""
+        problems = []
+        injected = {name for name, _ in self._dependencies_of(implementation_type)}
+        for param_name, param in inspect.signature(implementation_type.__init__).parameters.items():
+            if param_name == 'self' or param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                continue
+            if param.default is inspect.Parameter.empty and param_name not in injected:
+                problems.append(f"{_type_name(service_type)}: 参数 '{param_name}' 无法注入且没有默认值")
+        return problems
+
+    def _dependencies_of(self, implementation_type: Type) -> List[Tuple[str, Any]]:
+        return self._compile_type(implementation_type)[1]
+
+    def _find_cycles(self) -> List[str]:
+        """在编译出的依赖关系中查找依赖环"""
+        problems = []
+        visiting: Set[Any] = set()
+        visited: Set[Any] = set()
+
+        def visit(node: Any, path: List[Any]) -> None:
+            if node in visited:
+                return
+            if node in visiting:
+                cycle = path[path.index(node):] + [node]
+                problems.append("依赖环: " + " -> ".join(_type_name(n) for n in cycle))
+                return
+            visiting.add(node)
+            for dependency in self._plan_dependencies.get(node, ()):
+                visit(dependency, path + [node])
+            visiting.discard(node)
+            visited.add(node)
+
+        for service_type in list(self._plan_dependencies):
+            visit(service_type, [])
+        return problems
+
+    def _record_resolution(self, service_type: Any, elapsed: float) -> None:
+        with self._stats_lock:
+            stats = self._stats.get(service_type)
+            if stats is None:
+                stats = self._stats[service_type] = ResolutionStats()
+            stats.count += 1
+            stats.total_time += elapsed
+
+    def get_resolution_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """按服务类型的解析次数和耗时，按总耗时降序"""
+        with self._stats_lock:
+            items = [(key, stats.count, stats.total_time) for key, stats in self._stats.items()]
+        items.sort(key=lambda item: item[2], reverse=True)
+        return {
+            _type_name(key): {
+                'count': count,
+                'total_ms': total_time * 1000,
+                'average_us': total_time / count * 1e6 if count else 0.0,
+            }
+            for key, count, total_time in items
+        }
+
     def create_scope(self) -> 'ScopedContainer':
         """创建作用域容器"""
         return ScopedContainer(self)
@@ -352,6 +541,8 @@ class Container:
             self._instances.clear()
             self._services.clear()
             self._resolving.clear()
+            self._plans.clear()
+            self._plan_dependencies.clear()
 
 
 class ScopedContainer:
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+指标注册表
+
+进程内的耗时、计数和状态指标统一记录在这里，读取统计时不再对样本排序：
+- Histogram：对数分桶直方图（HDR 风格）。数值按 2 的幂分段，每段再均分为
+  2^HISTOGRAM_SUB_BUCKET_BITS 个子桶，相对误差不超过 1/2^HISTOGRAM_SUB_BUCKET_BITS。
+  记录为 O(1)（一次位运算求桶号加一次字典自增），分位数按桶累加求出，与样本数无关
+- 每个直方图按 WINDOW_SLICE_SECONDS 切分时间片，保留最近 MAX_WINDOW_SECONDS 的时间片，
+  另有整个会话的累计直方图：1 分钟、10 分钟和会话三个窗口的汇总不会因为样本过多而丢数据
+- Counter：单调计数，同样按时间片保留窗口内的增量；Gauge：最近一次设置的值
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 每个 2 的幂区间内的子桶位数（5 位即 32 个子桶，相对误差约 3%）
+HISTOGRAM_SUB_BUCKET_BITS = 5
+# 耗时直方图以微秒为最小单位
+LATENCY_SCALE = 1_000_000
+
+# 时间片长度与保留的最长窗口（秒）
+WINDOW_SLICE_SECONDS = 10.0
+MAX_WINDOW_SECONDS = 600.0
+
+# 标准汇总窗口：名称 -> 秒数（None 表示整个会话）
+WINDOW_1_MINUTE = "1m"
+WINDOW_10_MINUTES = "10m"
+WINDOW_SESSION = "session"
+STANDARD_WINDOWS: Dict[str, Optional[float]] = {
+    WINDOW_1_MINUTE: 60.0,
+    WINDOW_10_MINUTES: 600.0,
+    WINDOW_SESSION: None,
+}
+
+_SUB_BUCKET_COUNT = 1 << HISTOGRAM_SUB_BUCKET_BITS
+
+
+def _bucket_index(value: int) -> int:
+    """非负整数所在的桶号；小于子桶数的值各占一个桶（精确）"""
+    if value < _SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - 1 - HISTOGRAM_SUB_BUCKET_BITS
+    return ((shift + 1) << HISTOGRAM_SUB_BUCKET_BITS) + (value >> shift) - _SUB_BUCKET_COUNT
+
+
+def _bucket_bounds(index: int) -> tuple:
+    """桶号对应的整数区间 [low, high)"""
+    if index < _SUB_BUCKET_COUNT:
+        return index, index + 1
+    shift = (index >> HISTOGRAM_SUB_BUCKET_BITS) - 1
+    mantissa = (index & (_SUB_BUCKET_COUNT - 1)) + _SUB_BUCKET_COUNT
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class Histogram:
+    """
+    对数分桶直方图（非线程安全，由所属指标加锁）
+
+    Args:
+        scale: 记录值乘以该系数后取整分桶（耗时按秒记录、按微秒分桶时为 1e6）
+    """
+
+    __slots__ = ('scale', 'buckets', 'count', 'errors', 'total', 'min', 'max')
+
+    def __init__(self, scale: float = 1):
+        self.scale = scale
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, value: float, success: bool = True) -> None:
+        index = _bucket_index(max(0, int(value * self.scale)))
+        buckets = self.buckets
+        buckets[index] = buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if not success:
+            self.errors += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "Histogram") -> None:
+        buckets = self.buckets
+        for index, count in other.buckets.items():
+            buckets[index] = buckets.get(index, 0) + count
+        self.count += other.count
+        self.errors += other.errors
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentiles(self, quantiles: Iterable[float]) -> List[float]:
+        """按桶累加求分位数（取桶中点，并限制在实际最小/最大值之间）"""
+        quantiles = list(quantiles)
+        if not self.count:
+            return [0.0] * len(quantiles)
+        ranks = sorted((max(1, int(q * self.count + 0.5)), position) for position, q in enumerate(quantiles))
+        results = [0.0] * len(quantiles)
+        seen = 0
+        rank_index = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            while rank_index < len(ranks) and ranks[rank_index][0] <= seen:
+                low, high = _bucket_bounds(index)
+                value = (low + high - 1) / 2 / self.scale
+                results[ranks[rank_index][1]] = min(max(value, self.min), self.max)
+                rank_index += 1
+            if rank_index == len(ranks):
+                break
+        return results
+
+    def percentile(self, quantile: float) -> float:
+        return self.percentiles([quantile])[0]
+
+    def summary(self) -> Dict[str, Any]:
+        p50, p95, p99 = self.percentiles((0.5, 0.95, 0.99))
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'success_rate': (self.count - self.errors) / self.count if self.count else 1.0,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min or 0.0,
+            'max': self.max or 0.0,
+            'p50': p50,
+            'p95': p95,
+            'p99': p99,
+        }
+
+
+class _Sliced:
+    """按时间片保留最近窗口数据的基类（调用方持有锁）"""
+
+    def __init__(self):
+        self._slices: deque = deque()
+
+    def _current_slice(self, now: float):
+        slice_start = now - now % WINDOW_SLICE_SECONDS
+        if not self._slices or self._slices[-1][0] != slice_start:
+            cutoff = slice_start - MAX_WINDOW_SECONDS
+            while self._slices and self._slices[0][0] <= cutoff:
+                self._slices.popleft()
+            self._slices.append([slice_start, self._new_slice()])
+        return self._slices[-1]
+
+    def _window_slices(self, seconds: float, now: float) -> List[Any]:
+        """覆盖最近 seconds 秒的时间片（按时间片对齐，最多多出一个时间片）"""
+        cutoff = now - min(seconds, MAX_WINDOW_SECONDS) - WINDOW_SLICE_SECONDS
+        return [value for slice_start, value in self._slices if slice_start > cutoff]
+
+    def _new_slice(self) -> Any:
+        raise NotImplementedError
+
+
+class LatencyMetric(_Sliced):
+    """带时间窗口的直方图指标"""
+
+    def __init__(self, name: str, scale: float = LATENCY_SCALE):
+        super().__init__()
+        self.name = name
+        self.scale = scale
+        self.session = Histogram(scale)
+        self._lock = threading.Lock()
+
+    def _new_slice(self) -> Histogram:
+        return Histogram(self.scale)
+
+    def record(self, value: float, success: bool = True) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._current_slice(now)[1].record(value, success)
+            self.session.record(value, success)
+
+    def window(self, seconds: Optional[float] = None) -> Histogram:
+        """窗口内的合并直方图（seconds 为 None 表示整个会话）"""
+        merged = Histogram(self.scale)
+        with self._lock:
+            if seconds is None:
+                merged.merge(self.session)
+            else:
+                for histogram in self._window_slices(seconds, time.monotonic()):
+                    merged.merge(histogram)
+        return merged
+
+    def reset(self) -> None:
+        with self._lock:
+            self._slices.clear()
+            self.session = Histogram(self.scale)
+
+
+class Counter(_Sliced):
+    """单调计数器"""
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def _new_slice(self) -> int:
+        return 0
+
+    def increment(self, amount: int = 1) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._current_slice(now)[1] += amount
+            self.value += amount
+
+    def window(self, seconds: Optional[float] = None) -> int:
+        """窗口内的增量（seconds 为 None 表示整个会话）"""
+        with self._lock:
+            if seconds is None:
+                return self.value
+            return sum(self._window_slices(seconds, time.monotonic()))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._slices.clear()
+            self.value = 0
+
+
+class Gauge:
+    """瞬时值"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value: Optional[float] = None
+        self.updated_at: Optional[float] = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+        self.updated_at = time.time()
+
+    def reset(self) -> None:
+        self.value = None
+        self.updated_at = None
+
+
+class MetricsRegistry:
+    """按名称管理直方图、计数器和瞬时值"""
+
+    def __init__(self):
+        self._histograms: Dict[str, LatencyMetric] = {}
+        self._counters: Dict[str, Counter] = {}
+        self._gauges: Dict[str, Gauge] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, scale: float = LATENCY_SCALE) -> LatencyMetric:
+        """获取或创建直方图（默认按秒记录耗时）"""
+        metric = self._histograms.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._histograms.get(name)
+                if metric is None:
+                    metric = self._histograms[name] = LatencyMetric(name, scale)
+        return metric
+
+    def counter(self, name: str) -> Counter:
+        metric = self._counters.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._counters.setdefault(name, Counter(name))
+        return metric
+
+    def gauge(self, name: str) -> Gauge:
+        metric = self._gauges.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._gauges.setdefault(name, Gauge(name))
+        return metric
+
+    def record_latency(self, name: str, seconds: float, success: bool = True) -> None:
+        self.histogram(name).record(seconds, success)
+
+    def histogram_names(self) -> List[str]:
+        return list(self._histograms)
+
+    def has_histogram(self, name: str) -> bool:
+        return name in self._histograms
+
+    def summarize(self, name: str, seconds: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """单个直方图在窗口内的汇总；不存在或窗口内没有样本时返回 None"""
+        metric = self._histograms.get(name)
+        if metric is None:
+            return None
+        histogram = metric.window(seconds)
+        return histogram.summary() if histogram.count else None
+
+    def snapshot(self, windows: Optional[Dict[str, Optional[float]]] = None) -> Dict[str, Any]:
+        """所有指标在各标准窗口（1 分钟、10 分钟、会话）内的汇总"""
+        windows = windows or STANDARD_WINDOWS
+        with self._lock:
+            histograms = list(self._histograms.values())
+            counters = list(self._counters.values())
+            gauges = list(self._gauges.values())
+        return {
+            'histograms': {
+                metric.name: {label: metric.window(seconds).summary() for label, seconds in windows.items()}
+                for metric in histograms
+            },
+            'counters': {
+                metric.name: {label: metric.window(seconds) for label, seconds in windows.items()}
+                for metric in counters
+            },
+            'gauges': {metric.name: metric.value for metric in gauges},
+        }
+
+    def reset(self, names: Optional[Iterable[str]] = None) -> None:
+        """清空指定名称（默认全部）的指标数据"""
+        with self._lock:
+            metrics = [*self._histograms.values(), *self._counters.values(), *self._gauges.values()]
+        selected = None if names is None else set(names)
+        for metric in metrics:
+            if selected is None or metric.name in selected:
+                metric.reset()
+
+
+_metrics_registry: Optional[MetricsRegistry] = None
+_metrics_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """获取全局指标注册表"""
+    global _metrics_registry
+    if _metrics_registry is None:
+        with _metrics_registry_lock:
+            if _metrics_registry is None:
+                _metrics_registry = MetricsRegistry()
+    return _metrics_registry
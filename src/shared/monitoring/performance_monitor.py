@@ -13,12 +13,14 @@ import threading
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from collections import deque, defaultdict
-
+from src.shared.monitoring.metrics import MAX_WINDOW_SECONDS, MetricsRegistry, get_metrics_registry
 from src.shared.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 指标注册表中的名称前缀，避免与 UnifiedPerformanceManager 等按操作名记录的指标同名
+PERF_METRIC_PREFIX = "perf."
+
 
 @dataclass
 class PerformanceMetric:
@@ -44,6 +46,8 @@ class PerformanceReport:
     max_memory_usage: int
     success_rate: float
     error_count: int
+    p50_duration: float = 0.0
+    p99_duration: float = 0.0
 
 
 class PerformanceMonitor:
@@ -55,10 +59,14 @@ class PerformanceMonitor:
     2. 内存使用情况
     3. 渲染性能
     4. 用户操作响应时间
+
+    耗时和内存增长写入指标注册表的直方图（名称为 perf.操作类型），报告直接读取直方图汇总，
+    不再保留和排序逐条样本。
     """
     
-    def __init__(self):
-        self._metrics: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self._registry = registry or get_metrics_registry()
+        self._operation_types: set = set()
         self._active_operations: Dict[str, float] = {}  # 操作ID -> 开始时间
         self._lock = threading.RLock()
         
@@ -120,7 +128,11 @@ class PerformanceMonitor:
                 metric.metadata['operation_id'] = operation_id
                 
                 # 存储指标
-                self._metrics[operation_type].append(metric)
+                self._registry.record_latency(_duration_metric_name(operation_type), duration, success)
+                self._registry.histogram(_memory_metric_name(operation_type), scale=1).record(
+                    current_memory - self._baseline_memory
+                )
+                self._operation_types.add(operation_type)
                 
                 # 检查性能阈值
                 self._check_performance_threshold(operation_type, metric)
@@ -171,46 +183,35 @@ class PerformanceMonitor:
             logger.error(f"记录性能问题失败: {e}")
     
     def get_performance_report(self, operation_type: str, time_range: Optional[timedelta] = None) -> Optional[PerformanceReport]:
-        """获取性能报告"""
+        """
+        获取性能报告
+
+        time_range 不超过10分钟时按时间窗口统计，更长或未指定时统计整个会话。
+        """
         try:
-            with self._lock:
-                metrics = self._metrics.get(operation_type, deque())
-                
-                if not metrics:
-                    return None
-                
-                # 过滤时间范围
-                if time_range:
-                    cutoff_time = datetime.now() - time_range
-                    filtered_metrics = [m for m in metrics if m.timestamp >= cutoff_time]
-                else:
-                    filtered_metrics = list(metrics)
-                
-                if not filtered_metrics:
-                    return None
-                
-                # 计算统计信息
-                durations = [m.duration for m in filtered_metrics]
-                memory_usages = [m.memory_after - m.memory_before for m in filtered_metrics]
-                successful_ops = [m for m in filtered_metrics if m.metadata.get('success', True)]
-                
-                # 计算百分位数
-                sorted_durations = sorted(durations)
-                p95_index = int(len(sorted_durations) * 0.95)
-                p95_duration = sorted_durations[p95_index] if sorted_durations else 0
-                
-                return PerformanceReport(
-                    operation_type=operation_type,
-                    total_operations=len(filtered_metrics),
-                    avg_duration=sum(durations) / len(durations),
-                    min_duration=min(durations),
-                    max_duration=max(durations),
-                    p95_duration=p95_duration,
-                    avg_memory_usage=sum(memory_usages) / len(memory_usages),
-                    max_memory_usage=max(memory_usages),
-                    success_rate=len(successful_ops) / len(filtered_metrics),
-                    error_count=len(filtered_metrics) - len(successful_ops)
-                )
+            seconds = None
+            if time_range is not None and time_range.total_seconds() <= MAX_WINDOW_SECONDS:
+                seconds = time_range.total_seconds()
+
+            durations = self._registry.summarize(_duration_metric_name(operation_type), seconds)
+            if not durations:
+                return None
+            memory = self._registry.summarize(_memory_metric_name(operation_type), seconds) or {}
+
+            return PerformanceReport(
+                operation_type=operation_type,
+                total_operations=durations['count'],
+                avg_duration=durations['mean'],
+                min_duration=durations['min'],
+                max_duration=durations['max'],
+                p95_duration=durations['p95'],
+                avg_memory_usage=int(memory.get('mean', 0)),
+                max_memory_usage=int(memory.get('max', 0)),
+                success_rate=durations['success_rate'],
+                error_count=durations['errors'],
+                p50_duration=durations['p50'],
+                p99_duration=durations['p99']
+            )
                 
         except Exception as e:
             logger.error(f"生成性能报告失败: {e}")
@@ -220,7 +221,7 @@ class PerformanceMonitor:
         """获取所有操作类型的性能报告"""
         reports = {}
         
-        for operation_type in self._metrics.keys():
+        for operation_type in list(self._operation_types):
             report = self.get_performance_report(operation_type, time_range)
             if report:
                 reports[operation_type] = report
@@ -232,11 +233,16 @@ class PerformanceMonitor:
         try:
             with self._lock:
                 if operation_type:
-                    if operation_type in self._metrics:
-                        self._metrics[operation_type].clear()
+                    if operation_type in self._operation_types:
+                        self._registry.reset([_duration_metric_name(operation_type), _memory_metric_name(operation_type)])
                         logger.info(f"已清理性能指标: {operation_type}")
                 else:
-                    self._metrics.clear()
+                    names = [
+                        name for operation in self._operation_types
+                        for name in (_duration_metric_name(operation), _memory_metric_name(operation))
+                    ]
+                    self._registry.reset(names)
+                    self._operation_types.clear()
                     logger.info("已清理所有性能指标")
         
         except Exception as e:
@@ -257,6 +263,14 @@ class PerformanceMonitor:
             return {}
 
 
+def _duration_metric_name(operation_type: str) -> str:
+    return f"{PERF_METRIC_PREFIX}{operation_type}"
+
+
+def _memory_metric_name(operation_type: str) -> str:
+    return f"{PERF_METRIC_PREFIX}{operation_type}.memory_growth"
+
+
 # 全局性能监控器实例
 _performance_monitor = None
 
@@ -8,6 +8,7 @@
 主要模块：
 - base_utils: 工具类基础架构和统一接口
 - unified_performance: 统一性能监控和缓存管理
+- tracing: 同步/异步调用追踪与 Chrome trace 导出
 - unified_error_handler: 统一错误处理机制
 - text_utils: 文本处理和分析工具
 - file_utils: 文件和目录操作工具
@@ -36,6 +37,11 @@ try:
         performance_monitor
     )
 
+    # 调用追踪
+    from .tracing import (
+        Tracer, Span, get_tracer, traced, trace_span, current_span, set_span_attributes
+    )
+
     # 统一错误处理
     from .unified_error_handler import (
         UnifiedErrorHandler, ErrorSeverity, ErrorCategory, ErrorInfo,
@@ -104,6 +110,15 @@ try:
         "set_performance_manager",
         "performance_monitor",
 
+        # 调用追踪
+        "Tracer",
+        "Span",
+        "get_tracer",
+        "traced",
+        "trace_span",
+        "current_span",
+        "set_span_attributes",
+
         # 统一错误处理
         "UnifiedErrorHandler",
         "ErrorSeverity",
@@ -4,7 +4,7 @@
 异步操作管理器
 
 提供统一的异步操作管理，包括：
-- 统一的异步任务执行
+- 统一的异步任务执行（所有协程运行在唯一的应用事件循环上）
 - 线程安全的回调处理
 - 任务生命周期管理
 - 错误处理和重试机制
@@ -18,17 +18,68 @@ from functools import wraps
 from PyQt6.QtCore import QObject, QTimer, pyqtSignal
 
 from src.shared.utils.logger import get_logger
+from src.shared.utils.event_loop import get_app_event_loop
 # 移除ensure_main_thread导入，使用Qt信号槽机制
 
 logger = get_logger(__name__)
 
 
+class AsyncTaskHandle(QObject):
+    """
+    异步任务句柄
+
+    包装提交到应用事件循环的协程，完成后通过Qt信号在句柄所在线程（通常是界面线程）通知结果。
+    完成回调在 start() 中才挂到 Future 上：先连接 finished/failed，再调用 start()，
+    很快完成的协程也不会在连接之前发出信号。
+    """
+
+    finished = pyqtSignal(object)  # 结果
+    failed = pyqtSignal(object)  # 异常
+
+    def __init__(self, future: concurrent.futures.Future, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._future = future
+        self._started = False
+
+    def start(self) -> 'AsyncTaskHandle':
+        """开始转发结果（已完成的 Future 会立即在当前线程发出信号）"""
+        if not self._started:
+            self._started = True
+            self._future.add_done_callback(self._on_done)
+        return self
+
+    def _on_done(self, future: concurrent.futures.Future) -> None:
+        # 在事件循环线程中调用；信号以排队方式投递到接收方所在线程
+        try:
+            if future.cancelled():
+                self.failed.emit(asyncio.CancelledError())
+                return
+            error = future.exception()
+            if error is not None:
+                self.failed.emit(error)
+            else:
+                self.finished.emit(future.result())
+        except RuntimeError as e:
+            # 句柄已随父对象销毁（如对话框关闭），结果不再需要
+            logger.debug(f"异步任务句柄已销毁，丢弃结果: {e}")
+
+    @property
+    def future(self) -> concurrent.futures.Future:
+        return self._future
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def cancel(self) -> bool:
+        return self._future.cancel()
+
+
 class AsyncTaskManager(QObject):
     """
     异步任务管理器
     
     统一管理应用程序中的异步操作，提供：
-    - 任务执行和生命周期管理
+    - 任务执行和生命周期管理（协程提交到应用事件循环，不再每个任务新建事件循环）
     - 线程安全的回调处理
     - 错误处理和重试机制
     - 资源清理和任务取消
@@ -43,16 +94,13 @@ class AsyncTaskManager(QObject):
     def __init__(self, max_workers: int = 4):
         """
         初始化异步任务管理器
-        
+
         Args:
-            max_workers: 最大工作线程数
+            max_workers: 保留参数（协程统一在应用事件循环上执行，不再占用工作线程）
         """
         super().__init__()
         self.max_workers = max_workers
-        self._thread_pool = concurrent.futures.ThreadPoolExecutor(
-            max_workers=max_workers,
-            thread_name_prefix="AsyncTask"
-        )
+        self._event_loop = get_app_event_loop()
         self._active_tasks: Set[str] = set()
         self._task_futures: Dict[str, concurrent.futures.Future] = {}
         self._lock = threading.RLock()
@@ -60,7 +108,7 @@ class AsyncTaskManager(QObject):
         # 连接回调信号
         self.callback_signal.connect(self._execute_callback)
 
-        logger.info(f"异步任务管理器初始化完成，最大工作线程数: {max_workers}")
+        logger.info("异步任务管理器初始化完成，使用应用事件循环")
 
     def _execute_callback(self, callback_func):
         """
@@ -106,64 +154,99 @@ class AsyncTaskManager(QObject):
             
             self._active_tasks.add(task_id)
         
-        def run_in_thread():
-            """在线程中运行异步协程"""
+        async def run_task():
+            """在应用事件循环中运行协程"""
+            # 发送任务开始信号
+            self.task_started.emit(task_id)
+
+            # 执行协程（带超时）
+            if timeout:
+                return await asyncio.wait_for(coro, timeout=timeout)
+            return await coro
+
+        def on_done(future: concurrent.futures.Future):
+            """任务结束处理（在事件循环线程中调用）"""
             try:
-                # 创建新的事件循环
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
-                try:
-                    # 发送任务开始信号
-                    self.task_started.emit(task_id)
-                    
-                    # 执行协程（带超时）
-                    if timeout:
-                        result = loop.run_until_complete(
-                            asyncio.wait_for(coro, timeout=timeout)
-                        )
-                    else:
-                        result = loop.run_until_complete(coro)
-                    
+                if future.cancelled():
+                    logger.debug(f"异步任务已取消: {task_id}")
+                    return
+
+                error = future.exception()
+                if error is None:
+                    result = future.result()
+
                     # 在主线程中执行成功回调
                     if success_callback:
                         # 使用Qt信号槽机制安全切换到主线程
                         self.callback_signal.emit(lambda: success_callback(result))
-                    
+
                     # 发送任务完成信号
                     self.task_completed.emit(task_id, result)
-                    
-                    return result
-                    
-                finally:
-                    loop.close()
-                    
-            except Exception as e:
-                logger.error(f"异步任务执行失败: {task_id}, {e}")
-                
-                # 在主线程中执行错误回调
-                if error_callback:
-                    # 使用Qt信号槽机制安全切换到主线程
-                    self.callback_signal.emit(lambda: error_callback(e))
-                
-                # 发送任务失败信号
-                self.task_failed.emit(task_id, e)
-                
-                raise
-                
+                else:
+                    logger.error(f"异步任务执行失败: {task_id}, {error}")
+
+                    # 在主线程中执行错误回调
+                    if error_callback:
+                        # 使用Qt信号槽机制安全切换到主线程
+                        self.callback_signal.emit(lambda: error_callback(error))
+
+                    # 发送任务失败信号
+                    self.task_failed.emit(task_id, error)
+
             finally:
                 # 清理任务
                 with self._lock:
                     self._active_tasks.discard(task_id)
                     self._task_futures.pop(task_id, None)
-        
-        # 提交任务到线程池
-        future = self._thread_pool.submit(run_in_thread)
-        self._task_futures[task_id] = future
-        
+
+        # 提交任务到应用事件循环
+        try:
+            future = self._event_loop.submit(run_task())
+        except Exception:
+            with self._lock:
+                self._active_tasks.discard(task_id)
+            coro.close()
+            raise
+
+        with self._lock:
+            if not future.done():
+                self._task_futures[task_id] = future
+        future.add_done_callback(on_done)
+
         logger.debug(f"异步任务已提交: {task_id}")
         return task_id
-    
+
+    def submit(
+        self,
+        coro: Coroutine,
+        on_finished: Optional[Callable[[Any], None]] = None,
+        on_failed: Optional[Callable[[BaseException], None]] = None,
+        parent: Optional[QObject] = None
+    ) -> AsyncTaskHandle:
+        """
+        提交协程并返回已开始转发结果的任务句柄
+
+        回调在连接到句柄信号之后才开始转发，由Qt排队投递到回调所属对象（或调用方）所在线程。
+        需要自行连接信号时不传回调，连接后调用 handle.start()。
+
+        Args:
+            coro: 要执行的协程
+            on_finished: 成功回调，参数为协程结果
+            on_failed: 失败回调，参数为异常（取消时为 CancelledError）
+            parent: 句柄的父对象（决定其生命周期）
+
+        Returns:
+            AsyncTaskHandle: 任务句柄
+        """
+        handle = AsyncTaskHandle(self._event_loop.submit(coro), parent)
+        if on_finished is not None:
+            handle.finished.connect(on_finished)
+        if on_failed is not None:
+            handle.failed.connect(on_failed)
+        if on_finished is not None or on_failed is not None:
+            handle.start()
+        return handle
+
     def execute_delayed(
         self,
         func: Callable,
@@ -204,6 +287,7 @@ class AsyncTaskManager(QObject):
             
             future = self._task_futures.get(task_id)
             if future and not future.done():
+                # 取消会传递到事件循环中正在运行的协程
                 cancelled = future.cancel()
                 if cancelled:
                     self._active_tasks.discard(task_id)
@@ -257,12 +341,9 @@ class AsyncTaskManager(QObject):
         清理资源
         """
         try:
-            # 取消所有任务
+            # 取消所有任务（应用事件循环由应用退出流程统一停止）
             self.cancel_all_tasks()
             
-            # 关闭线程池
-            self._thread_pool.shutdown(wait=False)
-            
             logger.info("异步任务管理器已清理")
             
         except Exception as e:
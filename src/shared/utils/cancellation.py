@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+协作式取消
+
+CancellationToken 在调用链中逐层传递，由执行方在循环和阶段之间主动检查：
+- 可以带截止时间（单调时钟），超过截止时间视为取消
+- cancel() 可从任意线程调用
+- 子令牌继承父令牌的取消状态，可设置更早的截止时间
+- 提供给 SQLite 进度回调等只接受无参函数的接口时，直接传 token.is_cancelled
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class OperationCancelled(Exception):
+    """操作被取消或超过截止时间"""
+
+    def __init__(self, message: str = "操作已取消", timed_out: bool = False):
+        super().__init__(message)
+        self.timed_out = timed_out
+
+
+class CancellationToken:
+    """可带截止时间的取消令牌（线程安全）"""
+
+    def __init__(self, timeout: Optional[float] = None, parent: Optional["CancellationToken"] = None):
+        self.parent = parent
+        self.deadline: Optional[float] = None
+        if timeout is not None:
+            self.deadline = time.monotonic() + timeout
+        if parent is not None and parent.deadline is not None:
+            self.deadline = parent.deadline if self.deadline is None else min(self.deadline, parent.deadline)
+        self._cancelled = threading.Event()
+
+    def child(self, timeout: Optional[float] = None) -> "CancellationToken":
+        """创建子令牌：父令牌取消时一同取消，可设置更早的截止时间"""
+        return CancellationToken(timeout, parent=self)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """是否被显式取消（含父令牌）"""
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    @property
+    def timed_out(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def is_cancelled(self) -> bool:
+        """被取消或已超过截止时间"""
+        return self.cancelled or self.timed_out
+
+    def remaining(self) -> Optional[float]:
+        """距截止时间的剩余秒数（没有截止时间时返回 None）"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise OperationCancelled()
+        if self.timed_out:
+            raise OperationCancelled("操作超时", timed_out=True)
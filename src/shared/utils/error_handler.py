@@ -250,34 +250,19 @@ class ErrorHandler(QObject):
                 user_data={'original_error': error}
             )
 
-            # 异步执行恢复（在后台线程中）
-            import threading
-            import asyncio
-
-            def recovery_thread():
-                try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-
-                    async def perform_recovery():
-                        result = await self.recovery_system.recover_from_error(error_context)
-                        return result
-
-                    result = loop.run_until_complete(perform_recovery())
-                    loop.close()
-
-                    # 在主线程中处理结果
-                    from PyQt6.QtCore import QTimer
-                    QTimer.singleShot(0, lambda: self._handle_recovery_result(result, error, context))
-
-                except Exception as e:
-                    logger.error(f"智能恢复线程异常: {e}")
-                    # 恢复失败，显示错误对话框
-                    QTimer.singleShot(0, lambda: self._show_error_dialog(error, context))
-
-            # 启动恢复线程
-            thread = threading.Thread(target=recovery_thread, daemon=True)
-            thread.start()
+            # 异步执行恢复（在应用事件循环中），结果回到主线程处理
+            from src.shared.utils.async_manager import get_async_manager
+
+            def on_recovery_failed(e):
+                logger.error(f"智能恢复异常: {e}")
+                # 恢复失败，显示错误对话框
+                self._show_error_dialog(error, context)
+
+            get_async_manager().execute_async(
+                self.recovery_system.recover_from_error(error_context),
+                success_callback=lambda result: self._handle_recovery_result(result, error, context),
+                error_callback=on_recovery_failed
+            )
 
             return True  # 表示已尝试恢复
 
@@ -510,9 +495,7 @@ class IntelligentErrorDialog(QDialog):
             progress_dialog.setStandardButtons(QMessageBox.StandardButton.NoButton)
             progress_dialog.show()
 
-            # 异步执行恢复
-            import asyncio
-
+            # 异步执行恢复（在应用事件循环中）
             async def perform_recovery():
                 try:
                     result = await self.recovery_system.recover_from_error(error_context)
@@ -521,26 +504,13 @@ class IntelligentErrorDialog(QDialog):
                     logger.error(f"自动恢复失败: {e}")
                     return None
 
-            # 在新线程中执行恢复
-            import threading
-
-            def recovery_thread():
-                try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    result = loop.run_until_complete(perform_recovery())
-                    loop.close()
-
-                    # 在主线程中显示结果
-                    from PyQt6.QtCore import QTimer
-                    QTimer.singleShot(0, lambda: self._show_recovery_result(result, progress_dialog))
-
-                except Exception as e:
-                    logger.error(f"恢复线程异常: {e}")
-                    QTimer.singleShot(0, lambda: self._show_recovery_result(None, progress_dialog))
-
-            thread = threading.Thread(target=recovery_thread, daemon=True)
-            thread.start()
+            # 在主线程中显示结果
+            from src.shared.utils.async_manager import get_async_manager
+            get_async_manager().execute_async(
+                perform_recovery(),
+                success_callback=lambda result: self._show_recovery_result(result, progress_dialog),
+                error_callback=lambda e: self._show_recovery_result(None, progress_dialog)
+            )
 
         except Exception as e:
             logger.error(f"启动自动恢复失败: {e}")
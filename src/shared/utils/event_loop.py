@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+应用级异步事件循环
+
+整个应用只有一个常驻的asyncio事件循环，运行在独立的后台线程中：
+- 所有协程（服务调用、事件总线、AI客户端）都提交到这个循环执行，
+  绑定事件循环的资源（如 AsyncOpenAI / httpx 连接池）因此可以跨调用复用
+- 界面线程通过 submit_coroutine() 提交协程并拿到 concurrent.futures.Future，
+  或通过 AsyncTaskManager 以Qt信号/回调的形式拿回结果
+- 同步代码通过 run_coroutine_blocking() 在该循环上执行协程并等待结果，
+  不再各自 asyncio.run() / new_event_loop()；循环线程内的代码必须直接 await
+
+Qt主线程的事件循环不被阻塞；循环线程与Qt之间只通过线程安全的调度和信号交互。
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Callable, Coroutine, Optional
+
+from src.shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+LOOP_THREAD_NAME = "AppEventLoop"
+LOOP_START_TIMEOUT = 5.0
+LOOP_SHUTDOWN_TIMEOUT = 5.0
+
+
+class AppEventLoop:
+    """
+    应用级事件循环
+
+    惰性启动：第一次提交协程时创建循环线程。stop() 取消未完成的任务、
+    关闭异步生成器和默认执行器后停止循环。
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._started = threading.Event()
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """启动循环线程（已启动时直接返回循环）"""
+        with self._lock:
+            if self._loop is not None and not self._loop.is_closed() and self._thread and self._thread.is_alive():
+                return self._loop
+
+            self._started.clear()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._run_loop,
+                args=(self._loop,),
+                name=LOOP_THREAD_NAME,
+                daemon=True
+            )
+            self._thread.start()
+
+        if not self._started.wait(LOOP_START_TIMEOUT):
+            raise RuntimeError("应用事件循环启动超时")
+        logger.info("应用事件循环已启动")
+        return self._loop
+
+    def _run_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        loop.call_soon(self._started.set)
+        try:
+            loop.run_forever()
+        finally:
+            try:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                loop.run_until_complete(loop.shutdown_default_executor())
+            except Exception as e:
+                logger.debug(f"关闭事件循环资源时出错: {e}")
+            loop.close()
+            logger.info("应用事件循环已停止")
+
+    def stop(self, timeout: float = LOOP_SHUTDOWN_TIMEOUT) -> None:
+        """取消所有未完成任务并停止循环线程"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or loop.is_closed() or thread is None:
+                return
+
+        if threading.current_thread() is thread:
+            loop.call_soon(loop.stop)
+            return
+
+        async def _cancel_pending():
+            current = asyncio.current_task()
+            pending = [t for t in asyncio.all_tasks() if t is not current and not t.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(_cancel_pending(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"取消未完成的异步任务失败: {e}")
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        with self._lock:
+            if self._loop is loop:
+                self._loop = None
+                self._thread = None
+
+    # ------------------------------------------------------------------
+    # 访问
+    # ------------------------------------------------------------------
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """应用事件循环（必要时启动）"""
+        return self.start()
+
+    @property
+    def is_running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def in_loop_thread(self) -> bool:
+        """当前是否在循环线程中"""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """提交协程到应用事件循环，返回线程安全的Future（可取消）"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, callback: Callable, *args) -> None:
+        """在循环线程中调度普通回调"""
+        loop = self.loop
+        if self.in_loop_thread():
+            loop.call_soon(callback, *args)
+        else:
+            loop.call_soon_threadsafe(callback, *args)
+
+    def run_blocking(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        在应用事件循环上执行协程并阻塞等待结果
+
+        Raises:
+            RuntimeError: 在循环线程内调用（同步等待会自锁，且协程依赖的客户端、锁等都绑定在本循环上，
+                不能改到其他循环执行）；循环线程内的代码应直接 await 协程
+        """
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("不能在应用事件循环线程内同步等待协程，请直接 await")
+
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise asyncio.TimeoutError(f"协程执行超时（{timeout}秒）")
+
+
+# 全局应用事件循环
+_app_event_loop: Optional[AppEventLoop] = None
+_app_event_loop_lock = threading.Lock()
+
+
+def get_app_event_loop() -> AppEventLoop:
+    """获取全局应用事件循环"""
+    global _app_event_loop
+    if _app_event_loop is None:
+        with _app_event_loop_lock:
+            if _app_event_loop is None:
+                _app_event_loop = AppEventLoop()
+    return _app_event_loop
+
+
+def submit_coroutine(coro: Coroutine) -> concurrent.futures.Future:
+    """提交协程到应用事件循环"""
+    return get_app_event_loop().submit(coro)
+
+
+def run_coroutine_blocking(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """在应用事件循环上执行协程并等待结果（供同步代码使用）"""
+    return get_app_event_loop().run_blocking(coro, timeout)
+
+
+def shutdown_app_event_loop(timeout: float = LOOP_SHUTDOWN_TIMEOUT) -> None:
+    """停止应用事件循环（应用退出时调用）"""
+    if _app_event_loop is not None:
+        _app_event_loop.stop(timeout)
@@ -16,6 +16,7 @@ from typing import Any, Dict, Optional, TypeVar, List, Iterator
 from datetime import datetime
 
 from src.shared.utils.unified_performance import get_performance_manager
+from src.shared.utils.tracing import set_span_attributes, traced
 from src.shared.constants import MAX_DOCUMENT_SIZE
 
 logger = logging.getLogger(__name__)
@@ -55,7 +56,7 @@ class UnifiedFileOperations:
         self.cache_prefix = cache_prefix
         self.performance_manager = get_performance_manager()
 
-    async def save_json_atomic(
+    def save_json_atomic_sync(
         self,
         file_path: Path,
         data: Dict[str, Any],
@@ -64,7 +65,7 @@ class UnifiedFileOperations:
         cache_ttl: int = 3600
     ) -> bool:
         """
-        原子性保存JSON文件
+        原子性保存JSON文件（同步版本，任意线程可调用，包括应用事件循环线程）
 
         Args:
             file_path: 文件路径
@@ -83,35 +84,31 @@ class UnifiedFileOperations:
 
             # 创建备份
             if create_backup and file_path.exists():
-                await self._create_backup(file_path)
+                self._create_backup_sync(file_path)
 
             # 使用临时文件确保原子性写入
             temp_file = file_path.with_suffix(TEMP_SUFFIX)
+            with open(temp_file, 'w', encoding=DEFAULT_ENCODING) as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
 
-            def _write_file():
-                with open(temp_file, 'w', encoding=DEFAULT_ENCODING) as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-
-                # 验证写入的文件
-                with open(temp_file, 'r', encoding=DEFAULT_ENCODING) as f:
-                    json.load(f)
+            # 验证写入的文件
+            with open(temp_file, 'r', encoding=DEFAULT_ENCODING) as f:
+                json.load(f)
 
-                # 原子性替换（Windows下可能因占用而失败，增加重试与回退）
-                replace_exc = None
-                for attempt in range(5):
-                    try:
-                        # 优先使用 os.replace（跨平台原子替换）
-                        os.replace(str(temp_file), str(file_path))
-                        replace_exc = None
-                        break
-                    except Exception as e:
-                        replace_exc = e
-                        time.sleep(0.1 * (attempt + 1))  # 退避
-                if replace_exc is not None:
-                    # 最后尝试 Path.replace
-                    temp_file.replace(file_path)
-
-            await asyncio.get_event_loop().run_in_executor(None, _write_file)
+            # 原子性替换（Windows下可能因占用而失败，增加重试与回退）
+            replace_exc = None
+            for attempt in range(5):
+                try:
+                    # 优先使用 os.replace（跨平台原子替换）
+                    os.replace(str(temp_file), str(file_path))
+                    replace_exc = None
+                    break
+                except Exception as e:
+                    replace_exc = e
+                    time.sleep(0.1 * (attempt + 1))  # 退避
+            if replace_exc is not None:
+                # 最后尝试 Path.replace
+                temp_file.replace(file_path)
 
             # 更新缓存
             if cache_key:
@@ -134,6 +131,83 @@ class UnifiedFileOperations:
                     pass
             return False
 
+    async def save_json_atomic(
+        self,
+        file_path: Path,
+        data: Dict[str, Any],
+        create_backup: bool = True,
+        cache_key: Optional[str] = None,
+        cache_ttl: int = 3600
+    ) -> bool:
+        """
+        原子性保存JSON文件（在线程池中执行 save_json_atomic_sync）
+
+        Args:
+            file_path: 文件路径
+            data: 要保存的数据
+            create_backup: 是否创建备份
+            cache_key: 缓存键（可选）
+            cache_ttl: 缓存TTL（秒）
+
+        Returns:
+            bool: 保存是否成功
+        """
+        return await asyncio.get_event_loop().run_in_executor(
+            None, self.save_json_atomic_sync, file_path, data, create_backup, cache_key, cache_ttl
+        )
+
+    def _get_cached_json(self, cache_key: Optional[str]) -> Any:
+        """读取JSON缓存，未命中时返回None"""
+        if not cache_key:
+            return None
+        cache_result = self.performance_manager.cache_get(f"{self.cache_prefix}:{cache_key}")
+        set_span_attributes(cache_hit=cache_result.success)
+        return cache_result.data if cache_result.success else None
+
+    def _set_cached_json(self, cache_key: Optional[str], data: Any, cache_ttl: int) -> None:
+        """写入JSON缓存"""
+        if cache_key and data:
+            self.performance_manager.cache_set(f"{self.cache_prefix}:{cache_key}", data, ttl=cache_ttl)
+
+    @staticmethod
+    def _read_json_file(file_path: Path):
+        with open(file_path, 'r', encoding=DEFAULT_ENCODING) as f:
+            return json.load(f), f.tell()
+
+    def load_json_sync(
+        self,
+        file_path: Path,
+        cache_key: Optional[str] = None,
+        cache_ttl: int = 3600
+    ) -> Optional[Dict[str, Any]]:
+        """
+        加载JSON文件（同步版本，带缓存；任意线程可调用，包括应用事件循环线程）
+
+        Args:
+            file_path: 文件路径
+            cache_key: 缓存键（可选）
+            cache_ttl: 缓存TTL（秒）
+
+        Returns:
+            Optional[Dict[str, Any]]: 加载的数据
+        """
+        try:
+            cached = self._get_cached_json(cache_key)
+            if cached is not None:
+                return cached
+
+            if not file_path.exists():
+                return None
+
+            data, _ = self._read_json_file(file_path)
+            self._set_cached_json(cache_key, data, cache_ttl)
+            logger.debug(f"JSON文件加载成功: {file_path}")
+            return data
+        except Exception as e:
+            logger.error(f"加载JSON文件失败: {file_path}, 错误: {e}")
+            return None
+
+    @traced("文件.读取JSON")
     async def load_json_cached(
         self,
         file_path: Path,
@@ -153,34 +227,21 @@ class UnifiedFileOperations:
         """
         try:
             # 尝试从缓存获取
-            if cache_key:
-                cache_result = self.performance_manager.cache_get(
-                    f"{self.cache_prefix}:{cache_key}"
-                )
-                if cache_result.success:
-                    logger.debug(f"从缓存加载JSON: {file_path} (hit)")
-                    return cache_result.data
-                else:
-                    logger.debug(f"从缓存加载JSON: {file_path} (miss)")
+            cached = self._get_cached_json(cache_key)
+            if cached is not None:
+                logger.debug(f"从缓存加载JSON: {file_path} (hit)")
+                return cached
 
             # 检查文件是否存在
             if not file_path.exists():
                 return None
 
             # 从文件加载
-            def _read_file():
-                with open(file_path, 'r', encoding=DEFAULT_ENCODING) as f:
-                    return json.load(f)
-
-            data = await asyncio.get_event_loop().run_in_executor(None, _read_file)
+            data, size = await asyncio.get_event_loop().run_in_executor(None, self._read_json_file, file_path)
+            set_span_attributes(bytes=size)
 
             # 更新缓存
-            if cache_key and data:
-                self.performance_manager.cache_set(
-                    f"{self.cache_prefix}:{cache_key}",
-                    data,
-                    ttl=cache_ttl
-                )
+            self._set_cached_json(cache_key, data, cache_ttl)
 
             logger.debug(f"JSON文件加载成功: {file_path}")
             return data
@@ -297,6 +358,7 @@ class UnifiedFileOperations:
                     pass
             return False
 
+    @traced("文件.读取文本")
     async def load_text(self, file_path: Path) -> Optional[str]:
         """
         加载文本文件
@@ -316,6 +378,7 @@ class UnifiedFileOperations:
                     return f.read()
 
             content = await asyncio.get_event_loop().run_in_executor(None, _read_file)
+            set_span_attributes(characters=len(content))
             logger.debug(f"文本文件加载成功: {file_path}")
             return content
 
@@ -325,18 +388,18 @@ class UnifiedFileOperations:
 
     async def _create_backup(self, file_path: Path) -> None:
         """创建文件备份"""
+        await asyncio.get_event_loop().run_in_executor(None, self._create_backup_sync, file_path)
+
+    def _create_backup_sync(self, file_path: Path) -> None:
+        """创建文件备份（同步版本）"""
         try:
+            import shutil
             backup_dir = file_path.parent / "backups"
             backup_dir.mkdir(exist_ok=True)
 
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             backup_file = backup_dir / f"{file_path.stem}{BACKUP_SUFFIX}_{timestamp}{file_path.suffix}"
-
-            def _copy_file():
-                import shutil
-                shutil.copy2(file_path, backup_file)
-
-            await asyncio.get_event_loop().run_in_executor(None, _copy_file)
+            shutil.copy2(file_path, backup_file)
             logger.debug(f"备份创建成功: {backup_file}")
 
         except Exception as e:
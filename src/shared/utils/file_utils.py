@@ -16,6 +16,7 @@ from datetime import datetime
 import tempfile
 import zipfile
 import json
+from platform import system
 
 from src.shared.utils.logger import get_logger
 from src.shared.constants import (
@@ -612,3 +613,19 @@ def find_files(directory: Union[str, Path], pattern: str = "*", recursive: bool
     """查找文件的便捷函数"""
     manager = FileManager()
     return manager.find_files(directory, pattern, recursive)
+
+
+def get_user_cache_dir() -> Path:
+    """用户级缓存目录（与日志目录的定位方式一致，不负责创建目录）"""
+    home = Path.home()
+    sys_name = system()
+    try:
+        if sys_name == "Windows":
+            base = Path(os.environ.get("LOCALAPPDATA", str(home / "AppData" / "Local")))
+            return base / "AI_Novel_Editor" / "cache"
+        if sys_name == "Darwin":
+            return home / "Library" / "Caches" / "AI Novel Editor"
+        base = Path(os.environ.get("XDG_CACHE_HOME", str(home / ".cache")))
+        return base / "ai-novel-editor"
+    except Exception:
+        return home / ".ai_novel_editor_app" / "cache"
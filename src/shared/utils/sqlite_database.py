@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 数据库访问层
+
+每个数据库文件对应一个 SQLiteDatabase：
+- 唯一的写连接由后台写线程持有；写操作以函数形式提交给写线程，在一个 IMMEDIATE 事务中执行，
+  多个写入方不再争抢文件锁。write() 阻塞等待结果，submit() 立即返回 Future
+- 读操作从只读连接池借用连接；WAL 模式下读与写互不阻塞。连接长期存活，
+  sqlite3 的预编译语句缓存可以跨调用复用
+- 所有连接统一设置 WAL、synchronous=NORMAL、mmap_size、cache_size 和 busy_timeout
+- 读操作可传入取消检查函数，由 set_progress_handler 中止正在执行的查询，抛出 QueryInterrupted
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from src.shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_READER_COUNT = 4
+DEFAULT_BUSY_TIMEOUT = 5.0
+DEFAULT_MMAP_SIZE = 64 * 1024 * 1024
+DEFAULT_CACHE_SIZE_KB = 8 * 1024
+STATEMENT_CACHE_SIZE = 256
+# 每执行多少条虚拟机指令检查一次取消
+PROGRESS_HANDLER_INTERVAL = 1000
+WRITER_SHUTDOWN_TIMEOUT = 5.0
+
+
+class QueryInterrupted(sqlite3.OperationalError):
+    """查询被取消检查函数中止"""
+
+
+class SQLiteDatabase:
+    """
+    单写多读的 SQLite 数据库
+
+    Args:
+        db_path: 数据库文件路径（父目录不存在时自动创建）
+        initializer: 写连接打开后在第一个事务中执行的函数（建表、迁移）
+        readers: 只读连接数上限
+        row_factory: 所有连接使用的行工厂
+        name: 线程名和日志中使用的名称
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        initializer: Optional[Callable[[sqlite3.Connection], None]] = None,
+        readers: int = DEFAULT_READER_COUNT,
+        row_factory: Optional[Callable] = None,
+        name: Optional[str] = None
+    ):
+        self.db_path = Path(db_path)
+        self.name = name or self.db_path.stem
+        self.max_readers = max(1, readers)
+        self._initializer = initializer
+        self._row_factory = row_factory
+
+        self._lock = threading.Condition()
+        self._closed = False
+        self._opened = threading.Event()
+
+        self._write_queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_conn: Optional[sqlite3.Connection] = None
+
+        self._idle_readers: List[sqlite3.Connection] = []
+        self._reader_count = 0
+
+        self.writes = 0
+        self.write_time = 0.0
+        self.reads = 0
+        self.interrupted = 0
+
+    # ------------------------------------------------------------------
+    # 连接
+    # ------------------------------------------------------------------
+
+    def _connect(self, read_only: bool) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=DEFAULT_BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        if self._row_factory is not None:
+            conn.row_factory = self._row_factory
+        conn.execute(f"PRAGMA busy_timeout = {int(DEFAULT_BUSY_TIMEOUT * 1000)}")
+        conn.execute(f"PRAGMA mmap_size = {DEFAULT_MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size = {-DEFAULT_CACHE_SIZE_KB}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        else:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def open(self) -> None:
+        """打开写连接并执行初始化（可重复调用；读写操作会自动调用）"""
+        if not self._opened.is_set():
+            self.write(lambda conn: None)
+
+    # ------------------------------------------------------------------
+    # 写
+    # ------------------------------------------------------------------
+
+    def submit(self, operation: Callable[[sqlite3.Connection], Any]) -> Future:
+        """提交写操作（在写线程的一个事务中执行），立即返回 Future"""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"数据库已关闭: {self.name}")
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._writer_loop, name=f"sqlite-writer-{self.name}", daemon=True
+                )
+                self._writer.start()
+            self._write_queue.put((operation, future))
+        return future
+
+    def write(self, operation: Callable[[sqlite3.Connection], Any], timeout: Optional[float] = None) -> Any:
+        """执行写操作并返回结果；在写线程内调用时直接在当前事务中执行"""
+        if threading.current_thread() is self._writer and self._writer_conn is not None:
+            return operation(self._writer_conn)
+        return self.submit(operation).result(timeout)
+
+    def _writer_loop(self) -> None:
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                break
+            operation, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if self._writer_conn is None:
+                    self._open_writer()
+                result = self._run_transaction(operation)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        if self._writer_conn is not None:
+            self._writer_conn.close()
+            self._writer_conn = None
+
+    def _open_writer(self) -> None:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect(read_only=False)
+        self._writer_conn = conn
+        try:
+            if self._initializer is not None:
+                self._run_transaction(self._initializer)
+        except BaseException:
+            self._writer_conn = None
+            conn.close()
+            raise
+        self._opened.set()
+
+    def _run_transaction(self, operation: Callable[[sqlite3.Connection], Any]) -> Any:
+        conn = self._writer_conn
+        started = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = operation(conn)
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        if conn.in_transaction:
+            conn.execute("COMMIT")
+        self.writes += 1
+        self.write_time += time.perf_counter() - started
+        return result
+
+    # ------------------------------------------------------------------
+    # 读
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def reader(self, interrupt: Optional[Callable[[], bool]] = None) -> Iterator[sqlite3.Connection]:
+        """
+        借用一个只读连接（结果需在 with 块内取完）
+
+        Args:
+            interrupt: 取消检查函数，返回 True 时中止当前查询并抛出 QueryInterrupted
+        """
+        self.open()
+        conn = self._acquire_reader()
+        interrupted = False
+
+        if interrupt is not None:
+            def progress_handler() -> int:
+                nonlocal interrupted
+                if interrupt():
+                    interrupted = True
+                    return 1
+                return 0
+            conn.set_progress_handler(progress_handler, PROGRESS_HANDLER_INTERVAL)
+
+        try:
+            self.reads += 1
+            yield conn
+        except sqlite3.OperationalError as e:
+            if interrupted and not isinstance(e, QueryInterrupted):
+                self.interrupted += 1
+                raise QueryInterrupted("查询已取消") from e
+            raise
+        finally:
+            if interrupt is not None:
+                conn.set_progress_handler(None, 0)
+            self._release_reader(conn)
+
+    def read(self, operation: Callable[[sqlite3.Connection], Any], interrupt: Optional[Callable[[], bool]] = None) -> Any:
+        """借用只读连接执行查询函数"""
+        with self.reader(interrupt) as conn:
+            return operation(conn)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise RuntimeError(f"数据库已关闭: {self.name}")
+                if self._idle_readers:
+                    return self._idle_readers.pop()
+                if self._reader_count < self.max_readers:
+                    self._reader_count += 1
+                    break
+                self._lock.wait()
+        try:
+            return self._connect(read_only=True)
+        except BaseException:
+            with self._lock:
+                self._reader_count -= 1
+                self._lock.notify()
+            raise
+
+    def _release_reader(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if not self._closed:
+                self._idle_readers.append(conn)
+                self._lock.notify()
+                return
+            self._reader_count -= 1
+        conn.close()
+
+    # ------------------------------------------------------------------
+    # 生命周期与统计
+    # ------------------------------------------------------------------
+
+    def close(self) -> None:
+        """等待已提交的写操作完成，关闭所有连接"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            writer = self._writer
+            idle, self._idle_readers = self._idle_readers, []
+            self._reader_count -= len(idle)
+            self._lock.notify_all()
+
+        if writer is not None:
+            self._write_queue.put(None)
+            if writer is not threading.current_thread():
+                writer.join(WRITER_SHUTDOWN_TIMEOUT)
+        for conn in idle:
+            conn.close()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            'path': str(self.db_path),
+            'writes': self.writes,
+            'average_write_ms': self.write_time / self.writes * 1000 if self.writes else 0.0,
+            'pending_writes': self._write_queue.qsize(),
+            'reads': self.reads,
+            'interrupted': self.interrupted,
+            'readers_open': self._reader_count,
+            'readers_idle': len(self._idle_readers),
+        }
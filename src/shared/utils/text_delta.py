@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文本增量
+
+把一次内容变更表示为单个替换：在 position 处删除 removed_length 个字符并插入 inserted_text。
+编辑器的一次（或合并后的多次相邻）输入都可以用一个这样的替换描述，
+订阅方只需处理变更附近的文本，而不必持有并比较整篇内容。
+
+- compute_text_delta：通过公共前缀/后缀求出新旧文本之间的最小单段替换，
+  比较按分块切片进行，开销与公共前缀/后缀长度成正比，不逐字符循环
+- content_hash / chain_hash：内容版本哈希。全文哈希只在建立基准时计算一次，
+  之后每次变更的版本哈希由上一版本哈希和增量链式求出，开销与增量大小成正比
+- count_changed_segments：只重新统计变更附近的片段，求出词数、段落数等计数的变化量
+"""
+
+import hashlib
+from dataclasses import dataclass
+from typing import Callable, Tuple
+
+# 内容哈希长度（字节）
+CONTENT_HASH_SIZE = 16
+
+# 比较公共前缀/后缀时的初始分块长度，逐块翻倍
+_INITIAL_COMPARE_CHUNK = 64
+
+
+@dataclass(frozen=True)
+class TextDelta:
+    """单段文本替换"""
+    position: int = 0
+    removed_length: int = 0
+    inserted_text: str = ""
+
+    @property
+    def inserted_length(self) -> int:
+        return len(self.inserted_text)
+
+    @property
+    def length_change(self) -> int:
+        return len(self.inserted_text) - self.removed_length
+
+    @property
+    def is_empty(self) -> bool:
+        return self.removed_length == 0 and not self.inserted_text
+
+    def apply(self, text: str) -> str:
+        """把替换应用到基准文本上"""
+        if self.position + self.removed_length > len(text):
+            raise ValueError("文本增量超出基准文本范围")
+        return text[:self.position] + self.inserted_text + text[self.position + self.removed_length:]
+
+
+def content_hash(text: str) -> str:
+    """内容哈希（十六进制）"""
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=CONTENT_HASH_SIZE).hexdigest()
+
+
+def chain_hash(base_hash: str, delta: TextDelta) -> str:
+    """由基准版本哈希和增量求出变更后的版本哈希"""
+    digest = hashlib.blake2b(digest_size=CONTENT_HASH_SIZE)
+    digest.update(base_hash.encode('ascii'))
+    digest.update(f"|{delta.position}|{delta.removed_length}|".encode('ascii'))
+    digest.update(delta.inserted_text.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+def _common_prefix_length(a: str, b: str, limit: int) -> int:
+    """a、b 在前 limit 个字符内的公共前缀长度"""
+    start = 0
+    chunk = _INITIAL_COMPARE_CHUNK
+    # 按翻倍的分块找到第一个不同的块
+    while start < limit:
+        end = min(limit, start + chunk)
+        if a[start:end] != b[start:end]:
+            break
+        start = end
+        chunk *= 2
+    else:
+        return limit
+    # 在不同的块内二分
+    low, high = start, end
+    while high - low > 1:
+        middle = (low + high) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def _common_suffix_length(a: str, b: str, limit: int) -> int:
+    """a、b 在后 limit 个字符内的公共后缀长度"""
+    len_a, len_b = len(a), len(b)
+    matched = 0
+    chunk = _INITIAL_COMPARE_CHUNK
+    while matched < limit:
+        size = min(limit - matched, chunk)
+        if a[len_a - matched - size:len_a - matched] != b[len_b - matched - size:len_b - matched]:
+            break
+        matched += size
+        chunk *= 2
+    else:
+        return limit
+    # 在不同的块内二分：[low, high) 为候选的公共后缀长度
+    low, high = matched, matched + size
+    while high - low > 1:
+        middle = (low + high) // 2
+        if a[len_a - middle:len_a - low] == b[len_b - middle:len_b - low]:
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def compute_text_delta(old_text: str, new_text: str) -> TextDelta:
+    """求把 old_text 变为 new_text 的最小单段替换（内容相同时返回空增量）"""
+    if old_text is new_text or old_text == new_text:
+        return TextDelta(len(old_text or ""), 0, "")
+    old_text = old_text or ""
+    new_text = new_text or ""
+    prefix = _common_prefix_length(old_text, new_text, min(len(old_text), len(new_text)))
+    suffix = _common_suffix_length(
+        old_text, new_text, min(len(old_text), len(new_text)) - prefix
+    )
+    return TextDelta(
+        position=prefix,
+        removed_length=len(old_text) - prefix - suffix,
+        inserted_text=new_text[prefix:len(new_text) - suffix]
+    )
+
+
+def _word_window(text: str, start: int, end: int) -> Tuple[int, int]:
+    """把 [start, end) 扩展到两侧的空白处，使窗口外的词不受影响"""
+    while start > 0 and not text[start - 1].isspace():
+        start -= 1
+    while end < len(text) and not text[end].isspace():
+        end += 1
+    return start, end
+
+
+def _separator_window(text: str, start: int, end: int, separator: str) -> Tuple[int, int]:
+    """
+    把 [start, end) 扩展到两侧的分隔符处（分隔符由同一字符重复组成，如 '\\n\\n'、'.'）
+
+    窗口边界取分隔符连续段的起点（前一个字符不是分隔字符），
+    此时 split(separator) 在边界两侧的切分互不影响。左边界的分隔符整体位于 start 之前，
+    右边界的前一个字符位于 end 之后（即在未改动的后缀中）。
+    """
+    mark = separator[0]
+    left = text.rfind(separator, 0, start)
+    if left == -1:
+        left = 0
+    else:
+        while left > 0 and text[left - 1] == mark:
+            left -= 1
+
+    right = end
+    while True:
+        right = text.find(separator, right)
+        if right == -1:
+            right = len(text)
+            break
+        if right - 1 >= end and text[right - 1] != mark:
+            break
+        while right < len(text) and text[right] == mark:
+            right += 1
+    return left, right
+
+
+def count_changed_segments(
+    old_text: str,
+    new_text: str,
+    delta: TextDelta,
+    counter: Callable[[str], int],
+    separator: str = None
+) -> int:
+    """
+    只统计变更附近的窗口，返回 counter(new_text) - counter(old_text)
+
+    Args:
+        counter: 计数函数，如 lambda s: len(s.split())
+        separator: counter 按该分隔符切分计数时传入；为 None 表示按空白切分
+    """
+    old_end = delta.position + delta.removed_length
+    if separator is None:
+        start, end = _word_window(old_text, delta.position, old_end)
+    else:
+        start, end = _separator_window(old_text, delta.position, old_end, separator)
+    new_end = end + delta.length_change
+    return counter(new_text[start:new_end]) - counter(old_text[start:end])
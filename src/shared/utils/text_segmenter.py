@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中文分词服务
+
+进程内所有 jieba 调用（深度上下文分析、响应评估、全文检索、文本处理插件）共用一个分词服务：
+- jieba 按需导入；词典可在启动后空闲时由后台线程加载（warm_up），
+  词典未就绪时的首次分词会等待加载完成，而不是重复加载
+- jieba 序列化后的词典模型缓存在用户缓存目录下（而不是系统临时目录），重启后直接读取
+- 分词结果按段落内容哈希缓存在有界 LRU 中；长文本按换行拆分后逐段命中缓存，
+  拆分结果与整段分词一致（jieba 本身也按空白切开再分词）
+- 未安装 jieba 或词典加载失败时退化为按字/单词切分
+"""
+
+import hashlib
+import importlib.util
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+JIEBA_AVAILABLE = importlib.util.find_spec("jieba") is not None
+
+# 分词结果缓存的段落数上限，超长段落不缓存
+SEGMENT_CACHE_SIZE = 4096
+MAX_CACHED_PARAGRAPH_LENGTH = 10000
+
+# 词典模型缓存所在的子目录
+DICTIONARY_CACHE_DIR_NAME = "jieba"
+
+MODE_CUT = "cut"
+MODE_SEARCH = "search"
+
+_LINE_BREAK_PATTERN = re.compile(r'(\r\n|\n)')
+_FALLBACK_TOKEN_PATTERN = re.compile(r'[A-Za-z0-9]+|.', re.S)
+
+
+class TextSegmenter:
+    """
+    共享的中文分词器
+
+    线程安全；cut()/cut_for_search() 返回新的列表，调用方可以自由修改。
+    """
+
+    def __init__(self, cache_size: int = SEGMENT_CACHE_SIZE, dictionary_cache_dir: Optional[Path] = None):
+        self.cache_size = max(0, cache_size)
+        self._dictionary_cache_dir = dictionary_cache_dir
+        self._available = JIEBA_AVAILABLE
+        self._tokenizer = None
+        self._ready = threading.Event()
+        self._load_lock = threading.Lock()
+        self._loader: Optional[threading.Thread] = None
+        self._loader_lock = threading.Lock()
+
+        self._cache: "OrderedDict[Tuple[str, bytes], Tuple[str, ...]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.load_time: Optional[float] = None
+
+        if not self._available:
+            logger.warning("未安装 jieba，中文分词退化为按字切分")
+
+    @property
+    def available(self) -> bool:
+        """jieba 是否可用"""
+        return self._available
+
+    @property
+    def is_ready(self) -> bool:
+        """词典是否已加载（或已确定不可用）"""
+        return self._ready.is_set() or not self._available
+
+    # ------------------------------------------------------------------
+    # 词典加载
+    # ------------------------------------------------------------------
+
+    def warm_up(self) -> bool:
+        """
+        在后台线程中加载词典（可重复调用）
+
+        Returns:
+            bool: 已开始加载或已加载完成返回 True，jieba 不可用返回 False
+        """
+        if not self._available:
+            return False
+        with self._loader_lock:
+            if self._ready.is_set() or self._loader is not None:
+                return True
+            self._loader = threading.Thread(target=self._load_dictionary, name="jieba-loader", daemon=True)
+            self._loader.start()
+        return True
+
+    def initialize(self) -> bool:
+        """在当前线程中加载词典（工作进程初始化时使用）"""
+        return self._get_tokenizer() is not None
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """等待后台加载完成"""
+        if not self._available:
+            return True
+        return self._ready.wait(timeout)
+
+    def _get_tokenizer(self):
+        if not self._ready.is_set():
+            if not self._available:
+                return None
+            self._load_dictionary()
+        return self._tokenizer
+
+    def _load_dictionary(self) -> None:
+        with self._load_lock:
+            if self._ready.is_set():
+                return
+            started = time.perf_counter()
+            try:
+                import jieba
+                jieba.setLogLevel(logging.WARNING)
+
+                # 共用 jieba 的默认分词器，直接调用 jieba 的第三方代码也能受益
+                tokenizer = jieba.dt
+                cache_dir = self._resolve_dictionary_cache_dir()
+                if cache_dir is not None:
+                    tokenizer.tmp_dir = str(cache_dir)
+                tokenizer.initialize()
+
+                self._tokenizer = tokenizer
+                self.load_time = time.perf_counter() - started
+                logger.info(f"jieba 词典加载完成，耗时 {self.load_time:.2f}s")
+            except Exception as e:
+                self._available = False
+                logger.warning(f"jieba 词典加载失败，中文分词退化为按字切分: {e}")
+            finally:
+                self._ready.set()
+
+    def _resolve_dictionary_cache_dir(self) -> Optional[Path]:
+        """词典模型缓存目录；无法创建时返回 None（由 jieba 使用系统临时目录）"""
+        try:
+            cache_dir = self._dictionary_cache_dir
+            if cache_dir is None:
+                from src.shared.utils.file_utils import get_user_cache_dir
+                cache_dir = get_user_cache_dir() / DICTIONARY_CACHE_DIR_NAME
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            return cache_dir
+        except Exception as e:
+            logger.debug(f"无法创建 jieba 词典缓存目录: {e}")
+            return None
+
+    # ------------------------------------------------------------------
+    # 分词
+    # ------------------------------------------------------------------
+
+    def cut(self, text: str) -> List[str]:
+        """精确模式分词（与 jieba.lcut(text) 结果一致）"""
+        return self._segment(text, MODE_CUT)
+
+    def cut_for_search(self, text: str) -> List[str]:
+        """搜索引擎模式分词（与 jieba.lcut_for_search(text) 结果一致）"""
+        return self._segment(text, MODE_SEARCH)
+
+    def _segment(self, text: str, mode: str) -> List[str]:
+        if not text:
+            return []
+        tokens: List[str] = []
+        for piece in _LINE_BREAK_PATTERN.split(text):
+            if not piece:
+                continue
+            if piece == '\n' or piece == '\r\n':
+                tokens.append(piece)
+            else:
+                tokens.extend(self._segment_paragraph(piece, mode))
+        return tokens
+
+    def _segment_paragraph(self, paragraph: str, mode: str) -> Tuple[str, ...]:
+        cacheable = self.cache_size > 0 and len(paragraph) <= MAX_CACHED_PARAGRAPH_LENGTH
+        if cacheable:
+            digest = hashlib.blake2b(paragraph.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+            key = (mode, digest)
+            with self._cache_lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                    return cached
+                self.cache_misses += 1
+
+        tokens = tuple(self._run(paragraph, mode))
+
+        if cacheable:
+            with self._cache_lock:
+                self._cache[key] = tokens
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return tokens
+
+    def _run(self, paragraph: str, mode: str):
+        tokenizer = self._get_tokenizer()
+        if tokenizer is None:
+            return _FALLBACK_TOKEN_PATTERN.findall(paragraph)
+        if mode == MODE_SEARCH:
+            return tokenizer.cut_for_search(paragraph)
+        return tokenizer.cut(paragraph)
+
+    # ------------------------------------------------------------------
+    # 缓存管理与统计
+    # ------------------------------------------------------------------
+
+    def clear_cache(self) -> None:
+        """清空分词结果缓存"""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            'available': self._available,
+            'ready': self._ready.is_set(),
+            'load_time': self.load_time,
+            'cache_entries': len(self._cache),
+            'cache_size': self.cache_size,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+_text_segmenter: Optional[TextSegmenter] = None
+_text_segmenter_lock = threading.Lock()
+
+
+def get_text_segmenter() -> TextSegmenter:
+    """获取全局分词服务"""
+    global _text_segmenter
+    if _text_segmenter is None:
+        with _text_segmenter_lock:
+            if _text_segmenter is None:
+                _text_segmenter = TextSegmenter()
+    return _text_segmenter
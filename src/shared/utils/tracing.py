@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轻量级调用追踪
+
+用 span 记录一次操作及其子操作的耗时，可以把一次缓慢的文档打开还原为火焰时间线：
+- traced 装饰器同时支持同步函数和协程函数（协程按实际执行时间计，而不是创建协程的时间）；
+  trace_span 为上下文管理器，可在同步和异步代码中使用
+- 当前 span 保存在 contextvars 中：同一线程内的嵌套调用、await 链以及 asyncio 创建的
+  子任务都会自动成为当前 span 的子 span。run_in_executor 不复制上下文，线程池中的 span
+  会成为新的根 span
+- span 可带属性（文档ID、字节数、是否命中缓存等），set_span_attributes 设置当前 span 的属性
+- 结束的 span 写入有界环形缓冲区，export_chrome_trace 导出为 Chrome trace-event JSON，
+  可在 chrome://tracing 或 Perfetto 中查看。同一线程内并发执行的 asyncio 任务各占一条时间线
+"""
+
+import asyncio
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from src.shared.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 环形缓冲区保留的已结束 span 数
+DEFAULT_SPAN_BUFFER_SIZE = 10000
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_CANCELLED = "cancelled"
+
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """一次被追踪的操作"""
+
+    __slots__ = (
+        'name', 'span_id', 'parent_id', 'trace_id', 'start', 'end',
+        'thread_id', 'thread_name', 'task_name', 'attributes', 'status', 'error'
+    )
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+        self.task_name = _current_task_name()
+        self.attributes = attributes
+        self.status = STATUS_OK
+        self.error: Optional[str] = None
+        self.end: Optional[float] = None
+        self.start = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        """耗时（秒）；未结束时为到目前为止的耗时"""
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    @property
+    def is_root(self) -> bool:
+        return self.parent_id is None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'trace_id': self.trace_id,
+            'start': self.start,
+            'duration': self.duration,
+            'thread': self.thread_name,
+            'task': self.task_name,
+            'status': self.status,
+            'error': self.error,
+            'attributes': dict(self.attributes),
+        }
+
+
+def _current_task_name() -> Optional[str]:
+    """当前线程正在运行的 asyncio 任务名（不在任务中时为 None）"""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        return None
+    return task.get_name() if task is not None else None
+
+
+class Tracer:
+    """span 的创建、上下文传播和环形缓冲区"""
+
+    def __init__(self, buffer_size: int = DEFAULT_SPAN_BUFFER_SIZE, enabled: bool = True):
+        self.enabled = enabled
+        self._current: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+        self._spans: deque = deque(maxlen=max(1, buffer_size))
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Span], None]] = []
+
+    # ------------------------------------------------------------------
+    # 创建 span
+    # ------------------------------------------------------------------
+
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    def start_span(self, name: str, **attributes: Any) -> Tuple[Span, Any]:
+        """开始 span 并设为当前 span，返回 (span, 恢复上下文用的令牌)"""
+        span = Span(name, self._current.get(), attributes)
+        return span, self._current.set(span)
+
+    def finish_span(self, span: Span, context_token: Any, error: Optional[BaseException] = None) -> None:
+        """结束 span，恢复之前的当前 span 并写入缓冲区"""
+        span.end = time.perf_counter()
+        if error is not None:
+            if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+                span.status = STATUS_CANCELLED
+            else:
+                span.status = STATUS_ERROR
+                span.error = f"{type(error).__name__}: {error}"
+        try:
+            self._current.reset(context_token)
+        except ValueError:
+            # 在其他上下文中结束（如生成器跨任务恢复），令牌不可用，清空当前 span
+            self._current.set(None)
+
+        with self._lock:
+            self._spans.append(span)
+        for listener in self._listeners:
+            try:
+                listener(span)
+            except Exception as e:
+                logger.debug(f"span 监听器执行失败: {e}")
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """追踪 with 块（禁用时产出 None）"""
+        if not self.enabled:
+            yield None
+            return
+        span, context_token = self.start_span(name, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            self.finish_span(span, context_token, e)
+            raise
+        self.finish_span(span, context_token)
+
+    def traced(
+        self,
+        name: Optional[str] = None,
+        on_finish: Optional[Callable[[Span], None]] = None,
+        **attributes: Any
+    ) -> Callable[[Callable], Callable]:
+        """
+        追踪函数调用的装饰器，自动区分同步函数和协程函数
+
+        Args:
+            name: span 名，默认为 模块.限定名
+            on_finish: 该函数的 span 结束后调用
+            attributes: 每次调用都附带的属性
+        """
+        def decorator(func: Callable) -> Callable:
+            span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await func(*args, **kwargs)
+                    span, context_token = self.start_span(span_name, **attributes)
+                    try:
+                        result = await func(*args, **kwargs)
+                    except BaseException as e:
+                        self._finish_traced(span, context_token, on_finish, e)
+                        raise
+                    self._finish_traced(span, context_token, on_finish)
+                    return result
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                span, context_token = self.start_span(span_name, **attributes)
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException as e:
+                    self._finish_traced(span, context_token, on_finish, e)
+                    raise
+                self._finish_traced(span, context_token, on_finish)
+                return result
+            return wrapper
+
+        return decorator
+
+    def _finish_traced(
+        self,
+        span: Span,
+        context_token: Any,
+        on_finish: Optional[Callable[[Span], None]],
+        error: Optional[BaseException] = None
+    ) -> None:
+        self.finish_span(span, context_token, error)
+        if on_finish is not None:
+            try:
+                on_finish(span)
+            except Exception as e:
+                logger.debug(f"span 结束回调执行失败: {span.name}, {e}")
+
+    def add_listener(self, listener: Callable[[Span], None]) -> None:
+        """注册 span 结束监听器（在结束 span 的线程中同步调用，应尽量轻量）"""
+        self._listeners = self._listeners + [listener]
+
+    def remove_listener(self, listener: Callable[[Span], None]) -> None:
+        self._listeners = [item for item in self._listeners if item is not listener]
+
+    # ------------------------------------------------------------------
+    # 查询与导出
+    # ------------------------------------------------------------------
+
+    def get_spans(self, trace_id: Optional[int] = None) -> List[Span]:
+        """缓冲区中已结束的 span，按开始时间排序"""
+        with self._lock:
+            spans = list(self._spans)
+        if trace_id is not None:
+            spans = [span for span in spans if span.trace_id == trace_id]
+        spans.sort(key=lambda span: span.start)
+        return spans
+
+    def find_slowest(self, name: Optional[str] = None, limit: int = 10) -> List[Span]:
+        """耗时最长的根 span（可按名称过滤），用于定位需要导出的那一次调用"""
+        with self._lock:
+            spans = [
+                span for span in self._spans
+                if span.is_root and (name is None or span.name == name)
+            ]
+        spans.sort(key=lambda span: span.duration, reverse=True)
+        return spans[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    def to_chrome_trace(self, trace_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        转换为 Chrome trace-event 格式
+
+        每个 span 是一个完整事件（ph 为 X），时间单位为微秒。
+        时间线按 (线程, asyncio 任务) 划分，保证同一时间线上的事件严格嵌套。
+        """
+        spans = self.get_spans(trace_id)
+        pid = os.getpid()
+        lanes: Dict[Tuple[Any, Optional[str]], int] = {}
+        events: List[Dict[str, Any]] = []
+
+        for span in spans:
+            lane = (span.thread_id, span.task_name)
+            tid = lanes.get(lane)
+            if tid is None:
+                tid = lanes[lane] = len(lanes) + 1
+                lane_name = span.thread_name if span.task_name is None else f"{span.thread_name} / {span.task_name}"
+                events.append({
+                    'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                    'args': {'name': lane_name},
+                })
+            args = {key: _json_value(value) for key, value in span.attributes.items()}
+            args['span_id'] = span.span_id
+            if span.parent_id is not None:
+                args['parent_id'] = span.parent_id
+            if span.status != STATUS_OK:
+                args['status'] = span.status
+            if span.error:
+                args['error'] = span.error
+            events.append({
+                'name': span.name,
+                'cat': span.name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': round(span.start * 1e6, 3),
+                'dur': round(span.duration * 1e6, 3),
+                'pid': pid,
+                'tid': tid,
+                'args': args,
+            })
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, file_path: Union[str, Path], trace_id: Optional[int] = None) -> bool:
+        """把缓冲区中的 span（或指定的一次调用链）导出为 Chrome trace JSON 文件"""
+        try:
+            file_path = Path(file_path)
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_chrome_trace(trace_id), f, ensure_ascii=False)
+            logger.info(f"追踪数据已导出: {file_path}")
+            return True
+        except Exception as e:
+            logger.error(f"导出追踪数据失败: {e}")
+            return False
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            buffered = len(self._spans)
+        return {
+            'enabled': self.enabled,
+            'buffered_spans': buffered,
+            'buffer_size': self._spans.maxlen,
+        }
+
+
+def _json_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """获取全局追踪器"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+    return _tracer
+
+
+def traced(
+    name: Optional[str] = None,
+    on_finish: Optional[Callable[[Span], None]] = None,
+    **attributes: Any
+) -> Callable[[Callable], Callable]:
+    """使用全局追踪器的装饰器（同步函数和协程函数均可）"""
+    return get_tracer().traced(name, on_finish, **attributes)
+
+
+def trace_span(name: str, **attributes: Any):
+    """使用全局追踪器的上下文管理器"""
+    return get_tracer().span(name, **attributes)
+
+
+def current_span() -> Optional[Span]:
+    return get_tracer().current_span()
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    """设置当前 span 的属性（不在 span 中时忽略）"""
+    span = get_tracer().current_span()
+    if span is not None:
+        span.attributes.update(attributes)
@@ -6,17 +6,19 @@
 整合performance_optimizer和cache_manager的功能，提供统一的性能优化接口。
 """
 
+import sys
 import time
 import threading
 import asyncio
-from typing import Any, Dict, Optional, Callable, TypeVar, Generic, Union
-from collections import deque
+from typing import Any, Dict, Optional, Callable, Set, TypeVar, Generic, Union
+from collections import deque, OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-import pickle
 import logging
 
 from .base_utils import BaseUtility, UtilResult, timed_operation
+from .tracing import STATUS_OK, Span, traced
+from src.shared.monitoring.metrics import MetricsRegistry, get_metrics_registry
 
 logger = logging.getLogger(__name__)
 
@@ -27,8 +29,134 @@ V = TypeVar('V')
 # 性能常量
 DEFAULT_CACHE_SIZE = 1000
 DEFAULT_TTL = 3600  # 1小时
-DEFAULT_CLEANUP_THRESHOLD = 0.8
 DEFAULT_MAX_MEMORY_MB = 100
+DEFAULT_ENTRY_SIZE = 1024  # 无法估算时的默认条目大小（字节）
+SIZE_SAMPLE_LIMIT = 32     # 容器大小估算时的采样元素数
+SIZE_MAX_DEPTH = 16        # 容器大小估算的最大嵌套深度
+
+
+# ---------------------------------------------------------------------------
+# 缓存条目大小估算
+# ---------------------------------------------------------------------------
+
+def _text_size(value: str) -> int:
+    """字符串按UTF-8编码后的字节数计（纯ASCII时无需编码）"""
+    if value.isascii():
+        return len(value)
+    return len(value.encode('utf-8', 'surrogatepass'))
+
+
+# 类型 -> 大小估算函数（按MRO匹配，可通过 register_cache_sizer 扩展）
+_cache_sizers: Dict[type, Callable[[Any], int]] = {
+    str: _text_size,
+    bytes: len,
+    bytearray: len,
+    memoryview: lambda value: value.nbytes,
+}
+# 类型 -> 已解析的估算函数（含MRO查找结果）
+_resolved_sizers: Dict[type, Optional[Callable[[Any], int]]] = {}
+_sizer_lock = threading.Lock()
+
+
+def register_cache_sizer(value_type: type, sizer: Callable[[Any], int]) -> None:
+    """
+    注册缓存条目大小估算函数
+
+    Args:
+        value_type: 值类型（子类同样适用）
+        sizer: 返回近似字节数的函数，应为O(1)或接近O(1)
+    """
+    with _sizer_lock:
+        _cache_sizers[value_type] = sizer
+        _resolved_sizers.clear()
+
+
+def _resolve_sizer(value_type: type) -> Optional[Callable[[Any], int]]:
+    try:
+        return _resolved_sizers[value_type]
+    except KeyError:
+        pass
+
+    sizer = None
+    for base in value_type.__mro__:
+        if base in _cache_sizers:
+            sizer = _cache_sizers[base]
+            break
+    _resolved_sizers[value_type] = sizer
+    return sizer
+
+
+def estimate_size(value: Any) -> int:
+    """
+    估算缓存值占用的字节数
+
+    字符串按UTF-8字节数、字节串按长度计；容器按采样元素估算；未注册类型按实例估算
+    （对象本身加上属性字典）。每个对象只计一次，循环引用和过深的嵌套不会导致无限递归。
+    """
+    try:
+        return _estimate(value, set(), 0)
+    except RecursionError:
+        return DEFAULT_ENTRY_SIZE
+
+
+def _estimate(value: Any, seen: Set[int], depth: int) -> int:
+    if value is None:
+        return 0
+
+    sizer = _resolve_sizer(type(value))
+    if sizer is not None:
+        try:
+            return int(sizer(value))
+        except Exception:
+            return DEFAULT_ENTRY_SIZE
+
+    if isinstance(value, (int, float, bool, complex)):
+        return sys.getsizeof(value)
+
+    # 已计入的对象（共享引用或循环引用）不再重复计算；过深的嵌套只计对象本身
+    if id(value) in seen or depth >= SIZE_MAX_DEPTH:
+        return 0 if id(value) in seen else sys.getsizeof(value)
+    seen.add(id(value))
+
+    if isinstance(value, (list, tuple, set, frozenset, deque)):
+        return _estimate_container(value, len(value), seen, depth + 1)
+
+    if isinstance(value, dict):
+        return _estimate_mapping(value, seen, depth + 1)
+
+    # 未注册类型：逐实例估算，避免同类型的第一个实例决定所有实例的大小
+    size = sys.getsizeof(value, DEFAULT_ENTRY_SIZE)
+    attributes = getattr(value, '__dict__', None)
+    if isinstance(attributes, dict):
+        size += _estimate_mapping(attributes, seen, depth + 1)
+    return size
+
+
+def _estimate_container(values, count: int, seen: Set[int], depth: int) -> int:
+    overhead = sys.getsizeof(values)
+    if count == 0:
+        return overhead
+    sample_total = 0
+    sampled = 0
+    for item in values:
+        if sampled >= SIZE_SAMPLE_LIMIT:
+            break
+        sample_total += _estimate(item, seen, depth)
+        sampled += 1
+    return overhead + sample_total * count // sampled
+
+
+def _estimate_mapping(mapping: Dict[Any, Any], seen: Set[int], depth: int) -> int:
+    count = len(mapping)
+    if count == 0:
+        return sys.getsizeof(mapping)
+    sample_total = 0
+    for index, (key, item) in enumerate(mapping.items()):
+        if index >= SIZE_SAMPLE_LIMIT:
+            break
+        sample_total += _estimate(key, seen, depth) + _estimate(item, seen, depth)
+    sampled = min(count, SIZE_SAMPLE_LIMIT)
+    return sys.getsizeof(mapping) + sample_total * count // sampled
 
 
 @dataclass
@@ -103,14 +231,15 @@ class UnifiedPerformanceManager(BaseUtility):
         self.default_ttl = default_ttl
         self.max_memory_bytes = max_memory_mb * 1024 * 1024
         
-        # 缓存存储
-        self._cache: Dict[str, CacheEntry] = {}
-        self._access_order: deque = deque()
+        # 缓存存储（OrderedDict维护LRU顺序：末尾为最近使用）
+        self._cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._current_bytes = 0
         self._lock = threading.RLock()
         
-        # 性能指标
+        # 性能指标：写入指标注册表的对数分桶直方图，不保留逐条样本
         self.enable_metrics = enable_metrics
-        self._metrics: deque = deque(maxlen=10000)  # 保留最近10000条记录
+        self.metrics: MetricsRegistry = get_metrics_registry()
+        self._metric_names: set = set()
         self._metrics_lock = threading.RLock()
         
         # 统计信息
@@ -118,6 +247,7 @@ class UnifiedPerformanceManager(BaseUtility):
             'hits': 0,
             'misses': 0,
             'evictions': 0,
+            'expirations': 0,
             'memory_usage': 0
         }
         
@@ -127,95 +257,83 @@ class UnifiedPerformanceManager(BaseUtility):
     def cache_get(self, key: str) -> UtilResult[Any]:
         """获取缓存值"""
         with self._lock:
-            if key not in self._cache:
+            entry = self._cache.get(key)
+            if entry is None:
                 self._cache_stats['misses'] += 1
                 return UtilResult.failure_result(f"缓存键不存在: {key}")
-            
-            entry = self._cache[key]
-            
+
             # 检查是否过期
             if entry.is_expired():
-                del self._cache[key]
-                if key in self._access_order:
-                    self._access_order.remove(key)
+                self._remove_entry(key)
+                self._cache_stats['expirations'] += 1
                 self._cache_stats['misses'] += 1
                 return UtilResult.failure_result(f"缓存已过期: {key}")
-            
+
             # 更新访问信息
             entry.touch()
-            self._access_order.remove(key)
-            self._access_order.append(key)
+            self._cache.move_to_end(key)
             self._cache_stats['hits'] += 1
-            
+
             return UtilResult.success_result(entry.value)
-    
+
     @timed_operation("cache_set")
     def cache_set(self, key: str, value: Any, ttl: Optional[float] = None) -> UtilResult[bool]:
-        """设置缓存值"""
+        """设置缓存值（超出条目数或内存预算时按LRU淘汰）"""
+        size = estimate_size(value)
+
         with self._lock:
-            # 计算值的大小
-            try:
-                size = len(pickle.dumps(value))
-            except Exception:
-                size = 1024  # 默认大小
-            
-            # 检查是否需要清理
-            if len(self._cache) >= self.max_cache_size:
-                self._evict_lru()
-            
-            # 创建缓存条目
-            entry = CacheEntry(
+            # 单个条目超过总预算时不缓存
+            if size > self.max_memory_bytes:
+                self._remove_entry(key)
+                return UtilResult.failure_result(f"缓存值过大: {key} ({size} 字节)")
+
+            # 如果键已存在，先扣除旧条目
+            self._remove_entry(key)
+
+            self._cache[key] = CacheEntry(
                 value=value,
                 timestamp=time.time(),
                 ttl=ttl or self.default_ttl,
                 size=size
             )
-            
-            # 如果键已存在，从访问顺序中移除
-            if key in self._cache:
-                self._access_order.remove(key)
-            
-            self._cache[key] = entry
-            self._access_order.append(key)
-            self._update_memory_usage()
-            
+            self._current_bytes += size
+
+            self._evict_lru()
+            self._cache_stats['memory_usage'] = self._current_bytes
+
             return UtilResult.success_result(True)
-    
+
     @timed_operation("cache_delete")
     def cache_delete(self, key: str) -> UtilResult[bool]:
         """删除缓存值"""
         with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-                if key in self._access_order:
-                    self._access_order.remove(key)
-                self._update_memory_usage()
+            if self._remove_entry(key):
+                self._cache_stats['memory_usage'] = self._current_bytes
                 return UtilResult.success_result(True)
             return UtilResult.failure_result(f"缓存键不存在: {key}")
-    
+
+    def _remove_entry(self, key: str) -> bool:
+        """移除条目并扣除其大小（调用方持有锁）"""
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            return False
+        self._current_bytes -= entry.size
+        return True
+
     def _evict_lru(self) -> None:
-        """清理最近最少使用的缓存条目"""
-        if not self._access_order:
-            return
-        
-        # 计算需要清理的数量
-        cleanup_count = max(1, int(self.max_cache_size * (1 - DEFAULT_CLEANUP_THRESHOLD)))
-        
-        for _ in range(cleanup_count):
-            if self._access_order:
-                oldest_key = self._access_order.popleft()
-                if oldest_key in self._cache:
-                    del self._cache[oldest_key]
-                    self._cache_stats['evictions'] += 1
-        
-        self._update_memory_usage()
-        self.logger.debug(f"LRU清理完成，移除了 {cleanup_count} 个条目")
-    
-    def _update_memory_usage(self) -> None:
-        """更新内存使用统计"""
-        total_size = sum(entry.size for entry in self._cache.values())
-        self._cache_stats['memory_usage'] = total_size
-    
+        """淘汰最近最少使用的条目，直到条目数和内存占用都回到预算内"""
+        evicted = 0
+        while self._cache and (
+            len(self._cache) > self.max_cache_size or self._current_bytes > self.max_memory_bytes
+        ):
+            _, entry = self._cache.popitem(last=False)
+            self._current_bytes -= entry.size
+            evicted += 1
+
+        if evicted:
+            self._cache_stats['evictions'] += evicted
+            self.logger.debug(f"LRU清理完成，移除了 {evicted} 个条目")
+
     @timed_operation("record_metric")
     def record_metric(
         self,
@@ -225,29 +343,30 @@ class UnifiedPerformanceManager(BaseUtility):
         memory_usage: Optional[int] = None,
         cpu_usage: Optional[float] = None
     ) -> UtilResult[bool]:
-        """记录性能指标"""
+        """记录性能指标（O(1)：耗时写入直方图，内存和CPU写入瞬时值）"""
         if not self.enable_metrics:
             return UtilResult.success_result(True)
-        
-        metric = PerformanceMetrics(
-            operation_name=operation_name,
-            duration=duration,
-            timestamp=time.time(),
-            success=success,
-            memory_usage=memory_usage,
-            cpu_usage=cpu_usage
-        )
-        
-        with self._metrics_lock:
-            self._metrics.append(metric)
-        
+
+        self.metrics.record_latency(operation_name, duration, success)
+        if memory_usage is not None:
+            self.metrics.gauge(f"{operation_name}.memory_usage").set(memory_usage)
+        if cpu_usage is not None:
+            self.metrics.gauge(f"{operation_name}.cpu_usage").set(cpu_usage)
+
+        if operation_name not in self._metric_names:
+            with self._metrics_lock:
+                self._metric_names.add(operation_name)
+
         return UtilResult.success_result(True)
     
     def get_cache_stats(self) -> Dict[str, Any]:
-        """获取缓存统计信息"""
+        """获取缓存统计信息（命中/未命中/淘汰/过期计数与内存占用）"""
         with self._lock:
             stats = self._cache_stats.copy()
             stats['size'] = len(self._cache)
+            stats['memory_usage'] = self._current_bytes
+            stats['max_size'] = self.max_cache_size
+            stats['max_memory_bytes'] = self.max_memory_bytes
             
             total_requests = stats['hits'] + stats['misses']
             if total_requests > 0:
@@ -258,29 +377,47 @@ class UnifiedPerformanceManager(BaseUtility):
             stats['memory_usage_mb'] = stats['memory_usage'] / (1024 * 1024)
             return stats
     
-    def get_performance_summary(self, operation_name: Optional[str] = None) -> Dict[str, Any]:
-        """获取性能摘要"""
+    def get_performance_summary(
+        self,
+        operation_name: Optional[str] = None,
+        window_seconds: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        获取性能摘要
+
+        Args:
+            operation_name: 操作名，默认汇总本管理器记录的所有操作
+            window_seconds: 只统计最近若干秒（最长10分钟），默认为整个会话
+        """
         with self._metrics_lock:
-            if operation_name:
-                metrics = [m for m in self._metrics if m.operation_name == operation_name]
+            names = [operation_name] if operation_name else list(self._metric_names)
+
+        merged = None
+        for name in names:
+            if not self.metrics.has_histogram(name):
+                continue
+            histogram = self.metrics.histogram(name).window(window_seconds)
+            if merged is None:
+                merged = histogram
             else:
-                metrics = list(self._metrics)
-        
-        if not metrics:
+                merged.merge(histogram)
+
+        if merged is None or not merged.count:
             return {}
-        
-        durations = [m.duration for m in metrics]
-        success_count = sum(1 for m in metrics if m.success)
-        
+
+        summary = merged.summary()
         return {
             'operation': operation_name or 'all',
-            'total_operations': len(metrics),
-            'success_count': success_count,
-            'success_rate': success_count / len(metrics),
-            'avg_duration': sum(durations) / len(durations),
-            'min_duration': min(durations),
-            'max_duration': max(durations),
-            'total_duration': sum(durations)
+            'total_operations': summary['count'],
+            'success_count': summary['count'] - summary['errors'],
+            'success_rate': summary['success_rate'],
+            'avg_duration': summary['mean'],
+            'min_duration': summary['min'],
+            'max_duration': summary['max'],
+            'p50_duration': summary['p50'],
+            'p95_duration': summary['p95'],
+            'p99_duration': summary['p99'],
+            'total_duration': summary['total']
         }
     
     @timed_operation("cleanup_expired")
@@ -293,12 +430,11 @@ class UnifiedPerformanceManager(BaseUtility):
                     expired_keys.append(key)
             
             for key in expired_keys:
-                del self._cache[key]
-                if key in self._access_order:
-                    self._access_order.remove(key)
-            
-            self._update_memory_usage()
-            
+                self._remove_entry(key)
+
+            self._cache_stats['expirations'] += len(expired_keys)
+            self._cache_stats['memory_usage'] = self._current_bytes
+
             return UtilResult.success_result(len(expired_keys))
     
     def validate_config(self) -> UtilResult[bool]:
@@ -315,47 +451,39 @@ class UnifiedPerformanceManager(BaseUtility):
         """清理资源"""
         with self._lock:
             self._cache.clear()
-            self._access_order.clear()
+            self._current_bytes = 0
+            self._cache_stats['memory_usage'] = 0
         
         with self._metrics_lock:
-            self._metrics.clear()
+            names = set(self._metric_names)
+            names.update(f"{name}.{suffix}" for name in self._metric_names for suffix in ('memory_usage', 'cpu_usage'))
+            self.metrics.reset(names)
+            self._metric_names.clear()
         
         return UtilResult.success_result(True)
 
 
 # 性能监控装饰器
 def performance_monitor(operation_name: str = ""):
-    """性能监控装饰器"""
+    """
+    性能监控装饰器
+
+    基于追踪 span 实现，同步函数和协程函数都按实际执行时间记录；
+    结束时把耗时和是否成功写入性能管理器的指标。
+    """
     def decorator(func: Callable) -> Callable:
-        def wrapper(*args, **kwargs):
-            start_time = time.time()
-            op_name = operation_name or f"{func.__module__}.{func.__name__}"
-            
-            try:
-                result = func(*args, **kwargs)
-                duration = time.time() - start_time
-                
-                # 记录成功的性能指标
-                manager = get_performance_manager()
-                if manager:
-                    manager.record_metric(op_name, duration, True)
-                
-                return result
-                
-            except Exception as e:
-                duration = time.time() - start_time
-                
-                # 记录失败的性能指标
-                manager = get_performance_manager()
-                if manager:
-                    manager.record_metric(op_name, duration, False)
-                
-                raise e
-        
-        return wrapper
+        op_name = operation_name or f"{func.__module__}.{func.__name__}"
+        return traced(op_name, on_finish=_record_span_metric)(func)
     return decorator
 
 
+def _record_span_metric(span: Span) -> None:
+    """把结束的 span 记为性能指标"""
+    manager = get_performance_manager()
+    if manager:
+        manager.record_metric(span.name, span.duration, span.status == STATUS_OK)
+
+
 # 全局性能管理器实例
 _global_performance_manager: Optional[UnifiedPerformanceManager] = None
 
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置保存线程测试
+
+异步控制器（如 ProjectController._update_project_settings）在应用事件循环线程中同步调用
+配置管理器的 set/save；这里在同一线程上执行保存，验证配置确实写入了文件，而不是因为
+“不能在事件循环线程内同步等待协程”被吞掉。
+"""
+
+import json
+from typing import Any, Dict
+
+from src.shared.config.base_config_manager import BaseConfigManager
+from src.shared.utils.event_loop import get_app_event_loop, run_coroutine_blocking
+
+WAIT_TIMEOUT = 5.0
+
+
+class _DemoConfigManager(BaseConfigManager):
+    def get_default_config(self) -> Dict[str, Any]:
+        return {"project": {"last_opened_directory": ""}}
+
+    def get_config_file_name(self) -> str:
+        return "demo_settings.json"
+
+
+def test_save_from_coroutine_on_app_loop(tmp_path):
+    manager = _DemoConfigManager(tmp_path)
+
+    async def update_settings():
+        assert get_app_event_loop().in_loop_thread()
+        return manager.set("project.last_opened_directory", "/novels/demo")
+
+    assert run_coroutine_blocking(update_settings(), timeout=WAIT_TIMEOUT) is True
+
+    saved = json.loads((tmp_path / "demo_settings.json").read_text(encoding="utf-8"))
+    assert saved["project"]["last_opened_directory"] == "/novels/demo"
+
+    # 重新加载（同样在事件循环线程中）也能读到已保存的值
+    async def reload():
+        return _DemoConfigManager(tmp_path).get("project.last_opened_directory")
+
+    assert run_coroutine_blocking(reload(), timeout=WAIT_TIMEOUT) == "/novels/demo"
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件总线界面线程投递测试
+
+订阅者是 QObject 的同步处理器应在界面线程执行（可以直接操作控件和 QTimer），
+普通对象的同步处理器仍在事件总线的线程池中执行。
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from PyQt6.QtCore import QObject
+from PyQt6.QtTest import QTest
+from PyQt6.QtWidgets import QApplication
+
+from src.shared.events.event_bus import Event, EventBus
+from src.shared.utils.async_manager import get_async_manager
+
+WAIT_TIMEOUT_MS = 5000
+
+
+@dataclass
+class _PingEvent(Event):
+    value: int = 0
+
+
+class _QtSubscriber(QObject):
+    def __init__(self):
+        super().__init__()
+        self.threads = []
+
+    def on_ping(self, event: _PingEvent) -> None:
+        self.threads.append(threading.current_thread())
+
+
+class _PlainSubscriber:
+    def __init__(self):
+        self.threads = []
+
+    def on_ping(self, event: _PingEvent) -> None:
+        self.threads.append(threading.current_thread())
+
+
+@pytest.fixture(scope="module")
+def app():
+    app = QApplication.instance() or QApplication([])
+    # 异步任务管理器须在界面线程创建，回调信号才会投递到界面线程
+    get_async_manager()
+    return app
+
+
+def test_qobject_subscriber_runs_in_gui_thread(app):
+    bus = EventBus()
+    qt_subscriber = _QtSubscriber()
+    plain_subscriber = _PlainSubscriber()
+    bus.subscribe(_PingEvent, qt_subscriber.on_ping, subscriber=qt_subscriber)
+    bus.subscribe(_PingEvent, plain_subscriber.on_ping, subscriber=plain_subscriber)
+
+    for value in range(3):
+        bus.publish(_PingEvent(value=value))
+
+    assert QTest.qWaitFor(
+        lambda: len(qt_subscriber.threads) == 3 and len(plain_subscriber.threads) == 3,
+        WAIT_TIMEOUT_MS
+    )
+    assert all(thread is threading.main_thread() for thread in qt_subscriber.threads)
+    assert all(thread is not threading.main_thread() for thread in plain_subscriber.threads)
+    bus.shutdown()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全文检索分词测试
+
+在内存中的FTS5表上验证编码后的文本与 build_match_query 生成的查询能够互相匹配：
+中文任意长度子串、单字前缀，以及拉丁词的前缀查询。
+"""
+
+import sqlite3
+
+import pytest
+
+from src.application.services.search.fts_tokenizer import (
+    build_match_query, decode_fts_text, encode_for_index, MATCH_START, MATCH_END
+)
+
+DOCUMENTS = {
+    "dragon": "东海龙王敖广",
+    "hello": "Hello world, said Alice.",
+    "mixed": "龙王Hellen出场",
+}
+
+
+@pytest.fixture
+def fts():
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE t USING fts5(doc_id UNINDEXED, title, body, tokenize = 'unicode61 remove_diacritics 2')")
+    except sqlite3.OperationalError:
+        pytest.skip("SQLite 未编译 FTS5")
+    conn.executemany(
+        "INSERT INTO t(doc_id, title, body) VALUES (?, '', ?)",
+        [(doc_id, encode_for_index(text)) for doc_id, text in DOCUMENTS.items()]
+    )
+    yield conn
+    conn.close()
+
+
+def _search(conn, query):
+    match = build_match_query(query)
+    rows = conn.execute("SELECT doc_id FROM t WHERE t MATCH ?", (match,)).fetchall()
+    return {row[0] for row in rows}
+
+
+def test_cjk_substring_matches(fts):
+    assert _search(fts, "龙王") == {"dragon", "mixed"}
+    assert _search(fts, "海龙王敖") == {"dragon"}
+    assert _search(fts, "王龙") == set()
+
+
+def test_cjk_single_character_is_prefix(fts):
+    assert _search(fts, "龙") == {"dragon", "mixed"}
+    assert _search(fts, "广") == {"dragon"}
+
+
+def test_cjk_single_character_highlight_is_clipped(fts):
+    row = fts.execute(
+        "SELECT highlight(t, 2, ?, ?) FROM t WHERE t MATCH ? AND doc_id = 'dragon'",
+        (MATCH_START, MATCH_END, build_match_query("龙"))
+    ).fetchone()
+    assert decode_fts_text(row[0], query="龙") == "东海<mark>龙</mark>王敖广"
+
+
+def test_latin_last_token_is_prefix(fts):
+    assert build_match_query("hel") == '{title body} : "hel" *'
+    assert _search(fts, "hel") == {"hello", "mixed"}
+    assert _search(fts, "hello") == {"hello"}
+    assert _search(fts, "ali") == {"hello"}
+    assert _search(fts, "ello") == set()
+
+
+def test_mixed_phrase_ends_with_latin_prefix(fts):
+    assert _search(fts, "龙王hel") == {"mixed"}
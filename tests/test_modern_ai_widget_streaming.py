@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ModernAIWidget 流式输出测试
+
+在 offscreen 平台上向组件流式写入 50K 字符，验证增量按帧合并后追加：
+文档编辑次数和重绘次数随帧数增长，而不是随片段数增长。
+"""
+
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from PyQt6.QtCore import QEvent, QObject
+from PyQt6.QtTest import QTest
+from PyQt6.QtWidgets import QApplication
+
+from src.presentation.widgets.ai.refactored.components.modern_ai_widget import (
+    ModernAIWidget, STREAM_FLUSH_INTERVAL_MS
+)
+
+TOTAL_CHARS = 50_000
+CHUNK_SIZE = 10
+FRAMES = 50
+CHUNKS_PER_FRAME = TOTAL_CHARS // CHUNK_SIZE // FRAMES
+
+
+class _PaintCounter(QObject):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Paint:
+            self.count += 1
+        return False
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def widget(app):
+    widget = ModernAIWidget()
+    widget.output_area = widget.create_output_area()
+    widget.main_layout.addWidget(widget.output_area)
+    widget.resize(600, 400)
+    widget.show()
+    QTest.qWaitForWindowExposed(widget)
+    yield widget
+    widget.close()
+    widget.deleteLater()
+
+
+def _chunks():
+    text = "".join(chr(ord("a") + i % 26) for i in range(TOTAL_CHARS))
+    return text, [text[i:i + CHUNK_SIZE] for i in range(0, TOTAL_CHARS, CHUNK_SIZE)]
+
+
+def _wait_for_flush(widget):
+    """等待本帧的合并定时器触发并处理重绘"""
+    QTest.qWait(STREAM_FLUSH_INTERVAL_MS * 2)
+    assert not widget._stream_flush_timer.isActive()
+
+
+def test_streaming_50k_chars_updates_once_per_frame(widget):
+    text, chunks = _chunks()
+    text_widget = widget.output_area.output_text
+    edits = []
+    text_widget.document().contentsChange.connect(lambda position, removed, added: edits.append(added))
+
+    widget.stream_started_signal.emit()
+    QTest.qWait(1)
+    edits.clear()
+    painter = _PaintCounter()
+    text_widget.viewport().installEventFilter(painter)
+
+    for frame in range(FRAMES):
+        for chunk in chunks[frame * CHUNKS_PER_FRAME:(frame + 1) * CHUNKS_PER_FRAME]:
+            widget.stream_delta_signal.emit(chunk)
+        _wait_for_flush(widget)
+
+    text_widget.viewport().removeEventFilter(painter)
+
+    assert text_widget.toPlainText() == text
+    # 每帧一次追加，而不是每个片段一次
+    assert len(edits) == FRAMES
+    assert sum(edits) == TOTAL_CHARS
+    # 重绘次数受帧数限制（与 5000 个片段无关）
+    assert 0 < painter.count <= FRAMES * 2
+
+    widget.stream_finished_signal.emit(text, False)
+    QTest.qWait(1)
+    assert text_widget.toPlainText() == text
+
+
+def test_burst_of_deltas_is_appended_in_one_edit(widget):
+    text, chunks = _chunks()
+    text_widget = widget.output_area.output_text
+    edits = []
+
+    widget.stream_started_signal.emit()
+    QTest.qWait(1)
+    text_widget.document().contentsChange.connect(lambda position, removed, added: edits.append(added))
+
+    for chunk in chunks:
+        widget.stream_delta_signal.emit(chunk)
+    assert edits == []
+    _wait_for_flush(widget)
+
+    assert edits == [TOTAL_CHARS]
+    assert text_widget.toPlainText() == text
+
+
+def test_restart_discards_pending_deltas(widget):
+    text_widget = widget.output_area.output_text
+
+    widget.stream_started_signal.emit()
+    widget.stream_delta_signal.emit("stale")
+    widget.stream_started_signal.emit()
+    widget.stream_delta_signal.emit("fresh")
+    _wait_for_flush(widget)
+
+    assert text_widget.toPlainText() == "fresh"
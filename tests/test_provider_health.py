@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提供商健康跟踪与熔断器测试
+
+用标准库 http.server 启动一个 OpenAI 兼容的假服务，依次返回 429、5xx、200，
+通过真实的 OpenAI 客户端验证熔断器 CLOSED -> OPEN -> HALF_OPEN -> CLOSED 的状态变化和错误分类。
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("openai")
+
+from src.domain.ai.entities.ai_request import AIRequest
+from src.domain.ai.value_objects.ai_request_type import AIRequestType
+from src.infrastructure.ai import provider_health
+from src.infrastructure.ai.provider_health import (
+    CircuitOpenError, CircuitState, ErrorClass, ProviderHealth, classify_error
+)
+from src.infrastructure.ai.unified_ai_client_manager import UnifiedAIClientManager
+
+PROVIDER = "openai"
+OPEN_SECONDS = 0.1
+WAIT_TIMEOUT = 5.0
+
+COMPLETION = {
+    "id": "chatcmpl-test",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-3.5-turbo",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """按服务器当前的 status 响应 /chat/completions"""
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        server = self.server
+        server.request_count += 1
+        if server.on_request is not None:
+            server.on_request()
+
+        status = server.status
+        if status == 200:
+            body = COMPLETION
+        else:
+            body = {"error": {"message": f"fake error {status}", "type": "fake", "code": status}}
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        # 关闭 SDK 自带的重试，每次调用只到达服务器一次
+        self.send_header("x-should-retry", "false")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOpenAIHandler)
+    server.status = 200
+    server.request_count = 0
+    server.on_request = None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def manager(fake_server, monkeypatch):
+    monkeypatch.setattr(provider_health, "OPEN_BASE_SECONDS", OPEN_SECONDS)
+    host, port = fake_server.server_address
+    return UnifiedAIClientManager({
+        "default_provider": PROVIDER,
+        "response_cache_enabled": False,
+        "providers": {
+            PROVIDER: {"api_key": "test-key", "base_url": f"http://{host}:{port}/v1"},
+        },
+    })
+
+
+async def _generate(manager):
+    """取得客户端并发起一次生成，结果计入健康状态"""
+    client_result = await manager.get_client(PROVIDER)
+    if not client_result.success:
+        raise CircuitOpenError(PROVIDER, client_result.metadata.get("retry_after", 0.0))
+    request = AIRequest(request_type=AIRequestType.TEXT_GENERATION, prompt="hello")
+    return await manager._tracked_generate(PROVIDER, client_result.data, request, 5.0)
+
+
+async def _wait_for(predicate, timeout=WAIT_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("等待状态变化超时")
+        await asyncio.sleep(0.01)
+
+
+def test_breaker_opens_on_failures_and_recovers_after_probe(fake_server, manager):
+    async def scenario():
+        health = manager._get_health(PROVIDER)
+        probe_states = []
+        fake_server.on_request = lambda: probe_states.append(health.state)
+
+        # 200：连接并成功生成
+        response = await _generate(manager)
+        assert response.content == "ok"
+        assert health.state == CircuitState.CLOSED
+
+        # 429 两次、5xx 三次：连续失败达到阈值后打开
+        fake_server.status = 429
+        for _ in range(2):
+            with pytest.raises(Exception) as exc_info:
+                await _generate(manager)
+            assert classify_error(exc_info.value) == ErrorClass.RATE_LIMIT
+        assert health.state == CircuitState.CLOSED
+
+        fake_server.status = 503
+        for _ in range(provider_health.FAILURE_THRESHOLD - 2):
+            with pytest.raises(Exception) as exc_info:
+                await _generate(manager)
+            assert classify_error(exc_info.value) == ErrorClass.SERVER
+        assert health.state == CircuitState.OPEN
+        assert health.error_counts == {"rate_limit": 2, "server": 3}
+
+        # 打开期间快速失败，不再访问服务器
+        requests_before = fake_server.request_count
+        with pytest.raises(CircuitOpenError):
+            await _generate(manager)
+        assert fake_server.request_count == requests_before
+
+        # 退避结束后的探测仍遇到 5xx：探测时为 HALF_OPEN，失败后重新打开
+        probe_states.clear()
+        await _wait_for(lambda: probe_states and health.state == CircuitState.OPEN)
+        assert probe_states[0] == CircuitState.HALF_OPEN
+
+        # 服务恢复：下一次探测成功后关闭
+        fake_server.status = 200
+        probe_states.clear()
+        await _wait_for(lambda: health.state == CircuitState.CLOSED)
+        assert probe_states == [CircuitState.HALF_OPEN]
+
+        response = await _generate(manager)
+        assert response.content == "ok"
+        assert health.consecutive_failures == 0
+        await manager.cleanup()
+
+    asyncio.run(scenario())
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class _ResponseError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"response {status_code}")
+        self.response = _Response(status_code)
+
+
+class APITimeoutError(Exception):
+    pass
+
+
+@pytest.mark.parametrize("error, expected", [
+    (asyncio.TimeoutError(), ErrorClass.TIMEOUT),
+    (_StatusError(429), ErrorClass.RATE_LIMIT),
+    (_StatusError(401), ErrorClass.AUTH),
+    (_StatusError(403), ErrorClass.AUTH),
+    (_StatusError(500), ErrorClass.SERVER),
+    (_ResponseError(502), ErrorClass.SERVER),
+    (_StatusError(408), ErrorClass.TIMEOUT),
+    (_StatusError(400), ErrorClass.CLIENT),
+    (APITimeoutError(), ErrorClass.TIMEOUT),
+    (ConnectionRefusedError(), ErrorClass.NETWORK),
+    (ValueError("boom"), ErrorClass.UNKNOWN),
+])
+def test_classify_error(error, expected):
+    assert classify_error(error) == expected
+
+
+def test_client_errors_do_not_affect_health():
+    health = ProviderHealth(PROVIDER)
+    for _ in range(provider_health.FAILURE_THRESHOLD):
+        assert health.record_failure(_StatusError(400)) == ErrorClass.CLIENT
+    assert health.state == CircuitState.CLOSED
+    assert health.total_failures == 0
+    assert health.error_counts == {"client": provider_health.FAILURE_THRESHOLD}